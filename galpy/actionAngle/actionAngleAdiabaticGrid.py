@@ -14,11 +14,14 @@ import numpy
 from scipy import interpolate
 
 from .. import potential
-from ..potential.Potential import _evaluatePotentials
+from ..potential.Potential import _check_c, _evaluatePotentials
 from ..potential.Potential import flatten as flatten_potential
 from ..util import multi
+from . import actionAngleAdiabatic_c
 from .actionAngle import UnboundError, actionAngle
 from .actionAngleAdiabatic import actionAngleAdiabatic
+from .actionAngleAdiabatic_c import _ext_loaded as ext_loaded
+from .actionAngleStaeckelGrid import _spline1d_tables, _spline2d_tables
 
 _PRINTOUTSIDEGRID = False
 
@@ -272,6 +275,14 @@ class actionAngleAdiabaticGrid(actionAngle):
         self._jrInterp = interpolate.RectBivariateSpline(
             self._Lzs, y, jr, kx=3, ky=3, s=0.0
         )
+        # Tables for the C implementation of the interpolation
+        self._c_interp_tables = (
+            _spline1d_tables(self._EzZmaxsInterp, self._jzEzmaxInterp)
+            + _spline2d_tables(self._jzInterp),
+            _spline1d_tables(self._ERRLInterp, self._ERRaInterp, self._jrERRaInterp)
+            + (self._ERRLmax, self._ERRamax)
+            + _spline2d_tables(self._jrInterp),
+        )
         # Check the units
         self._check_consistent_units()
         return None
@@ -311,6 +322,13 @@ class actionAngleAdiabaticGrid(actionAngle):
             vT = self._eval_vT
             z = self._eval_z
             vz = self._eval_vz
+        if (
+            isinstance(R, numpy.ndarray)
+            and (self._c and not ("c" in kwargs and not kwargs["c"]))
+            and ext_loaded
+            and _check_c(self._pot)
+        ):
+            return self._evaluate_c(R, vR, vT, z, vz, **kwargs)
         # First work on the vertical action
         Phi = _evaluatePotentials(self._pot, R, z)
         try:
@@ -454,6 +472,51 @@ class actionAngleAdiabaticGrid(actionAngle):
                 )[0][0]
         return (jr, R * vT, jz)
 
+    def _evaluate_c(self, R, vR, vT, z, vz, **kwargs):
+        """Evaluate the actions for arrays of phase-space points, interpolating the grid in C and directly computing the actions of off-grid points"""
+        # Vertical action
+        Ez, jz, indx = actionAngleAdiabatic_c.actionAngleAdiabaticGrid_jz_c(
+            self._pot, R, z, vz, self._Rmin, self._Rmax, *self._c_interp_tables[0]
+        )
+        if numpy.sum(indx) > 0:
+            jz[indx] = self._aA(
+                R[indx],
+                numpy.zeros(numpy.sum(indx)),
+                numpy.ones(numpy.sum(indx)),  # these two r dummies
+                numpy.zeros(numpy.sum(indx)),
+                numpy.sqrt(2.0 * Ez[indx]),
+                _justjz=True,
+                **kwargs
+            )[2]
+        # Radial action
+        ER, jr, indx = actionAngleAdiabatic_c.actionAngleAdiabaticGrid_jr_c(
+            self._pot,
+            self._gamma,
+            R,
+            vR,
+            vT,
+            jz,
+            self._Lzmin,
+            self._Lzmax,
+            *self._c_interp_tables[1]
+        )
+        if numpy.sum(indx) > 0:
+            ERLz = numpy.fabs(R[indx] * vT[indx]) + self._gamma * jz[indx]
+            thisRL = self._RLInterp(ERLz)
+            jr[indx] = self._aA(
+                thisRL,
+                numpy.sqrt(
+                    2.0 * (ER[indx] - _evaluatePotentials(self._pot, thisRL, 0.0))
+                    - ERLz**2.0 / thisRL**2.0
+                ),
+                ERLz / thisRL,
+                numpy.zeros(len(thisRL)),
+                numpy.zeros(len(thisRL)),
+                _justjr=True,
+                **kwargs
+            )[0]
+        return (jr, R * vT, jz)
+
     def Jz(self, *args, **kwargs):
         """
         Evaluate the action jz.
@@ -236,3 +236,216 @@ def actionAngleRperiRapZmaxAdiabatic_c(pot, gamma, R, vR, vT, z, vz):
         vz = numpy.asfortranarray(vz)
 
     return (rperi, rap, zmax, err.value)
+
+
+def actionAngleAdiabaticGrid_jz_c(pot, R, z, vz, Rmin, Rmax, t1d, c1d, tx, ty, cjz):
+    """
+    Use C to calculate the vertical action by interpolating the grid of actionAngleAdiabaticGrid
+
+    Parameters
+    ----------
+    pot : Potential or list of such instances
+        Gravitational potential to compute actions in
+    R : numpy.ndarray
+        R coordinate.
+    z : numpy.ndarray
+        z coordinate.
+    vz : numpy.ndarray
+        vz coordinate.
+    Rmin, Rmax : float
+        Range of the grid in R
+    t1d, c1d : numpy.ndarray
+        Knots and coefficients of the cubic splines in R of log(EzZmax) and log(jzEzmax), shape (2,nknots)
+    tx, ty, cjz : numpy.ndarray
+        Knots and coefficients of the bicubic spline of jz in (R,Ez/EzZmax)
+
+    Returns
+    -------
+    tuple
+        (Ez,jz,offgrid) with the vertical energy, the vertical action (not set for points that are off the grid), and a boolean array that is True for points that are off the grid
+    """
+    # Parse the potential
+    from ..orbit.integrateFullOrbit import _parse_pot
+    from ..orbit.integratePlanarOrbit import _prep_tfuncs
+
+    npot, pot_type, pot_args, pot_tfuncs = _parse_pot(pot, potforactions=True)
+    pot_tfuncs = _prep_tfuncs(pot_tfuncs)
+
+    # Set up result arrays
+    Ez = numpy.empty(len(R))
+    jz = numpy.empty(len(R))
+    offgrid = numpy.empty(len(R), dtype=numpy.int32)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    actionAngleAdiabaticGrid_jzFunc = _lib.actionAngleAdiabaticGrid_jz
+    actionAngleAdiabaticGrid_jzFunc.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_void_p,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+    ]
+
+    # Array requirements
+    R = numpy.require(R, dtype=numpy.float64, requirements=["C", "W"])
+    z = numpy.require(z, dtype=numpy.float64, requirements=["C", "W"])
+    vz = numpy.require(vz, dtype=numpy.float64, requirements=["C", "W"])
+
+    # Run the C code
+    actionAngleAdiabaticGrid_jzFunc(
+        len(R),
+        R,
+        z,
+        vz,
+        ctypes.c_int(npot),
+        pot_type,
+        pot_args,
+        pot_tfuncs,
+        ctypes.c_double(Rmin),
+        ctypes.c_double(Rmax),
+        ctypes.c_int(t1d.shape[1]),
+        t1d,
+        c1d,
+        ctypes.c_int(len(tx)),
+        tx,
+        ctypes.c_int(len(ty)),
+        ty,
+        cjz,
+        Ez,
+        jz,
+        offgrid,
+    )
+
+    return (Ez, jz, offgrid.astype(bool))
+
+
+def actionAngleAdiabaticGrid_jr_c(
+    pot, gamma, R, vR, vT, jz, Lzmin, Lzmax, t1d, c1d, ERRLmax, ERRamax, tx, ty, cjr
+):
+    """
+    Use C to calculate the radial action by interpolating the grid of actionAngleAdiabaticGrid
+
+    Parameters
+    ----------
+    pot : Potential or list of such instances
+        Gravitational potential to compute actions in
+    gamma : float
+        as in Lz -> Lz+gamma * J_z
+    R : numpy.ndarray
+        R coordinate.
+    vR : numpy.ndarray
+        vR coordinate.
+    vT : numpy.ndarray
+        vT coordinate.
+    jz : numpy.ndarray
+        Vertical action.
+    Lzmin, Lzmax : float
+        Range of the grid in Lz+gamma*jz
+    t1d, c1d : numpy.ndarray
+        Knots and coefficients of the cubic splines in Lz+gamma*jz of ERRL, ERRa, and jrERRa, shape (3,nknots)
+    ERRLmax, ERRamax : float
+        Offsets used in the ERRL and ERRa splines
+    tx, ty, cjr : numpy.ndarray
+        Knots and coefficients of the bicubic spline of jr in (Lz+gamma*jz,(ER-ERRa)/(ERRL-ERRa))
+
+    Returns
+    -------
+    tuple
+        (ER,jr,offgrid) with the radial energy, the radial action (not set for points that are off the grid), and a boolean array that is True for points that are off the grid
+    """
+    # Parse the potential
+    from ..orbit.integrateFullOrbit import _parse_pot
+    from ..orbit.integratePlanarOrbit import _prep_tfuncs
+
+    npot, pot_type, pot_args, pot_tfuncs = _parse_pot(pot, potforactions=True)
+    pot_tfuncs = _prep_tfuncs(pot_tfuncs)
+
+    # Set up result arrays
+    ER = numpy.empty(len(R))
+    jr = numpy.empty(len(R))
+    offgrid = numpy.empty(len(R), dtype=numpy.int32)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    actionAngleAdiabaticGrid_jrFunc = _lib.actionAngleAdiabaticGrid_jr
+    actionAngleAdiabaticGrid_jrFunc.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_void_p,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+    ]
+
+    # Array requirements
+    R = numpy.require(R, dtype=numpy.float64, requirements=["C", "W"])
+    vR = numpy.require(vR, dtype=numpy.float64, requirements=["C", "W"])
+    vT = numpy.require(vT, dtype=numpy.float64, requirements=["C", "W"])
+    jz = numpy.require(jz, dtype=numpy.float64, requirements=["C", "W"])
+
+    # Run the C code
+    actionAngleAdiabaticGrid_jrFunc(
+        len(R),
+        R,
+        vR,
+        vT,
+        jz,
+        ctypes.c_int(npot),
+        pot_type,
+        pot_args,
+        pot_tfuncs,
+        ctypes.c_double(gamma),
+        ctypes.c_double(Lzmin),
+        ctypes.c_double(Lzmax),
+        ctypes.c_int(t1d.shape[1]),
+        t1d,
+        c1d,
+        ctypes.c_double(ERRLmax),
+        ctypes.c_double(ERRamax),
+        ctypes.c_int(len(tx)),
+        tx,
+        ctypes.c_int(len(ty)),
+        ty,
+        cjr,
+        ER,
+        jr,
+        offgrid,
+    )
+
+    return (ER, jr, offgrid.astype(bool))
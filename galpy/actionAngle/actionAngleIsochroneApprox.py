@@ -383,46 +383,24 @@ class actionAngleIsochroneApprox(actionAngle):
                 mask[: 2 * maxn - 3 : 2] = False
             gridR = gridR[mask]
             gridZ = gridZ[mask]
-            tangleR = numpy.tile(angleRT.T, (nn, 1, 1)).T
-            tgridR = numpy.tile(gridR, (no, nt, 1))
-            tangleZ = numpy.tile(angleZT.T, (nn, 1, 1)).T
-            tgridZ = numpy.tile(gridZ, (no, nt, 1))
             if _isNonAxi(self._pot):
                 gridphi = gridphi[mask]
-                tgridphi = numpy.tile(gridphi, (no, nt, 1))
-                tanglephi = numpy.tile(anglephiT.T, (nn, 1, 1)).T
                 sinnR = numpy.sin(
-                    tgridR * tangleR + tgridphi * tanglephi + tgridZ * tangleZ
+                    gridR * angleRT[:, :, None]
+                    + gridphi * anglephiT[:, :, None]
+                    + gridZ * angleZT[:, :, None]
                 )
             else:
-                sinnR = numpy.sin(tgridR * tangleR + tgridZ * tangleZ)
+                sinnR = numpy.sin(
+                    gridR * angleRT[:, :, None] + gridZ * angleZT[:, :, None]
+                )
             A[:, :, 2:] = sinnR
-            # Matrix magic
-            atainv = numpy.empty((no, 2 + nn, 2 + nn))
+            # Matrix magic, for all objects at once
             AT = numpy.transpose(A, axes=(0, 2, 1))
-            for ii in range(no):
-                atainv[
-                    ii,
-                    :,
-                    :,
-                ] = linalg.inv(numpy.dot(AT[ii, :, :], A[ii, :, :]))
-            ATAR = numpy.sum(
-                AT
-                * numpy.transpose(numpy.tile(angleRT, (2 + nn, 1, 1)), axes=(1, 0, 2)),
-                axis=2,
-            )
-            ATAT = numpy.sum(
-                AT
-                * numpy.transpose(
-                    numpy.tile(anglephiT, (2 + nn, 1, 1)), axes=(1, 0, 2)
-                ),
-                axis=2,
-            )
-            ATAZ = numpy.sum(
-                AT
-                * numpy.transpose(numpy.tile(angleZT, (2 + nn, 1, 1)), axes=(1, 0, 2)),
-                axis=2,
-            )
+            atainv = linalg.inv(numpy.matmul(AT, A))
+            ATAR = numpy.einsum("ijk,ik->ij", AT, angleRT)
+            ATAT = numpy.einsum("ijk,ik->ij", AT, anglephiT)
+            ATAZ = numpy.einsum("ijk,ik->ij", AT, angleZT)
             angleR = numpy.sum(atainv[:, 0, :] * ATAR, axis=1)
             OmegaR = numpy.sum(atainv[:, 1, :] * ATAR, axis=1)
             anglephi = numpy.sum(atainv[:, 0, :] * ATAT, axis=1)
@@ -730,25 +708,22 @@ class actionAngleIsochroneApprox(actionAngle):
             else:
                 R, vR, vT, phi = args
                 z, vz = numpy.zeros_like(R), numpy.zeros_like(R)
-            if isinstance(R, float):
-                os = [Orbit([R, vR, vT, z, vz, phi])]
-                RasOrbit = True
-                integrated = False
-            elif len(R.shape) == 1:  # not integrated yet
-                os = [
-                    Orbit([R[ii], vR[ii], vT[ii], z[ii], vz[ii], phi[ii]])
-                    for ii in range(R.shape[0])
-                ]
+            if isinstance(R, float) or len(R.shape) == 1:  # not integrated yet
+                # Integrate all objects together as a single Orbit instance
+                R, vR, vT, z, vz, phi = self._integrate_objects(
+                    numpy.array(
+                        [numpy.atleast_1d(x) for x in (R, vR, vT, z, vz, phi)],
+                        dtype="float",
+                    ).T,
+                    flip=_firstFlip,
+                )
                 RasOrbit = True
                 integrated = False
-        if (
+        if not RasOrbit and (
             isinstance(args[0], Orbit)
             or (isinstance(args[0], list) and isinstance(args[0][0], Orbit))
-            or RasOrbit
         ):
-            if RasOrbit:
-                pass
-            elif not isinstance(args[0], list):
+            if not isinstance(args[0], list):
                 os = [args[0]]
                 if os[0].phasedim() == 3 or os[0].phasedim() == 5:  # pragma: no cover
                     raise OSError("Must specify phi for actionAngleIsochroneApprox")
@@ -827,71 +802,55 @@ class actionAngleIsochroneApprox(actionAngle):
                 oz[:, nt - 1 :] = z
                 ovz[:, nt - 1 :] = vz
                 ophi[:, nt - 1 :] = phi
-            # load orbits
-            if _firstFlip:
-                os = [
-                    Orbit(
-                        [
-                            R[ii, 0],
-                            vR[ii, 0],
-                            vT[ii, 0],
-                            z[ii, 0],
-                            vz[ii, 0],
-                            phi[ii, 0],
-                        ]
-                    )
-                    for ii in range(R.shape[0])
-                ]
-            else:
-                os = [
-                    Orbit(
-                        [
-                            R[ii, 0],
-                            -vR[ii, 0],
-                            -vT[ii, 0],
-                            z[ii, 0],
-                            -vz[ii, 0],
-                            phi[ii, 0],
-                        ]
-                    )
-                    for ii in range(R.shape[0])
-                ]
-            # integrate orbits
-            [
-                o.integrate(
-                    self._tsJ,
-                    pot=self._pot,
-                    method=self._integrate_method,
-                    dt=self._integrate_dt,
-                )
-                for o in os
-            ]
-            # extract phase-space points along the orbit
-            ts = self._tsJ
+            # integrate all orbits in the other direction together, starting
+            # from the t=0 point (the first point if _firstFlip)
+            bR, bvR, bvT, bz, bvz, bphi = self._integrate_objects(
+                numpy.array(
+                    [R[:, 0], vR[:, 0], vT[:, 0], z[:, 0], vz[:, 0], phi[:, 0]]
+                ).T,
+                flip=not _firstFlip,
+            )
+            # add the phase-space points along the orbit, dropping t=0, which
+            # we already have, and reversing such that everything is in the
+            # right order
             if _firstFlip:
-                for ii in range(no):
-                    oR[ii, nt:] = os[ii].R(ts[1:])  # drop t=0, which we have
-                    ovR[ii, nt:] = os[ii].vR(ts[1:])  # already
-                    ovT[ii, nt:] = os[ii].vT(ts[1:])  # reverse, such that
-                    if os[ii].getOrbit().shape[1] == 6:
-                        oz[ii, nt:] = os[ii].z(ts[1:])  # everything is in the
-                        ovz[ii, nt:] = os[ii].vz(ts[1:])  # right order
-                    ophi[ii, nt:] = os[ii].phi(ts[1:])  #!
+                oR[:, nt:] = bR[:, 1:]
+                ovR[:, nt:] = bvR[:, 1:]
+                ovT[:, nt:] = bvT[:, 1:]
+                oz[:, nt:] = bz[:, 1:]
+                ovz[:, nt:] = bvz[:, 1:]
+                ophi[:, nt:] = bphi[:, 1:]
             else:
-                for ii in range(no):
-                    oR[ii, : nt - 1] = os[ii].R(ts[1:])[::-1]  # drop t=0, which we have
-                    ovR[ii, : nt - 1] = -os[ii].vR(ts[1:])[::-1]  # already
-                    ovT[ii, : nt - 1] = -os[ii].vT(ts[1:])[::-1]  # reverse, such that
-                    if os[ii].getOrbit().shape[1] == 6:
-                        oz[ii, : nt - 1] = os[ii].z(ts[1:])[
-                            ::-1
-                        ]  # everything is in the
-                        ovz[ii, : nt - 1] = -os[ii].vz(ts[1:])[::-1]  # right order
-                    ophi[ii, : nt - 1] = os[ii].phi(ts[1:])[::-1]  #!
+                oR[:, : nt - 1] = bR[:, :0:-1]
+                ovR[:, : nt - 1] = bvR[:, :0:-1]
+                ovT[:, : nt - 1] = bvT[:, :0:-1]
+                oz[:, : nt - 1] = bz[:, :0:-1]
+                ovz[:, : nt - 1] = bvz[:, :0:-1]
+                ophi[:, : nt - 1] = bphi[:, :0:-1]
             return (oR, ovR, ovT, oz, ovz, ophi)
         else:
             return (R, vR, vT, z, vz, phi)
 
+    def _integrate_objects(self, vxvv, flip=False):
+        """Integrate the phase-space points vxvv [N,6] together for the times self._tsJ, backwards in time if flip; returns (R,vR,vT,z,vz,phi), each [N,ntJ], directly at the integration times"""
+        from ..orbit import Orbit
+
+        if flip:
+            vxvv = vxvv * numpy.array([1.0, -1.0, -1.0, 1.0, -1.0, 1.0])
+        os = Orbit(vxvv)
+        os.integrate(
+            self._tsJ,
+            pot=self._pot,
+            method=self._integrate_method,
+            dt=self._integrate_dt,
+        )
+        out = os.getOrbit()
+        if flip:
+            out[..., 1] = -out[..., 1]
+            out[..., 2] = -out[..., 2]
+            out[..., 4] = -out[..., 4]
+        return tuple(out[..., ii] for ii in range(6))
+
 
 @potential_physical_input
 @physical_conversion("position", pop=True)
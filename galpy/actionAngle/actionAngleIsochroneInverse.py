@@ -8,11 +8,12 @@
 #
 ###############################################################################
 import numpy
-from scipy import optimize
 
 from ..potential import IsochronePotential
 from ..util import conversion
+from . import actionAngleIsochroneInverse_c
 from .actionAngleInverse import actionAngleInverse
+from .actionAngleIsochroneInverse_c import _ext_loaded as ext_loaded
 
 
 class actionAngleIsochroneInverse(actionAngleInverse):
@@ -28,6 +29,8 @@ class actionAngleIsochroneInverse(actionAngleInverse):
             Scale parameter of the isochrone parameter.
         ip : galpy.potential.IsochronePotential, optional
             Instance of a IsochronePotential.
+        c : bool, optional
+            If True, use the C implementation (default: True if the C extension is available).
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -56,17 +59,10 @@ class actionAngleIsochroneInverse(actionAngleInverse):
             self.b = conversion.parse_length(kwargs["b"], ro=self._ro)
             rb = numpy.sqrt(self.b**2.0 + 1.0)
             self.amp = (self.b + rb) ** 2.0 * rb
-        # In case we ever decide to implement this in C...
-        self._c = False
-        ext_loaded = False
-        if ext_loaded and (
-            ("c" in kwargs and kwargs["c"]) or not "c" in kwargs
-        ):  # pragma: no cover
+        if ext_loaded and (("c" in kwargs and kwargs["c"]) or not "c" in kwargs):
             self._c = True
         else:
             self._c = False
-        if not self._c:
-            self._ip = IsochronePotential(amp=self.amp, b=self.b)
         # Define _pot, because some functions that use actionAngle instances need this
         self._pot = IsochronePotential(amp=self.amp, b=self.b)
         # Check the units
@@ -79,11 +75,11 @@ class actionAngleIsochroneInverse(actionAngleInverse):
 
         Parameters
         ----------
-        jr : float
+        jr : float or numpy.ndarray
             Radial action.
-        jphi : float
+        jphi : float or numpy.ndarray
             Azimuthal action.
-        jz : float
+        jz : float or numpy.ndarray
             Vertical action.
         angler : numpy.ndarray
             Radial angle.
@@ -92,6 +88,9 @@ class actionAngleIsochroneInverse(actionAngleInverse):
         anglez : numpy.ndarray
             Vertical angle.
 
+        c : bool, optional
+            True/False to override the object-wide setting for whether or not to use the C implementation.
+
         Returns
         -------
         numpy.ndarray
@@ -109,11 +108,11 @@ class actionAngleIsochroneInverse(actionAngleInverse):
 
         Parameters
         ----------
-        jr : float
+        jr : float or numpy.ndarray
             Radial action.
-        jphi : float
+        jphi : float or numpy.ndarray
             Azimuthal action.
-        jz : float
+        jz : float or numpy.ndarray
             Vertical action.
         angler : numpy.ndarray
             Radial angle.
@@ -122,6 +121,9 @@ class actionAngleIsochroneInverse(actionAngleInverse):
         anglez : numpy.ndarray
             Vertical angle.
 
+        c : bool, optional
+            True/False to override the object-wide setting for whether or not to use the C implementation.
+
         Returns
         -------
         tuple
@@ -129,8 +131,33 @@ class actionAngleIsochroneInverse(actionAngleInverse):
 
         Notes
         -----
+        - The actions can also be arrays with the same length as the angles, to evaluate (x,v) for a number of points on different tori.
         - 2017-11-15 - Written - Bovy (UofT).
         """
+        if (self._c and not ("c" in kwargs and not kwargs["c"])) or (
+            ext_loaded and ("c" in kwargs and kwargs["c"])
+        ):
+            (
+                R,
+                vR,
+                vT,
+                z,
+                vz,
+                phi,
+                omegar,
+                omegaphi,
+                omegaz,
+                err,
+            ) = actionAngleIsochroneInverse_c.actionAngleIsochroneInverse_xvFreqs_c(
+                self.amp, self.b, jr, jphi, jz, angler, anglephi, anglez
+            )
+            if err != 0:  # pragma: no cover
+                raise RuntimeError(
+                    "C-code for the isochrone inverse transformation failed; try with c=False"
+                )
+            if numpy.ndim(jr) == 0 and numpy.ndim(jphi) == 0 and numpy.ndim(jz) == 0:
+                omegar, omegaphi, omegaz = omegar[0], omegaphi[0], omegaz[0]
+            return (R, vR, vT, z, vz, phi, omegar, omegaphi, omegaz)
         L = jz + numpy.fabs(jphi)  # total angular momentum
         L2 = L**2.0
         sqrtfourbkL2 = numpy.sqrt(L2 + 4.0 * self.b * self.amp)
@@ -146,20 +173,7 @@ class actionAngleIsochroneInverse(actionAngleInverse):
         angler = (numpy.atleast_1d(angler) % (-2.0 * numpy.pi)) % (2.0 * numpy.pi)
         anglephi = numpy.atleast_1d(anglephi)
         anglez = numpy.atleast_1d(anglez)
-        eta = numpy.empty(len(angler))
-        for ii, ar in enumerate(angler):
-            try:
-                eta[ii] = optimize.newton(
-                    lambda x: x - a * e / ab * numpy.sin(x) - ar,
-                    0.0,
-                    lambda x: 1 - a * e / ab * numpy.cos(x),
-                )
-            except RuntimeError:
-                # Newton-Raphson did not converge, this has to work,
-                # bc 0 <= ra < 2pi the following start x have different signs
-                eta[ii] = optimize.brentq(
-                    lambda x: x - a * e / ab * numpy.sin(x) - ar, 0.0, 2.0 * numpy.pi
-                )
+        eta = _solve_eta(angler, a * e / ab)
         coseta = numpy.cos(eta)
         r = a * numpy.sqrt((1.0 - e * coseta) * (1.0 - e * coseta + 2.0 * self.b / a))
         vr = numpy.sqrt(self.amp / ab) * a * e * numpy.sin(eta) / r
@@ -220,3 +234,32 @@ class actionAngleIsochroneInverse(actionAngleInverse):
         omegar = (-2.0 * H) ** 1.5 / self.amp
         omegaz = (1.0 + L / sqrtfourbkL2) / 2.0 * omegar
         return (omegar, numpy.sign(jphi) * omegaz, omegaz)
+
+
+def _solve_eta(ar, ec, maxiter=100):
+    """Solve eta - ec sin(eta) = ar for all points at once, with 0 <= ar < 2pi and 0 <= ec < 1, using Newton-Raphson safeguarded by bisection on [0,2pi]"""
+    ar, ec = numpy.broadcast_arrays(ar, ec)
+    eta = ar + ec * numpy.sin(ar)  # Good starting guess
+    etamin = numpy.zeros_like(eta)
+    etamax = numpy.full_like(eta, 2.0 * numpy.pi)
+    indx = numpy.ones(eta.shape, dtype=bool)
+    for ii in range(maxiter):
+        teta, tec, tar = eta[indx], ec[indx], ar[indx]
+        f = teta - tec * numpy.sin(teta) - tar
+        # Update the bracket
+        tetamin = numpy.where(f < 0.0, teta, etamin[indx])
+        tetamax = numpy.where(f < 0.0, etamax[indx], teta)
+        fp = 1.0 - tec * numpy.cos(teta)
+        deta = f / fp
+        teta = teta - deta
+        # Bisect when the Newton step leaves the bracket
+        bisect = (teta <= tetamin) + (teta >= tetamax)
+        teta[bisect] = 0.5 * (tetamin[bisect] + tetamax[bisect])
+        deta[bisect] = (tetamax - tetamin)[bisect]
+        eta[indx] = numpy.where(f == 0.0, eta[indx], teta)
+        etamin[indx] = tetamin
+        etamax[indx] = tetamax
+        indx[indx] = (f != 0.0) * (numpy.fabs(deta) >= 1e-15 * (1.0 + numpy.fabs(teta)))
+        if not numpy.any(indx):
+            break
+    return eta
@@ -0,0 +1,113 @@
+import ctypes
+import ctypes.util
+
+import numpy
+from numpy.ctypeslib import ndpointer
+
+from ..util import _load_extension_libs
+
+_lib, _ext_loaded = _load_extension_libs.load_libgalpy()
+
+
+def actionAngleIsochroneInverse_xvFreqs_c(
+    amp, b, jr, jphi, jz, angler, anglephi, anglez
+):
+    """
+    Use C to calculate (x,v) and frequencies from action-angle coordinates in the isochrone potential
+
+    Parameters
+    ----------
+    amp : float
+        Amplitude of the isochrone potential
+    b : float
+        Scale parameter of the isochrone potential
+    jr : numpy.ndarray
+        Radial action
+    jphi : numpy.ndarray
+        Azimuthal action
+    jz : numpy.ndarray
+        Vertical action
+    angler : numpy.ndarray
+        Radial angle
+    anglephi : numpy.ndarray
+        Azimuthal angle
+    anglez : numpy.ndarray
+        Vertical angle
+
+    Returns
+    -------
+    tuple
+        (R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz,err) where:
+           * R,vR,vT,z,vz,phi,Omegar,Omegaphi,Omegaz : array, shape (N), with N the broadcast length of the inputs
+           * err - non-zero if error occurred
+    """
+    # Broadcast all inputs against each other
+    jr, jphi, jz, angler, anglephi, anglez = (
+        numpy.array(x, dtype=numpy.float64, order="C")
+        for x in numpy.broadcast_arrays(
+            *(numpy.atleast_1d(x) for x in (jr, jphi, jz, angler, anglephi, anglez))
+        )
+    )
+    ndata = len(jr)
+
+    # Set up result arrays
+    R = numpy.empty(ndata)
+    vR = numpy.empty(ndata)
+    vT = numpy.empty(ndata)
+    z = numpy.empty(ndata)
+    vz = numpy.empty(ndata)
+    phi = numpy.empty(ndata)
+    Omegar = numpy.empty(ndata)
+    Omegaphi = numpy.empty(ndata)
+    Omegaz = numpy.empty(ndata)
+    err = ctypes.c_int(0)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    actionAngleIsochroneInverse_xvFreqsFunc = _lib.actionAngleIsochroneInverse_xvFreqs
+    actionAngleIsochroneInverse_xvFreqsFunc.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ctypes.c_double,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.POINTER(ctypes.c_int),
+    ]
+
+    # Run the C code
+    actionAngleIsochroneInverse_xvFreqsFunc(
+        ctypes.c_int(ndata),
+        jr,
+        jphi,
+        jz,
+        angler,
+        anglephi,
+        anglez,
+        ctypes.c_double(amp),
+        ctypes.c_double(b),
+        R,
+        vR,
+        vT,
+        z,
+        vz,
+        phi,
+        Omegar,
+        Omegaphi,
+        Omegaz,
+        ctypes.byref(err),
+    )
+
+    return (R, vR, vT, z, vz, phi, Omegar, Omegaphi, Omegaz, err.value)
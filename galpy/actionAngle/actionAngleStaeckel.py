@@ -36,7 +36,12 @@ from ..potential.Potential import (
 from ..potential.Potential import flatten as flatten_potential
 from ..util import coords  # for prolate confocal transforms
 from ..util import conversion, galpyWarning
-from ..util.conversion import physical_conversion, potential_physical_input
+from ..util.conversion import (
+    actionAngle_physical_input,
+    physical_conversion,
+    physical_conversion_actionAngle,
+    potential_physical_input,
+)
 from . import actionAngleStaeckel_c
 from .actionAngle import UnboundError, actionAngle
 from .actionAngleStaeckel_c import _ext_loaded as ext_loaded
@@ -61,6 +66,10 @@ class actionAngleStaeckel(actionAngle):
             If True, always use C for calculations. Default is False.
         order : int, optional
             Number of points to use in the Gauss-Legendre numerical integration of the relevant action, frequency, and angle integrals. Default is 10.
+        tol : float, optional
+            If set, compute the actions adaptively: starting from order, the order of the Gauss-Legendre integration is doubled for each object until the relative change in its actions is less than tol (or maxorder is reached). Default is None (fixed order).
+        maxorder : int, optional
+            Maximum order of the Gauss-Legendre integration when computing the actions adaptively. Default is 8*order.
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -93,6 +102,8 @@ class actionAngleStaeckel(actionAngle):
         self._useu0 = kwargs.get("useu0", False)
         self._delta = kwargs["delta"]
         self._order = kwargs.get("order", 10)
+        self._tol = kwargs.get("tol", None)
+        self._maxorder = kwargs.get("maxorder", 8 * self._order)
         self._delta = conversion.parse_length(self._delta, ro=self._ro)
         # Check the units
         self._check_consistent_units()
@@ -118,6 +129,10 @@ class actionAngleStaeckel(actionAngle):
             True/False to override the object-wide setting for whether or not to use the C implementation.
         order: int, optional
             number of points to use in the Gauss-Legendre numerical integration of the relevant action integrals.
+        tol: float, optional
+            if set, override the object-wide relative tolerance for computing the actions adaptively (see actionsErrors).
+        maxorder: int, optional
+            override the object-wide maximum order of the Gauss-Legendre integration when computing the actions adaptively.
         fixed_quad: bool, optional
             if True, use Gaussian quadrature (scipy.integrate.fixed_quad instead of scipy.integrate.quad).
         **kwargs: dict, optional
@@ -133,6 +148,10 @@ class actionAngleStaeckel(actionAngle):
         - 2012-11-27 - Written - Bovy (IAS)
         - 2017-12-27 - Allowed individual delta for each point - Bovy (UofT)
         """
+        if kwargs.get("tol", self._tol) is not None:
+            return self._actionsErrors(*args, **kwargs)[:3]
+        kwargs.pop("tol", None)
+        kwargs.pop("maxorder", None)
         delta = kwargs.pop("delta", self._delta)
         order = kwargs.get("order", self._order)
         if len(args) == 5:  # R,vR.vT, z, vz
@@ -200,6 +219,7 @@ class actionAngleStaeckel(actionAngle):
                 for ii in range(len(R)):
                     targs = (R[ii], vR[ii], vT[ii], z[ii], vz[ii])
                     tkwargs = copy.copy(kwargs)
+                    tkwargs["tol"] = None
                     try:
                         tkwargs["delta"] = delta[ii]
                     except (TypeError, IndexError):
@@ -220,6 +240,159 @@ class actionAngleStaeckel(actionAngle):
                     numpy.atleast_1d(aASingle.Jz(**copy.copy(kwargs))),
                 )
 
+    @actionAngle_physical_input
+    @physical_conversion_actionAngle("actionsErrors", pop=True)
+    def actionsErrors(self, *args, **kwargs):
+        """
+        Evaluate the actions adaptively, together with an estimate of their numerical error (jr,lz,jz,jrerr,jzerr).
+
+        Parameters
+        ----------
+        *args : tuple
+            Either:
+            a) R,vR,vT,z,vz[,phi]:
+                1) floats: phase-space value for single object (phi is optional) (each can be a Quantity)
+                2) numpy.ndarray: [N] phase-space values for N objects (each can be a Quantity)
+            b) Orbit instance: initial condition used if that's it, orbit(t) if there is a time given as well as the second argument
+        delta: bool, optional
+            can be used to override the object-wide focal length; can also be an array with length N to allow different delta for different phase-space points
+        u0: float, optional
+            if object-wide option useu0 is set, u0 to use (if useu0 and useu0 is None, a good value will be computed).
+        c: bool, optional
+            True/False to override the object-wide setting for whether or not to use the C implementation.
+        order: int, optional
+            initial number of points to use in the Gauss-Legendre numerical integration of the relevant action integrals.
+        tol: float, optional
+            relative tolerance on the actions; the order of the integration is doubled for each object until the relative change in its actions is less than tol (default: object-wide tol or 1e-8 if that is not set).
+        maxorder: int, optional
+            maximum order of the Gauss-Legendre integration (default: object-wide maxorder).
+
+        Returns
+        -------
+        tuple
+            (jr,lz,jz,jrerr,jzerr), where jrerr and jzerr are the absolute differences between the actions computed at the final and the penultimate order
+
+        Notes
+        -----
+        - Only the actions are computed adaptively; frequencies and angles use the fixed order.
+        - Unbound orbits (jr or jz = 9999.99) and circular or in-plane orbits (jr or jz = 0) have zero error.
+        """
+        return self._actionsErrors(*args, **kwargs)
+
+    def _actionsErrors(self, *args, **kwargs):
+        delta = kwargs.pop("delta", self._delta)
+        order = kwargs.pop("order", self._order)
+        tol = kwargs.pop("tol", self._tol)
+        if tol is None:
+            tol = 1e-8
+        maxorder = kwargs.pop("maxorder", self._maxorder)
+        if len(args) == 5:  # R,vR.vT, z, vz
+            R, vR, vT, z, vz = args
+        elif len(args) == 6:  # R,vR.vT, z, vz, phi
+            R, vR, vT, z, vz, phi = args
+        else:
+            self._parse_eval_args(*args)
+            R = self._eval_R
+            vR = self._eval_vR
+            vT = self._eval_vT
+            z = self._eval_z
+            vz = self._eval_vz
+        if isinstance(R, float):
+            R = numpy.array([R])
+            vR = numpy.array([vR])
+            vT = numpy.array([vT])
+            z = numpy.array([z])
+            vz = numpy.array([vz])
+        if (
+            (self._c and not ("c" in kwargs and not kwargs["c"]))
+            or (ext_loaded and ("c" in kwargs and kwargs["c"]))
+        ) and _check_c(self._pot):
+            Lz = R * vT
+            if self._useu0:
+                # First calculate u0
+                if "u0" in kwargs:
+                    u0 = numpy.asarray(kwargs["u0"])
+                else:
+                    E = numpy.array(
+                        [
+                            _evaluatePotentials(self._pot, R[ii], z[ii])
+                            + vR[ii] ** 2.0 / 2.0
+                            + vz[ii] ** 2.0 / 2.0
+                            + vT[ii] ** 2.0 / 2.0
+                            for ii in range(len(R))
+                        ]
+                    )
+                    u0 = actionAngleStaeckel_c.actionAngleStaeckel_calcu0(
+                        E, Lz, self._pot, delta
+                    )[0]
+            else:
+                u0 = None
+            (
+                jr,
+                jz,
+                jrerr,
+                jzerr,
+                err,
+            ) = actionAngleStaeckel_c.actionAngleStaeckel_actions_adaptive_c(
+                self._pot,
+                delta,
+                R,
+                vR,
+                vT,
+                z,
+                vz,
+                u0=u0,
+                order=order,
+                maxorder=maxorder,
+                tol=tol,
+            )
+            if err == 0:
+                return (jr, Lz, jz, jrerr, jzerr)
+            else:  # pragma: no cover
+                raise RuntimeError(
+                    "C-code for calculation actions failed; try with c=False"
+                )
+        else:
+            # Same scheme in Python, using fixed_quad at increasing order
+            kwargs["c"] = False
+            kwargs["fixed_quad"] = True
+            kwargs.pop("u0", None)
+            delta = numpy.asarray(delta)
+            if delta.size == 1:
+                delta = delta.item()
+            jr, Lz, jz = self._evaluate(
+                R, vR, vT, z, vz, delta=delta, order=order, tol=None, **kwargs
+            )
+            jrerr = numpy.zeros(len(R))
+            jzerr = numpy.zeros(len(R))
+            # Like in C, don't refine unbound and circular/in-plane orbits
+            ractive = (jr != 9999.99) * (jr != 0.0)
+            zactive = (jz != 9999.99) * (jz != 0.0)
+            torder = order
+            while (numpy.any(ractive) or numpy.any(zactive)) and 2 * torder <= maxorder:
+                torder *= 2
+                indx = ractive + zactive
+                njr, _, njz = self._evaluate(
+                    R[indx],
+                    vR[indx],
+                    vT[indx],
+                    z[indx],
+                    vz[indx],
+                    delta=delta if numpy.ndim(delta) == 0 else delta[indx],
+                    order=torder,
+                    tol=None,
+                    **kwargs
+                )
+                rindx = ractive[indx]
+                jrerr[ractive] = numpy.fabs(njr[rindx] - jr[ractive])
+                jr[ractive] = njr[rindx]
+                ractive[ractive] = jrerr[ractive] > tol * numpy.fabs(jr[ractive])
+                zindx = zactive[indx]
+                jzerr[zactive] = numpy.fabs(njz[zindx] - jz[zactive])
+                jz[zactive] = njz[zindx]
+                zactive[zactive] = jzerr[zactive] > tol * numpy.fabs(jz[zactive])
+            return (jr, Lz, jz, jrerr, jzerr)
+
     def _actionsFreqs(self, *args, **kwargs):
         """
         Evaluate the actions and frequencies (jr,lz,jz,Omegar,Omegaphi,Omegaz).
@@ -254,6 +427,8 @@ class actionAngleStaeckel(actionAngle):
         -----
         - 2013-08-28 - Written - Bovy (IAS)
         """
+        kwargs.pop("tol", None)
+        kwargs.pop("maxorder", None)
         delta = kwargs.pop("delta", self._delta)
         order = kwargs.get("order", self._order)
         if (
@@ -372,6 +547,8 @@ class actionAngleStaeckel(actionAngle):
         -----
         - 2013-08-28 - Written - Bovy (IAS)
         """
+        kwargs.pop("tol", None)
+        kwargs.pop("maxorder", None)
         delta = kwargs.pop("delta", self._delta)
         order = kwargs.get("order", self._order)
         if (
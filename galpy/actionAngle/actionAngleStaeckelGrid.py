@@ -14,7 +14,7 @@ import numpy
 from scipy import interpolate, ndimage, optimize
 
 from .. import potential
-from ..potential.Potential import _evaluatePotentials
+from ..potential.Potential import _check_c, _evaluatePotentials
 from ..potential.Potential import flatten as flatten_potential
 from ..util import conversion, coords, multi
 from . import actionAngleStaeckel, actionAngleStaeckel_c
@@ -322,6 +322,18 @@ class actionAngleStaeckelGrid(actionAngle):
             self._rapFiltered = ndimage.spline_filter(
                 numpy.log(self._rap + 10.0**-10.0), order=3
             )
+        # Tables for the C implementation of the interpolation
+        self._c_interp_tables = (
+            _spline1d_tables(
+                self._ERLInterp, self._ERaInterp, self._jrLzInterp, self._jzLzInterp
+            )
+            + (self._ERLmax, self._ERamax)
+            + _spline2d_tables(self._logu0Interp)
+            + (
+                numpy.ascontiguousarray(self._jrFiltered, dtype=numpy.float64),
+                numpy.ascontiguousarray(self._jzFiltered, dtype=numpy.float64),
+            )
+        )
         # Check the units
         self._check_consistent_units()
         return None
@@ -361,119 +373,27 @@ class actionAngleStaeckelGrid(actionAngle):
             vT = self._eval_vT
             z = self._eval_z
             vz = self._eval_vz
-        Lz = R * vT
-        Phi = _evaluatePotentials(self._pot, R, z)
-        E = Phi + vR**2.0 / 2.0 + vT**2.0 / 2.0 + vz**2.0 / 2.0
-        thisERL = -numpy.exp(self._ERLInterp(Lz)) + self._ERLmax
-        thisERa = -numpy.exp(self._ERaInterp(Lz)) + self._ERamax
         if isinstance(R, numpy.ndarray):
-            indx = ((E - thisERa) / (thisERL - thisERa) > 1.0) * (
-                ((E - thisERa) / (thisERL - thisERa) - 1.0) < 10.0**-2.0
-            )
-            E[indx] = thisERL[indx]
-            indx = ((E - thisERa) / (thisERL - thisERa) < 0.0) * (
-                (E - thisERa) / (thisERL - thisERa) > -(10.0**-2.0)
-            )
-            E[indx] = thisERa[indx]
-            indx = Lz < self._Lzmin
-            indx += Lz > self._Lzmax
-            indx += (E - thisERa) / (thisERL - thisERa) > 1.0
-            indx += (E - thisERa) / (thisERL - thisERa) < 0.0
-            indxc = True ^ indx
-            jr = numpy.empty(R.shape)
-            jz = numpy.empty(R.shape)
-            if numpy.sum(indxc) > 0:
-                u0 = numpy.exp(
-                    self._logu0Interp.ev(
-                        Lz[indxc],
-                        (
-                            _Efunc(E[indxc], thisERL[indxc])
-                            - _Efunc(thisERa[indxc], thisERL[indxc])
-                        )
-                        / (
-                            _Efunc(thisERL[indxc], thisERL[indxc])
-                            - _Efunc(thisERa[indxc], thisERL[indxc])
-                        ),
-                    )
+            if (self._c and not ("c" in kwargs and not kwargs["c"])) and _check_c(
+                self._pot
+            ):
+                jr, jz, indx = actionAngleStaeckel_c.actionAngleStaeckelGrid_actions_c(
+                    self._pot,
+                    self._delta,
+                    R,
+                    vR,
+                    vT,
+                    z,
+                    vz,
+                    self._Lzmin,
+                    self._Lzmax,
+                    self._nLz,
+                    self._nE,
+                    self._npsi,
+                    *self._c_interp_tables
                 )
-                sinh2u0 = numpy.sinh(u0) ** 2.0
-                thisEr = self.Er(
-                    R[indxc],
-                    z[indxc],
-                    vR[indxc],
-                    vz[indxc],
-                    E[indxc],
-                    Lz[indxc],
-                    sinh2u0,
-                    u0,
-                )
-                thisEz = self.Ez(
-                    R[indxc],
-                    z[indxc],
-                    vR[indxc],
-                    vz[indxc],
-                    E[indxc],
-                    Lz[indxc],
-                    sinh2u0,
-                    u0,
-                )
-                thisv2 = self.vatu0(
-                    E[indxc], Lz[indxc], u0, self._delta * numpy.sinh(u0), retv2=True
-                )
-                cos2psi = 2.0 * thisEr / thisv2 / (1.0 + sinh2u0)  # latter is cosh2u0
-                cos2psi[(cos2psi > 1.0) * (cos2psi < 1.0 + 10.0**-5.0)] = 1.0
-                indxCos2psi = cos2psi > 1.0
-                indxCos2psi += cos2psi < 0.0
-                indxc[indxc] = True ^ indxCos2psi  # Handle these two cases as off-grid
-                indx = True ^ indxc
-                psi = numpy.arccos(numpy.sqrt(cos2psi[True ^ indxCos2psi]))
-                coords = numpy.empty((3, numpy.sum(indxc)))
-                coords[0, :] = (
-                    (Lz[indxc] - self._Lzmin)
-                    / (self._Lzmax - self._Lzmin)
-                    * (self._nLz - 1.0)
-                )
-                y = (
-                    _Efunc(E[indxc], thisERL[indxc])
-                    - _Efunc(thisERa[indxc], thisERL[indxc])
-                ) / (
-                    _Efunc(thisERL[indxc], thisERL[indxc])
-                    - _Efunc(thisERa[indxc], thisERL[indxc])
-                )
-                coords[1, :] = y * (self._nE - 1.0)
-                coords[2, :] = psi / numpy.pi * 2.0 * (self._npsi - 1.0)
-                jr[indxc] = (
-                    numpy.exp(
-                        ndimage.map_coordinates(
-                            self._jrFiltered, coords, order=3, prefilter=False
-                        )
-                    )
-                    - 10.0**-10.0
-                ) * (numpy.exp(self._jrLzInterp(Lz[indxc])) - 10.0**-5.0)
-                # Switch to Ez-calculated psi
-                sin2psi = (
-                    2.0
-                    * thisEz[True ^ indxCos2psi]
-                    / thisv2[True ^ indxCos2psi]
-                    / (1.0 + sinh2u0[True ^ indxCos2psi])
-                )  # latter is cosh2u0
-                sin2psi[(sin2psi > 1.0) * (sin2psi < 1.0 + 10.0**-5.0)] = 1.0
-                indxSin2psi = sin2psi > 1.0
-                indxSin2psi += sin2psi < 0.0
-                indxc[indxc] = True ^ indxSin2psi  # Handle these two cases as off-grid
-                indx = True ^ indxc
-                psiz = numpy.arcsin(numpy.sqrt(sin2psi[True ^ indxSin2psi]))
-                newcoords = numpy.empty((3, numpy.sum(indxc)))
-                newcoords[0:2, :] = coords[0:2, True ^ indxSin2psi]
-                newcoords[2, :] = psiz / numpy.pi * 2.0 * (self._npsi - 1.0)
-                jz[indxc] = (
-                    numpy.exp(
-                        ndimage.map_coordinates(
-                            self._jzFiltered, newcoords, order=3, prefilter=False
-                        )
-                    )
-                    - 10.0**-10.0
-                ) * (numpy.exp(self._jzLzInterp(Lz[indxc])) - 10.0**-5.0)
+            else:
+                jr, jz, indx = self._evaluate_grid(R, vR, vT, z, vz)
             if numpy.sum(indx) > 0:
                 jrindiv, lzindiv, jzindiv = self._aA(
                     R[indx], vR[indx], vT[indx], z[indx], vz[indx], **kwargs
@@ -514,6 +434,122 @@ class actionAngleStaeckelGrid(actionAngle):
         jz[jz < 0.0] = 0.0
         return (jr, R * vT, jz)
 
+    def _evaluate_grid(self, R, vR, vT, z, vz):
+        """Evaluate the actions for the points on the grid, returns (jr,jz,indx) with indx True for points that are off the grid, for which jr and jz are not set"""
+        Lz = R * vT
+        Phi = _evaluatePotentials(self._pot, R, z)
+        E = Phi + vR**2.0 / 2.0 + vT**2.0 / 2.0 + vz**2.0 / 2.0
+        thisERL = -numpy.exp(self._ERLInterp(Lz)) + self._ERLmax
+        thisERa = -numpy.exp(self._ERaInterp(Lz)) + self._ERamax
+        indx = ((E - thisERa) / (thisERL - thisERa) > 1.0) * (
+            ((E - thisERa) / (thisERL - thisERa) - 1.0) < 10.0**-2.0
+        )
+        E[indx] = thisERL[indx]
+        indx = ((E - thisERa) / (thisERL - thisERa) < 0.0) * (
+            (E - thisERa) / (thisERL - thisERa) > -(10.0**-2.0)
+        )
+        E[indx] = thisERa[indx]
+        indx = Lz < self._Lzmin
+        indx += Lz > self._Lzmax
+        indx += (E - thisERa) / (thisERL - thisERa) > 1.0
+        indx += (E - thisERa) / (thisERL - thisERa) < 0.0
+        indxc = True ^ indx
+        jr = numpy.empty(R.shape)
+        jz = numpy.empty(R.shape)
+        if numpy.sum(indxc) > 0:
+            u0 = numpy.exp(
+                self._logu0Interp.ev(
+                    Lz[indxc],
+                    (
+                        _Efunc(E[indxc], thisERL[indxc])
+                        - _Efunc(thisERa[indxc], thisERL[indxc])
+                    )
+                    / (
+                        _Efunc(thisERL[indxc], thisERL[indxc])
+                        - _Efunc(thisERa[indxc], thisERL[indxc])
+                    ),
+                )
+            )
+            sinh2u0 = numpy.sinh(u0) ** 2.0
+            thisEr = self.Er(
+                R[indxc],
+                z[indxc],
+                vR[indxc],
+                vz[indxc],
+                E[indxc],
+                Lz[indxc],
+                sinh2u0,
+                u0,
+            )
+            thisEz = self.Ez(
+                R[indxc],
+                z[indxc],
+                vR[indxc],
+                vz[indxc],
+                E[indxc],
+                Lz[indxc],
+                sinh2u0,
+                u0,
+            )
+            thisv2 = self.vatu0(
+                E[indxc], Lz[indxc], u0, self._delta * numpy.sinh(u0), retv2=True
+            )
+            cos2psi = 2.0 * thisEr / thisv2 / (1.0 + sinh2u0)  # latter is cosh2u0
+            cos2psi[(cos2psi > 1.0) * (cos2psi < 1.0 + 10.0**-5.0)] = 1.0
+            indxCos2psi = cos2psi > 1.0
+            indxCos2psi += cos2psi < 0.0
+            indxc[indxc] = True ^ indxCos2psi  # Handle these two cases as off-grid
+            indx = True ^ indxc
+            psi = numpy.arccos(numpy.sqrt(cos2psi[True ^ indxCos2psi]))
+            coords = numpy.empty((3, numpy.sum(indxc)))
+            coords[0, :] = (
+                (Lz[indxc] - self._Lzmin)
+                / (self._Lzmax - self._Lzmin)
+                * (self._nLz - 1.0)
+            )
+            y = (
+                _Efunc(E[indxc], thisERL[indxc])
+                - _Efunc(thisERa[indxc], thisERL[indxc])
+            ) / (
+                _Efunc(thisERL[indxc], thisERL[indxc])
+                - _Efunc(thisERa[indxc], thisERL[indxc])
+            )
+            coords[1, :] = y * (self._nE - 1.0)
+            coords[2, :] = psi / numpy.pi * 2.0 * (self._npsi - 1.0)
+            jr[indxc] = (
+                numpy.exp(
+                    ndimage.map_coordinates(
+                        self._jrFiltered, coords, order=3, prefilter=False
+                    )
+                )
+                - 10.0**-10.0
+            ) * (numpy.exp(self._jrLzInterp(Lz[indxc])) - 10.0**-5.0)
+            # Switch to Ez-calculated psi
+            sin2psi = (
+                2.0
+                * thisEz[True ^ indxCos2psi]
+                / thisv2[True ^ indxCos2psi]
+                / (1.0 + sinh2u0[True ^ indxCos2psi])
+            )  # latter is cosh2u0
+            sin2psi[(sin2psi > 1.0) * (sin2psi < 1.0 + 10.0**-5.0)] = 1.0
+            indxSin2psi = sin2psi > 1.0
+            indxSin2psi += sin2psi < 0.0
+            indxc[indxc] = True ^ indxSin2psi  # Handle these two cases as off-grid
+            indx = True ^ indxc
+            psiz = numpy.arcsin(numpy.sqrt(sin2psi[True ^ indxSin2psi]))
+            newcoords = numpy.empty((3, numpy.sum(indxc)))
+            newcoords[0:2, :] = coords[0:2, True ^ indxSin2psi]
+            newcoords[2, :] = psiz / numpy.pi * 2.0 * (self._npsi - 1.0)
+            jz[indxc] = (
+                numpy.exp(
+                    ndimage.map_coordinates(
+                        self._jzFiltered, newcoords, order=3, prefilter=False
+                    )
+                )
+                - 10.0**-10.0
+            ) * (numpy.exp(self._jzLzInterp(Lz[indxc])) - 10.0**-5.0)
+        return (jr, jz, indx)
+
     def Jz(self, *args, **kwargs):
         """
         Evaluate the action jz
@@ -944,3 +980,31 @@ def _invEfunc(Ef, *args):
     """Inverse of Efunc"""
     #    return Ef**2.+args[0]
     return numpy.exp(Ef) + args[0] - 10.0**-10.0
+
+
+def _spline1d_tables(*splines):
+    """Knots and coefficients of cubic InterpolatedUnivariateSplines (all with the same number of knots) in the format used by the C code, (t[nspline,nknots],c[nspline,nknots-4])"""
+    t = numpy.array(
+        [
+            numpy.concatenate(
+                (
+                    numpy.full(3, spl.get_knots()[0]),
+                    spl.get_knots(),
+                    numpy.full(3, spl.get_knots()[-1]),
+                )
+            )
+            for spl in splines
+        ]
+    )
+    c = numpy.array([spl.get_coeffs() for spl in splines])
+    return (numpy.ascontiguousarray(t), numpy.ascontiguousarray(c))
+
+
+def _spline2d_tables(spline):
+    """Knots and coefficients of a bicubic RectBivariateSpline in the format used by the C code, (tx,ty,c)"""
+    tx, ty = spline.get_knots()
+    return (
+        numpy.ascontiguousarray(tx, dtype=numpy.float64),
+        numpy.ascontiguousarray(ty, dtype=numpy.float64),
+        numpy.ascontiguousarray(spline.get_coeffs(), dtype=numpy.float64),
+    )
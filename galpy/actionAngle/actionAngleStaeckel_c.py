@@ -146,6 +146,158 @@ def actionAngleStaeckel_c(pot, delta, R, vR, vT, z, vz, u0=None, order=10):
     return (jr, jz, err.value)
 
 
+def actionAngleStaeckel_actions_adaptive_c(
+    pot, delta, R, vR, vT, z, vz, u0=None, order=10, maxorder=80, tol=1e-8
+):
+    """
+    Use C to calculate actions using the Staeckel approximation, adaptively increasing the order of the Gauss-Legendre integration until the actions converge
+
+    Parameters
+    ----------
+    pot : Potential or list of such instances
+        Potential
+    delta : float
+        Focal length of prolate spheroidal coordinates
+    R : float
+        Galactocentric radius
+    vR : float
+        Galactocentric radial velocity
+    vT : float
+        Galactocentric tangential velocity
+    z : float
+        Height
+    vz : float
+        Vertical velocity
+    u0 : float, optional
+        If set, u0 to use
+    order : int, optional
+        Initial order of Gauss-Legendre integration of the relevant integrals; the order is doubled until convergence
+    maxorder : int, optional
+        Maximum order of Gauss-Legendre integration
+    tol : float, optional
+        Relative tolerance on the actions
+
+    Returns
+    -------
+    tuple
+        (jr,jz,jrerr,jzerr,err) where:
+           * jr,jz : array, shape (len(R))
+           * jrerr,jzerr : array, shape (len(R)), estimated absolute errors (difference between the last two orders)
+           * err - non-zero if error occurred
+    """
+    if u0 is None:
+        u0, dummy = coords.Rz_to_uv(R, z, delta=numpy.atleast_1d(delta))
+    # Parse the potential
+    from ..orbit.integrateFullOrbit import _parse_pot
+    from ..orbit.integratePlanarOrbit import _prep_tfuncs
+
+    npot, pot_type, pot_args, pot_tfuncs = _parse_pot(pot, potforactions=True)
+    pot_tfuncs = _prep_tfuncs(pot_tfuncs)
+
+    # Parse delta
+    delta = numpy.atleast_1d(delta)
+    ndelta = len(delta)
+
+    # Set up result arrays
+    jr = numpy.empty(len(R))
+    jz = numpy.empty(len(R))
+    jrerr = numpy.empty(len(R))
+    jzerr = numpy.empty(len(R))
+    err = ctypes.c_int(0)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    actionAngleStaeckel_actionsFunc = _lib.actionAngleStaeckel_actions_adaptive
+    actionAngleStaeckel_actionsFunc.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_void_p,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_double,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.POINTER(ctypes.c_int),
+    ]
+
+    # Array requirements, first store old order
+    f_cont = [
+        R.flags["F_CONTIGUOUS"],
+        vR.flags["F_CONTIGUOUS"],
+        vT.flags["F_CONTIGUOUS"],
+        z.flags["F_CONTIGUOUS"],
+        vz.flags["F_CONTIGUOUS"],
+        u0.flags["F_CONTIGUOUS"],
+        delta.flags["F_CONTIGUOUS"],
+    ]
+    R = numpy.require(R, dtype=numpy.float64, requirements=["C", "W"])
+    vR = numpy.require(vR, dtype=numpy.float64, requirements=["C", "W"])
+    vT = numpy.require(vT, dtype=numpy.float64, requirements=["C", "W"])
+    z = numpy.require(z, dtype=numpy.float64, requirements=["C", "W"])
+    vz = numpy.require(vz, dtype=numpy.float64, requirements=["C", "W"])
+    u0 = numpy.require(u0, dtype=numpy.float64, requirements=["C", "W"])
+    delta = numpy.require(delta, dtype=numpy.float64, requirements=["C", "W"])
+    jr = numpy.require(jr, dtype=numpy.float64, requirements=["C", "W"])
+    jz = numpy.require(jz, dtype=numpy.float64, requirements=["C", "W"])
+    jrerr = numpy.require(jrerr, dtype=numpy.float64, requirements=["C", "W"])
+    jzerr = numpy.require(jzerr, dtype=numpy.float64, requirements=["C", "W"])
+
+    # Run the C code
+    actionAngleStaeckel_actionsFunc(
+        len(R),
+        R,
+        vR,
+        vT,
+        z,
+        vz,
+        u0,
+        ctypes.c_int(npot),
+        pot_type,
+        pot_args,
+        pot_tfuncs,
+        ctypes.c_int(ndelta),
+        delta,
+        ctypes.c_int(order),
+        ctypes.c_int(maxorder),
+        ctypes.c_double(tol),
+        jr,
+        jz,
+        jrerr,
+        jzerr,
+        ctypes.byref(err),
+    )
+
+    # Reset input arrays
+    if f_cont[0]:
+        R = numpy.asfortranarray(R)
+    if f_cont[1]:
+        vR = numpy.asfortranarray(vR)
+    if f_cont[2]:
+        vT = numpy.asfortranarray(vT)
+    if f_cont[3]:
+        z = numpy.asfortranarray(z)
+    if f_cont[4]:
+        vz = numpy.asfortranarray(vz)
+    if f_cont[5]:
+        u0 = numpy.asfortranarray(u0)
+    if f_cont[6]:
+        delta = numpy.asfortranarray(delta)
+
+    return (jr, jz, jrerr, jzerr, err.value)
+
+
 def actionAngleStaeckel_calcu0(E, Lz, pot, delta):
     """
     Use C to calculate u0 in the Staeckel approximation
@@ -696,3 +848,159 @@ def actionAngleUminUmaxVminStaeckel_c(pot, delta, R, vR, vT, z, vz, u0=None):
         delta = numpy.asfortranarray(delta)
 
     return (umin, umax, vmin, err.value)
+
+
+def actionAngleStaeckelGrid_actions_c(
+    pot,
+    delta,
+    R,
+    vR,
+    vT,
+    z,
+    vz,
+    Lzmin,
+    Lzmax,
+    nLz,
+    nE,
+    npsi,
+    t1d,
+    c1d,
+    ERLmax,
+    ERamax,
+    tx,
+    ty,
+    cu0,
+    jrFiltered,
+    jzFiltered,
+):
+    """
+    Use C to calculate actions by interpolating the grid of actionAngleStaeckelGrid
+
+    Parameters
+    ----------
+    pot : Potential or list of such instances
+        Potential
+    delta : float
+        Focal length of prolate spheroidal coordinates
+    R : numpy.ndarray
+        Galactocentric radius
+    vR : numpy.ndarray
+        Galactocentric radial velocity
+    vT : numpy.ndarray
+        Galactocentric tangential velocity
+    z : numpy.ndarray
+        Height
+    vz : numpy.ndarray
+        Vertical velocity
+    Lzmin, Lzmax : float
+        Range of the grid in Lz
+    nLz, nE, npsi : int
+        Size of the grid in Lz, E, and psi
+    t1d, c1d : numpy.ndarray
+        Knots and coefficients of the cubic splines in Lz of ERL, ERa, jrLzE, and jzLzE, shape (4,nknots)
+    ERLmax, ERamax : float
+        Offsets used in the ERL and ERa splines
+    tx, ty, cu0 : numpy.ndarray
+        Knots and coefficients of the bicubic spline of log(u0) in (Lz,y)
+    jrFiltered, jzFiltered : numpy.ndarray
+        Spline-filtered grids of log(jr) and log(jz), shape (nLz,nE,npsi)
+
+    Returns
+    -------
+    tuple
+        (jr,jz,offgrid) where:
+           * jr,jz : array, shape (len(R)), not set for points that are off the grid
+           * offgrid : boolean array, shape (len(R)), True for points that are off the grid
+    """
+    # Parse the potential
+    from ..orbit.integrateFullOrbit import _parse_pot
+    from ..orbit.integratePlanarOrbit import _prep_tfuncs
+
+    npot, pot_type, pot_args, pot_tfuncs = _parse_pot(pot, potforactions=True)
+    pot_tfuncs = _prep_tfuncs(pot_tfuncs)
+
+    # Set up result arrays
+    jr = numpy.empty(len(R))
+    jz = numpy.empty(len(R))
+    offgrid = numpy.empty(len(R), dtype=numpy.int32)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    actionAngleStaeckelGrid_actionsFunc = _lib.actionAngleStaeckelGrid_actions
+    actionAngleStaeckelGrid_actionsFunc.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_void_p,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_int,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+    ]
+
+    # Array requirements
+    R = numpy.require(R, dtype=numpy.float64, requirements=["C", "W"])
+    vR = numpy.require(vR, dtype=numpy.float64, requirements=["C", "W"])
+    vT = numpy.require(vT, dtype=numpy.float64, requirements=["C", "W"])
+    z = numpy.require(z, dtype=numpy.float64, requirements=["C", "W"])
+    vz = numpy.require(vz, dtype=numpy.float64, requirements=["C", "W"])
+
+    # Run the C code
+    actionAngleStaeckelGrid_actionsFunc(
+        len(R),
+        R,
+        vR,
+        vT,
+        z,
+        vz,
+        ctypes.c_int(npot),
+        pot_type,
+        pot_args,
+        pot_tfuncs,
+        ctypes.c_double(delta),
+        ctypes.c_double(Lzmin),
+        ctypes.c_double(Lzmax),
+        ctypes.c_int(nLz),
+        ctypes.c_int(nE),
+        ctypes.c_int(npsi),
+        ctypes.c_int(t1d.shape[1]),
+        t1d,
+        c1d,
+        ctypes.c_double(ERLmax),
+        ctypes.c_double(ERamax),
+        ctypes.c_int(len(tx)),
+        tx,
+        ctypes.c_int(len(ty)),
+        ty,
+        cu0,
+        jrFiltered,
+        jzFiltered,
+        jr,
+        jz,
+        offgrid,
+    )
+
+    return (jr, jz, offgrid.astype(bool))
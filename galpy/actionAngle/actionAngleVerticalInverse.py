@@ -8,6 +8,8 @@
 #
 ###############################################################################
 import copy
+import os
+import pickle
 import warnings
 
 import numpy
@@ -17,13 +19,36 @@ from numpy.polynomial import chebyshev, polynomial
 from scipy import interpolate, ndimage, optimize
 
 from ..potential import evaluatelinearForces, evaluatelinearPotentials
-from ..util import galpyWarning
+from ..util import _content_key, galpyWarning, multi
 from ..util import plot as plot
+from ..util import save_pickles
 from .actionAngleHarmonic import actionAngleHarmonic
 from .actionAngleHarmonicInverse import actionAngleHarmonicInverse
 from .actionAngleInverse import actionAngleInverse
 from .actionAngleVertical import actionAngleVertical
 
+# Per-energy tables that define the mapped tori, these are what is computed
+# in parallel and saved
+_TORI_KEYS = [
+    "js",
+    "js_orig",
+    "Omegas",
+    "Omegas_orig",
+    "OmegaHO",
+    "xmaxs",
+    "pt_xmaxs",
+    "pt_coeffs",
+    "pt_deriv_coeffs",
+    "pt_deriv2_coeffs",
+    "xgrid",
+    "dta",
+    "mta",
+    "ja",
+    "djadj",
+    "nSn",
+    "dSndJ",
+]
+
 
 class actionAngleVerticalInverse(actionAngleInverse):
     """Inverse action-angle formalism for one dimensional systems"""
@@ -40,6 +65,8 @@ class actionAngleVerticalInverse(actionAngleInverse):
         maxiter=100,
         angle_tol=1e-12,
         bisect=False,
+        numcores=1,
+        savefilename=None,
     ):
         """
         Initialize an actionAngleVerticalInverse object
@@ -66,6 +93,10 @@ class actionAngleVerticalInverse(actionAngleInverse):
             tolerance for angle root-finding (f(x) is within tol of desired value)
         bisect : bool
             if True, use simple bisection for root-finding, otherwise first try Newton-Raphson (mainly useful for testing the bisection fallback)
+        numcores : int, optional
+            number of cores to use to map the tori for different energies in parallel (default: 1)
+        savefilename : str, optional
+            if set, load the mapped tori from this file if it exists and save them to it otherwise; the file is specific to the potential, Es, nta, point-transformation parameters, maxiter, angle_tol, and bisect; if these do not match, the tori are re-computed and the file is overwritten (with a warning)
 
         Notes
         -----
@@ -76,13 +107,81 @@ class actionAngleVerticalInverse(actionAngleInverse):
             raise OSError("Must specify pot= for actionAngleVerticalInverse")
         self._pot = pot
         self._aAV = actionAngleVertical(pot=self._pot)
-        # Compute action, frequency, and xmax for each energy
+        self._Es = numpy.sort(numpy.array(Es))
+        self._nE = len(self._Es)
+        self._nta = nta
+        self._thetaa = numpy.linspace(0.0, 2.0 * numpy.pi * (1.0 - 1.0 / nta), nta)
+        self._maxiter = maxiter
+        self._angle_tol = angle_tol
+        self._bisect = bisect
+        if use_pointtransform and pt_deg > 1:
+            self._pt_deg = pt_deg - (1 - pt_deg % 2)  # make odd
+        else:
+            self._pt_deg = 1
+        self._pt_nxa = pt_nxa
+        # Map all tori, or load them from a previous run
+        if not savefilename is None and self._tori_key() is None:
+            warnings.warn(
+                "The potential of this actionAngleVerticalInverse object cannot be represented by its content, so the tori are not saved to or loaded from savefilename",
+                galpyWarning,
+            )
+            savefilename = None
+        tori = None
+        if not savefilename is None and os.path.exists(savefilename):
+            tori = self._load_saved_tori(savefilename)
+        if tori is None:
+            if numcores > 1 and self._nE > 1:
+                Echunks = numpy.array_split(self._Es, numpy.amin([numcores, self._nE]))
+                tori = _concatenate_tori(
+                    multi.parallel_map(
+                        lambda x: self._map_tori(Echunks[x]),
+                        range(len(Echunks)),
+                        numcores=numcores,
+                    )
+                )
+            else:
+                tori = self._map_tori(self._Es)
+            if not savefilename is None:
+                tori["key"] = self._tori_key()
+                save_pickles(savefilename, tori)
+        for key in _TORI_KEYS:
+            setattr(self, "_" + key, tori[key])
+        # The following work properly for arrays of omega
+        self._hoaa = actionAngleHarmonic(omega=self._OmegaHO)
+        self._hoaainv = actionAngleHarmonicInverse(omega=self._OmegaHO)
+        self._nforSn = numpy.arange(self._ja.shape[1] // 2 + 1)
+        # Interpolation of small, noisy coeffs doesn't work, so set to zero
+        if setup_interp:
+            self._nSn[numpy.fabs(self._nSn) < 1e-16] = 0.0
+            self._dSndJ[numpy.fabs(self._dSndJ) < 1e-15] = 0.0
+        self._dSndJ /= numpy.atleast_2d(self._nforSn)[:, 1:]
+        self._nforSn = self._nforSn[1:]
+        self._js[self._Es < 1e-10] = 0.0
+        # Should use sqrt(2nd deriv. pot), but currently not implemented for 1D
+        if self._nE > 1:
+            self._OmegaHO[self._Es < 1e-10] = self._OmegaHO[1]
+            self._Omegas[self._Es < 1e-10] = self._Omegas[1]
+        self._nSn[self._js < 1e-10] = 0.0
+        self._dSndJ[self._js < 1e-10] = 0.0
+        # Setup interpolation if requested
+        if setup_interp:
+            self._interp = True
+            self._setup_interp()
+        else:
+            self._interp = False
+        return None
+
+    def _map_tori(self, Es):
+        # Map the tori for all energies in Es; sets the per-energy attributes
+        # and returns them in a dictionary (for merging parallel chunks and
+        # for saving)
+        self._Es = Es
         self._nE = len(Es)
+        # Compute action, frequency, and xmax for each energy
         js = numpy.empty(self._nE)
         Omegas = numpy.empty(self._nE)
         xmaxs = numpy.empty(self._nE)
-        self._Es = numpy.sort(numpy.array(Es))
-        for ii, E in enumerate(Es):
+        for ii, E in enumerate(self._Es):
             if (E - evaluatelinearPotentials(self._pot, 0.0)) < 1e-14:
                 # J=0, should be using vertical freq. from 2nd deriv.
                 tJ, tO = self._aAV.actionsFreqs(
@@ -110,26 +209,17 @@ class actionAngleVerticalInverse(actionAngleInverse):
         self._xmaxs = xmaxs
         # Set harmonic-oscillator frequencies == frequencies
         self._OmegaHO = copy.copy(Omegas)
-        # The following work properly for arrays of omega
         self._hoaa = actionAngleHarmonic(omega=self._OmegaHO)
-        self._hoaainv = actionAngleHarmonicInverse(omega=self._OmegaHO)
-        if use_pointtransform and pt_deg > 1:
-            self._setup_pointtransform(pt_deg - (1 - pt_deg % 2), pt_nxa)  # make odd
+        if self._pt_deg > 1:
+            self._setup_pointtransform(self._pt_deg, self._pt_nxa)
         else:
             # Setup identity point transformation
-            self._pt_deg = 1
-            self._pt_nxa = pt_nxa
             self._pt_xmaxs = self._xmaxs
             self._pt_coeffs = numpy.zeros((self._nE, 2))
             self._pt_coeffs[:, 1] = 1.0
             self._pt_deriv_coeffs = numpy.ones((self._nE, 1))
             self._pt_deriv2_coeffs = numpy.zeros((self._nE, 1))
         # Now map all tori
-        self._nta = nta
-        self._thetaa = numpy.linspace(0.0, 2.0 * numpy.pi * (1.0 - 1.0 / nta), nta)
-        self._maxiter = maxiter
-        self._angle_tol = angle_tol
-        self._bisect = bisect
         self._xgrid = self._create_xgrid()
         self._ja = _ja(
             self._xgrid,
@@ -163,7 +253,6 @@ class actionAngleVerticalInverse(actionAngleInverse):
         self._Omegas_orig = copy.copy(self._Omegas)
         self._Omegas /= numpy.nanmean(self._djadj, axis=1)
         # Compute Fourier expansions
-        self._nforSn = numpy.arange(self._ja.shape[1] // 2 + 1)
         self._nSn = (
             numpy.real(
                 numpy.fft.rfft(
@@ -183,31 +272,47 @@ class actionAngleVerticalInverse(actionAngleInverse):
             )[:, 1:]
             / self._ja.shape[1]
         )
-        # Interpolation of small, noisy coeffs doesn't work, so set to zero
-        if setup_interp:
-            self._nSn[numpy.fabs(self._nSn) < 1e-16] = 0.0
-            self._dSndJ[numpy.fabs(self._dSndJ) < 1e-15] = 0.0
-        self._dSndJ /= numpy.atleast_2d(self._nforSn)[:, 1:]
-        self._nforSn = self._nforSn[1:]
-        self._js[self._Es < 1e-10] = 0.0
-        # Should use sqrt(2nd deriv. pot), but currently not implemented for 1D
-        if self._nE > 1:
-            self._OmegaHO[self._Es < 1e-10] = self._OmegaHO[1]
-            self._Omegas[self._Es < 1e-10] = self._Omegas[1]
-        self._nSn[self._js < 1e-10] = 0.0
-        self._dSndJ[self._js < 1e-10] = 0.0
-        # Setup interpolation if requested
-        if setup_interp:
-            self._interp = True
-            self._setup_interp()
-        else:
-            self._interp = False
-        return None
+        return {key: getattr(self, "_" + key) for key in _TORI_KEYS}
+
+    def _tori_key(self):
+        # Key that identifies the tori by the potential, energies, and the
+        # parameters of the torus mapping; None if the potential cannot be
+        # represented in a key
+        try:
+            pot_key = (
+                _content_key(self._pot)
+                if not isinstance(self._pot, list)
+                else tuple(_content_key(p) for p in self._pot)
+            )
+        except TypeError:
+            return None
+        return (
+            pot_key,
+            tuple(self._Es),
+            self._nta,
+            self._pt_deg,
+            self._pt_nxa,
+            self._maxiter,
+            self._angle_tol,
+            self._bisect,
+        )
+
+    def _load_saved_tori(self, savefilename):
+        """Load the tori from savefilename; returns None (after warning) if the saved tori were computed for a different setup"""
+        with open(savefilename, "rb") as savefile:
+            tori = pickle.load(savefile)
+        if tori.get("key") != self._tori_key():
+            warnings.warn(
+                "Tori saved in {} were computed for a different potential, energies, nta, point-transformation parameters, or root-finding settings; re-computing the tori and overwriting the file".format(
+                    savefilename
+                ),
+                galpyWarning,
+            )
+            return None
+        return tori
 
     def _setup_pointtransform(self, pt_deg, pt_nxa):
         # Setup a point transformation for each torus
-        self._pt_deg = pt_deg
-        self._pt_nxa = pt_nxa
         xamesh = numpy.linspace(-1.0, 1.0, pt_nxa)
         self._pt_coeffs = numpy.empty((self._nE, pt_deg + 1))
         self._pt_deriv_coeffs = numpy.empty((self._nE, pt_deg))
@@ -1217,6 +1322,13 @@ class actionAngleVerticalInverse(actionAngleInverse):
         return tOmega
 
 
+def _concatenate_tori(tori):
+    # Merge the per-energy tables of tori mapped for consecutive energy chunks
+    return {
+        key: numpy.concatenate([ttori[key] for ttori in tori]) for key in _TORI_KEYS
+    }
+
+
 def _anglea(xa, E, pot, omega, ptcoeffs, ptderivcoeffs, xmax, ptxmax, vsign=1.0):
     """
     Compute the auxiliary angle in the harmonic-oscillator for a grid in x and E
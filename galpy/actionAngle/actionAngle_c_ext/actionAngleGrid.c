@@ -0,0 +1,394 @@
+/*
+  C code for evaluating actions by interpolating the pre-computed grids of
+  actionAngleStaeckelGrid and actionAngleAdiabaticGrid
+*/
+#ifdef _WIN32
+#include <Python.h>
+#endif
+#include <stdio.h>
+#include <stdlib.h>
+#include <stdbool.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#define CHUNKSIZE 100
+//Potentials
+#include <galpy_potentials.h>
+#include <integrateFullOrbit.h>
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+//Macros to export functions in DLL on different OS
+#if defined(_WIN32)
+#define EXPORT __declspec(dllexport)
+#elif defined(__GNUC__)
+#define EXPORT __attribute__((visibility("default")))
+#else
+// Just do nothing?
+#define EXPORT
+#endif
+/*
+  Function Declarations
+*/
+EXPORT void actionAngleStaeckelGrid_actions(int,double *,double *,double *,
+					    double *,double *,int,int *,double *,
+					    tfuncs_type_arr,double,double,double,
+					    int,int,int,int,double *,double *,
+					    double,double,int,double *,int,
+					    double *,double *,double *,double *,
+					    double *,double *,int *);
+EXPORT void actionAngleAdiabaticGrid_jz(int,double *,double *,double *,int,
+					int *,double *,tfuncs_type_arr,double,
+					double,int,double *,double *,int,
+					double *,int,double *,double *,double *,
+					double *,int *);
+EXPORT void actionAngleAdiabaticGrid_jr(int,double *,double *,double *,
+					double *,int,int *,double *,
+					tfuncs_type_arr,double,double,double,int,
+					double *,double *,double,double,int,
+					double *,int,double *,double *,double *,
+					double *,int *);
+double evaluatePotentialsUV(double,double,double,int,struct potentialArg *);
+/*
+  Actual functions, inlines first
+*/
+/*
+  Cubic B-splines as represented by FITPACK (scipy.interpolate's
+  InterpolatedUnivariateSpline and RectBivariateSpline): knot interval search
+  and the non-zero basis functions (following FITPACK's fpbspl)
+*/
+static inline int cubic_spline_interval(double x,int n,double * t){
+  int lo= 3, hi= n - 5, mid;
+  while ( lo < hi ){
+    mid= ( lo + hi + 1 ) / 2;
+    if ( *(t+mid) <= x ) lo= mid;
+    else hi= mid - 1;
+  }
+  return lo;
+}
+static inline void cubic_spline_basis(double x,int l,double * t,double * h){
+  int ii, jj, li, lj;
+  double f, hh[3];
+  *h= 1.;
+  for (jj=1; jj <= 3; jj++){
+    for (ii=0; ii < jj; ii++) *(hh+ii)= *(h+ii);
+    *h= 0.;
+    for (ii=1; ii <= jj; ii++){
+      li= l + ii;
+      lj= li - jj;
+      f= *(hh+ii-1) / ( *(t+li) - *(t+lj) );
+      *(h+ii-1)+= f * ( *(t+li) - x );
+      *(h+ii)= f * ( x - *(t+lj) );
+    }
+  }
+}
+// 1D spline, extrapolating beyond the knots like splev with ext=0
+static inline double eval_cubic_spline_1d(double x,int n,double * t,double * c){
+  int jj, l= cubic_spline_interval(x,n,t);
+  double h[4], out= 0.;
+  cubic_spline_basis(x,l,t,h);
+  for (jj=0; jj < 4; jj++) out+= *(c+l-3+jj) * *(h+jj);
+  return out;
+}
+// 2D spline, clamping to the edges of the grid like bispev
+static inline double eval_cubic_spline_2d(double x,double y,
+					  int nx,double * tx,int ny,double * ty,
+					  double * c){
+  int ii, jj, lx, ly;
+  double hx[4], hy[4], out= 0.;
+  if ( x < *(tx+3) ) x= *(tx+3);
+  if ( x > *(tx+nx-4) ) x= *(tx+nx-4);
+  if ( y < *(ty+3) ) y= *(ty+3);
+  if ( y > *(ty+ny-4) ) y= *(ty+ny-4);
+  lx= cubic_spline_interval(x,nx,tx);
+  ly= cubic_spline_interval(y,ny,ty);
+  cubic_spline_basis(x,lx,tx,hx);
+  cubic_spline_basis(y,ly,ty,hy);
+  for (ii=0; ii < 4; ii++)
+    for (jj=0; jj < 4; jj++)
+      out+= *(c+(lx-3+ii)*(ny-4)+ly-3+jj) * *(hx+ii) * *(hy+jj);
+  return out;
+}
+/*
+  Cubic B-spline interpolation of spline-filtered 3D data, like
+  scipy.ndimage.map_coordinates(order=3,prefilter=False) with the default
+  mode='constant' (coefficients are mirrored at the edges, zero outside)
+*/
+static inline double cubic_bspline_weight(double x){
+  x= fabs(x);
+  if ( x < 1. ) return 2. / 3. - x * x + 0.5 * x * x * x;
+  if ( x < 2. ) return ( 2. - x ) * ( 2. - x ) * ( 2. - x ) / 6.;
+  return 0.;
+}
+static inline int mirror_index(int ii,int n){
+  if ( n == 1 ) return 0;
+  if ( ii < 0 ) ii= -ii;
+  if ( ii > n - 1 ) ii= 2 * ( n - 1 ) - ii;
+  return ii;
+}
+static inline double map_coordinates_cubic_3d(double x,double y,double z,
+					      int n1,int n2,int n3,
+					      double * coeffs){
+  int ii, jj, kk, i0, j0, k0, ti, tj;
+  double wx[4], wy[4], wz[4], out= 0.;
+  if ( x < 0. || x > n1 - 1 || y < 0. || y > n2 - 1 || z < 0. || z > n3 - 1 )
+    return 0.;
+  i0= (int) floor(x) - 1;
+  j0= (int) floor(y) - 1;
+  k0= (int) floor(z) - 1;
+  for (ii=0; ii < 4; ii++){
+    *(wx+ii)= cubic_bspline_weight(x - i0 - ii);
+    *(wy+ii)= cubic_bspline_weight(y - j0 - ii);
+    *(wz+ii)= cubic_bspline_weight(z - k0 - ii);
+  }
+  for (ii=0; ii < 4; ii++){
+    ti= mirror_index(i0+ii,n1) * n2;
+    for (jj=0; jj < 4; jj++){
+      tj= ( ti + mirror_index(j0+jj,n2) ) * n3;
+      for (kk=0; kk < 4; kk++)
+	out+= *(wx+ii) * *(wy+jj) * *(wz+kk)
+	  * *(coeffs+tj+mirror_index(k0+kk,n3));
+    }
+  }
+  return out;
+}
+/*
+  actionAngleStaeckelGrid: the 1D splines in Lz are (in order) those of
+  ERL, ERa, jrLzE, jzLzE, tabulated as t1d[4,nt1d] and c1d[4,nt1d-4]; the 2D
+  spline is that of log(u0) in (Lz,y) and jrFiltered and jzFiltered are the
+  spline-filtered grids of log(jr) and log(jz) in (Lz,y,psi)
+*/
+void actionAngleStaeckelGrid_actions(int ndata,
+				     double *R,
+				     double *vR,
+				     double *vT,
+				     double *z,
+				     double *vz,
+				     int npot,
+				     int * pot_type,
+				     double * pot_args,
+				     tfuncs_type_arr pot_tfuncs,
+				     double delta,
+				     double Lzmin,
+				     double Lzmax,
+				     int nLz,
+				     int nE,
+				     int npsi,
+				     int nt1d,
+				     double * t1d,
+				     double * c1d,
+				     double ERLmax,
+				     double ERamax,
+				     int ntx,
+				     double * tx,
+				     int nty,
+				     double * ty,
+				     double * cu0,
+				     double * jrFiltered,
+				     double * jzFiltered,
+				     double *jr,
+				     double *jz,
+				     int * offgrid){
+  int ii;
+  double Lz, E, ERL, ERa, ratio, EfERa, y, u0, sinh2u0, d12, d22, u, v;
+  double sinhu, coshu, sinv, cosv, pu, pv, potu0pi2, Er, Ez, v2, cos2psi;
+  double sin2psi, psi, Lz22delta;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_leapFuncArgs_Full(npot,actionAngleArgs,&pot_type,&pot_args,&pot_tfuncs);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk)				\
+  private(ii,Lz,E,ERL,ERa,ratio,EfERa,y,u0,sinh2u0,d12,d22,u,v,sinhu,	\
+	  coshu,sinv,cosv,pu,pv,potu0pi2,Er,Ez,v2,cos2psi,sin2psi,psi,	\
+	  Lz22delta)
+  for (ii=0; ii < ndata; ii++){
+    *(offgrid+ii)= 0;
+    Lz= *(R+ii) * *(vT+ii);
+    E= evaluatePotentials(*(R+ii),*(z+ii),npot,actionAngleArgs)
+      + 0.5 * *(vR+ii) * *(vR+ii)
+      + 0.5 * *(vT+ii) * *(vT+ii)
+      + 0.5 * *(vz+ii) * *(vz+ii);
+    ERL= -exp(eval_cubic_spline_1d(Lz,nt1d,t1d,c1d)) + ERLmax;
+    ERa= -exp(eval_cubic_spline_1d(Lz,nt1d,t1d+nt1d,c1d+nt1d-4)) + ERamax;
+    // Move energies just outside of the grid onto the grid's edge
+    ratio= ( E - ERa ) / ( ERL - ERa );
+    if ( ratio > 1. && ratio - 1. < 0.01 ) E= ERL;
+    ratio= ( E - ERa ) / ( ERL - ERa );
+    if ( ratio < 0. && ratio > -0.01 ) E= ERa;
+    ratio= ( E - ERa ) / ( ERL - ERa );
+    if ( Lz < Lzmin || Lz > Lzmax || ratio > 1. || ratio < 0. ){
+      *(offgrid+ii)= 1;
+      continue;
+    }
+    EfERa= log(ERa - ERL + 1e-10);
+    y= ( log(E - ERL + 1e-10) - EfERa ) / ( log(1e-10) - EfERa );
+    u0= exp(eval_cubic_spline_2d(Lz,y,ntx,tx,nty,ty,cu0));
+    sinh2u0= sinh(u0) * sinh(u0);
+    // (u,v) and their momenta (divided by delta)
+    d12= ( *(z+ii) + delta ) * ( *(z+ii) + delta ) + *(R+ii) * *(R+ii);
+    d22= ( *(z+ii) - delta ) * ( *(z+ii) - delta ) + *(R+ii) * *(R+ii);
+    u= acosh(0.5 / delta * ( sqrt(d12) + sqrt(d22) ));
+    v= acos(0.5 / delta * ( sqrt(d12) - sqrt(d22) ));
+    sinhu= sinh(u);
+    coshu= cosh(u);
+    sinv= sin(v);
+    cosv= cos(v);
+    pu= *(vR+ii) * coshu * sinv + *(vz+ii) * sinhu * cosv;
+    pv= *(vR+ii) * sinhu * cosv - *(vz+ii) * coshu * sinv;
+    Lz22delta= 0.5 * Lz * Lz / delta / delta;
+    potu0pi2= evaluatePotentialsUV(u0,0.5 * M_PI,delta,npot,actionAngleArgs);
+    // 'radial' and 'vertical' energies
+    Er= 0.5 * pu * pu + Lz22delta * ( 1. / sinhu / sinhu - 1. / sinh2u0 )
+      - E * ( sinhu * sinhu - sinh2u0 )
+      + ( sinhu * sinhu + 1. )
+      * evaluatePotentialsUV(u,0.5 * M_PI,delta,npot,actionAngleArgs)
+      - ( sinh2u0 + 1. ) * potu0pi2;
+    Ez= 0.5 * pv * pv + Lz22delta * ( 1. / sinv / sinv - 1. )
+      - E * ( sinv * sinv - 1. )
+      - ( sinh2u0 + 1. ) * potu0pi2
+      + ( sinh2u0 + sinv * sinv )
+      * evaluatePotentialsUV(u0,v,delta,npot,actionAngleArgs);
+    v2= 2. * ( E - potu0pi2 ) - Lz * Lz / delta / delta / sinh2u0;
+    cos2psi= 2. * Er / v2 / ( 1. + sinh2u0 );
+    if ( cos2psi > 1. && cos2psi < 1. + 1e-5 ) cos2psi= 1.;
+    sin2psi= 2. * Ez / v2 / ( 1. + sinh2u0 );
+    if ( sin2psi > 1. && sin2psi < 1. + 1e-5 ) sin2psi= 1.;
+    if ( cos2psi > 1. || cos2psi < 0. || sin2psi > 1. || sin2psi < 0. ){
+      *(offgrid+ii)= 1;
+      continue;
+    }
+    // Interpolate
+    psi= acos(sqrt(cos2psi));
+    *(jr+ii)= ( exp(map_coordinates_cubic_3d(( Lz - Lzmin ) / ( Lzmax - Lzmin )
+					     * ( nLz - 1. ),
+					     y * ( nE - 1. ),
+					     psi / M_PI * 2. * ( npsi - 1. ),
+					     nLz,nE,npsi,jrFiltered))
+		- 1e-10 )
+      * ( exp(eval_cubic_spline_1d(Lz,nt1d,t1d+2*nt1d,c1d+2*(nt1d-4))) - 1e-5 );
+    psi= asin(sqrt(sin2psi));
+    *(jz+ii)= ( exp(map_coordinates_cubic_3d(( Lz - Lzmin ) / ( Lzmax - Lzmin )
+					     * ( nLz - 1. ),
+					     y * ( nE - 1. ),
+					     psi / M_PI * 2. * ( npsi - 1. ),
+					     nLz,nE,npsi,jzFiltered))
+		- 1e-10 )
+      * ( exp(eval_cubic_spline_1d(Lz,nt1d,t1d+3*nt1d,c1d+3*(nt1d-4))) - 1e-5 );
+  }
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+}
+/*
+  actionAngleAdiabaticGrid, vertical action: the 1D splines in R are (in
+  order) those of log(EzZmax) and log(jzEzmax), tabulated as t1d[2,nt1d] and
+  c1d[2,nt1d-4]; the 2D spline is that of jz in (R,Ez/EzZmax); also returns Ez
+*/
+void actionAngleAdiabaticGrid_jz(int ndata,
+				 double *R,
+				 double *z,
+				 double *vz,
+				 int npot,
+				 int * pot_type,
+				 double * pot_args,
+				 tfuncs_type_arr pot_tfuncs,
+				 double Rmin,
+				 double Rmax,
+				 int nt1d,
+				 double * t1d,
+				 double * c1d,
+				 int ntx,
+				 double * tx,
+				 int nty,
+				 double * ty,
+				 double * cjz,
+				 double *Ez,
+				 double *jz,
+				 int * offgrid){
+  int ii;
+  double EzZmax;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_leapFuncArgs_Full(npot,actionAngleArgs,&pot_type,&pot_args,&pot_tfuncs);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk) private(ii,EzZmax)
+  for (ii=0; ii < ndata; ii++){
+    *(offgrid+ii)= 0;
+    *(Ez+ii)= evaluatePotentials(*(R+ii),*(z+ii),npot,actionAngleArgs)
+      - evaluatePotentials(*(R+ii),0.,npot,actionAngleArgs)
+      + 0.5 * *(vz+ii) * *(vz+ii);
+    EzZmax= exp(eval_cubic_spline_1d(*(R+ii),nt1d,t1d,c1d));
+    if ( *(R+ii) > Rmax || *(R+ii) < Rmin
+	 || ( *(Ez+ii) != 0. && log(*(Ez+ii)) > EzZmax ) ){
+      *(offgrid+ii)= 1;
+      continue;
+    }
+    *(jz+ii)= eval_cubic_spline_2d(*(R+ii),*(Ez+ii) / EzZmax,ntx,tx,nty,ty,cjz)
+      * ( exp(eval_cubic_spline_1d(*(R+ii),nt1d,t1d+nt1d,c1d+nt1d-4)) - 1e-5 );
+  }
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+}
+/*
+  actionAngleAdiabaticGrid, radial action given jz: the 1D splines in
+  Lz+gamma*jz are (in order) those of ERRL, ERRa, and jrERRa, tabulated as
+  t1d[3,nt1d] and c1d[3,nt1d-4]; the 2D spline is that of jr in
+  (Lz+gamma*jz,(ER-ERRa)/(ERRL-ERRa)); also returns ER
+*/
+void actionAngleAdiabaticGrid_jr(int ndata,
+				 double *R,
+				 double *vR,
+				 double *vT,
+				 double *jz,
+				 int npot,
+				 int * pot_type,
+				 double * pot_args,
+				 tfuncs_type_arr pot_tfuncs,
+				 double gamma,
+				 double Lzmin,
+				 double Lzmax,
+				 int nt1d,
+				 double * t1d,
+				 double * c1d,
+				 double ERRLmax,
+				 double ERRamax,
+				 int ntx,
+				 double * tx,
+				 int nty,
+				 double * ty,
+				 double * cjr,
+				 double *ER,
+				 double *jr,
+				 int * offgrid){
+  int ii;
+  double ERLz, ERRL, ERRa, ratio;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_leapFuncArgs_Full(npot,actionAngleArgs,&pot_type,&pot_args,&pot_tfuncs);
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk) private(ii,ERLz,ERRL,ERRa,ratio)
+  for (ii=0; ii < ndata; ii++){
+    *(offgrid+ii)= 0;
+    ERLz= fabs(*(R+ii) * *(vT+ii)) + gamma * *(jz+ii);
+    *(ER+ii)= evaluatePotentials(*(R+ii),0.,npot,actionAngleArgs)
+      + 0.5 * *(vR+ii) * *(vR+ii)
+      + 0.5 * ERLz * ERLz / *(R+ii) / *(R+ii);
+    ERRL= -exp(eval_cubic_spline_1d(ERLz,nt1d,t1d,c1d)) + ERRLmax;
+    ERRa= -exp(eval_cubic_spline_1d(ERLz,nt1d,t1d+nt1d,c1d+nt1d-4)) + ERRamax;
+    // Move energies just outside of the grid onto the grid's edge
+    ratio= ( *(ER+ii) - ERRa ) / ( ERRL - ERRa );
+    if ( ratio > 1. && ratio - 1. < 0.01 ) *(ER+ii)= ERRL;
+    ratio= ( *(ER+ii) - ERRa ) / ( ERRL - ERRa );
+    if ( ratio < 0. && ratio > -0.01 ) *(ER+ii)= ERRa;
+    ratio= ( *(ER+ii) - ERRa ) / ( ERRL - ERRa );
+    if ( ERLz < Lzmin || ERLz > Lzmax || ratio > 1. || ratio < 0. ){
+      *(offgrid+ii)= 1;
+      continue;
+    }
+    *(jr+ii)= eval_cubic_spline_2d(ERLz,ratio,ntx,tx,nty,ty,cjr)
+      * ( exp(eval_cubic_spline_1d(ERLz,nt1d,t1d+2*nt1d,c1d+2*(nt1d-4))) - 1e-5 );
+  }
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+}
@@ -0,0 +1,149 @@
+/*
+  C code for the inverse action-angle transformation in the isochrone potential
+*/
+#include <stdio.h>
+#include <stdlib.h>
+#include <math.h>
+#ifdef _OPENMP
+#include <omp.h>
+#endif
+#define CHUNKSIZE 1000
+#include <actionAngle.h>
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+//Macros to export functions in DLL on different OS
+#if defined(_WIN32)
+#define EXPORT __declspec(dllexport)
+#elif defined(__GNUC__)
+#define EXPORT __attribute__((visibility("default")))
+#else
+// Just do nothing?
+#define EXPORT
+#endif
+/*
+  Function Declarations
+*/
+EXPORT void actionAngleIsochroneInverse_xvFreqs(int,double *,double *,double *,
+						double *,double *,double *,
+						double,double,
+						double *,double *,double *,
+						double *,double *,double *,
+						double *,double *,double *,
+						int *);
+double solveIsochroneEta(double,double,int *);
+/*
+  Actual functions
+*/
+/*
+  Solve the isochrone's Kepler-like equation eta - ec sin(eta) = ar for eta
+  with 0 <= ar < 2pi and 0 <= ec < 1, using Newton-Raphson safeguarded by
+  bisection on the bracket [0,2pi] (the left-hand side is monotonic in eta)
+*/
+double solveIsochroneEta(double ar,double ec,int * err){
+  int ii;
+  double eta, f, fp, deta;
+  double etamin= 0., etamax= 2. * M_PI;
+  // Good starting guess
+  eta= ar + ec * sin(ar);
+  for (ii=0; ii < 100; ii++){
+    f= eta - ec * sin(eta) - ar;
+    if ( f == 0. ) return eta;
+    // Update the bracket
+    if ( f < 0. ) etamin= eta;
+    else etamax= eta;
+    fp= 1. - ec * cos(eta);
+    deta= f / fp;
+    eta-= deta;
+    if ( eta <= etamin || eta >= etamax || fp == 0. ){
+      // Newton step left the bracket, bisect instead
+      eta= 0.5 * ( etamin + etamax );
+      deta= etamax - etamin;
+    }
+    if ( fabs(deta) < 1e-15 * ( 1. + fabs(eta) ) ) return eta;
+  }
+  *err= -1;
+  return eta;
+}
+void actionAngleIsochroneInverse_xvFreqs(int ndata,
+					 double * jr,
+					 double * jphi,
+					 double * jz,
+					 double * angler,
+					 double * anglephi,
+					 double * anglez,
+					 double amp,
+					 double b,
+					 double * R,
+					 double * vR,
+					 double * vT,
+					 double * z,
+					 double * vz,
+					 double * phi,
+					 double * Omegar,
+					 double * Omegaphi,
+					 double * Omegaz,
+					 int * err){
+  int ii, terr;
+  double L, L2, sqrtfourbkL2, H, a, ab, e, ar, eta, coseta, r, vr, taneta2;
+  double tan11, tan12, Lambdaeta, psi, lowerl, sintheta, costheta, vtheta;
+  double sinu, u, signjphi;
+  UNUSED int chunk= CHUNKSIZE;
+  terr= 0;
+#pragma omp parallel for schedule(static,chunk)				\
+  private(ii,L,L2,sqrtfourbkL2,H,a,ab,e,ar,eta,coseta,r,vr,taneta2,	\
+	  tan11,tan12,Lambdaeta,psi,lowerl,sintheta,costheta,vtheta,	\
+	  sinu,u,signjphi)						\
+  reduction(min:terr)
+  for (ii=0; ii < ndata; ii++){
+    int eta_err= 0;
+    L= *(jz+ii) + fabs(*(jphi+ii)); // total angular momentum
+    L2= L * L;
+    sqrtfourbkL2= sqrt(L2 + 4. * b * amp);
+    H= -2. * amp * amp / ( 2. * *(jr+ii) + L + sqrtfourbkL2 )
+      / ( 2. * *(jr+ii) + L + sqrtfourbkL2 );
+    // Frequencies
+    *(Omegar+ii)= pow(-2. * H,1.5) / amp;
+    *(Omegaz+ii)= ( 1. + L / sqrtfourbkL2 ) / 2. * *(Omegar+ii);
+    signjphi= (double) ( ( *(jphi+ii) > 0. ) - ( *(jphi+ii) < 0. ) );
+    *(Omegaphi+ii)= signjphi * *(Omegaz+ii);
+    // Coordinates
+    a= -amp / 2. / H - b;
+    ab= a + b;
+    e= sqrt(1. + L2 / ( 2. * H * a * a ) );
+    // Solve Kepler's-ish equation; ar must be between 0 and 2pi
+    ar= fmod(*(angler+ii),2. * M_PI);
+    if ( ar < 0. ) ar+= 2. * M_PI;
+    eta= solveIsochroneEta(ar,a * e / ab,&eta_err);
+    if ( eta_err < terr ) terr= eta_err;
+    coseta= cos(eta);
+    r= a * sqrt( ( 1. - e * coseta ) * ( 1. - e * coseta + 2. * b / a ) );
+    vr= sqrt(amp / ab) * a * e * sin(eta) / r;
+    taneta2= tan(0.5 * eta);
+    tan11= atan(sqrt( ( 1. + e ) / ( 1. - e ) ) * taneta2);
+    tan12= atan(sqrt( ( a * ( 1. + e ) + 2. * b ) / ( a * ( 1. - e ) + 2. * b ) )
+		* taneta2);
+    if ( tan11 < 0. ) tan11+= M_PI;
+    if ( tan12 < 0. ) tan12+= M_PI;
+    Lambdaeta= tan11 + L / sqrtfourbkL2 * tan12;
+    psi= *(anglez+ii) - *(Omegaz+ii) / *(Omegar+ii) * ar + Lambdaeta;
+    lowerl= sqrt(1. - *(jphi+ii) * *(jphi+ii) / L2);
+    sintheta= sin(psi) * lowerl;
+    costheta= sqrt(1. - sintheta * sintheta);
+    vtheta= L * lowerl * cos(psi) / costheta / r;
+    *(R+ii)= r * costheta;
+    *(z+ii)= r * sintheta;
+    *(vR+ii)= vr * costheta - vtheta * sintheta;
+    *(vz+ii)= vr * sintheta + vtheta * costheta;
+    *(vT+ii)= *(jphi+ii) / *(R+ii);
+    sinu= sintheta / costheta * *(jphi+ii) / L / lowerl;
+    u= asin(sinu);
+    if ( vtheta < 0. ) u= M_PI - u;
+    *(phi+ii)= *(anglephi+ii) - signjphi * *(anglez+ii) + u;
+    // For non-inclined orbits, phi == psi
+    if ( ! isfinite(*(phi+ii)) ) *(phi+ii)= psi;
+    *(phi+ii)= fmod(*(phi+ii),2. * M_PI);
+    if ( *(phi+ii) < 0. ) *(phi+ii)+= 2. * M_PI;
+  }
+  *err= terr;
+}
@@ -108,6 +108,11 @@ EXPORT void actionAngleStaeckel_uminUmaxVmin(int,double *,double *,double *,doub
 EXPORT void actionAngleStaeckel_actions(int,double *,double *,double *,double *,
 				 double *,double *,int,int *,double *,tfuncs_type_arr,int,
 				 double *,int,double *,double *,int *);
+EXPORT void actionAngleStaeckel_actions_adaptive(int,double *,double *,double *,
+					  double *,double *,double *,int,int *,
+					  double *,tfuncs_type_arr,int,double *,
+					  int,int,double,double *,double *,
+					  double *,double *,int *);
 EXPORT void actionAngleStaeckel_actionsFreqsAngles(int,double *,double *,double *,
 					    double *,double *,double *,
 					    int,int *,double *,tfuncs_type_arr,
@@ -136,6 +141,15 @@ void calcJRStaeckel(int,double *,double *,double *,double *,double *,double *,
 void calcJzStaeckel(int,double *,double *,double *,double *,double *,int,
 		    double *,double *,double *,double *,double *,int,
 		    struct potentialArg *,int);
+void calcJRStaeckelAdaptive(int,double *,double *,double *,double *,double *,
+			    double *,double *,int,double *,double *,double *,
+			    double *,double *,double *,int,
+			    struct potentialArg *,int,int,double);
+void calcJzStaeckelAdaptive(int,double *,double *,double *,double *,double *,
+			    double *,int,double *,double *,double *,double *,
+			    double *,int,struct potentialArg *,int,int,double);
+void glfixedBatchStaeckel(int,int *,int,double (*)(double,void *),void *,
+			  size_t,double *,int,double *,int,double *);
 void calcdJRStaeckel(int,double *,double *,double *,double *,double *,
 		     double *,double *,double *,int,
 		     double *,double *,double *,double *,double *,double *,int,
@@ -661,6 +675,349 @@ void calcJzStaeckel(int ndata,
   free(params);
   gsl_integration_glfixed_table_free ( T );
 }
+void actionAngleStaeckel_actions_adaptive(int ndata,
+					  double *R,
+					  double *vR,
+					  double *vT,
+					  double *z,
+					  double *vz,
+					  double *u0,
+					  int npot,
+					  int * pot_type,
+					  double * pot_args,
+					  tfuncs_type_arr pot_tfuncs,
+					  int ndelta,
+					  double * delta,
+					  int order,
+					  int maxorder,
+					  double tol,
+					  double *jr,
+					  double *jz,
+					  double *jrerr,
+					  double *jzerr,
+					  int * err){
+  int ii;
+  double tdelta;
+  //Set up the potentials
+  struct potentialArg * actionAngleArgs= (struct potentialArg *) malloc ( npot * sizeof (struct potentialArg) );
+  parse_leapFuncArgs_Full(npot,actionAngleArgs,&pot_type,&pot_args,&pot_tfuncs);
+  //E,Lz
+  double *E= (double *) malloc ( ndata * sizeof(double) );
+  double *Lz= (double *) malloc ( ndata * sizeof(double) );
+  calcEL(ndata,R,vR,vT,z,vz,E,Lz,npot,actionAngleArgs);
+  //Calculate all necessary parameters
+  double *ux= (double *) malloc ( ndata * sizeof(double) );
+  double *vx= (double *) malloc ( ndata * sizeof(double) );
+  Rz_to_uv_vec(ndata,R,z,ux,vx,ndelta,delta);
+  double *coshux= (double *) malloc ( ndata * sizeof(double) );
+  double *sinhux= (double *) malloc ( ndata * sizeof(double) );
+  double *sinvx= (double *) malloc ( ndata * sizeof(double) );
+  double *cosvx= (double *) malloc ( ndata * sizeof(double) );
+  double *pux= (double *) malloc ( ndata * sizeof(double) );
+  double *pvx= (double *) malloc ( ndata * sizeof(double) );
+  double *sinh2u0= (double *) malloc ( ndata * sizeof(double) );
+  double *cosh2u0= (double *) malloc ( ndata * sizeof(double) );
+  double *v0= (double *) malloc ( ndata * sizeof(double) );
+  double *sin2v0= (double *) malloc ( ndata * sizeof(double) );
+  double *potu0v0= (double *) malloc ( ndata * sizeof(double) );
+  double *potupi2= (double *) malloc ( ndata * sizeof(double) );
+  double *I3U= (double *) malloc ( ndata * sizeof(double) );
+  double *I3V= (double *) malloc ( ndata * sizeof(double) );
+  int delta_stride= ndelta == 1 ? 0 : 1;
+  UNUSED int chunk= CHUNKSIZE;
+#pragma omp parallel for schedule(static,chunk) private(ii,tdelta)
+  for (ii=0; ii < ndata; ii++){
+    tdelta= *(delta+ii*delta_stride);
+    *(coshux+ii)= cosh(*(ux+ii));
+    *(sinhux+ii)= sinh(*(ux+ii));
+    *(cosvx+ii)= cos(*(vx+ii));
+    *(sinvx+ii)= sin(*(vx+ii));
+    *(pux+ii)= tdelta * (*(vR+ii) * *(coshux+ii) * *(sinvx+ii)
+			+ *(vz+ii) * *(sinhux+ii) * *(cosvx+ii));
+    *(pvx+ii)= tdelta * (*(vR+ii) * *(sinhux+ii) * *(cosvx+ii)
+			- *(vz+ii) * *(coshux+ii) * *(sinvx+ii));
+    *(sinh2u0+ii)= sinh(*(u0+ii)) * sinh(*(u0+ii));
+    *(cosh2u0+ii)= cosh(*(u0+ii)) * cosh(*(u0+ii));
+    *(v0+ii)= 0.5 * M_PI; //*(vx+ii);
+    *(sin2v0+ii)= sin(*(v0+ii)) * sin(*(v0+ii));
+    *(potu0v0+ii)= evaluatePotentialsUV(*(u0+ii),*(v0+ii),tdelta,
+					npot,actionAngleArgs);
+    *(I3U+ii)= *(E+ii) * *(sinhux+ii) * *(sinhux+ii)
+      - 0.5 * *(pux+ii) * *(pux+ii) / tdelta / tdelta
+      - 0.5 * *(Lz+ii) * *(Lz+ii) / tdelta / tdelta / *(sinhux+ii) / *(sinhux+ii)
+      - ( *(sinhux+ii) * *(sinhux+ii) + *(sin2v0+ii))
+      *evaluatePotentialsUV(*(ux+ii),*(v0+ii),tdelta,
+			    npot,actionAngleArgs)
+      + ( *(sinh2u0+ii) + *(sin2v0+ii) )* *(potu0v0+ii);
+    *(potupi2+ii)= evaluatePotentialsUV(*(u0+ii),0.5 * M_PI,tdelta,
+					npot,actionAngleArgs);
+    *(I3V+ii)= - *(E+ii) * *(sinvx+ii) * *(sinvx+ii)
+      + 0.5 * *(pvx+ii) * *(pvx+ii) / tdelta / tdelta
+      + 0.5 * *(Lz+ii) * *(Lz+ii) / tdelta / tdelta / *(sinvx+ii) / *(sinvx+ii)
+      - *(cosh2u0+ii) * *(potupi2+ii)
+      + ( *(sinh2u0+ii) + *(sinvx+ii) * *(sinvx+ii))
+      * evaluatePotentialsUV(*(u0+ii),*(vx+ii),tdelta,
+			     npot,actionAngleArgs);
+  }
+  //Calculate 'peri' and 'apo'centers
+  double *umin= (double *) malloc ( ndata * sizeof(double) );
+  double *umax= (double *) malloc ( ndata * sizeof(double) );
+  double *vmin= (double *) malloc ( ndata * sizeof(double) );
+  calcUminUmax(ndata,umin,umax,ux,pux,E,Lz,I3U,ndelta,delta,u0,sinh2u0,v0,
+	       sin2v0,potu0v0,npot,actionAngleArgs);
+  calcVmin(ndata,vmin,vx,pvx,E,Lz,I3V,ndelta,delta,u0,cosh2u0,sinh2u0,potupi2,
+	   npot,actionAngleArgs);
+  //Calculate the actions, adaptively increasing the order
+  calcJRStaeckelAdaptive(ndata,jr,jrerr,umin,umax,E,Lz,I3U,ndelta,delta,u0,
+			 sinh2u0,v0,sin2v0,potu0v0,npot,actionAngleArgs,
+			 order,maxorder,tol);
+  calcJzStaeckelAdaptive(ndata,jz,jzerr,vmin,E,Lz,I3V,ndelta,delta,u0,cosh2u0,
+			 sinh2u0,potupi2,npot,actionAngleArgs,
+			 order,maxorder,tol);
+  //Free
+  free_potentialArgs(npot,actionAngleArgs);
+  free(actionAngleArgs);
+  free(E);
+  free(Lz);
+  free(ux);
+  free(vx);
+  free(coshux);
+  free(sinhux);
+  free(sinvx);
+  free(cosvx);
+  free(pux);
+  free(pvx);
+  free(sinh2u0);
+  free(cosh2u0);
+  free(v0);
+  free(sin2v0);
+  free(potu0v0);
+  free(potupi2);
+  free(I3U);
+  free(I3V);
+  free(umin);
+  free(umax);
+  free(vmin);
+}
+/*
+  Fixed-order Gauss-Legendre integration of func for a batch of orbits
+  (indices active), with the quadrature nodes of all orbits evaluated together
+  in a single flattened loop; params is an array of integrand-argument
+  structures of size paramsize for all orbits, a and b are the integration
+  limits (stride zero for a limit that is the same for all orbits)
+*/
+#define GLBATCHSIZE 16384
+void glfixedBatchStaeckel(int nactive,
+			  int * active,
+			  int order,
+			  double (*func)(double,void *),
+			  void * params,
+			  size_t paramsize,
+			  double * a,
+			  int a_stride,
+			  double * b,
+			  int b_stride,
+			  double * out){
+  int ii, jj, kk, ll, nbatch;
+  double A, B, Ax, s;
+  void * tparams;
+  gsl_integration_glfixed_table * T= gsl_integration_glfixed_table_alloc (order);
+  int m= (order + 1) >> 1;
+  double * fvals= (double *) malloc ( GLBATCHSIZE * m * sizeof(double) );
+  UNUSED int chunk= CHUNKSIZE;
+  for (ll=0; ll < nactive; ll+= GLBATCHSIZE){
+    nbatch= nactive - ll < GLBATCHSIZE ? nactive - ll : GLBATCHSIZE;
+    // Evaluate the integrand at all nodes of all orbits in this batch
+#pragma omp parallel for schedule(static,chunk)		\
+  private(ii,jj,kk,A,B,Ax,tparams)				\
+  shared(nbatch,ll,m,active,T,params,fvals,a,b)
+    for (jj=0; jj < nbatch * m; jj++){
+      ii= *(active + ll + jj / m);
+      kk= jj % m;
+      A= 0.5 * ( *(b+ii*b_stride) - *(a+ii*a_stride) );
+      B= 0.5 * ( *(b+ii*b_stride) + *(a+ii*a_stride) );
+      tparams= (char *) params + ii * paramsize;
+      if ( ( order & 1 ) && kk == 0 ) // odd order: central node
+	*(fvals+jj)= *(T->w) * func(B,tparams);
+      else {
+	Ax= A * *(T->x+kk);
+	*(fvals+jj)= *(T->w+kk) * ( func(B+Ax,tparams) + func(B-Ax,tparams) );
+      }
+    }
+    // Sum the contributions of all nodes for each orbit
+#pragma omp parallel for schedule(static,chunk)	\
+  private(ii,jj,kk,A,s)				\
+  shared(nbatch,ll,m,active,fvals,a,b,out)
+    for (jj=0; jj < nbatch; jj++){
+      ii= *(active + ll + jj);
+      A= 0.5 * ( *(b+ii*b_stride) - *(a+ii*a_stride) );
+      s= 0.;
+      for (kk=0; kk < m; kk++)
+	s+= *(fvals+jj*m+kk);
+      *(out+ii)= A * s;
+    }
+  }
+  free(fvals);
+  gsl_integration_glfixed_table_free ( T );
+}
+void calcJRStaeckelAdaptive(int ndata,
+			    double * jr,
+			    double * jrerr,
+			    double * umin,
+			    double * umax,
+			    double * E,
+			    double * Lz,
+			    double * I3U,
+			    int ndelta,
+			    double * delta,
+			    double * u0,
+			    double * sinh2u0,
+			    double * v0,
+			    double * sin2v0,
+			    double * potu0v0,
+			    int nargs,
+			    struct potentialArg * actionAngleArgs,
+			    int order,
+			    int maxorder,
+			    double tol){
+  int ii, jj, nactive, nintegrate, torder;
+  int delta_stride= ndelta == 1 ? 0 : 1;
+  struct JRStaeckelArg * params= (struct JRStaeckelArg *) malloc ( ndata * sizeof (struct JRStaeckelArg) );
+  int * integrate= (int *) malloc ( ndata * sizeof(int) );
+  int * active= (int *) malloc ( ndata * sizeof(int) );
+  double * newjr= (double *) malloc ( ndata * sizeof(double) );
+  // Set up the integrand parameters for all orbits that need to be integrated
+  nintegrate= 0;
+  for (ii=0; ii < ndata; ii++){
+    *(jrerr+ii)= 0.;
+    if ( *(umin+ii) == -9999.99 || *(umax+ii) == -9999.99 ){
+      *(jr+ii)= 9999.99;
+      continue;
+    }
+    if ( (*(umax+ii) - *(umin+ii)) / *(umax+ii) < 0.000001 ){//circular
+      *(jr+ii) = 0.;
+      continue;
+    }
+    (params+ii)->delta= *(delta+ii*delta_stride);
+    (params+ii)->E= *(E+ii);
+    (params+ii)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
+    (params+ii)->I3U= *(I3U+ii);
+    (params+ii)->u0= *(u0+ii);
+    (params+ii)->sinh2u0= *(sinh2u0+ii);
+    (params+ii)->v0= *(v0+ii);
+    (params+ii)->sin2v0= *(sin2v0+ii);
+    (params+ii)->potu0v0= *(potu0v0+ii);
+    (params+ii)->nargs= nargs;
+    (params+ii)->actionAngleArgs= actionAngleArgs;
+    *(integrate+nintegrate)= ii;
+    *(active+nintegrate++)= ii;
+  }
+  // Integrate at the initial order, then keep doubling the order for orbits
+  // whose integral changed by more than tol
+  torder= order;
+  nactive= nintegrate;
+  glfixedBatchStaeckel(nactive,active,torder,&JRStaeckelIntegrand,params,
+		       sizeof (struct JRStaeckelArg),umin,1,umax,1,jr);
+  while ( nactive > 0 && 2 * torder <= maxorder ){
+    torder*= 2;
+    glfixedBatchStaeckel(nactive,active,torder,&JRStaeckelIntegrand,params,
+			 sizeof (struct JRStaeckelArg),umin,1,umax,1,newjr);
+    jj= 0;
+    for (ii=0; ii < nactive; ii++){
+      *(jrerr+*(active+ii))= fabs(*(newjr+*(active+ii)) - *(jr+*(active+ii)));
+      *(jr+*(active+ii))= *(newjr+*(active+ii));
+      if ( *(jrerr+*(active+ii)) > tol * fabs(*(jr+*(active+ii))) )
+	*(active+jj++)= *(active+ii);
+    }
+    nactive= jj;
+  }
+  for (ii=0; ii < nintegrate; ii++){
+    *(jr+*(integrate+ii))*= sqrt(2.) * *(delta+*(integrate+ii)*delta_stride) / M_PI;
+    *(jrerr+*(integrate+ii))*= sqrt(2.) * *(delta+*(integrate+ii)*delta_stride) / M_PI;
+  }
+  free(params);
+  free(integrate);
+  free(active);
+  free(newjr);
+}
+void calcJzStaeckelAdaptive(int ndata,
+			    double * jz,
+			    double * jzerr,
+			    double * vmin,
+			    double * E,
+			    double * Lz,
+			    double * I3V,
+			    int ndelta,
+			    double * delta,
+			    double * u0,
+			    double * cosh2u0,
+			    double * sinh2u0,
+			    double * potupi2,
+			    int nargs,
+			    struct potentialArg * actionAngleArgs,
+			    int order,
+			    int maxorder,
+			    double tol){
+  int ii, jj, nactive, nintegrate, torder;
+  double halfpi= 0.5 * M_PI;
+  int delta_stride= ndelta == 1 ? 0 : 1;
+  struct JzStaeckelArg * params= (struct JzStaeckelArg *) malloc ( ndata * sizeof (struct JzStaeckelArg) );
+  int * integrate= (int *) malloc ( ndata * sizeof(int) );
+  int * active= (int *) malloc ( ndata * sizeof(int) );
+  double * newjz= (double *) malloc ( ndata * sizeof(double) );
+  // Set up the integrand parameters for all orbits that need to be integrated
+  nintegrate= 0;
+  for (ii=0; ii < ndata; ii++){
+    *(jzerr+ii)= 0.;
+    if ( *(vmin+ii) == -9999.99 ){
+      *(jz+ii)= 9999.99;
+      continue;
+    }
+    if ( (0.5 * M_PI - *(vmin+ii)) / M_PI * 2. < 0.000001 ){//circular
+      *(jz+ii) = 0.;
+      continue;
+    }
+    (params+ii)->delta= *(delta+ii*delta_stride);
+    (params+ii)->E= *(E+ii);
+    (params+ii)->Lz22delta= 0.5 * *(Lz+ii) * *(Lz+ii) / *(delta+ii*delta_stride) / *(delta+ii*delta_stride);
+    (params+ii)->I3V= *(I3V+ii);
+    (params+ii)->u0= *(u0+ii);
+    (params+ii)->cosh2u0= *(cosh2u0+ii);
+    (params+ii)->sinh2u0= *(sinh2u0+ii);
+    (params+ii)->potupi2= *(potupi2+ii);
+    (params+ii)->nargs= nargs;
+    (params+ii)->actionAngleArgs= actionAngleArgs;
+    *(integrate+nintegrate)= ii;
+    *(active+nintegrate++)= ii;
+  }
+  // Integrate at the initial order, then keep doubling the order for orbits
+  // whose integral changed by more than tol
+  torder= order;
+  nactive= nintegrate;
+  glfixedBatchStaeckel(nactive,active,torder,&JzStaeckelIntegrand,params,
+		       sizeof (struct JzStaeckelArg),vmin,1,&halfpi,0,jz);
+  while ( nactive > 0 && 2 * torder <= maxorder ){
+    torder*= 2;
+    glfixedBatchStaeckel(nactive,active,torder,&JzStaeckelIntegrand,params,
+			 sizeof (struct JzStaeckelArg),vmin,1,&halfpi,0,newjz);
+    jj= 0;
+    for (ii=0; ii < nactive; ii++){
+      *(jzerr+*(active+ii))= fabs(*(newjz+*(active+ii)) - *(jz+*(active+ii)));
+      *(jz+*(active+ii))= *(newjz+*(active+ii));
+      if ( *(jzerr+*(active+ii)) > tol * fabs(*(jz+*(active+ii))) )
+	*(active+jj++)= *(active+ii);
+    }
+    nactive= jj;
+  }
+  for (ii=0; ii < nintegrate; ii++){
+    *(jz+*(integrate+ii))*= 2 * sqrt(2.) * *(delta+*(integrate+ii)*delta_stride) / M_PI;
+    *(jzerr+*(integrate+ii))*= 2 * sqrt(2.) * *(delta+*(integrate+ii)*delta_stride) / M_PI;
+  }
+  free(params);
+  free(integrate);
+  free(active);
+  free(newjz);
+}
 void actionAngleStaeckel_actionsFreqs(int ndata,
 				      double *R,
 				      double *vR,
@@ -16,6 +16,7 @@ from . import (
     sphericaldf,
     streamdf,
     streamgapdf,
+    streampepperdf,
     streamspraydf,
     surfaceSigmaProfile,
 )
@@ -52,9 +53,11 @@ diskdf = diskdf.diskdf
 evolveddiskdf = evolveddiskdf.evolveddiskdf
 expSurfaceSigmaProfile = surfaceSigmaProfile.expSurfaceSigmaProfile
 surfaceSigmaProfile = surfaceSigmaProfile.surfaceSigmaProfile
+ActionNodeCache = quasiisothermaldf.ActionNodeCache
 quasiisothermaldf = quasiisothermaldf.quasiisothermaldf
 streamdf = streamdf.streamdf
 streamgapdf = streamgapdf.streamgapdf
+streampepperdf = streampepperdf.streampepperdf
 sphericaldf = sphericaldf.sphericaldf
 eddingtondf = eddingtondf.eddingtondf
 isotropicHernquistdf = isotropicHernquistdf.isotropicHernquistdf
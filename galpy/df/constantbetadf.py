@@ -8,7 +8,13 @@ from ..potential import interpSphericalPotential
 from ..potential.Potential import _evaluatePotentials
 from ..util import conversion, quadpack
 from ..util._optional_deps import _JAX_LOADED
-from .sphericaldf import anisotropicsphericaldf, sphericaldf
+from .sphericaldf import (
+    _TABULATE_LNRRANGE,
+    _fEtable_key,
+    _get_fEtable,
+    _gl_integrate,
+    anisotropicsphericaldf,
+)
 
 if _JAX_LOADED:
     from jax import grad, vmap
@@ -19,6 +25,10 @@ if _JAX_LOADED:
 class _constantbetadf(anisotropicsphericaldf):
     """Class that implements DFs of the form f(E,L) = L^{-2\beta} f(E) with constant beta anisotropy parameter"""
 
+    _content_key_exclude = anisotropicsphericaldf._content_key_exclude + (
+        "_coseta_icmf_interp",
+    )
+
     def __init__(
         self, pot=None, denspot=None, beta=None, rmax=None, scale=None, ro=None, vo=None
     ):
@@ -149,6 +159,12 @@ class _constantbetadf(anisotropicsphericaldf):
 class constantbetadf(_constantbetadf):
     """Class that implements DFs of the form :math:`f(E,L) = L^{-2\\beta} f_1(E)` with constant :math:`\\beta` anisotropy parameter for a given density profile"""
 
+    _content_key_exclude = _constantbetadf._content_key_exclude + (
+        "_gradfunc",
+        "_logstartt",
+        "_fE_interp",
+    )
+
     def __init__(
         self,
         pot=None,
@@ -157,6 +173,8 @@ class constantbetadf(_constantbetadf):
         twobeta=None,
         rmax=None,
         scale=None,
+        tabulate=False,
+        tabulate_rtol=1e-6,
         ro=None,
         vo=None,
     ):
@@ -177,6 +195,10 @@ class constantbetadf(_constantbetadf):
             maximum radius to consider; DF is cut off at E = Phi(rmax)
         scale : float or Quantity, optional
             Characteristic scale radius to aid sampling calculations. Optional and will also be overridden by value from pot if available.
+        tabulate : bool, optional
+            If True, compute f(E) once on an adaptive energy grid and evaluate fE using a monotone spline of this table. Tables are shared between instances with the same pot, denspot, beta, and rmax.
+        tabulate_rtol : float, optional
+            Relative tolerance of the tabulated f(E).
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -282,10 +304,24 @@ class constantbetadf(_constantbetadf):
             self._logstartt = interpolate.InterpolatedUnivariateSpline(
                 Es, numpy.log10(startt) + 10.0 / 3.0 * (1.0 - self._alpha), k=3
             )
+        self._fE_table = None
+        if tabulate:
+            self._fE_table = _get_fEtable(
+                _fEtable_key(
+                    "constantbetadf",
+                    self._pot,
+                    self._denspot,
+                    self._rmax,
+                    self._twobeta,
+                ),
+                self.fE if self._halfint else self._fE_gl,
+                self._Emin,
+                self._potInf,
+                rtol=tabulate_rtol,
+            )
 
-    def sample(self, R=None, z=None, phi=None, n=1, return_orbit=True, rmin=0.0):
-        # Slight over-write of superclass method to first build f(E) interp
-        # No docstring so superclass' is used
+    def _setup_sampling_interp(self):
+        # Build the f(E) interpolator used in sampling
         if not hasattr(self, "_fE_interp"):
             Es4interp = numpy.hstack(
                 (
@@ -299,9 +335,7 @@ class constantbetadf(_constantbetadf):
             self._fE_interp = interpolate.InterpolatedUnivariateSpline(
                 Es4interp[iindx], fE4interp[iindx], k=3, ext=3
             )
-        return sphericaldf.sample(
-            self, R=R, z=z, phi=phi, n=n, return_orbit=return_orbit, rmin=rmin
-        )
+        return None
 
     def fE(self, E):
         """
@@ -322,6 +356,8 @@ class constantbetadf(_constantbetadf):
         - 2021-02-14 - Written - Bovy (UofT)
         """
         Eint = numpy.atleast_1d(conversion.parse_energy(E, vo=self._vo))
+        if self._fE_table is not None:
+            return self._fE_table(Eint).reshape(numpy.shape(E))
         out = numpy.zeros_like(Eint)
         indx = (Eint < self._potInf) * (Eint >= self._Emin)
         if self._halfint:
@@ -378,6 +414,38 @@ class constantbetadf(_constantbetadf):
             )
             return -out.reshape(E.shape) * self._fE_prefactor
 
+    def _fE_gl(self, E):
+        # Vectorized version of fE using fixed-order Gauss-Legendre
+        # integration, used to build the tabulated f(E); the small-r part of
+        # the integral uses the same transformation as fE, the large-r part
+        # is integrated in ln(r)
+        E = numpy.atleast_1d(E)
+        out = numpy.zeros_like(E)
+        indx = (E < self._potInf) * (E >= self._Emin)
+        rmin = self._rphi(E[indx])
+        startt = 10.0 ** self._logstartt(E[indx])
+        out[indx] = _gl_integrate(
+            lambda t, tE, trmin: _fEintegrand_smallr(
+                t, self._pot, tE, self._gradfunc, self._alpha, trmin
+            ),
+            startt,
+            rmin ** (1.0 - self._alpha),
+            args=(E[indx], rmin),
+        )
+        # Add constant part at the beginning
+        out[indx] += startt * _fEintegrand_smallr(
+            startt, self._pot, E[indx], self._gradfunc, self._alpha, rmin
+        )
+        out[indx] += _gl_integrate(
+            lambda lnr, tE: _fEintegrand_lnr(
+                lnr, self._pot, tE, self._gradfunc, self._alpha
+            ),
+            numpy.log(2.0 * rmin),
+            numpy.log(2.0 * rmin) + _TABULATE_LNRRANGE,
+            args=(E[indx],),
+        )
+        return -out * self._fE_prefactor
+
 
 def _fEintegrand_raw(r, pot, E, dmp1nudrmp1, alpha):
     # The 'raw', i.e., direct integrand in the constant-beta inversion
@@ -406,3 +474,9 @@ def _fEintegrand_smallr(t, pot, E, dmp1nudrmp1, alpha, rmin):
 def _fEintegrand_larger(t, pot, E, dmp1nudrmp1, alpha):
     # The integrand at large r, using transformation to deal with infinity
     return 1.0 / t**2 * _fEintegrand_raw(1.0 / t, pot, E, dmp1nudrmp1, alpha)
+
+
+def _fEintegrand_lnr(lnr, pot, E, dmp1nudrmp1, alpha):
+    # The integrand at large r in ln(r), used for tabulating f(E)
+    r = numpy.exp(lnr)
+    return r * _fEintegrand_raw(r, pot, E, dmp1nudrmp1, alpha)
@@ -16,10 +16,13 @@ _INTERPDEGREE = 3
 _RMIN = 10.0**-10.0
 _MAXD_REJECTLOS = 4.0
 _PROFILE = False
+import contextlib
 import copy
+import hashlib
 import os
 import os.path
 import pickle
+import tempfile
 
 import numpy
 import scipy
@@ -27,12 +30,12 @@ import scipy
 numpylog = (
     numpy.lib.scimath.log
 )  # somehow, this code produces log(negative), which scipy (now numpy.lib.scimath.log) implements as log(|negative|) + i pi while numpy gives NaN and we want the scipy behavior; not sure where the log(negative) comes from though! I think it's for sigma=0 DFs (this test fails with numpy.log) where the DF eval has a log(~zero) that can be slightly negative because of numerical precision issues
-from scipy import integrate, interpolate, optimize, stats
+from scipy import fft, integrate, interpolate, optimize, stats
 
 from ..actionAngle import actionAngleAdiabatic
 from ..orbit import Orbit
 from ..potential import PowerSphericalPotential
-from ..util import conversion, quadpack, save_pickles
+from ..util import conversion, multi, quadpack
 from ..util.ars import ars
 from ..util.conversion import (
     _APY_LOADED,
@@ -46,12 +49,23 @@ from .surfaceSigmaProfile import expSurfaceSigmaProfile, surfaceSigmaProfile
 
 if _APY_LOADED:
     from astropy import units
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
 # scipy version
 from packaging.version import parse as parse_version
 
 _SCIPY_VERSION = parse_version(scipy.__version__)
 _SCIPY_VERSION_BREAK = parse_version("0.9")
 _CORRECTIONSDIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "data")
+# Order of the Gauss-Legendre integration over each velocity in DFcorrection
+# and in the gl=True surface-mass moments
+_NGL = 64
+# Number of terms in the cosine series of the radial motion used in sampling
+# (increased up to _NFOURIER_MAX for very eccentric orbits)
+_NFOURIER = 64
+_NFOURIER_MAX = 1024
 _DEGTORAD = numpy.pi / 180.0
 
 
@@ -755,7 +769,9 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion("surfacedensity", pop=True)
-    def surfacemass(self, R, romberg=False, nsigma=None, relative=False):
+    def surfacemass(
+        self, R, romberg=False, nsigma=None, relative=False, gl=False, ngl=_NGL
+    ):
         """
         Calculate the surface-mass at R by marginalizing over velocity
 
@@ -769,16 +785,24 @@ class diskdf(df):
             Number of sigma to integrate the velocities over
         relative : bool, optional
             If True, return the relative surface mass at R (default: False)
+        gl : bool, optional
+            If True, use Gauss-Legendre integration with ngl nodes for each velocity (default: False; always True when R is an array)
+        ngl : int, optional
+            Order of the Gauss-Legendre integration (default: 64)
 
         Returns
         -------
-        float
+        float or numpy.ndarray
             Surface mass at R
 
         Notes
         -----
         - 2011-03-XX - Bovy (NYU)
         """
+        if gl or isinstance(R, numpy.ndarray):
+            return self._vmomentsurfacemass(
+                R, 0, 0, nsigma=nsigma, relative=relative, gl=True, ngl=ngl
+            )
         if nsigma == None:
             nsigma = _NSIGMA
         logSigmaR = self.targetSurfacemass(R, log=True, use_physical=False)
@@ -834,7 +858,9 @@ class diskdf(df):
 
     @potential_physical_input
     @physical_conversion("velocity2surfacedensity", pop=True)
-    def sigma2surfacemass(self, R, romberg=False, nsigma=None, relative=False):
+    def sigma2surfacemass(
+        self, R, romberg=False, nsigma=None, relative=False, gl=False, ngl=_NGL
+    ):
         """
         Calculate the product sigma_R^2 x surface-mass at R by marginalizing over velocity.
 
@@ -848,10 +874,14 @@ class diskdf(df):
             Number of sigma to integrate the velocities over.
         relative : bool, optional
             If True, return the relative density (default: False).
+        gl : bool, optional
+            If True, use Gauss-Legendre integration with ngl nodes for each velocity (default: False; always True when R is an array).
+        ngl : int, optional
+            Order of the Gauss-Legendre integration (default: 64).
 
         Returns
         -------
-        float
+        float or numpy.ndarray
             Sigma_R^2 x surface-mass at R.
 
         Notes
@@ -859,6 +889,10 @@ class diskdf(df):
         - 2010-03-XX - Written - Bovy (NYU).
 
         """
+        if gl or isinstance(R, numpy.ndarray):
+            return self._vmomentsurfacemass(
+                R, 2, 0, nsigma=nsigma, relative=relative, gl=True, ngl=ngl
+            )
         if nsigma == None:
             nsigma = _NSIGMA
         logSigmaR = self.targetSurfacemass(R, log=True, use_physical=False)
@@ -930,10 +964,14 @@ class diskdf(df):
             If True, use a romberg integrator (default: False)
         deriv : str, optional
             Calculates derivative of the moment wrt R or phi (default: None)
+        gl : bool, optional
+            If True, use Gauss-Legendre integration with ngl nodes for each velocity (default: False; always True when R is an array)
+        ngl : int, optional
+            Order of the Gauss-Legendre integration (default: 64)
 
         Returns
         -------
-        float or Quantity
+        float, numpy.ndarray, or Quantity
             <vR^n vT^m  x surface-mass> at R (no support for units)
 
         Notes
@@ -966,11 +1004,23 @@ class diskdf(df):
             return self._vmomentsurfacemass(*args, **kwargs)
 
     def _vmomentsurfacemass(
-        self, R, n, m, romberg=False, nsigma=None, relative=False, phi=0.0, deriv=None
+        self,
+        R,
+        n,
+        m,
+        romberg=False,
+        nsigma=None,
+        relative=False,
+        phi=0.0,
+        deriv=None,
+        gl=False,
+        ngl=_NGL,
     ):
         """Non-physical version of vmomentsurfacemass, otherwise the same"""
         # odd moments of vR are zero
         if isinstance(n, int) and n % 2 == 1:
+            if isinstance(R, numpy.ndarray):
+                return numpy.zeros_like(R)
             return 0.0
         if nsigma == None:
             nsigma = _NSIGMA
@@ -982,6 +1032,13 @@ class diskdf(df):
             norm = 1.0
         else:
             norm = numpy.exp(logSigmaR + logsigmaR2 * (n + m) / 2.0) / self._gamma**m
+        if gl or isinstance(R, numpy.ndarray):
+            out = norm * _vmomentsurfacemass_gl(
+                self, numpy.atleast_1d(R), n, m, nsigma=nsigma, ngl=ngl, deriv=deriv
+            )
+            if isinstance(R, numpy.ndarray):
+                return out
+            return out[0]
         # Use the asymmetric drift equation to estimate va
         va = (
             sigmaR2
@@ -1610,22 +1667,12 @@ class diskdf(df):
         -----
         - 2010-07-11 - Written - Bovy (NYU)
         """
-        if self._beta == 0.0:
-            xE = numpy.exp(E - 0.5)
-        else:  # non-flat rotation curve
-            xE = (2.0 * E / (1.0 + 1.0 / self._beta)) ** (1.0 / 2.0 / self._beta)
-        _, _, rperi, rap = self._aA.EccZmaxRperiRap(
-            xE,
-            numpy.sqrt(2.0 * (E - self._psp(xE)) - L**2.0 / xE**2.0),
-            L / xE,
-            0.0,
-            0.0,
-        )
-        return (
-            self._aA._aAS.actionsFreqs(xE, 0.0, L / xE, 0.0, 0.0)[3][0],
-            rap[0],
-            rperi[0],
+        _, _, wR, rperi, rap = _ELtoRvRwR(
+            numpy.atleast_1d(E), numpy.atleast_1d(L), self._beta, numpy.zeros(1)
         )
+        if numpy.isnan(rperi[0]):  # pragma: no cover
+            raise ValueError("(E,L) does not correspond to an orbit")
+        return (wR[0], rap[0], rperi[0])
 
     def sample(
         self,
@@ -1639,6 +1686,7 @@ class diskdf(df):
         nsigma=None,
         maxd=None,
         target=True,
+        returnSingleOrbit=False,
     ):
         """
         Sample n*nphi points from this disk DF.
@@ -1665,11 +1713,13 @@ class diskdf(df):
             Maximum distance to consider (for the rejection sampling).
         target : bool, optional
             If True, use target surface mass and sigma2 profiles (default).
+        returnSingleOrbit : bool, optional
+            If True, return the planar(R)Orbits as a single Orbit instance containing all samples rather than as a list (default: False).
 
         Returns
         -------
-        list
-            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits.
+        list or Orbit
+            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits or single Orbit instance with n*nphi planar(R)Orbits.
             CAUTION: lists of EL need to be post-processed to account for the
                     \\kappa/\\omega_R discrepancy
 
@@ -1680,6 +1730,80 @@ class diskdf(df):
         """
         raise NotImplementedError("'sample' method for this disk df is not implemented")
 
+    def _sampleEL(self, n):
+        """Internal function that samples n (E,L) pairs from the DF; returns (E,L,x) arrays, with x the radius that is sampled from x Sigma(x)"""
+        raise NotImplementedError(
+            "'_sampleEL' method for this disk df is not implemented"
+        )
+
+    def _sampleOrbits(
+        self,
+        n,
+        rrange=None,
+        returnOrbit=False,
+        nphi=1.0,
+        returnSingleOrbit=False,
+        use_physical=True,
+    ):
+        """
+        Sample n*nphi orbits from this disk DF in batches.
+
+        Parameters
+        ----------
+        n : int
+            Number of desired (E,L) samples.
+        rrange : list, optional
+            If set, only return samples with R in this range (/ro).
+        returnOrbit : bool, optional
+            If True, also sample phi.
+        nphi : float, optional
+            Number of azimuths to sample for each E,L.
+        returnSingleOrbit : bool, optional
+            If True, return a single Orbit instance rather than a list.
+        use_physical : bool, optional
+            If True, turn on physical output when ro and vo are set for this DF.
+
+        Returns
+        -------
+        list or Orbit
+            n*nphi planar(R)Orbits.
+
+        Notes
+        -----
+        - Each (E,L) sample is placed at a uniformly-distributed radial phase along its orbit, obtained from a cosine series of the radial motion rather than by integrating the orbit, and is repeated on average kappa/wR x nphi times, all at once for all samples in a batch.
+        """
+        out = numpy.empty((0, 3 + returnOrbit))
+        while len(out) < n * nphi:
+            E, Lz, xEL = self._sampleEL(max(int(n - len(out) / nphi), 1))
+            R, vR, wR, _, _ = _ELtoRvRwR(
+                E, Lz, self._beta, stats.uniform.rvs(size=len(E))
+            )
+            indx = True ^ numpy.isnan(R)
+            R, vR, wR, Lz, xEL = R[indx], vR[indx], wR[indx], Lz[indx], xEL[indx]
+            vxvv = numpy.array([R, vR, Lz / R]).T
+            # Multiplicity kappa/wR x nphi, which accounts for the radial
+            # period being 2pi/kappa when sampling (E,L)
+            kappawR = _kappa(xEL, self._beta) / wR * nphi
+            mult = numpy.ceil(kappawR) - 1.0
+            mult += stats.uniform.rvs(size=len(R)) <= kappawR - mult
+            if not rrange is None:
+                mult[(R < rrange[0]) + (R > rrange[1])] = 0
+            vxvv = numpy.repeat(vxvv, mult.astype(int), axis=0)
+            if returnOrbit:
+                vxvv = numpy.hstack(
+                    (vxvv, stats.uniform.rvs(size=(len(vxvv), 1)) * 2.0 * numpy.pi)
+                )
+            out = numpy.vstack((out, vxvv))
+        out = out[: int(n * nphi)]
+        if use_physical and self._roSet and self._voSet:
+            ro, vo = self._ro, self._vo
+        else:
+            ro, vo = None, None
+        if returnSingleOrbit:
+            return Orbit(out, ro=ro, vo=vo)
+        else:
+            return [Orbit(vxvv, ro=ro, vo=vo) for vxvv in out]
+
     def _estimatemeanvR(self, R, phi=0.0, log=False):
         """
         Quickly estimate the mean radial velocity at a given radius R.
@@ -1940,6 +2064,7 @@ class dehnendf(diskdf):
         targetSurfmass=True,
         targetSigma2=True,
         maxd=None,
+        returnSingleOrbit=False,
         **kwargs
     ):
         """
@@ -1974,13 +2099,15 @@ class dehnendf(diskdf):
             If True, use target sigma2 profile. Default is True.
         maxd : float or Quantity, optional
             Maximum distance to consider (for the rejection sampling). Default is None.
+        returnSingleOrbit : bool, optional
+            If True, return the planar(R)Orbits as a single Orbit instance containing all samples rather than as a list. Default is False.
         **kwargs : dict, optional
             Additional keyword arguments.
 
         Returns
         -------
-        out : list
-            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits.
+        out : list or Orbit
+            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits or single Orbit instance with n*nphi planar(R)Orbits.
             CAUTION: lists of EL need to be post-processed to account for the
             \\kappa/\\omega_R discrepancy; EL not returned in physical units.
 
@@ -1998,31 +2125,39 @@ class dehnendf(diskdf):
                 targetSurfmass=targetSurfmass,
                 targetSigma2=targetSigma2,
             )
+        if not returnROrbit and not returnOrbit:
+            E, Lz, _ = self._sampleEL(int(n * nphi))
+            return [[e, l] for e, l in zip(E, Lz)]
+        if not rrange is None:
+            rrange[0] = conversion.parse_length(rrange[0], ro=self._ro)
+            rrange[1] = conversion.parse_length(rrange[1], ro=self._ro)
+        return self._sampleOrbits(
+            n,
+            rrange=rrange,
+            returnOrbit=returnOrbit,
+            nphi=nphi,
+            returnSingleOrbit=returnSingleOrbit,
+            use_physical=kwargs.get("use_physical", True),
+        )
+
+    def _sampleEL(self, n):
+        """Internal function that samples n (E,L) pairs from the DF; returns (E,L,xE) arrays"""
         # First sample xE
-        if self._correct:
-            xE = numpy.array(
-                ars(
-                    [0.0, 0.0],
-                    [True, False],
-                    [0.05, 2.0],
-                    _ars_hx,
-                    _ars_hpx,
-                    nsamples=n,
-                    hxparams=(self._surfaceSigmaProfile, self._corr),
-                )
-            )
-        else:
-            xE = numpy.array(
-                ars(
-                    [0.0, 0.0],
-                    [True, False],
-                    [0.05, 2.0],
-                    _ars_hx,
-                    _ars_hpx,
-                    nsamples=n,
-                    hxparams=(self._surfaceSigmaProfile, None),
-                )
+        xE = numpy.array(
+            ars(
+                [0.0, 0.0],
+                [True, False],
+                [0.05, 2.0],
+                _ars_hx,
+                _ars_hpx,
+                nsamples=n,
+                hxparams=(
+                    self._surfaceSigmaProfile,
+                    self._corr if self._correct else None,
+                ),
+                batch=True,
             )
+        )
         # Calculate E
         if self._beta == 0.0:
             E = numpylog(xE) + 0.5
@@ -2039,91 +2174,7 @@ class dehnendf(diskdf):
         if self._correct:
             Lz *= self._corr.correct(xE, log=False)[1, :]
         Lz += LCE
-        if not returnROrbit and not returnOrbit:
-            out = [[e, l] for e, l in zip(E, Lz)]
-        else:
-            if not rrange is None:
-                rrange[0] = conversion.parse_length(rrange[0], ro=self._ro)
-                rrange[1] = conversion.parse_length(rrange[1], ro=self._ro)
-            out = []
-            for ii in range(int(n)):
-                try:
-                    wR, rap, rperi = self._ELtowRRapRperi(E[ii], Lz[ii])
-                except ValueError:  # pragma: no cover
-                    # Tests don't get here anymore, because of improvements
-                    # in the rperi/rap calculation, but leaving the try/except
-                    # in because it can do no harm
-                    continue
-                TR = 2.0 * numpy.pi / wR
-                tr = stats.uniform.rvs() * TR
-                if tr > TR / 2.0:
-                    tr -= TR / 2.0
-                    thisOrbit = Orbit([rperi, 0.0, Lz[ii] / rperi])
-                else:
-                    thisOrbit = Orbit([rap, 0.0, Lz[ii] / rap])
-                thisOrbit.integrate(numpy.array([0.0, tr]), self._psp)
-                if returnOrbit:
-                    vxvv = thisOrbit(tr).vxvv[0]
-                    thisOrbit = Orbit(
-                        vxvv=numpy.array(
-                            [
-                                vxvv[0],
-                                vxvv[1],
-                                vxvv[2],
-                                stats.uniform.rvs() * numpy.pi * 2.0,
-                            ]
-                        ).reshape(4)
-                    )
-                else:
-                    thisOrbit = thisOrbit(tr)
-                kappa = _kappa(thisOrbit.vxvv[0, 0], self._beta)
-                if not rrange == None:
-                    if (
-                        thisOrbit.vxvv[0, 0] < rrange[0]
-                        or thisOrbit.vxvv[0, 0] > rrange[1]
-                    ):
-                        continue
-                mult = numpy.ceil(kappa / wR * nphi) - 1.0
-                kappawR = kappa / wR * nphi - mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(
-                            Orbit(
-                                vxvv=numpy.array(
-                                    [
-                                        vxvv[0],
-                                        vxvv[1],
-                                        vxvv[2],
-                                        stats.uniform.rvs() * numpy.pi * 2.0,
-                                    ]
-                                ).reshape(4)
-                            )
-                        )
-                    else:
-                        out.append(thisOrbit)
-                    mult -= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
-        # Recurse to get enough
-        if len(out) < n * nphi:
-            out.extend(
-                self.sample(
-                    n=int(n - len(out) / nphi),
-                    rrange=rrange,
-                    returnROrbit=returnROrbit,
-                    returnOrbit=returnOrbit,
-                    nphi=int(nphi),
-                    los=los,
-                    losdeg=losdeg,
-                )
-            )
-        # Trim to make sure output has the right size
-        out = out[0 : int(n * nphi)]
-        if kwargs.get("use_physical", True) and self._roSet and self._voSet:
-            if isinstance(out[0], Orbit):
-                dumb = [o.turn_physical_on(ro=self._ro, vo=self._vo) for o in out]
-        return out
+        return (E, Lz, xE)
 
     def _dlnfdR(self, R, vR, vT):
         # Calculate a bunch of stuff that we need
@@ -2314,6 +2365,17 @@ class shudf(diskdf):
         """
         E = conversion.parse_energy(E, vo=self._vo)
         L = conversion.parse_angmom(L, ro=self._ro, vo=self._vo)
+        if isinstance(L, numpy.ndarray) and numpy.any(L < 0.0):
+            # We must remove counter-rotating mass
+            out = numpy.zeros(numpy.broadcast(E, L, logSigmaR, logsigmaR2).shape)
+            E, L, logSigmaR, logsigmaR2 = (
+                numpy.broadcast_to(x, out.shape) for x in (E, L, logSigmaR, logsigmaR2)
+            )
+            indx = L >= 0.0
+            out[indx] = numpy.real(
+                self.eval(E[indx], L[indx], logSigmaR[indx], logsigmaR2[indx])
+            )
+            return out
         # Calculate RL,LL, OmegaL
         if self._beta == 0.0:
             xL = L
@@ -2323,7 +2385,8 @@ class shudf(diskdf):
             logECLE = numpylog(
                 -0.5 * (1.0 / self._beta + 1.0) * xL ** (2.0 * self._beta) + E
             )
-        if xL < 0.0:  # We must remove counter-rotating mass
+        if not isinstance(xL, numpy.ndarray) and xL < 0.0:
+            # We must remove counter-rotating mass
             return 0.0
         if self._correct:
             correction = self._corr.correct(xL, log=True)
@@ -2357,6 +2420,7 @@ class shudf(diskdf):
         maxd=None,
         targetSurfmass=True,
         targetSigma2=True,
+        returnSingleOrbit=False,
         **kwargs
     ):
         """
@@ -2391,13 +2455,15 @@ class shudf(diskdf):
             If True, use target sigma2 profile. Default is True.
         maxd : float or Quantity, optional
             Maximum distance to consider (for the rejection sampling). Default is None.
+        returnSingleOrbit : bool, optional
+            If True, return the planar(R)Orbits as a single Orbit instance containing all samples rather than as a list. Default is False.
         **kwargs : dict, optional
             Additional keyword arguments.
 
         Returns
         -------
-        out : list
-            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits.
+        out : list or Orbit
+            n*nphi list of [[E,Lz],...] or list of planar(R)Orbits or single Orbit instance with n*nphi planar(R)Orbits.
             CAUTION: lists of EL need to be post-processed to account for the
             \\kappa/\\omega_R discrepancy; EL not returned in physical units.
 
@@ -2414,31 +2480,39 @@ class shudf(diskdf):
                 targetSurfmass=targetSurfmass,
                 targetSigma2=targetSigma2,
             )
+        if not returnROrbit and not returnOrbit:
+            E, Lz, _ = self._sampleEL(int(n * nphi))
+            return [[e, l] for e, l in zip(E, Lz)]
+        if not rrange is None:
+            rrange[0] = conversion.parse_length(rrange[0], ro=self._ro)
+            rrange[1] = conversion.parse_length(rrange[1], ro=self._ro)
+        return self._sampleOrbits(
+            n,
+            rrange=rrange,
+            returnOrbit=returnOrbit,
+            nphi=nphi,
+            returnSingleOrbit=returnSingleOrbit,
+            use_physical=kwargs.get("use_physical", True),
+        )
+
+    def _sampleEL(self, n):
+        """Internal function that samples n (E,L) pairs from the DF; returns (E,L,xL) arrays"""
         # First sample xL
-        if self._correct:
-            xL = numpy.array(
-                ars(
-                    [0.0, 0.0],
-                    [True, False],
-                    [0.05, 2.0],
-                    _ars_hx,
-                    _ars_hpx,
-                    nsamples=n,
-                    hxparams=(self._surfaceSigmaProfile, self._corr),
-                )
-            )
-        else:
-            xL = numpy.array(
-                ars(
-                    [0.0, 0.0],
-                    [True, False],
-                    [0.05, 2.0],
-                    _ars_hx,
-                    _ars_hpx,
-                    nsamples=n,
-                    hxparams=(self._surfaceSigmaProfile, None),
-                )
+        xL = numpy.array(
+            ars(
+                [0.0, 0.0],
+                [True, False],
+                [0.05, 2.0],
+                _ars_hx,
+                _ars_hpx,
+                nsamples=n,
+                hxparams=(
+                    self._surfaceSigmaProfile,
+                    self._corr if self._correct else None,
+                ),
+                batch=True,
             )
+        )
         # Calculate Lz
         Lz = xL ** (self._beta + 1.0)
         # Then sample E
@@ -2450,86 +2524,7 @@ class shudf(diskdf):
         if self._correct:
             E *= self._corr.correct(xL, log=False)[1, :]
         E += ECL
-        if not returnROrbit and not returnOrbit:
-            out = [[e, l] for e, l in zip(E, Lz)]
-        else:
-            if not rrange is None:
-                rrange[0] = conversion.parse_length(rrange[0], ro=self._ro)
-                rrange[1] = conversion.parse_length(rrange[1], ro=self._ro)
-            out = []
-            for ii in range(n):
-                try:
-                    wR, rap, rperi = self._ELtowRRapRperi(E[ii], Lz[ii])
-                except ValueError:  # pragma: no cover
-                    continue
-                TR = 2.0 * numpy.pi / wR
-                tr = stats.uniform.rvs() * TR
-                if tr > TR / 2.0:
-                    tr -= TR / 2.0
-                    thisOrbit = Orbit([rperi, 0.0, Lz[ii] / rperi])
-                else:
-                    thisOrbit = Orbit([rap, 0.0, Lz[ii] / rap])
-                thisOrbit.integrate(numpy.array([0.0, tr]), self._psp)
-                if returnOrbit:
-                    vxvv = thisOrbit(tr).vxvv[0]
-                    thisOrbit = Orbit(
-                        vxvv=numpy.array(
-                            [
-                                vxvv[0],
-                                vxvv[1],
-                                vxvv[2],
-                                stats.uniform.rvs() * numpy.pi * 2.0,
-                            ]
-                        ).reshape(4)
-                    )
-                else:
-                    thisOrbit = thisOrbit(tr)
-                kappa = _kappa(thisOrbit.vxvv[0, 0], self._beta)
-                if not rrange == None:
-                    if (
-                        thisOrbit.vxvv[0, 0] < rrange[0]
-                        or thisOrbit.vxvv[0, 0] > rrange[1]
-                    ):
-                        continue
-                mult = numpy.ceil(kappa / wR * nphi) - 1.0
-                kappawR = kappa / wR * nphi - mult
-                while mult > 0:
-                    if returnOrbit:
-                        out.append(
-                            Orbit(
-                                vxvv=numpy.array(
-                                    [
-                                        vxvv[0],
-                                        vxvv[1],
-                                        vxvv[2],
-                                        stats.uniform.rvs() * numpy.pi * 2.0,
-                                    ]
-                                ).reshape(4)
-                            )
-                        )
-                    else:
-                        out.append(thisOrbit)
-                    mult -= 1
-                if stats.uniform.rvs() > kappawR:
-                    continue
-                out.append(thisOrbit)
-        # Recurse to get enough
-        if len(out) < n * nphi:
-            out.extend(
-                self.sample(
-                    n=int(n - len(out) / nphi),
-                    rrange=rrange,
-                    returnROrbit=returnROrbit,
-                    returnOrbit=returnOrbit,
-                    nphi=nphi,
-                )
-            )
-        # Trim to make sure output has the right size
-        out = out[0 : int(n * nphi)]
-        if kwargs.get("use_physical", True) and self._roSet and self._voSet:
-            if isinstance(out[0], Orbit):
-                dumb = [o.turn_physical_on(ro=self._ro, vo=self._vo) for o in out]
-        return out
+        return (E, Lz, xL)
 
     def _dlnfdR(self, R, vR, vT):
         # Calculate a bunch of stuff that we need
@@ -2768,10 +2763,13 @@ class DFcorrection:
             Number of iterations to perform to calculate the corrections.
         interp_k : str, optional
             'k' keyword to give to InterpolatedUnivariateSpline.
+        numcores : int, optional
+            Number of cores to use to calculate the corrections at the different radii in parallel (default: 1).
 
         Notes
         -----
         - 2010-03-10 - Written - Bovy (NYU)
+        - The corrections are saved in savedir in a binary file whose name is a hash of all parameters that determine the corrections; concurrent processes that need the same corrections wait for the process that is calculating them (using a lock file) and then load them, rather than calculating them again.
 
         """
         if not "surfaceSigmaProfile" in kwargs:
@@ -2799,13 +2797,21 @@ class DFcorrection:
                 )
         else:
             self._savedir = kwargs.get("savedir", _CORRECTIONSDIR)
+            self._numcores = kwargs.get("numcores", 1)
             self._savefilename = self._createSavefilename(self._niter)
-            if os.path.exists(self._savefilename):
-                savefile = open(self._savefilename, "rb")
-                self._corrections = numpy.array(pickle.load(savefile))
-                savefile.close()
-            else:  # Calculate the corrections
-                self._corrections = self._calc_corrections()
+            try:
+                self._corrections = self._load_corrections(self._niter)
+            except (EOFError, ValueError, pickle.UnpicklingError):
+                # The file is being written by another process (that does
+                # not save it atomically); load it once we hold the lock
+                self._corrections = None
+            if self._corrections is None:
+                with _lock_file(self._savefilename):
+                    # Another process may have calculated the corrections
+                    # while we were waiting for the lock
+                    self._corrections = self._load_corrections(self._niter)
+                    if self._corrections is None:  # Calculate the corrections
+                        self._corrections = self._calc_corrections()
         # Interpolation; smoothly go to zero
         interpRs = numpy.append(self._rs, 2.0 * self._rmax)
         self._surfaceInterpolate = interpolate.InterpolatedUnivariateSpline(
@@ -2834,6 +2840,28 @@ class DFcorrection:
         return None
 
     def _createSavefilename(self, niter):
+        # Hash everything that determines the corrections
+        params = numpy.hstack(
+            (
+                numpy.array(
+                    self._surfaceSigmaProfile.outputParams(), dtype=numpy.float64
+                ),
+                [self._beta, self._npoints, self._rmax, niter, self._interp_k],
+            )
+        )
+        key = hashlib.sha1(
+            (
+                self._dftype.__name__
+                + "_"
+                + self._surfaceSigmaProfile.__class__.__name__
+            ).encode()
+            + params.astype(numpy.float64).tobytes()
+        ).hexdigest()
+        return os.path.join(
+            self._savedir, "dfcorrection_" + self._dftype.__name__ + "_" + key + ".npy"
+        )
+
+    def _createLegacySavefilename(self, niter):
         # Form surfaceSigmaProfile string
         sspFormat = self._surfaceSigmaProfile.formatStringParams()
         sspString = ""
@@ -2850,6 +2878,17 @@ class DFcorrection:
             + "%6.4f_%i_%6.4f_%i.sav" % (self._beta, self._npoints, self._rmax, niter),
         )
 
+    def _load_corrections(self, niter):
+        """Internal function that loads the corrections after niter iterations if they were saved before (in the binary format or in the pickle format of previous versions) and returns None otherwise"""
+        savefilename = self._createSavefilename(niter)
+        if os.path.exists(savefilename):
+            return numpy.load(savefilename)
+        savefilename = self._createLegacySavefilename(niter)
+        if os.path.exists(savefilename):
+            with open(savefilename, "rb") as savefile:
+                return numpy.array(pickle.load(savefile))
+        return None
+
     def correct(self, R, log=False):
         """
         Calculate the correction in Sigma and sigma2 at R.
@@ -2962,16 +3001,21 @@ class DFcorrection:
         """Internal function that calculates the corrections"""
         searchIter = self._niter - 1
         while searchIter > 0:
-            trySavefilename = self._createSavefilename(searchIter)
-            if os.path.exists(trySavefilename):
-                trySavefile = open(trySavefilename, "rb")
-                corrections = numpy.array(pickle.load(trySavefile))
-                trySavefile.close()
+            corrections = self._load_corrections(searchIter)
+            if not corrections is None:
                 break
             else:
                 searchIter -= 1
         if searchIter == 0:
             corrections = numpy.ones((self._npoints, 2))
+        # Split the radii in equal-size chunks (padding with the last one),
+        # because parallel_map concatenates its outputs
+        nchunk = numpy.amin([self._numcores, self._npoints])
+        chunksize = int(numpy.ceil(self._npoints / nchunk))
+        indx = numpy.reshape(
+            numpy.minimum(numpy.arange(nchunk * chunksize), self._npoints - 1),
+            (nchunk, chunksize),
+        )
         for ii in range(searchIter, self._niter):
             if ii == 0:
                 currentDF = self._dftype(
@@ -2987,30 +3031,160 @@ class DFcorrection:
                     savedir=self._savedir,
                     interp_k=self._interp_k,
                 )
-            newcorrections = numpy.zeros((self._npoints, 2))
-            for jj in range(self._npoints):
-                thisSurface = currentDF.surfacemass(self._rs[jj], use_physical=False)
-                newcorrections[jj, 0] = (
-                    currentDF.targetSurfacemass(self._rs[jj], use_physical=False)
-                    / thisSurface
-                )
-                newcorrections[jj, 1] = (
-                    currentDF.targetSigma2(self._rs[jj], use_physical=False)
-                    * thisSurface
-                    / currentDF.sigma2surfacemass(self._rs[jj], use_physical=False)
-                )
-                # print(jj, newcorrections[jj,:])
+            calc_chunk = lambda jj: numpy.reshape(
+                _relative_surfacemass_sigma2surfacemass(currentDF, self._rs[indx[jj]]),
+                (1, 2, chunksize),
+            )
+            if nchunk > 1:
+                rel = multi.parallel_map(calc_chunk, range(nchunk), numcores=nchunk)
+            else:
+                rel = [calc_chunk(0)]
+            relSurface, relSigma2Surface = numpy.concatenate(
+                [numpy.reshape(r, (2, chunksize)) for r in rel], axis=1
+            )[:, : self._npoints]
+            newcorrections = numpy.empty((self._npoints, 2))
+            # target surfacemass / surfacemass
+            newcorrections[:, 0] = 1.0 / relSurface
+            # target sigma2 x surfacemass / sigma2surfacemass
+            newcorrections[:, 1] = relSurface / relSigma2Surface
             corrections *= newcorrections
-        # Save
-        picklethis = []
-        for arr in list(corrections):
-            picklethis.append([float(a) for a in arr])
-        save_pickles(
-            self._savefilename, picklethis
-        )  # We pickle a list for platform-independence)
+        # Save, to a temporary file that is then moved such that other
+        # processes never see a partially-written file
+        savefile, tmp_savefilename = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(self._savefilename)), suffix=".npy"
+        )
+        try:
+            with os.fdopen(savefile, "wb") as savefile:
+                numpy.save(savefile, corrections)
+            os.replace(tmp_savefilename, self._savefilename)
+        except Exception:
+            os.remove(tmp_savefilename)
+            raise
         return corrections
 
 
+def _relative_surfacemass_sigma2surfacemass(df, R, nsigma=_NSIGMA, ngl=_NGL):
+    """Internal function that calculates the surfacemass and sigma2surfacemass relative to their targets at an array of radii R, integrating over velocity using Gauss-Legendre integration with the DF evaluated at all radii and nodes at once (and computing both from the same DF evaluations)"""
+    vR, vT, tdf, weights = _glVelocityGrid(df, R, nsigma, ngl)
+    return numpy.array(
+        [
+            numpy.sum(tdf * weights, axis=(1, 2)),
+            numpy.sum(tdf * vR**2.0 * weights, axis=(1, 2)),
+        ]
+    )
+
+
+def _vmomentsurfacemass_gl(df, R, n, m, nsigma=_NSIGMA, ngl=_NGL, deriv=None):
+    """Internal function that calculates the vmomentsurfacemass relative to its target at an array of radii R, integrating over velocity using Gauss-Legendre integration with the DF evaluated at all radii and nodes at once"""
+    vR, vT, tdf, weights = _glVelocityGrid(df, R, nsigma, ngl, fullvR=True)
+    integrand = vR**n * vT**m * tdf
+    if not deriv is None:
+        if deriv.lower() == "r":
+            sigmaR1 = numpy.sqrt(df.targetSigma2(R, use_physical=False))
+            integrand *= df._dlnfdR(
+                R[:, None, None],
+                vR * sigmaR1[:, None, None],
+                vT * sigmaR1[:, None, None] / df._gamma,
+            )
+        else:
+            return numpy.zeros_like(R)
+    return numpy.sum(integrand * weights, axis=(1, 2)) / 2.0
+
+
+def _glVelocityGrid(df, R, nsigma, ngl, fullvR=False):
+    """Internal function that sets up a [len(R),ngl (vT),ngl (vR)] Gauss-Legendre grid in (vR,vT) (in units of the velocity dispersion) at an array of radii R and evaluates the DF on it; vR in [0,nsigma] or, if fullvR, [-nsigma,nsigma]; returns (vR,vT,DF,weights) with the weights including the Jacobian and normalization of the integral"""
+    logSigmaR = df.targetSurfacemass(R, log=True, use_physical=False)
+    sigmaR2 = df.targetSigma2(R, use_physical=False)
+    sigmaR1 = numpy.sqrt(sigmaR2)
+    logsigmaR2 = numpylog(sigmaR2)
+    # Use the asymmetric drift equation to estimate va
+    va = (
+        sigmaR2
+        / 2.0
+        / R**df._beta
+        * (
+            1.0 / df._gamma**2.0
+            - 1.0
+            - R * df._surfaceSigmaProfile.surfacemassDerivative(R, log=True)
+            - R * df._surfaceSigmaProfile.sigma2Derivative(R, log=True)
+        )
+    )
+    va[numpy.fabs(va) > sigmaR1] = 0.0  # To avoid craziness near the center
+    vTmin = df._gamma * (R**df._beta - va) / sigmaR1 - nsigma
+    vTmax = vTmin + 2.0 * nsigma
+    if isinstance(df, shudf):
+        # Integrand is zero for counter-rotating orbits, start at vT=0 such
+        # that the integrand is smooth
+        vTmin = numpy.clip(vTmin, 0.0, vTmax)
+    if fullvR:
+        vRmin = -nsigma
+    else:
+        vRmin = 0.0
+    glx, glw = numpy.polynomial.legendre.leggauss(ngl)
+    vT = (
+        vTmin[:, None, None]
+        + 0.5 * (vTmax - vTmin)[:, None, None] * (glx[None, :, None] + 1.0)
+    ) * numpy.ones((1, 1, ngl))
+    vR = (vRmin + 0.5 * (nsigma - vRmin) * (glx[None, None, :] + 1.0)) * numpy.ones(
+        (len(R), ngl, 1)
+    )
+    E, L = vRvTRToEL(
+        (vR * sigmaR1[:, None, None]).flatten(),
+        (vT * sigmaR1[:, None, None] / df._gamma).flatten(),
+        numpy.tile(R[:, None], (1, ngl * ngl)).flatten(),
+        df._beta,
+        df._dftype,
+    )
+    tdf = numpy.reshape(
+        numpy.real(
+            df.eval(
+                E,
+                L,
+                numpy.tile(logSigmaR[:, None], (1, ngl * ngl)).flatten(),
+                numpy.tile(logsigmaR2[:, None], (1, ngl * ngl)).flatten(),
+            )
+        ),
+        vT.shape,
+    )
+    # 2 pi / gamma / pi from the integrand and Jacobians of the nodes
+    fac = 0.25 * (vTmax - vTmin) * (nsigma - vRmin) * 2.0 / df._gamma
+    return (
+        vR,
+        vT,
+        tdf,
+        fac[:, None, None] * glw[None, :, None] * glw[None, None, :],
+    )
+
+
+@contextlib.contextmanager
+def _lock_file(filename):
+    """Internal context manager that holds an exclusive lock on a lock file next to filename (when locking is supported and the lock file can be created)"""
+    if fcntl is None:  # pragma: no cover
+        yield
+        return
+    lockfilename = os.path.join(
+        os.path.dirname(filename), "." + os.path.basename(filename) + ".lock"
+    )
+    try:
+        lockfile = open(lockfilename, "a")
+    except OSError:  # pragma: no cover
+        yield
+        return
+    with lockfile:
+        fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            # Remove the lock file before releasing the lock; processes that
+            # are waiting for the lock or that create a new lock file find
+            # the saved file when they get the lock
+            try:
+                os.remove(lockfilename)
+            except OSError:  # pragma: no cover
+                pass
+            fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
 class DFcorrectionError(Exception):
     def __init__(self, value):
         self.value = value
@@ -3166,6 +3340,146 @@ def _kappa(R, beta):
     return numpy.sqrt(2.0 * (1.0 + beta)) * R ** (beta - 1)
 
 
+def _ELtoRvRwR(E, L, beta, phase):
+    """Internal function that returns (R,vR,wR,rperi,rap) at radial phase phase (in [0,1), the fraction of the radial period since pericenter) for arrays of (E,L) in the power-law potential with index beta; the number of terms in the series of the radial motion is increased for (very eccentric) orbits for which it has not converged; (E,L) that do not correspond to an orbit return NaN"""
+    rperi, rap = _ELtoRperiRap(E, L, beta)
+    R, vR, wR = numpy.zeros((3, len(E))) + numpy.nan
+    indx = numpy.arange(len(E))[True ^ numpy.isnan(rperi)]
+    nfourier = _NFOURIER
+    while len(indx) > 0:
+        series = _radialSeries(E[indx], L[indx], beta, rperi[indx], rap[indx], nfourier)
+        converged = (
+            numpy.amax(numpy.fabs(series[:, 3 * nfourier // 4 :]), axis=1)
+            < 10.0**-13.0 * series[:, 0]
+        ) + (nfourier >= _NFOURIER_MAX)
+        cindx = indx[converged]
+        R[cindx], vR[cindx] = _radialPhaseToRvR(
+            rperi[cindx], rap[cindx], series[converged], phase[cindx]
+        )
+        wR[cindx] = 2.0 / series[converged, 0]
+        indx = indx[True ^ converged]
+        nfourier *= 4
+    return (R, vR, wR, rperi, rap)
+
+
+def _ELtoRperiRap(E, L, beta):
+    """Internal function that computes the pericenter and apocenter for arrays of (E,L) in the power-law potential with index beta, using bisection in log R; (E,L) that do not correspond to an orbit return NaN"""
+    aL = numpy.fabs(L)
+    Rc = aL ** (1.0 / (1.0 + beta))  # guiding-center radius
+    good = _vR2(Rc, E, aL, beta) >= 0.0
+    # Bracket the pericenter and apocenter
+    lo = Rc / 2.0
+    hi = Rc * 2.0
+    while True:
+        indx = good * (_vR2(lo, E, aL, beta) >= 0.0)
+        if not numpy.any(indx):
+            break
+        lo[indx] /= 2.0
+    while True:
+        indx = good * (_vR2(hi, E, aL, beta) >= 0.0)
+        if not numpy.any(indx):
+            break
+        hi[indx] *= 2.0
+    # and find them
+    lo, rcp, hi = numpylog(lo), numpylog(Rc), numpylog(hi)
+    rclo, rchi = numpy.copy(rcp), numpy.copy(rcp)
+    for ii in range(64):
+        mid = 0.5 * (lo + rclo)
+        indx = _vR2(numpy.exp(mid), E, aL, beta) >= 0.0
+        rclo[indx] = mid[indx]
+        lo[True ^ indx] = mid[True ^ indx]
+        mid = 0.5 * (rchi + hi)
+        indx = _vR2(numpy.exp(mid), E, aL, beta) >= 0.0
+        rchi[indx] = mid[indx]
+        hi[True ^ indx] = mid[True ^ indx]
+    rperi = numpy.exp(0.5 * (lo + rclo))
+    rap = numpy.exp(0.5 * (rchi + hi))
+    rperi[True ^ good] = numpy.nan
+    rap[True ^ good] = numpy.nan
+    return (rperi, rap)
+
+
+def _vR2(R, E, L, beta):
+    """Internal function that returns vR^2 at R for (E,L) in the power-law potential with index beta"""
+    return 2.0 * (E - axipotential(R, beta)) - L**2.0 / R**2.0
+
+
+def _radialSeries(E, L, beta, rperi, rap, nfourier):
+    """Internal function that computes the cosine series of dt/deta, with ln R = (ln rap + ln rperi)/2 - (ln rap - ln rperi)/2 cos(eta), for arrays of orbits in the power-law potential with index beta; dt/deta is smooth and periodic in eta, such that the series converges exponentially (and interpolating in ln R makes it converge quickly also for very eccentric orbits)"""
+    # dt/deta at the nodes of the discrete cosine transform
+    eta = numpy.pi * (numpy.arange(nfourier) + 0.5) / nfourier
+    lnR = 0.5 * numpylog(rap * rperi)[:, None]
+    dlnR = 0.5 * numpylog(rap / rperi)[:, None]
+    R = numpy.exp(lnR - dlnR * numpy.cos(eta))
+    with numpy.errstate(invalid="ignore", divide="ignore"):
+        dtdeta = (
+            R
+            * dlnR
+            * numpy.sin(eta)
+            / numpy.sqrt(_vR2(R, E[:, None], L[:, None], beta))
+        )
+    # (Close-to-)circular orbits, for which the above suffers from
+    # cancellation: dt/deta = 1/kappa
+    Rc = numpy.fabs(L) ** (1.0 / (1.0 + beta))
+    circ = rap - rperi < 10.0**-6.0 * Rc
+    dtdeta[circ] = 1.0 / _kappa(Rc[circ], beta)[:, None]
+    return fft.dct(dtdeta, type=2, axis=1) / nfourier
+
+
+def _radialPhaseToRvR(rperi, rap, series, phase):
+    """Internal function that returns R,vR at radial phase phase (in [0,1), the fraction of the radial period since pericenter) for orbits with pericenter rperi, apocenter rap, and series from _radialSeries, by solving t(eta) = phase x T_R with Newton-Raphson safeguarded by bisection, starting from t(eta) tabulated at the nodes of the series"""
+    nfourier = series.shape[1]
+    k = numpy.arange(1, nfourier)
+
+    def t_dtdeta(eta, series):
+        keta = numpy.outer(eta, k)
+        return (
+            0.5 * series[:, 0] * eta
+            + numpy.sum(series[:, 1:] * numpy.sin(keta) / k, axis=1),
+            0.5 * series[:, 0] + numpy.sum(series[:, 1:] * numpy.cos(keta), axis=1),
+        )
+
+    # Solve for eta in [0,pi] and use the symmetry of the orbit for the rest
+    outgoing = phase <= 0.5
+    tphase = numpy.pi * series[:, 0] * numpy.where(outgoing, phase, 1.0 - phase)
+    # Tabulate t(eta) at the nodes, including eta=0 and pi, and bracket
+    etatab = numpy.pi * (numpy.arange(-1, nfourier + 1) + 0.5) / nfourier
+    etatab[0], etatab[-1] = 0.0, numpy.pi
+    ttab = numpy.empty((len(phase), nfourier + 2))
+    ttab[:, 0] = 0.0
+    ttab[:, -1] = numpy.pi * series[:, 0] / 2.0
+    ttab[:, 1:-1] = 0.5 * series[:, :1] * etatab[1:-1] + 0.5 * fft.dst(
+        numpy.hstack((series[:, 1:] / k, numpy.zeros((len(phase), 1)))),
+        type=3,
+        axis=1,
+    )
+    jj = numpy.sum(ttab[:, 1:-1] < tphase[:, None], axis=1)
+    rows = numpy.arange(len(phase))
+    lo, hi = etatab[jj], etatab[jj + 1]
+    eta = lo + (hi - lo) * (tphase - ttab[rows, jj]) / (
+        ttab[rows, jj + 1] - ttab[rows, jj]
+    )
+    # Only iterate on those that have not converged yet
+    indx = numpy.arange(len(phase))
+    for ii in range(100):
+        t, dtdeta = t_dtdeta(eta[indx], series[indx])
+        dt = t - tphase[indx]
+        hi[indx[dt > 0.0]] = eta[indx[dt > 0.0]]
+        lo[indx[dt <= 0.0]] = eta[indx[dt <= 0.0]]
+        neweta = eta[indx] - dt / dtdeta
+        bisect = (neweta < lo[indx]) + (neweta > hi[indx])
+        neweta[bisect] = 0.5 * (lo[indx] + hi[indx])[bisect]
+        converged = numpy.fabs(neweta - eta[indx]) < 10.0**-12.0
+        eta[indx] = neweta
+        indx = indx[True ^ converged]
+        if len(indx) == 0:
+            break
+    dtdeta = t_dtdeta(eta, series)[1]
+    dlnR = 0.5 * numpylog(rap / rperi)
+    R = numpy.sqrt(rap * rperi) * numpy.exp(-dlnR * numpy.cos(eta))
+    return (R, (2.0 * outgoing - 1.0) * R * dlnR * numpy.sin(eta) / dtdeta)
+
+
 def _dlToRphi(d, l):
     """Convert d and l to R and phi, l is in radians"""
     R = numpy.sqrt(1.0 + d**2.0 - 2.0 * d * numpy.cos(l))
@@ -6,7 +6,13 @@ from scipy import integrate, interpolate
 from ..potential import evaluateR2derivs
 from ..potential.Potential import _evaluatePotentials, _evaluateRforces
 from ..util import conversion
-from .sphericaldf import isotropicsphericaldf, sphericaldf
+from .sphericaldf import (
+    _TABULATE_LNRRANGE,
+    _fEtable_key,
+    _get_fEtable,
+    _gl_integrate,
+    isotropicsphericaldf,
+)
 
 
 class eddingtondf(isotropicsphericaldf):
@@ -19,7 +25,23 @@ class eddingtondf(isotropicsphericaldf):
     where :math:`\\Psi = -\\Phi+\\Phi(\\infty)` is the relative potential, :math:`\\mathcal{E} = \\Psi-v^2/2` is the relative (binding) energy, and :math:`\\rho` is the density of the tracer population (not necessarily the density corresponding to :math:`\\Psi` according to the Poisson equation). Note that the second term on the right-hand side is currently assumed to be zero in the code.
     """
 
-    def __init__(self, pot=None, denspot=None, rmax=1e4, scale=None, ro=None, vo=None):
+    _content_key_exclude = isotropicsphericaldf._content_key_exclude + (
+        "_dnudr",
+        "_d2nudr2",
+        "_fE_interp",
+    )
+
+    def __init__(
+        self,
+        pot=None,
+        denspot=None,
+        rmax=1e4,
+        scale=None,
+        tabulate=False,
+        tabulate_rtol=1e-6,
+        ro=None,
+        vo=None,
+    ):
         """
         Initialize an isotropic distribution function computed using the Eddington inversion.
 
@@ -33,6 +55,10 @@ class eddingtondf(isotropicsphericaldf):
             Maximum radius to consider. DF is cut off at E = Phi(rmax).
         scale : float or Quantity, optional
             Characteristic scale radius to aid sampling calculations. Optional and will also be overridden by value from pot if available.
+        tabulate : bool, optional
+            If True, compute f(E) once on an adaptive energy grid and evaluate fE using a monotone spline of this table. Tables are shared between instances with the same pot, denspot, and rmax. Default is False.
+        tabulate_rtol : float, optional
+            Relative tolerance of the tabulated f(E). Default is 1e-6.
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -49,21 +75,33 @@ class eddingtondf(isotropicsphericaldf):
         self._dnudr = (
             self._denspot._ddensdr
             if not isinstance(self._denspot, list)
-            else lambda r: numpy.sum([p._ddensdr(r) for p in self._denspot])
+            else lambda r: numpy.sum([p._ddensdr(r) for p in self._denspot], axis=0)
         )
         self._d2nudr2 = (
             self._denspot._d2densdr2
             if not isinstance(self._denspot, list)
-            else lambda r: numpy.sum([p._d2densdr2(r) for p in self._denspot])
+            else lambda r: numpy.sum([p._d2densdr2(r) for p in self._denspot], axis=0)
         )
         self._potInf = _evaluatePotentials(pot, self._rmax, 0)
         self._Emin = _evaluatePotentials(pot, 0.0, 0)
         # Build interpolator r(pot)
         self._rphi = self._setup_rphi_interpolator()
+        self._fE_table = None
+        if tabulate:
+            self._tabulate_fE(
+                _fEtable_key("eddingtondf", self._pot, self._denspot, self._rmax),
+                tabulate_rtol,
+            )
+
+    def _tabulate_fE(self, key, rtol):
+        # Set up the tabulated f(E) (from the cache if possible)
+        self._fE_table = _get_fEtable(
+            key, self._fE_gl, self._Emin, self._potInf, rtol=rtol
+        )
+        return None
 
-    def sample(self, R=None, z=None, phi=None, n=1, return_orbit=True, rmin=0.0):
-        # Slight over-write of superclass method to first build f(E) interp
-        # No docstring so superclass' is used
+    def _setup_sampling_interp(self):
+        # Build the f(E) interpolator used in sampling
         if not hasattr(self, "_fE_interp"):
             Es4interp = numpy.hstack(
                 (
@@ -77,9 +115,7 @@ class eddingtondf(isotropicsphericaldf):
             self._fE_interp = interpolate.InterpolatedUnivariateSpline(
                 Es4interp[iindx], fE4interp[iindx], k=3, ext=3
             )
-        return sphericaldf.sample(
-            self, R=R, z=z, phi=phi, n=n, return_orbit=return_orbit, rmin=rmin
-        )
+        return None
 
     def fE(self, E):
         """
@@ -100,6 +136,8 @@ class eddingtondf(isotropicsphericaldf):
         - 2021-02-04 - Written - Bovy (UofT)
         """
         Eint = conversion.parse_energy(E, vo=self._vo)
+        if self._fE_table is not None:
+            return self._fE_table(Eint)
         out = numpy.zeros_like(Eint)
         indx = (Eint < self._potInf) * (Eint >= self._Emin)
         # Split integral at twice the lower limit to deal with divergence at
@@ -131,6 +169,33 @@ class eddingtondf(isotropicsphericaldf):
         )
         return -out / (numpy.sqrt(8.0) * numpy.pi**2.0)
 
+    def _fE_gl(self, E):
+        # Vectorized version of fE using fixed-order Gauss-Legendre
+        # integration, used to build the tabulated f(E); the small-r part of
+        # the integral uses the same transformation as fE, the large-r part
+        # is integrated in ln(r)
+        E = numpy.atleast_1d(E)
+        out = numpy.zeros_like(E)
+        indx = (E < self._potInf) * (E >= self._Emin)
+        rmin = _polish_rphi(self._pot, E[indx], self._rphi(E[indx]))
+        out[indx] = _gl_integrate(
+            lambda t, tE, trmin: _fEintegrand_smallr(
+                t, self._pot, tE, self._dnudr, self._d2nudr2, trmin
+            ),
+            numpy.zeros_like(rmin),
+            numpy.sqrt(rmin),
+            args=(E[indx], rmin),
+        )
+        out[indx] += _gl_integrate(
+            lambda lnr, tE: _fEintegrand_lnr(
+                lnr, self._pot, tE, self._dnudr, self._d2nudr2
+            ),
+            numpy.log(2.0 * rmin),
+            numpy.log(2.0 * rmin) + _TABULATE_LNRRANGE,
+            args=(E[indx],),
+        )
+        return -out / (numpy.sqrt(8.0) * numpy.pi**2.0)
+
 
 def _fEintegrand_raw(r, pot, E, dnudr, d2nudr2):
     # The 'raw', i.e., direct integrand in the Eddington inversion
@@ -150,3 +215,22 @@ def _fEintegrand_smallr(t, pot, E, dnudr, d2nudr2, rmin):
 def _fEintegrand_larger(t, pot, E, dnudr, d2nudr2):
     # The integrand at large r, using transformation to deal with infinity
     return 1.0 / t**2 * _fEintegrand_raw(1.0 / t, pot, E, dnudr, d2nudr2)
+
+
+def _polish_rphi(pot, E, r):
+    # Improve r(E) from the interpolator using Newton iterations, such that
+    # the integrand's singularity is at the lower end of the integration range
+    for ii in range(2):
+        newr = numpy.fabs(
+            r + (E - _evaluatePotentials(pot, r, 0)) / -_evaluateRforces(pot, r, 0)
+        )
+        r = numpy.where(numpy.isfinite(newr), newr, r)
+    return r
+
+
+def _fEintegrand_lnr(lnr, pot, E, dnudr, d2nudr2):
+    # The integrand at large r in ln(r), used for tabulating f(E)
+    r = numpy.exp(lnr)
+    out = r * _fEintegrand_raw(r, pot, E, dnudr, d2nudr2)
+    out[True ^ numpy.isfinite(out)] = 0.0
+    return out
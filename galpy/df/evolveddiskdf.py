@@ -9,6 +9,7 @@
 _NSIGMA = 4.0
 _NTS = 1000
 _PROFILE = False
+_MAXORBITPOINTS = 1000000  # max. number of orbit points to integrate together
 import copy
 import sys
 import time as time_module
@@ -2888,57 +2889,116 @@ class evolveddiskdf(df):
         out.vTgrid = numpy.linspace(
             meanvT - nsigma * sigmaT1, meanvT + nsigma * sigmaT1, gridpoints
         )
-        if isinstance(t, (list, numpy.ndarray)):
-            nt = len(t)
-            out.df = numpy.zeros((gridpoints, gridpoints, nt))
-            for ii in range(gridpoints):
-                for jj in range(
-                    gridpoints - 1, -1, -1
-                ):  # Reverse, so we get the peak before we get to the extreme lags NOT NECESSARY
-                    if print_progress:  # pragma: no cover
-                        sys.stdout.write(
-                            "\r"
-                            + "Velocity gridpoint %i out of %i"
-                            % (jj + ii * gridpoints + 1, gridpoints * gridpoints)
-                        )
-                        sys.stdout.flush()
-                    thiso = Orbit([R, out.vRgrid[ii], out.vTgrid[jj], phi])
-                    out.df[ii, jj, :] = self(
-                        thiso,
-                        numpy.array(t).flatten(),
-                        integrate_method=integrate_method,
-                        deriv=deriv,
-                        use_physical=False,
-                    )
-                    out.df[
-                        ii, jj, numpy.isnan(out.df[ii, jj, :])
-                    ] = 0.0  # BOVY: for now
-            if print_progress:
-                sys.stdout.write("\n")  # pragma: no cover
-        else:
-            out.df = numpy.zeros((gridpoints, gridpoints))
-            for ii in range(gridpoints):
-                for jj in range(gridpoints):
-                    if print_progress:  # pragma: no cover
-                        sys.stdout.write(
-                            "\r"
-                            + "Velocity gridpoint %i out of %i"
-                            % (jj + ii * gridpoints + 1, gridpoints * gridpoints)
-                        )
-                        sys.stdout.flush()
-                    thiso = Orbit([R, out.vRgrid[ii], out.vTgrid[jj], phi])
-                    out.df[ii, jj] = self(
-                        thiso,
-                        t,
-                        integrate_method=integrate_method,
-                        deriv=deriv,
-                        use_physical=False,
-                    )
-            out.df[numpy.isnan(out.df)] = 0.0  # BOVY: for now
-            if print_progress:
-                sys.stdout.write("\n")  # pragma: no cover
+        # Integrate all velocities on the grid back together
+        vRs, vTs = numpy.meshgrid(out.vRgrid, out.vTgrid, indexing="ij")
+        if print_progress:  # pragma: no cover
+            sys.stdout.write(
+                "\r" + "Integrating %i velocity gridpoints" % (gridpoints * gridpoints)
+            )
+            sys.stdout.flush()
+        out.df = self._call_grid(
+            R,
+            vRs.flatten(),
+            vTs.flatten(),
+            phi,
+            t,
+            integrate_method=integrate_method,
+            deriv=deriv,
+        ).reshape((gridpoints, gridpoints, -1))
+        if not isinstance(t, (list, numpy.ndarray)):
+            out.df = out.df[:, :, 0]
+        if print_progress:
+            sys.stdout.write("\n")  # pragma: no cover
         return out
 
+    def _call_grid(self, R, vR, vT, phi, t, integrate_method="dopr54_c", deriv=None):
+        """Evaluate the DF (or its derivative wrt R or phi) at arrays of phase-space points R,vR,vT,phi by integrating all of them back together as a single multi-object Orbit; returns an array with shape [N] for a single time and [N,nt] for a list of times t"""
+        R, vR, vT, phi = numpy.broadcast_arrays(
+            *(numpy.atleast_1d(x).astype("float") for x in (R, vR, vT, phi))
+        )
+        # Must match Python fallback for non-C potentials here, bc odeint needs
+        # custom t list to avoid numerically instabilities
+        if "_c" in integrate_method and not _check_c(self._pot):
+            if "leapfrog" in integrate_method or "symplec" in integrate_method:
+                integrate_method = "leapfrog"
+            else:
+                integrate_method = "odeint"
+        tlist = isinstance(t, (list, numpy.ndarray))
+        if tlist:
+            t = numpy.array(t).flatten()
+        t = parse_time(t, ro=self._ro, vo=self._vo)
+        vxvv = numpy.array([R, vR, vT]).reshape((3, -1))
+        # Trivial cases: no integration necessary
+        if tlist and self._to == t[0]:
+            return numpy.tile(
+                self._initdf(vxvv, use_physical=False)[:, None], (1, len(t))
+            )
+        elif not tlist and self._to == t:
+            if deriv is None:
+                return self._initdf(vxvv, use_physical=False)
+            elif deriv.lower() == "r":
+                return self._initdf(vxvv, use_physical=False) * self._initdf._dlnfdR(
+                    R, vR, vT
+                )
+            else:
+                return numpy.zeros(len(R))
+        # Set up the times to integrate to and the indices of the times at
+        # which the initial DF is evaluated
+        if tlist:
+            ts = self._create_ts_tlist(t, integrate_method)
+            tindx = numpy.array(
+                [numpy.argmin(numpy.fabs(ts - (self._to + t[0] - ti))) for ti in t]
+            )
+        else:
+            if integrate_method == "odeint" or not deriv is None:
+                ts = numpy.linspace(t, self._to, _NTS)
+            else:
+                ts = numpy.linspace(t, self._to, 2)
+            tindx = numpy.array([len(ts) - 1])
+        if not deriv is None:
+            # Also integrate a small area of phase space to calculate the
+            # derivative of the initial DF with respect to R or phi
+            dxdv = numpy.zeros((len(R), 4))
+            if deriv.lower() == "r":
+                dderiv = (R + 10.0**-10.0) - R
+                dxdv[:, 0] = dderiv
+            elif deriv.lower() == "phi":
+                dderiv = (phi + 10.0**-10.0) - phi
+                dxdv[:, 3] = dderiv
+        # Integrate the orbits in chunks to limit the memory use
+        out = numpy.empty((len(R), len(tindx)))
+        nchunk = numpy.amax([_MAXORBITPOINTS // len(ts), 1])
+        for ii in range(0, len(R), nchunk):
+            chunk = slice(ii, ii + nchunk)
+            o = Orbit(numpy.array([R[chunk], vR[chunk], vT[chunk], phi[chunk]]).T)
+            if deriv is None:
+                o.integrate(ts, self._pot, method=integrate_method)
+            else:
+                o.integrate_dxdv(dxdv[chunk], ts, self._pot, method=integrate_method)
+            orb_array = o.getOrbit()[:, tindx]
+            retval = self._initdf(
+                orb_array.reshape((-1, 4)).T, use_physical=False
+            ).reshape(orb_array.shape[:2])
+            if not deriv is None:
+                Ro, vRo, vTo = orb_array[..., 0], orb_array[..., 1], orb_array[..., 2]
+                dorb_array = o.getOrbit_dxdv()[:, tindx] / dderiv[chunk, None, None]
+                retval *= (
+                    self._initdf._dlnfdR(Ro, vRo, vTo) * dorb_array[..., 0]
+                    + self._initdf._dlnfdvR(Ro, vRo, vTo) * dorb_array[..., 1]
+                    + self._initdf._dlnfdvT(Ro, vRo, vTo) * dorb_array[..., 2]
+                )
+            if not tlist:
+                # Orbits that reach the center
+                retval[orb_array[..., 0] <= 0.0] = numpy.finfo(
+                    numpy.dtype(numpy.float64)
+                ).eps
+            out[chunk] = retval
+        out[numpy.isnan(out)] = 0.0
+        if tlist:
+            return out
+        else:
+            return out[:, 0]
+
     def _create_ts_tlist(self, t, integrate_method):
         # Check input
         if not all(t == sorted(t, reverse=True)):  # pragma: no cover
@@ -3245,115 +3305,36 @@ class evolveddiskdfHierarchicalGrid:
             nlevelsTotal = nlevels
         self.nlevels = nlevels
         self.nlevelsTotal = nlevelsTotal
+        dxdy = (self.vRgrid[1] - self.vRgrid[0]) * (self.vTgrid[1] - self.vTgrid[0])
+        if nlevels > 0:
+            xsubmin = int(gridpoints) // 4
+            xsubmax = gridpoints - int(gridpoints) // 4
+        else:
+            xsubmin = gridpoints
+            xsubmax = 0
+        ysubmin, ysubmax = xsubmin, xsubmax
+        # Points that are part of a subgrid are ignored
+        indx = numpy.ones((gridpoints, gridpoints), dtype="bool")
+        if nlevels > 1:
+            indx[xsubmin:xsubmax, ysubmin:ysubmax] = False
+        # Integrate all remaining velocities on the grid back together
+        vRs, vTs = numpy.meshgrid(self.vRgrid, self.vTgrid, indexing="ij")
+        if print_progress:  # pragma: no cover
+            sys.stdout.write(
+                "\r" + "Integrating %i velocity gridpoints" % numpy.sum(indx)
+            )
+            sys.stdout.flush()
         if isinstance(t, (list, numpy.ndarray)):
-            nt = len(t)
-            self.df = numpy.zeros((gridpoints, gridpoints, nt))
-            dxdy = (self.vRgrid[1] - self.vRgrid[0]) * (self.vTgrid[1] - self.vTgrid[0])
-            if nlevels > 0:
-                xsubmin = int(gridpoints) // 4
-                xsubmax = gridpoints - int(gridpoints) // 4
-            else:
-                xsubmin = gridpoints
-                xsubmax = 0
-            ysubmin, ysubmax = xsubmin, xsubmax
-            for ii in range(gridpoints):
-                for jj in range(gridpoints):
-                    if print_progress:  # pragma: no cover
-                        sys.stdout.write(
-                            "\r"
-                            + "Velocity gridpoint %i out of %i"
-                            % (jj + ii * gridpoints + 1, gridpoints * gridpoints)
-                        )
-                        sys.stdout.flush()
-                    # If this is part of a subgrid, ignore
-                    if (
-                        nlevels > 1
-                        and ii >= xsubmin
-                        and ii < xsubmax
-                        and jj >= ysubmin
-                        and jj < ysubmax
-                    ):
-                        continue
-                    thiso = Orbit([R, self.vRgrid[ii], self.vTgrid[jj], phi])
-                    self.df[ii, jj, :] = edf(
-                        thiso, numpy.array(t).flatten(), deriv=deriv
-                    )
-                    self.df[
-                        ii, jj, numpy.isnan(self.df[ii, jj, :])
-                    ] = 0.0  # BOVY: for now
-                    # Multiply in area, somewhat tricky for edge objects
-                    if upperdxdy is None or (
-                        ii != 0
-                        and ii != gridpoints - 1
-                        and jj != 0
-                        and jj != gridpoints - 1
-                    ):
-                        self.df[ii, jj, :] *= dxdy
-                    elif (
-                        (ii == 0 or ii == gridpoints - 1)
-                        and (jj != 0 and jj != gridpoints - 1)
-                    ) or (
-                        (jj == 0 or jj == gridpoints - 1)
-                        and (ii != 0 and ii != gridpoints - 1)
-                    ):  # edge
-                        self.df[ii, jj, :] *= 1.5 * dxdy / 1.5  # turn this off for now
-                    else:  # corner
-                        self.df[ii, jj, :] *= (
-                            2.25 * dxdy / 2.25
-                        )  # turn this off for now
-            if print_progress:
-                sys.stdout.write("\n")  # pragma: no cover
+            self.df = numpy.zeros((gridpoints, gridpoints, len(t)))
         else:
             self.df = numpy.zeros((gridpoints, gridpoints))
-            dxdy = (self.vRgrid[1] - self.vRgrid[0]) * (self.vTgrid[1] - self.vTgrid[0])
-            if nlevels > 0:
-                xsubmin = int(gridpoints) // 4
-                xsubmax = gridpoints - int(gridpoints) // 4
-            else:
-                xsubmin = gridpoints
-                xsubmax = 0
-            ysubmin, ysubmax = xsubmin, xsubmax
-            for ii in range(gridpoints):
-                for jj in range(gridpoints):
-                    if print_progress:  # pragma: no cover
-                        sys.stdout.write(
-                            "\r"
-                            + "Velocity gridpoint %i out of %i"
-                            % (jj + ii * gridpoints + 1, gridpoints * gridpoints)
-                        )
-                        sys.stdout.flush()
-                    # If this is part of a subgrid, ignore
-                    if (
-                        nlevels > 1
-                        and ii >= xsubmin
-                        and ii < xsubmax
-                        and jj >= ysubmin
-                        and jj < ysubmax
-                    ):
-                        continue
-                    thiso = Orbit([R, self.vRgrid[ii], self.vTgrid[jj], phi])
-                    self.df[ii, jj] = edf(thiso, t, deriv=deriv)
-                    # Multiply in area, somewhat tricky for edge objects
-                    if upperdxdy is None or (
-                        ii != 0
-                        and ii != gridpoints - 1
-                        and jj != 0
-                        and jj != gridpoints - 1
-                    ):
-                        self.df[ii, jj] *= dxdy
-                    elif (
-                        (ii == 0 or ii == gridpoints - 1)
-                        and (jj != 0 and jj != gridpoints - 1)
-                    ) or (
-                        (jj == 0 or jj == gridpoints - 1)
-                        and (ii != 0 and ii != gridpoints - 1)
-                    ):  # edge
-                        self.df[ii, jj] *= 1.5 * dxdy / 1.5  # turn this off for now
-                    else:  # corner
-                        self.df[ii, jj] *= 2.25 * dxdy / 2.25  # turn this off for now
-            self.df[numpy.isnan(self.df)] = 0.0  # BOVY: for now
-            if print_progress:
-                sys.stdout.write("\n")  # pragma: no cover
+        # Multiply in area; edge and corner objects could be treated
+        # differently, but this is turned off for now
+        self.df[indx] = (
+            edf._call_grid(R, vRs[indx], vTs[indx], phi, t, deriv=deriv) * dxdy
+        )
+        if print_progress:
+            sys.stdout.write("\n")  # pragma: no cover
         if nlevels > 1:
             # Set up subgrid
             subnsigma = (self.meanvR - self.vRgrid[xsubmin]) / self.sigmaR1
@@ -1,16 +1,110 @@
 # jeans.py: utilities related to the Jeans equations
 import numpy
-from scipy import integrate
+from scipy import integrate, interpolate
 
+from ..potential.interpRZPotential import eval_force_c
 from ..potential.Potential import (
+    _check_c,
+    _isNonAxi,
     evaluateDensities,
     evaluaterforces,
     evaluateSurfaceDensities,
 )
 from ..potential.Potential import flatten as flatten_pot
+from ..util import _load_extension_libs
 from ..util.conversion import physical_conversion, potential_physical_input
 
+_lib, ext_loaded = _load_extension_libs.load_libgalpy()
+
 _INVSQRTTWO = 1.0 / numpy.sqrt(2.0)
+# Parameters of the logarithmic grid used for array input: maximum spacing in
+# ln(r), number of Gauss-Legendre nodes per grid cell, and the factors beyond
+# the largest radius out to which the Jeans equation is integrated and the
+# line-of-sight projection is performed
+_DLNR = 0.1
+_NGL = 6
+_ROUTFAC = 10.0**10.0
+_ROUTFAC_PROJ = 10.0**8.0
+
+
+def _vectorized_call(func, x):
+    # Evaluate a user-supplied function of radius for an array of radii,
+    # falling back to numpy.vectorize for functions that only take scalars
+    try:
+        out = numpy.asarray(func(x), dtype="float")
+    except (TypeError, ValueError):
+        out = None
+    if out is not None and out.ndim == 0:
+        return out * numpy.ones_like(x)
+    elif out is None or out.shape != x.shape:
+        out = numpy.vectorize(func, otypes=["float"])(x)
+    return out
+
+
+def _rforces(Pot, r):
+    # Spherical radial force at an array of radii r, evaluated at
+    # R=z=r/sqrt(2); uses C when the potential has a C implementation
+    if ext_loaded and _check_c(Pot) and not _isNonAxi(Pot):
+        Rz = numpy.require(
+            r.flatten() * _INVSQRTTWO, dtype=numpy.float64, requirements=["C", "W"]
+        )
+        Rforce, err = eval_force_c(Pot, Rz, Rz)
+        zforce, zerr = eval_force_c(Pot, Rz, Rz, zforce=True)
+        if err == 0 and zerr == 0:
+            return numpy.reshape((Rforce + zforce) * _INVSQRTTWO, r.shape)
+    return evaluaterforces(
+        Pot, r * _INVSQRTTWO, r * _INVSQRTTWO, phi=numpy.pi / 4.0, use_physical=False
+    )
+
+
+def _dens_sigmar2(Pot, dens, beta, rs):
+    """Compute rho(r) x sigma_r^2(r) at all cell edges of a logarithmic grid that includes the (sorted, unique) radii rs, by integrating the spherical Jeans equation backwards over the grid using Gauss-Legendre quadrature in each cell; returns (ln r at the cell edges, rho x sigma_r^2 at the cell edges)"""
+    lnrs = numpy.log(rs)
+    lnrout = lnrs[-1] + numpy.log(_ROUTFAC)
+    lnb = numpy.unique(
+        numpy.concatenate(
+            (
+                lnrs,
+                numpy.linspace(
+                    lnrs[0],
+                    lnrout,
+                    int(numpy.ceil((lnrout - lnrs[0]) / _DLNR)) + 1,
+                ),
+            )
+        )
+    )
+    glx, glw = numpy.polynomial.legendre.leggauss(_NGL)
+    halfw = 0.5 * (lnb[1:] - lnb[:-1])[:, numpy.newaxis]
+    lnx = lnb[:-1, numpy.newaxis] + halfw * (1.0 + glx)
+    x = numpy.exp(lnx)
+    # ln of the integrating factor exp(2 int beta / r dr) across each cell
+    # (dB) and from the start of each cell to the nodes in the cell (Bn)
+    if callable(beta):
+        dB = halfw[:, 0] * numpy.sum(glw * _vectorized_call(beta, x), axis=1)
+        halfn = 0.5 * (lnx - lnb[:-1, numpy.newaxis])
+        Bn = halfn * numpy.sum(
+            glw
+            * _vectorized_call(
+                beta,
+                numpy.exp(
+                    lnb[:-1, numpy.newaxis, numpy.newaxis]
+                    + halfn[..., numpy.newaxis] * (1.0 + glx)
+                ),
+            ),
+            axis=-1,
+        )
+    else:  # assume to be number
+        dB = beta * 2.0 * halfw[:, 0]
+        Bn = beta * (lnx - lnb[:-1, numpy.newaxis])
+    integrand = -_vectorized_call(dens, x) * _rforces(Pot, x) * x * numpy.exp(2.0 * Bn)
+    cellint = halfw[:, 0] * numpy.sum(glw * integrand, axis=1)
+    # Accumulate backwards, only using the integrating factor across single
+    # cells to avoid overflow
+    growth = numpy.exp(2.0 * dB)
+    out = numpy.zeros(len(lnb))
+    for ii in range(len(cellint) - 1, -1, -1):
+        out[ii] = cellint[ii] + growth[ii] * out[ii + 1]
+    return (lnb, out)
 
 
 @potential_physical_input
@@ -23,7 +117,7 @@ def sigmar(Pot, r, dens=None, beta=0.0):
     ----------
     Pot : potential or list of potentials
         Gravitational potential; evaluated at R=r/sqrt(2),z=r/sqrt(2), sphericity not checked.
-    r : float or Quantity
+    r : float, numpy.ndarray, or Quantity
         Galactocentric radius
     dens : function, optional
         tracer density profile (function of r); if None, the density is assumed to be that corresponding to the potential
@@ -32,11 +126,12 @@ def sigmar(Pot, r, dens=None, beta=0.0):
 
     Returns
     -------
-    float
+    float or numpy.ndarray
         sigma_r(r)
 
     Notes
     -----
+    - For array input, the Jeans equation is integrated for all radii at once using Gauss-Legendre quadrature on a logarithmic grid in r that includes all input radii, accumulating the integral backwards from large radii; dens and beta are evaluated for arrays of radii when possible.
     - 2018-07-05 - Written - Bovy (UofT)
     """
     Pot = flatten_pot(Pot)
@@ -48,6 +143,17 @@ def sigmar(Pot, r, dens=None, beta=0.0):
             phi=numpy.pi / 4.0,
             use_physical=False,
         )
+    if numpy.ndim(r) > 0:
+        r = numpy.asarray(r, dtype="float")
+        rs, inv = numpy.unique(r, return_inverse=True)
+        lnb, densSigmar2 = _dens_sigmar2(Pot, dens, beta, rs)
+        return numpy.reshape(
+            numpy.sqrt(
+                densSigmar2[numpy.searchsorted(lnb, numpy.log(rs))]
+                / _vectorized_call(dens, rs)
+            )[inv],
+            r.shape,
+        )
     if callable(beta):
         intFactor = lambda x: numpy.exp(
             2.0 * integrate.quad(lambda y: beta(y) / y, 1.0, x)[0]
@@ -83,7 +189,7 @@ def sigmalos(Pot, R, dens=None, surfdens=None, beta=0.0, sigma_r=None):
     ----------
     Pot : potential or list of potentials
         Gravitational potential; evaluated at R=r/sqrt(2),z=r/sqrt(2), sphericity not checked.
-    R : float or Quantity
+    R : float, numpy.ndarray, or Quantity
         Galactocentric projected radius
     dens : function, optional
         tracer density profile (function of r); if None, the density is assumed to be that corresponding to the potential
@@ -96,11 +202,12 @@ def sigmalos(Pot, R, dens=None, surfdens=None, beta=0.0, sigma_r=None):
 
     Returns
     -------
-    float
+    float or numpy.ndarray
         sigma_los(R)
 
     Notes
     -----
+    - For array input, sigma_r(r) is computed on a single logarithmic grid (as in sigmar) and the line-of-sight projection for all R is performed at once by substituting r = R cosh(t) and using Gauss-Legendre quadrature in t; in this case the surface density, if not given, is obtained from the same projection of the density.
     - 2018-08-27 - Written - Bovy (UofT)
     """
     Pot = flatten_pot(Pot)
@@ -111,6 +218,10 @@ def sigmalos(Pot, R, dens=None, surfdens=None, beta=0.0, sigma_r=None):
         )
     else:
         densPot = False
+    if numpy.ndim(R) > 0:
+        return _sigmalos_array(
+            Pot, numpy.asarray(R, dtype="float"), dens, surfdens, beta, sigma_r
+        )
     if callable(surfdens):
         called_surfdens = surfdens(R)
     elif surfdens is None:
@@ -132,7 +243,9 @@ def sigmalos(Pot, R, dens=None, surfdens=None, beta=0.0, sigma_r=None):
     else:
         call_beta = lambda x: beta
     if sigma_r is None:
-        call_sigma_r = lambda r: sigmar(Pot, r, dens=dens, beta=beta)
+        call_sigma_r = lambda r: sigmar(
+            Pot, r, dens=dens, beta=beta, use_physical=False
+        )
     elif not callable(sigma_r):
         call_sigma_r = lambda x: sigma_r
     else:
@@ -150,3 +263,42 @@ def sigmalos(Pot, R, dens=None, surfdens=None, beta=0.0, sigma_r=None):
         )[0]
         / called_surfdens
     )
+
+
+def _sigmalos_array(Pot, R, dens, surfdens, beta, sigma_r):
+    """Compute sigma_los(R) for an array of R, projecting along the line of sight for all R at once using x = R cosh(t) and Gauss-Legendre quadrature in t"""
+    Rs, inv = numpy.unique(R, return_inverse=True)
+    tmax = numpy.arccosh(Rs[-1] * _ROUTFAC_PROJ / Rs)
+    ncell = int(numpy.ceil(numpy.amax(tmax) / _DLNR))
+    glx, glw = numpy.polynomial.legendre.leggauss(_NGL)
+    u = ((numpy.arange(ncell)[:, numpy.newaxis] + 0.5 * (1.0 + glx)) / ncell).flatten()
+    t = numpy.outer(tmax, u)
+    w = numpy.outer(tmax, numpy.tile(glw, ncell) / 2.0 / ncell)
+    cosht = numpy.cosh(t)
+    x = Rs[:, numpy.newaxis] * cosht
+    densx = _vectorized_call(dens, x)
+    if sigma_r is None:
+        lnb, densSigmar2 = _dens_sigmar2(Pot, dens, beta, Rs)
+        indx = lnb <= numpy.log(Rs[-1] * _ROUTFAC_PROJ) + 1.0
+        densSigmar2x = numpy.exp(
+            interpolate.InterpolatedUnivariateSpline(
+                lnb[indx], numpy.log(densSigmar2[indx]), k=3
+            )(numpy.log(x))
+        )
+    elif callable(sigma_r):
+        densSigmar2x = densx * _vectorized_call(sigma_r, x) ** 2.0
+    else:
+        densSigmar2x = densx * sigma_r**2.0
+    if callable(beta):
+        betax = _vectorized_call(beta, x)
+    else:
+        betax = beta
+    num = 2.0 * numpy.sum(w * (1.0 - betax / cosht**2.0) * x * densSigmar2x, axis=1)
+    if callable(surfdens):
+        num /= _vectorized_call(surfdens, Rs)
+    elif surfdens is None:
+        num /= 2.0 * numpy.sum(w * densx * x, axis=1)
+    out = numpy.reshape(num[inv], R.shape)
+    if surfdens is not None and not callable(surfdens):
+        out /= surfdens
+    return numpy.sqrt(out)
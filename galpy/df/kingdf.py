@@ -21,6 +21,8 @@ class kingdf(isotropicsphericaldf):
 
     """
 
+    _content_key_exclude = isotropicsphericaldf._content_key_exclude + ("_icmf",)
+
     def __init__(self, W0, M=1.0, rt=1.0, npt=1001, ro=None, vo=None):
         """
         Initialize a King DF
@@ -107,6 +109,8 @@ class kingdf(isotropicsphericaldf):
 class _scalefreekingdf:
     """Internal helper class to solve the scale-free King DF model, that is, the one that only depends on W = Psi/sigma^2"""
 
+    _content_key_exclude = ("_W_from_r",)
+
     def __init__(self, W0):
         self.W0 = W0
 
@@ -6,7 +6,7 @@ from ..potential import evaluateDensities
 from ..potential.Potential import _evaluatePotentials
 from ..util import conversion
 from .eddingtondf import eddingtondf
-from .sphericaldf import anisotropicsphericaldf, sphericaldf
+from .sphericaldf import _fEtable_key, anisotropicsphericaldf
 
 
 # This is the general Osipkov-Merritt superclass, implementation of general
@@ -14,6 +14,10 @@ from .sphericaldf import anisotropicsphericaldf, sphericaldf
 class _osipkovmerrittdf(anisotropicsphericaldf):
     """General Osipkov-Merritt superclass with useful functions for any DF of the Osipkov-Merritt type."""
 
+    _content_key_exclude = anisotropicsphericaldf._content_key_exclude + (
+        "_logfQ_interp",
+    )
+
     def __init__(
         self, pot=None, denspot=None, ra=1.4, rmax=None, scale=None, ro=None, vo=None
     ):
@@ -201,7 +205,16 @@ class osipkovmerrittdf(_osipkovmerrittdf):
     """
 
     def __init__(
-        self, pot=None, denspot=None, ra=1.4, rmax=1e4, scale=None, ro=None, vo=None
+        self,
+        pot=None,
+        denspot=None,
+        ra=1.4,
+        rmax=1e4,
+        scale=None,
+        tabulate=False,
+        tabulate_rtol=1e-6,
+        ro=None,
+        vo=None,
     ):
         """
         Initialize a DF with Osipkov-Merritt anisotropy.
@@ -218,6 +231,10 @@ class osipkovmerrittdf(_osipkovmerrittdf):
             Maximum radius to consider; DF is cut off at E = Phi(rmax). Default: None
         scale : float or Quantity, optional
             Characteristic scale radius to aid sampling calculations. Not necessary, and will also be overridden by value from pot if available. Default: None
+        tabulate : bool, optional
+            If True, compute f(Q) once on an adaptive grid and evaluate fQ using a monotone spline of this table. Tables are shared between instances with the same pot, denspot, ra, and rmax. Default: False
+        tabulate_rtol : float, optional
+            Relative tolerance of the tabulated f(Q). Default: 1e-6
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -243,7 +260,7 @@ class osipkovmerrittdf(_osipkovmerrittdf):
             )
             if not isinstance(self._denspot, list)
             else (
-                lambda r: numpy.sum([p._ddensdr(r) for p in self._denspot])
+                lambda r: numpy.sum([p._ddensdr(r) for p in self._denspot], axis=0)
                 * (1.0 + r**2.0 / self._ra2)
                 + 2.0
                 * evaluateDensities(self._denspot, r, 0, use_physical=False)
@@ -259,10 +276,10 @@ class osipkovmerrittdf(_osipkovmerrittdf):
             )
             if not isinstance(self._denspot, list)
             else (
-                lambda r: numpy.sum([p._d2densdr2(r) for p in self._denspot])
+                lambda r: numpy.sum([p._d2densdr2(r) for p in self._denspot], axis=0)
                 * (1.0 + r**2.0 / self._ra2)
                 + 4.0
-                * numpy.sum([p._ddensdr(r) for p in self._denspot])
+                * numpy.sum([p._ddensdr(r) for p in self._denspot], axis=0)
                 * r
                 / self._ra2
                 + 2.0
@@ -270,10 +287,16 @@ class osipkovmerrittdf(_osipkovmerrittdf):
                 / self._ra2
             )
         )
+        if tabulate:
+            self._edf._tabulate_fE(
+                _fEtable_key(
+                    "osipkovmerrittdf", self._pot, self._denspot, self._rmax, self._ra
+                ),
+                tabulate_rtol,
+            )
 
-    def sample(self, R=None, z=None, phi=None, n=1, return_orbit=True, rmin=0.0):
-        # Slight over-write of superclass method to first build f(Q) interp
-        # No docstring so superclass' is used
+    def _setup_sampling_interp(self):
+        # Build the f(Q) interpolator used in sampling
         if not hasattr(self, "_logfQ_interp"):
             Qs4interp = numpy.hstack(
                 (
@@ -289,9 +312,7 @@ class osipkovmerrittdf(_osipkovmerrittdf):
             self._logfQ_interp = interpolate.InterpolatedUnivariateSpline(
                 Qs4interp[iindx], fQ4interp[iindx], k=3, ext=3
             )
-        return sphericaldf.sample(
-            self, R=R, z=z, phi=phi, n=n, return_orbit=return_orbit, rmin=rmin
-        )
+        return None
 
     def fQ(self, Q):
         """
@@ -1,16 +1,17 @@
 # A 'Binney' quasi-isothermal DF
 import hashlib
 import warnings
+from collections import OrderedDict
 
 import numpy
-from scipy import integrate, interpolate, optimize
+from scipy import integrate, interpolate
 
 from .. import actionAngle, potential
 from ..actionAngle import actionAngleIsochrone
 from ..orbit import Orbit
 from ..potential import IsochronePotential
 from ..potential import flatten as flatten_potential
-from ..util import conversion, galpyWarning
+from ..util import conversion, galpyWarning, multi
 from ..util._optional_deps import _APY_LOADED, _APY_UNITS
 from ..util.conversion import (
     actionAngle_physical_input,
@@ -30,6 +31,32 @@ if _APY_LOADED:
 _NSIGMA = 4
 _DEFAULTNGL = 10
 _DEFAULTNGL2 = 20
+_SAMPLEV_MINBATCH = 1000
+_MOMENTS_GRID_MAXNODES = 2**18
+# Raw velocity moments (n,m,o) needed for the moments in moments_grid
+_MOMENTS_GRID_REQUIREMENTS = {
+    "density": [],
+    "meanvR": [(1, 0, 0)],
+    "meanvT": [(0, 1, 0)],
+    "meanvz": [(0, 0, 1)],
+    "sigmaR2": [(2, 0, 0)],
+    "sigmaT2": [(0, 1, 0), (0, 2, 0)],
+    "sigmaz2": [(0, 0, 2)],
+    "sigmaRz": [(1, 0, 1)],
+    "tilt": [(2, 0, 0), (0, 0, 2), (1, 0, 1)],
+}
+# Powers of (ro,vo) that convert the moments in moments_grid to physical units
+_MOMENTS_GRID_PHYSICAL_POWERS = {
+    "density": (-3, 0),
+    "meanvR": (0, 1),
+    "meanvT": (0, 1),
+    "meanvz": (0, 1),
+    "sigmaR2": (0, 2),
+    "sigmaT2": (0, 2),
+    "sigmaz2": (0, 2),
+    "sigmaRz": (0, 2),
+    "tilt": (0, 0),
+}
 
 
 class quasiisothermaldf(df):
@@ -52,6 +79,7 @@ class quasiisothermaldf(df):
         lo=10.0 / 220.0 / 8.0,
         ro=None,
         vo=None,
+        action_cache=None,
     ):
         """
         Initialize a quasi-isothermal DF
@@ -82,6 +110,8 @@ class quasiisothermaldf(df):
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
             Velocity scale for translation into internal units (default from configuration file).
+        action_cache : ActionNodeCache, optional
+            If set, cache of the actions at the Gauss-Legendre velocity nodes used when calculating moments with gl=True and in moments_grid; can be shared between DFs that use the same aA.
         _precomputerg : bool, optional
             If True (default), pre-compute the rL(L).
         _precomputergrmax : float or Quantity, optional
@@ -124,6 +154,11 @@ class quasiisothermaldf(df):
                 raise OSError(
                     "Potential in aA does not appear to be the same as given potential pot"
                 )
+        if not action_cache is None and not action_cache._aA is self._aA:
+            raise OSError(
+                "actionAngle instance of action_cache is not the same as the given aA"
+            )
+        self._action_cache = action_cache
         self._check_consistent_units()
         self._cutcounter = cutcounter
         if _precomputerg:
@@ -634,14 +669,26 @@ class quasiisothermaldf(df):
                 return 0.0  # we know this must be the case
         if nsigma == None:
             nsigma = _NSIGMA
-        if _sigmaR1 is None:
-            sigmaR1 = self._sr * numpy.exp((self._refr - R) / self._hsr)
-        else:
-            sigmaR1 = _sigmaR1
-        if _sigmaz1 is None:
-            sigmaz1 = self._sz * numpy.exp((self._refr - R) / self._hsz)
+        # Only use the cache of actions when the nodes are not set by hand
+        use_cache = (
+            gl
+            and not self._action_cache is None
+            and _glqeval is None
+            and _jr is None
+            and _sigmaR1 is None
+            and _sigmaz1 is None
+        )
+        if use_cache:
+            sigmaR1, sigmaz1 = self._action_cache._sigmas(self, R)
         else:
-            sigmaz1 = _sigmaz1
+            if _sigmaR1 is None:
+                sigmaR1 = self._sr * numpy.exp((self._refr - R) / self._hsr)
+            else:
+                sigmaR1 = _sigmaR1
+            if _sigmaz1 is None:
+                sigmaz1 = self._sz * numpy.exp((self._refr - R) / self._hsz)
+            else:
+                sigmaz1 = _sigmaz1
         thisvc = potential.vcirc(self._pot, R, use_physical=False)
         # Use the asymmetric drift equation to estimate va
         gamma = numpy.sqrt(0.5)
@@ -715,6 +762,16 @@ class quasiisothermaldf(df):
             vRglw = numpy.tile(numpy.reshape(vRglw, (1, ngl)).T, (ngl, 1, ngl))
             vzglw = numpy.tile(vzglw, (ngl, ngl, 1))
             # evaluate
+            if use_cache:
+                _jr, _lz, _jz, _rg, _kappa, _nu, _Omega = self._action_cache._actions(
+                    self,
+                    [self._action_cache._key(self, R, z, ngl, nsigma, vTmax)],
+                    R + numpy.zeros((1, ngl * ngl * ngl)),
+                    numpy.reshape(vRgl, (1, -1)),
+                    numpy.reshape(vTgl, (1, -1)),
+                    z + numpy.zeros((1, ngl * ngl * ngl)),
+                    numpy.reshape(vzgl, (1, -1)),
+                )[:, 0]
             if _glqeval is None and _jr is None:
                 logqeval, jr, lz, jz, rg, kappa, nu, Omega = self(
                     R + numpy.zeros(ngl * ngl * ngl),
@@ -911,6 +968,316 @@ class quasiisothermaldf(df):
                 * sigmaz1 ** (1.0 + o)
             )
 
+    @potential_physical_input
+    def moments_grid(
+        self,
+        R,
+        z,
+        moments=("density", "sigmaR2", "meanvT", "sigmaz2"),
+        grid=True,
+        nsigma=None,
+        ngl=_DEFAULTNGL,
+        vTmax=1.5,
+        numcores=1,
+        **kwargs
+    ):
+        """
+        Calculate multiple moments of the velocity distribution on a grid of (R,z) in a single pass, using Gauss-Legendre integration.
+
+        Parameters
+        ----------
+        R : float, numpy.ndarray, or Quantity
+            Radii at which to calculate the moments.
+        z : float, numpy.ndarray, or Quantity
+            Heights at which to calculate the moments.
+        moments : list or tuple, optional
+            Moments to calculate (default: ('density', 'sigmaR2', 'meanvT', 'sigmaz2')); each entry is either the name of one of the moment methods of this class that support gl=True ('density', 'meanvR', 'meanvT', 'meanvz', 'sigmaR2', 'sigmaT2', 'sigmaz2', 'sigmaRz', 'tilt') or a tuple (n,m,o), which returns vmomentdensity(R,z,n,m,o).
+        grid : bool, optional
+            If True (default), calculate the moments on the grid spanned by R and z, with output shape (len(R),len(z)); otherwise, R and z are broadcast against each other.
+        nsigma : float, optional
+            Number of sigma to integrate the vR and vz velocities over (default: 4).
+        ngl : int, optional
+            Use ngl-th order Gauss-Legendre integration for each dimension (must be even).
+        vTmax : float, optional
+            Upper limit for the integration over vT (default: 1.5).
+        numcores : int, optional
+            Number of cores to use to calculate the actions at the Gauss-Legendre nodes in parallel.
+
+        Returns
+        -------
+        dict
+            Dictionary with the moments as keys, each containing an array of the moment at (R,z) (as a Quantity when appropriate).
+
+        Notes
+        -----
+        - The actions at all (R,z) and velocity Gauss-Legendre nodes are calculated together (in chunks, which are spread over numcores cores) and all moments are calculated from these, rather than calculating the actions separately for each (R,z) and moment.
+        - If the DF has an action_cache, the actions are taken from and stored in the cache; only the actions that are not cached are then calculated, spread over numcores cores.
+        """
+        if ngl % 2 == 1:
+            raise ValueError("ngl must be even")
+        if nsigma is None:
+            nsigma = _NSIGMA
+        if grid:
+            R, z = numpy.meshgrid(
+                numpy.atleast_1d(R), numpy.atleast_1d(z), indexing="ij"
+            )
+        else:
+            R, z = numpy.broadcast_arrays(R, z)
+        shape = R.shape
+        R = R.flatten()
+        z = z.flatten()
+        # Determine all of the raw velocity moments x density that we need
+        nmos = [(0, 0, 0)]
+        for moment in moments:
+            if isinstance(moment, tuple):
+                reqs = [moment]
+            elif moment in _MOMENTS_GRID_REQUIREMENTS:
+                reqs = _MOMENTS_GRID_REQUIREMENTS[moment]
+            else:
+                raise ValueError(
+                    "Moment " + str(moment) + " not supported in moments_grid"
+                )
+            for req in reqs:
+                req = tuple(int(ii) for ii in req)
+                if not req in nmos:
+                    nmos.append(req)
+        # Gauss-Legendre nodes and weights in units of nsigma x sigma
+        if ngl == _DEFAULTNGL:
+            glx, glw = self._glxdef, self._glwdef
+            glx12, glw12 = self._glxdef12, self._glwdef12
+        elif ngl == _DEFAULTNGL2:
+            glx, glw = self._glxdef2, self._glwdef2
+            glx12, glw12 = self._glxdef, self._glwdef
+        else:
+            glx, glw = numpy.polynomial.legendre.leggauss(ngl)
+            glx12, glw12 = numpy.polynomial.legendre.leggauss(ngl // 2)
+        adiabatic = isinstance(
+            self._aA,
+            (actionAngle.actionAngleAdiabatic, actionAngle.actionAngleAdiabaticGrid),
+        )
+        if adiabatic:
+            uvR = nsigma / 2.0 * (glx + 1.0)
+            uvRw = glw
+        else:
+            uvR = numpy.hstack(
+                (nsigma / 2.0 * (glx12 + 1.0), -nsigma / 2.0 * (glx12 + 1.0))
+            )
+            uvRw = numpy.hstack((glw12, glw12))
+        vTgl = vTmax / 2.0 * (glx + 1.0)
+        # Split the (R,z) into chunks, each of which requires a single action
+        # calculation; use chunks of equal size (padding with the last
+        # position), because parallel_map concatenates its outputs
+        npos = len(R)
+        nchunk = numpy.amin(
+            [
+                numpy.amax(
+                    [
+                        numcores,
+                        int(numpy.ceil(npos * ngl**3 / _MOMENTS_GRID_MAXNODES)),
+                    ]
+                ),
+                npos,
+            ]
+        )
+        chunksize = int(numpy.ceil(npos / nchunk))
+        indx = numpy.reshape(
+            numpy.minimum(numpy.arange(nchunk * chunksize), npos - 1),
+            (nchunk, chunksize),
+        )
+        calc_chunk = lambda ii: self._moments_grid_chunk(
+            R[indx[ii]], z[indx[ii]], nmos, uvR, uvRw, vTgl, glw, nsigma, vTmax
+        )
+        if not self._action_cache is None:
+            # Fill the cache in this process, spreading only the calculation
+            # of the actions that are not cached over numcores cores
+            raw = [
+                self._moments_grid_chunk(
+                    R[indx[ii]],
+                    z[indx[ii]],
+                    nmos,
+                    uvR,
+                    uvRw,
+                    vTgl,
+                    glw,
+                    nsigma,
+                    vTmax,
+                    numcores=numcores,
+                )
+                for ii in range(nchunk)
+            ]
+        elif numcores > 1 and nchunk > 1:
+            raw = multi.parallel_map(
+                calc_chunk, range(nchunk), numcores=numpy.amin([numcores, nchunk])
+            )
+        else:
+            raw = [calc_chunk(ii) for ii in range(nchunk)]
+        raw = numpy.concatenate(raw, axis=0)[:npos]
+        if adiabatic:  # we know odd moments in vR and vz must be zero
+            for jj, nmo in enumerate(nmos):
+                if nmo[0] % 2 == 1 or nmo[2] % 2 == 1:
+                    raw[:, jj] = 0.0
+        raw = {nmo: numpy.reshape(raw[:, jj], shape) for jj, nmo in enumerate(nmos)}
+        # Compute the requested moments and convert to physical units
+        out = {}
+        for moment in moments:
+            if isinstance(moment, tuple):
+                out[moment] = self._moments_grid_physical(
+                    raw[tuple(int(ii) for ii in moment)], moment, kwargs
+                )
+                continue
+            dens = raw[(0, 0, 0)]
+            if moment == "density":
+                tout = dens
+            elif moment == "meanvR":
+                tout = raw[(1, 0, 0)] / dens
+            elif moment == "meanvT":
+                tout = raw[(0, 1, 0)] / dens
+            elif moment == "meanvz":
+                tout = raw[(0, 0, 1)] / dens
+            elif moment == "sigmaR2":
+                tout = raw[(2, 0, 0)] / dens
+            elif moment == "sigmaT2":
+                tout = raw[(0, 2, 0)] / dens - (raw[(0, 1, 0)] / dens) ** 2.0
+            elif moment == "sigmaz2":
+                tout = raw[(0, 0, 2)] / dens
+            elif moment == "sigmaRz":
+                tout = raw[(1, 0, 1)] / dens
+            elif moment == "tilt":
+                tout = 0.5 * numpy.arctan(
+                    2.0 * raw[(1, 0, 1)] / (raw[(2, 0, 0)] - raw[(0, 0, 2)])
+                )
+            out[moment] = self._moments_grid_physical(tout, moment, kwargs)
+        return out
+
+    def _moments_grid_chunk(
+        self, R, z, nmos, uvR, uvRw, vTgl, vTglw, nsigma, vTmax, numcores=1
+    ):
+        """Calculate the raw velocity moments x density for the (n,m,o) in nmos at arrays R,z by evaluating the DF at all Gauss-Legendre nodes at once; returns an array with shape [len(R),len(nmos)]"""
+        ngl = len(vTgl)
+        if self._action_cache is None:
+            sigmaR1 = self._sr * numpy.exp((self._refr - R) / self._hsr)
+            sigmaz1 = self._sz * numpy.exp((self._refr - R) / self._hsz)
+        else:
+            sigmaR1, sigmaz1 = self._action_cache._sigmas(self, R)
+        # (R,vT,vR,vz) node grid with shape [len(R),ngl,ngl,ngl], in the same
+        # order as in _vmomentdensity
+        shape = (len(R), ngl, ngl, ngl)
+        Rs = numpy.reshape(
+            numpy.broadcast_to(R[:, None, None, None], shape), (len(R), -1)
+        )
+        vRs = numpy.reshape(
+            numpy.broadcast_to(
+                sigmaR1[:, None, None, None] * uvR[None, None, :, None], shape
+            ),
+            (len(R), -1),
+        )
+        vTs = numpy.reshape(
+            numpy.broadcast_to(vTgl[None, :, None, None], shape), (len(R), -1)
+        )
+        zs = numpy.reshape(
+            numpy.broadcast_to(z[:, None, None, None], shape), (len(R), -1)
+        )
+        vzs = numpy.reshape(
+            numpy.broadcast_to(
+                sigmaz1[:, None, None, None] * uvR[None, None, None, :], shape
+            ),
+            (len(R), -1),
+        )
+        if self._action_cache is None:
+            logqeval = self(
+                Rs.flatten(),
+                vRs.flatten(),
+                vTs.flatten(),
+                zs.flatten(),
+                vzs.flatten(),
+                log=True,
+                use_physical=False,
+            )
+        else:
+            jr, lz, jz, rg, kappa, nu, Omega = numpy.reshape(
+                self._action_cache._actions(
+                    self,
+                    [
+                        self._action_cache._key(self, RR, zz, ngl, nsigma, vTmax)
+                        for RR, zz in zip(R, z)
+                    ],
+                    Rs,
+                    vRs,
+                    vTs,
+                    zs,
+                    vzs,
+                    numcores=numcores,
+                ),
+                (7, -1),
+            )
+            logqeval = self(
+                (jr, lz, jz),
+                rg=rg,
+                kappa=kappa,
+                nu=nu,
+                Omega=Omega,
+                log=True,
+                use_physical=False,
+            )
+        qeval = numpy.reshape(numpy.exp(logqeval), shape)
+        qeval *= (
+            vTglw[None, :, None, None]
+            * uvRw[None, None, :, None]
+            * uvRw[None, None, None, :]
+        )
+        out = numpy.empty((len(R), len(nmos)))
+        for jj, (n, m, o) in enumerate(nmos):
+            out[:, jj] = (
+                numpy.einsum(
+                    "pijk,i,j,k->p", qeval, vTgl**m, uvR**n, uvR**o, optimize=True
+                )
+                * sigmaR1 ** (1.0 + n)
+                * sigmaz1 ** (1.0 + o)
+                * 0.125
+                * vTmax
+                * nsigma**2
+            )
+        return out
+
+    def _moments_grid_physical(self, out, moment, kwargs):
+        """Convert the output of moments_grid for moment to physical units like the corresponding moment method (vmomentdensity for a raw moment (n,m,o)) does"""
+        use_physical = kwargs.get("use_physical", True)
+        ro = kwargs.get("ro", None)
+        if ro is None and hasattr(self, "_roSet") and self._roSet:
+            ro = self._ro
+        ro = parse_length_kpc(ro)
+        vo = kwargs.get("vo", None)
+        if vo is None and hasattr(self, "_voSet") and self._voSet:
+            vo = self._vo
+        vo = parse_velocity_kms(vo)
+        if isinstance(moment, tuple):
+            ropow, vopow = -3, moment[0] + moment[1] + moment[2]
+            ro_necessary, vo_necessary = True, True
+        else:
+            ropow, vopow = _MOMENTS_GRID_PHYSICAL_POWERS[moment]
+            # like physical_conversion, angles are only physical when ro is set
+            ro_necessary, vo_necessary = ropow != 0 or moment == "tilt", vopow != 0
+        if (
+            use_physical
+            and not (ro_necessary and ro is None)
+            and not (vo_necessary and vo is None)
+        ):
+            fac = 1.0
+            if ropow != 0:
+                fac *= ro**ropow
+            if vopow != 0:
+                fac *= vo**vopow
+            if _APY_UNITS:
+                if moment == "tilt":
+                    u = units.rad
+                else:
+                    u = units.kpc**ropow * (units.km / units.s) ** vopow
+                return units.Quantity(out * fac, unit=u)
+            else:
+                return out * fac
+        else:
+            return out
+
     def jmomentdensity(self, *args, **kwargs):
         """
         Calculate the an arbitrary moment of an action of the velocity distribution at R times the surfacmass.
@@ -2082,17 +2449,17 @@ class quasiisothermaldf(df):
 
         Parameters
         ----------
-        R : float or Quantity
+        R : float, numpy.ndarray, or Quantity
             Galactocentric distance.
-        z : float or Quantity
+        z : float, numpy.ndarray, or Quantity
             Height.
         n : int, optional
-            Number of distances to sample.
+            Number of velocities to sample at each (R,z).
 
         Returns
         -------
-        list
-            List of samples.
+        numpy.ndarray
+            Array of samples with shape (n,3) for scalar (R,z) and (N,n,3) for arrays of N positions; the last axis is (vR,vT,vz).
 
         Notes
         -----
@@ -2103,53 +2470,17 @@ class quasiisothermaldf(df):
         if vo is None and hasattr(self, "_voSet") and self._voSet:
             vo = self._vo
         vo = parse_velocity_kms(vo)
-        # Determine the maximum of the velocity distribution
-        maxVR = 0.0
-        maxVz = 0.0
-        # scipy 1.5.0: issue scipy#12298: fmin_powell now returns multiD array,
-        # so squeeze out single dimensions by hand
-        maxVT = numpy.squeeze(
-            optimize.fmin_powell(
-                (lambda x: -self(R, 0.0, x, z, 0.0, log=True, use_physical=False)), 1.0
-            )
+        scalarOut = numpy.ndim(R) == 0 and numpy.ndim(z) == 0
+        R, z = (
+            numpy.array(x, dtype="float").flatten()
+            for x in numpy.broadcast_arrays(R, z)
         )
-        logmaxVD = self(R, maxVR, maxVT, z, maxVz, log=True, use_physical=False)
-        # Now rejection-sample
-        vRs = []
-        vTs = []
-        vzs = []
-        while len(vRs) < n:
-            nmore = n - len(vRs) + 1
-            # sample
-            propvR = numpy.random.normal(size=nmore) * 2.0 * self._sr
-            propvT = numpy.random.normal(size=nmore) * 2.0 * self._sr + maxVT
-            propvz = numpy.random.normal(size=nmore) * 2.0 * self._sz
-            VDatprop = (
-                self(
-                    R + numpy.zeros(nmore),
-                    propvR,
-                    propvT,
-                    z + numpy.zeros(nmore),
-                    propvz,
-                    log=True,
-                    use_physical=False,
-                )
-                - logmaxVD
-            )
-            VDatprop -= -0.5 * (
-                propvR**2.0 / 4.0 / self._sr**2.0
-                + propvz**2.0 / 4.0 / self._sz**2.0
-                + (propvT - maxVT) ** 2.0 / 4.0 / self._sr**2.0
-            )
-            VDatprop = numpy.reshape(VDatprop, (nmore))
-            indx = VDatprop > numpy.log(numpy.random.random(size=nmore))  # accept
-            vRs.extend(list(propvR[indx]))
-            vTs.extend(list(propvT[indx]))
-            vzs.extend(list(propvz[indx]))
-        out = numpy.empty((n, 3))
-        out[:, 0] = vRs[0:n]
-        out[:, 1] = vTs[0:n]
-        out[:, 2] = vzs[0:n]
+        # Determine the maximum of the velocity distribution, then
+        # rejection-sample all positions together
+        maxVT = self._sampleV_maxVT(R, z)
+        out = self._sampleV_preoptimized(R, z, maxVT, n=n)
+        if scalarOut:
+            out = out[0]
         if use_physical and not vo is None:
             if _APY_UNITS:
                 return units.Quantity(out * vo, unit=units.km / units.s)
@@ -2227,11 +2558,9 @@ class quasiisothermaldf(df):
         normal_R = R[~mask]
         normal_z = z[~mask]
         # Sample the velocity of outliers directly (without interpolation)
-        outlier_coord_v = numpy.empty((outliers_R.size, 3))
-        for i in range(outliers_R.size):
-            outlier_coord_v[i] = self.sampleV(
-                outliers_R[i], outliers_z[i], use_physical=False
-            )[0]
+        outlier_coord_v = self._sampleV_preoptimized(
+            outliers_R, outliers_z, self._sampleV_maxVT(outliers_R, outliers_z)
+        )[:, 0]
         # Prepare for optimizing maxVT on a grid
         # Get the new hash of the parameters of grid
         new_hash = hashlib.md5(
@@ -2247,24 +2576,10 @@ class quasiisothermaldf(df):
             R_linspace = numpy.linspace(R_min, R_max, R_number)
             z_linspace = numpy.linspace(z_min, z_max, z_number)
             Rv, zv = numpy.meshgrid(R_linspace, z_linspace)
-            grid = numpy.dstack((Rv, zv))  # This grid stores (R,z) coordinate
-            # Grid is a 3 dimensional array since it stores pairs of values, but
-            # grid max vT is a 2 dimensional array
-            grid_max_vT = numpy.empty((grid.shape[0], grid.shape[1]))
             # Optimize max_vT on the grid
-            for i in range(z_number):
-                for j in range(R_number):
-                    R, z = grid[i][j]
-                    grid_max_vT[i][j] = numpy.squeeze(
-                        optimize.fmin_powell(
-                            (
-                                lambda x: -self(
-                                    R, 0.0, x, z, 0.0, log=True, use_physical=False
-                                )
-                            ),
-                            1.0,
-                        )
-                    )
+            grid_max_vT = numpy.reshape(
+                self._sampleV_maxVT(Rv.flatten(), zv.flatten()), Rv.shape
+            )
             # Determine degree of interpolation
             ky = numpy.min([R_number - 1, 3])
             kx = numpy.min([z_number - 1, 3])
@@ -2279,7 +2594,9 @@ class quasiisothermaldf(df):
         # Evaluate interpolation object to get maxVT at the normal coordinates
         normal_max_vT = ip_max_vT.ev(normal_z, normal_R)
         # Sample all 3 velocities at a normal point and use interpolated vT
-        normal_coord_v = self._sampleV_preoptimized(normal_R, normal_z, normal_max_vT)
+        normal_coord_v = self._sampleV_preoptimized(normal_R, normal_z, normal_max_vT)[
+            :, 0
+        ]
         # Combine normal and outlier result, preserving original order
         coord_v[mask] = outlier_coord_v
         coord_v[~mask] = normal_coord_v
@@ -2291,9 +2608,79 @@ class quasiisothermaldf(df):
         else:
             return coord_v
 
-    def _sampleV_preoptimized(self, R, z, maxVT):
+    def _sampleV_maxVT(self, R, z, ngrid=41, maxiter=25):
+        """
+        Find the vT that maximizes the velocity distribution at vR=vz=0 for arrays of (R,z).
+
+        Parameters
+        ----------
+        R : numpy.ndarray
+            Galactocentric distance.
+        z : numpy.ndarray
+            Height.
+        ngrid : int, optional
+            Number of points in the initial grid in vT/vc(R) in [-0.5,1.5] used to bracket the maximum.
+        maxiter : int, optional
+            Number of golden-section iterations used to refine the maximum.
+
+        Returns
+        -------
+        numpy.ndarray
+            vT of the maximum of the velocity distribution at each (R,z).
+
+        Notes
+        -----
+        - The DF is evaluated at all positions at once in every step, such that each step requires a single action calculation.
         """
-        Sample a radial, azimuthal, and vertical velocity at R,z.
+        nR = len(R)
+
+        def logvd(vT, RR=R, zz=z):
+            return numpy.reshape(
+                self(
+                    RR,
+                    numpy.zeros_like(RR),
+                    vT,
+                    zz,
+                    numpy.zeros_like(RR),
+                    log=True,
+                    use_physical=False,
+                ),
+                vT.shape,
+            )
+
+        # Bracket the maximum on a grid
+        vc = numpy.atleast_1d(potential.vcirc(self._pot, R, use_physical=False))
+        vc = vc + numpy.zeros(nR)
+        vTgrid = numpy.outer(vc, numpy.linspace(-0.5, 1.5, ngrid))
+        lvd = logvd(
+            vTgrid.flatten(), RR=numpy.repeat(R, ngrid), zz=numpy.repeat(z, ngrid)
+        ).reshape((nR, ngrid))
+        imax = numpy.argmax(lvd, axis=1)
+        a = vTgrid[numpy.arange(nR), numpy.clip(imax - 1, 0, ngrid - 1)]
+        b = vTgrid[numpy.arange(nR), numpy.clip(imax + 1, 0, ngrid - 1)]
+        # Refine using golden-section search
+        invphi = (numpy.sqrt(5.0) - 1.0) / 2.0
+        c = b - invphi * (b - a)
+        d = a + invphi * (b - a)
+        fc = logvd(c)
+        fd = logvd(d)
+        for ii in range(maxiter):
+            left = fc > fd  # maximum in [a,d]
+            b = numpy.where(left, d, b)
+            a = numpy.where(left, a, c)
+            new = numpy.where(left, b - invphi * (b - a), a + invphi * (b - a))
+            fnew = logvd(new)
+            c, d, fc, fd = (
+                numpy.where(left, new, d),
+                numpy.where(left, c, new),
+                numpy.where(left, fnew, fd),
+                numpy.where(left, fc, fnew),
+            )
+        return 0.5 * (a + b)
+
+    def _sampleV_preoptimized(self, R, z, maxVT, n=1):
+        """
+        Sample radial, azimuthal, and vertical velocities at R,z.
 
         Parameters
         ----------
@@ -2303,61 +2690,86 @@ class quasiisothermaldf(df):
             Height.
         maxVT : numpy.ndarray
             An array of pre-optimized maximum vT at corresponding R,z.
+        n : int, optional
+            Number of velocities to sample at each R,z.
 
         Returns
         -------
         numpy.ndarray
-            A numpy array containing the sampled velocity, (vR, vT, vz), where each row correspond to the row of (R,z).
+            A numpy array with shape (len(R),n,3) containing the sampled velocity, (vR, vT, vz), where each row correspond to the row of (R,z).
 
         Notes
         -----
         - 2018-08-10 - Written - Samuel Wong (University of Toronto)
 
         """
+        R = numpy.atleast_1d(R)
+        z = numpy.atleast_1d(z)
+        maxVT = numpy.atleast_1d(maxVT)
         length = numpy.size(R)
-        out = numpy.empty((length, 3))  # Initialize output
+        out = numpy.empty((length, n, 3))  # Initialize output
         # Determine the maximum of the velocity distribution
         maxVR = numpy.zeros(length)
         maxVz = numpy.zeros(length)
-        logmaxVD = self(R, maxVR, maxVT, z, maxVz, log=True, use_physical=False)
-        # Now rejection-sample
-        # Initialize boolean index of position remaining to be sampled
-        remain_indx = numpy.full(length, True)
-        while numpy.any(remain_indx):
-            nmore = numpy.sum(remain_indx)
+        logmaxVD = numpy.reshape(
+            self(R, maxVR, maxVT, z, maxVz, log=True, use_physical=False), (length)
+        )
+        # Now rejection-sample, drawing the proposals for all positions that
+        # still need samples at once; when only few samples are missing,
+        # oversample by up to the inverse of the acceptance fraction seen so
+        # far to avoid many small action calculations
+        naccept = numpy.zeros(length, dtype="int")
+        nprop_tot = 0
+        nacc_tot = 0
+        while numpy.any(naccept < n):
+            remain = numpy.arange(length)[naccept < n]
+            nmiss = n - naccept[remain]
+            oversample = numpy.clip(
+                _SAMPLEV_MINBATCH / numpy.sum(nmiss),
+                1.0,
+                (nprop_tot + 1.0) / (nacc_tot + 1.0),
+            )
+            indx = numpy.repeat(remain, numpy.ceil(nmiss * oversample).astype("int"))
+            nmore = len(indx)
             propvR = numpy.random.normal(size=nmore) * 2.0 * self._sr
-            propvT = (
-                numpy.random.normal(size=nmore) * 2.0 * self._sr + maxVT[remain_indx]
-            )
+            propvT = numpy.random.normal(size=nmore) * 2.0 * self._sr + maxVT[indx]
             propvz = numpy.random.normal(size=nmore) * 2.0 * self._sz
             VDatprop = (
-                self(
-                    R[remain_indx],
-                    propvR,
-                    propvT,
-                    z[remain_indx],
-                    propvz,
-                    log=True,
-                    use_physical=False,
+                numpy.reshape(
+                    self(
+                        R[indx],
+                        propvR,
+                        propvT,
+                        z[indx],
+                        propvz,
+                        log=True,
+                        use_physical=False,
+                    ),
+                    (nmore),
                 )
-                - logmaxVD[remain_indx]
+                - logmaxVD[indx]
             )
             VDatprop -= -0.5 * (
                 propvR**2.0 / 4.0 / self._sr**2.0
                 + propvz**2.0 / 4.0 / self._sz**2.0
-                + (propvT - maxVT[remain_indx]) ** 2.0 / 4.0 / self._sr**2.0
+                + (propvT - maxVT[indx]) ** 2.0 / 4.0 / self._sr**2.0
             )
             accept_indx = VDatprop > numpy.log(numpy.random.random(size=nmore))
-            vR_accept = propvR[accept_indx]
-            vT_accept = propvT[accept_indx]
-            vz_accept = propvz[accept_indx]
-            # Get the indexing of rows of output array that need to be updated
-            # with newly accepted velocity
-            to_change = numpy.copy(remain_indx)
-            to_change[remain_indx] = accept_indx
-            out[to_change] = numpy.stack((vR_accept, vT_accept, vz_accept), axis=1)
-            # Removing accepted sampled from remain index
-            remain_indx[remain_indx] = ~accept_indx
+            # Store the accepted samples in the next free slots of their
+            # position, dropping any beyond n
+            acc_pos = indx[accept_indx]
+            slot = (
+                naccept[acc_pos]
+                + numpy.arange(len(acc_pos))
+                - numpy.searchsorted(acc_pos, acc_pos)
+            )
+            keep = slot < n
+            out[acc_pos[keep], slot[keep]] = numpy.stack(
+                (propvR[accept_indx], propvT[accept_indx], propvz[accept_indx]), axis=1
+            )[keep]
+            naccept += numpy.bincount(acc_pos[keep], minlength=length)
+            nprop_tot += nmore
+            nacc_tot += len(acc_pos)
         return out
 
     @actionAngle_physical_input
@@ -3064,6 +3476,186 @@ class quasiisothermaldf(df):
             return numpy.atleast_1d(self._rgInterp(lz))
 
 
+class ActionNodeCache:
+    """Class that caches the actions and frequencies at the Gauss-Legendre velocity nodes used to compute the moments of quasiisothermaldf instances, such that they can be shared between DFs with the same potential and actionAngle instance"""
+
+    def __init__(
+        self, aA, maxmem=256.0, sr=None, sz=None, hsr=None, hsz=None, refr=1.0
+    ):
+        """
+        Initialize a cache of actions at Gauss-Legendre velocity nodes
+
+        Parameters
+        ----------
+        aA : actionAngle instance
+            ActionAngle instance used by all quasiisothermaldf instances that share this cache.
+        maxmem : float, optional
+            Maximum memory in MB used by the cached actions; least-recently-used (R,z) positions are evicted once this is exceeded.
+        sr : float or Quantity, optional
+            If set, place the velocity nodes using this radial velocity dispersion at refr, rather than using the radial velocity dispersion of each DF.
+        sz : float or Quantity, optional
+            If set (together with sr), place the velocity nodes using this vertical velocity dispersion at refr, rather than using the vertical velocity dispersion of each DF.
+        hsr : float or Quantity, optional
+            Radial-velocity-dispersion scale length used to place the velocity nodes (must be set together with sr).
+        hsz : float or Quantity, optional
+            Vertical-velocity-dispersion scale length used to place the velocity nodes (must be set together with sz).
+        refr : float or Quantity, optional
+            Reference radius for sr and sz.
+
+        Notes
+        -----
+        - By default, the velocity nodes scale with the velocity dispersions of each DF, so the cached actions are only re-used by DFs with the same (sr,sz,hsr,hsz,refr) (for example, when only hr differs). When sr,hsr,sz,hsz are set, the nodes are placed in the same way for all DFs and the actions are re-used by all DFs that share the cache; the integration range is then nsigma times these fixed dispersions, which should be wide enough for all DFs considered.
+        """
+        if len({sr is None, sz is None, hsr is None, hsz is None}) > 1:
+            raise ValueError(
+                "sr, sz, hsr, and hsz must either all be set or all be None"
+            )
+        self._aA = aA
+        self._maxmem = maxmem
+        if sr is None:
+            self._scales = None
+        else:
+            self._scales = (
+                parse_velocity(sr, vo=aA._vo),
+                parse_velocity(sz, vo=aA._vo),
+                parse_length(hsr, ro=aA._ro),
+                parse_length(hsz, ro=aA._ro),
+                parse_length(refr, ro=aA._ro),
+            )
+        self.clear()
+        return None
+
+    def __len__(self):
+        return len(self._cache)
+
+    def clear(self):
+        """
+        Remove all cached actions and reset the hit and miss counters
+
+        Returns
+        -------
+        None
+        """
+        self._cache = OrderedDict()
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        return None
+
+    def cache_info(self):
+        """
+        Return statistics about the cache
+
+        Returns
+        -------
+        dict
+            Dictionary with the number of cache hits and misses, the number of cached (R,z) positions, and the memory currently used and the maximum memory (in MB).
+        """
+        return {
+            "hits": self._hits,
+            "misses": self._misses,
+            "size": len(self._cache),
+            "mem": self._nbytes / 1024.0**2,
+            "maxmem": self._maxmem,
+        }
+
+    def _sigmas(self, qdf, R):
+        """Return the radial and vertical velocity dispersions used to place the velocity nodes for qdf at R"""
+        if self._scales is None:
+            sr, sz, hsr, hsz, refr = (
+                qdf._sr,
+                qdf._sz,
+                qdf._hsr,
+                qdf._hsz,
+                qdf._refr,
+            )
+        else:
+            sr, sz, hsr, hsz, refr = self._scales
+        return (
+            sr * numpy.exp((refr - R) / hsr),
+            sz * numpy.exp((refr - R) / hsz),
+        )
+
+    def _key(self, qdf, R, z, ngl, nsigma, vTmax):
+        """Return the key for the velocity nodes of qdf at (R,z)"""
+        if self._scales is None:
+            scales = (qdf._sr, qdf._sz, qdf._hsr, qdf._hsz, qdf._refr)
+        else:
+            scales = self._scales
+        return (float(R), float(z), int(ngl), float(nsigma), float(vTmax)) + tuple(
+            float(s) for s in scales
+        )
+
+    def _actions(self, qdf, keys, R, vR, vT, z, vz, numcores=1):
+        """Return the (jr,lz,jz,rg,kappa,nu,Omega) at the velocity nodes for the positions with keys, with R,vR,vT,z,vz of shape [len(keys),nnode] (output has shape [7,len(keys),nnode]); the actions for positions that are not in the cache are computed together and stored"""
+        out = numpy.empty((7,) + R.shape)
+        miss = []
+        first_miss = {}
+        repeats = []  # (index,index of the same key in miss)
+        for ii, key in enumerate(keys):
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                out[:, ii] = self._cache[key]
+                self._hits += 1
+            elif key in first_miss:
+                repeats.append((ii, first_miss[key]))
+                self._hits += 1
+            else:
+                first_miss[key] = ii
+                miss.append(ii)
+                self._misses += 1
+        if len(miss) == 0:
+            return out
+        miss = numpy.array(miss)
+        # Split the positions in equal-size chunks (padding with the last
+        # one), because parallel_map concatenates its outputs
+        nchunk = numpy.amin([numcores, len(miss)])
+        chunksize = int(numpy.ceil(len(miss) / nchunk))
+        indx = numpy.reshape(
+            miss[numpy.minimum(numpy.arange(nchunk * chunksize), len(miss) - 1)],
+            (nchunk, chunksize),
+        )
+        calc_chunk = lambda jj: numpy.reshape(
+            numpy.array(
+                qdf(
+                    R[indx[jj]].flatten(),
+                    vR[indx[jj]].flatten(),
+                    vT[indx[jj]].flatten(),
+                    z[indx[jj]].flatten(),
+                    vz[indx[jj]].flatten(),
+                    log=True,
+                    _return_actions=True,
+                    _return_freqs=True,
+                    use_physical=False,
+                )[1:]
+            ),
+            (1, 7, chunksize, R.shape[1]),
+        )
+        if nchunk > 1:
+            new = multi.parallel_map(calc_chunk, range(nchunk), numcores=nchunk)
+        else:
+            new = [calc_chunk(0)]
+        new = numpy.concatenate(
+            [numpy.reshape(n, (7, chunksize, R.shape[1])) for n in new], axis=1
+        )[:, : len(miss)]
+        out[:, miss] = new
+        for ii, jj in repeats:
+            out[:, ii] = out[:, jj]
+        for jj, ii in enumerate(miss):
+            self._store(keys[ii], new[:, jj].copy())
+        return out
+
+    def _store(self, key, acts):
+        """Store the actions for key, evicting least-recently-used entries once more than maxmem is used"""
+        if key in self._cache:
+            self._nbytes -= self._cache.pop(key).nbytes
+        self._cache[key] = acts
+        self._nbytes += acts.nbytes
+        while self._nbytes > self._maxmem * 1024.0**2 and len(self._cache) > 0:
+            self._nbytes -= self._cache.popitem(last=False)[1].nbytes
+        return None
+
+
 def _vmomentsurfaceIntegrand(
     vz, vR, vT, R, z, df, sigmaR1, gamma, sigmaz1, n, m, o
 ):  # pragma: no cover because this is too slow; a warning is shown
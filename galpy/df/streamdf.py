@@ -1,12 +1,14 @@
 # The DF of a tidal stream
 import copy
 import multiprocessing
+import os
+import pickle
 import warnings
 
 import numpy
 import scipy
 from packaging.version import parse as parse_version
-from scipy import integrate, interpolate, optimize, special
+from scipy import integrate, interpolate, optimize, spatial, special
 
 _SCIPY_VERSION = parse_version(scipy.__version__)
 if _SCIPY_VERSION < parse_version("0.10"):  # pragma: no cover
@@ -20,6 +22,8 @@ from ..actionAngle.actionAngleIsochroneApprox import dePeriod
 from ..orbit import Orbit
 from ..potential import flatten as flatten_potential
 from ..util import (
+    _TINY,
+    _content_key,
     ars,
     conversion,
     coords,
@@ -27,7 +31,7 @@ from ..util import (
     galpyWarning,
     multi,
     plot,
-    stable_cho_factor,
+    save_pickles,
 )
 from ..util._optional_deps import _APY_LOADED, _APY_UNITS
 from ..util.conversion import physical_conversion
@@ -38,6 +42,23 @@ if _APY_LOADED:
 _INTERPDURINGSETUP = True
 _USEINTERP = True
 _USESIMPLE = True
+# Maximum number of points at which callMarg evaluates the DF at once
+_CALLMARG_MAXNODES = 100000
+# Attributes that make up the stream track, saved with savefilename=
+_TRACK_ATTRIBUTES = [
+    "_nTrackChunks",
+    "nInterpolatedTrackChunks",
+    "_trackts",
+    "_thetasTrack",
+    "_ObsTrack",
+    "_ObsTrackAA",
+    "_allAcfsTrack",
+    "_alljacsTrack",
+    "_allinvjacsTrack",
+    "_detdOdJps",
+    "_meandetdOdJp",
+    "_logmeandetdOdJp",
+]
 # cast a wide net
 _TWOPIWRAPS = numpy.arange(-4, 5) * 2.0 * numpy.pi
 _labelDict = {
@@ -93,6 +114,7 @@ class streamdf(df):
         approxConstTrackFreq=False,
         useTMHessian=False,
         custom_transform=None,
+        savefilename=None,
     ):
         """
         Initialize the DF of a tidal stream
@@ -155,6 +177,8 @@ class streamdf(df):
             If True, compute the basic Hessian dO/dJ_prog using TM; otherwise use aA (default: False).
         custom_transform : numpy.ndarray, optional
             Matrix implementing the rotation from (ra,dec) to a custom set of sky coordinates (default: None).
+        savefilename : str, optional
+            If set, load the stream track from this file if it exists and save it to this file otherwise, such that the track only needs to be computed once; the file is specific to the progenitor, potential, actionAngle object, and parameters of the stream and is overwritten (with a warning) if it was saved for a different setup (default: None).
 
         Notes
         -----
@@ -223,7 +247,20 @@ class streamdf(df):
         # Determine the stream track
         if not nosetup:
             self._determine_nTrackIterations(nTrackIterations)
-            self._determine_stream_track(nTrackChunks)
+            if not savefilename is None and self._stream_track_key() is None:
+                warnings.warn(
+                    "The progenitor, potential, or actionAngle object of this streamdf cannot be represented by their content, so the stream track is not saved to or loaded from savefilename",
+                    galpyWarning,
+                )
+                savefilename = None
+            if (
+                savefilename is None
+                or not os.path.exists(savefilename)
+                or not self._load_stream_track(savefilename, nTrackChunks)
+            ):
+                self._determine_stream_track(nTrackChunks)
+                if not savefilename is None:
+                    self._save_stream_track(savefilename)
             self._useInterp = useInterp
             if interpTrack or self._useInterp:
                 self._interpolate_stream_track()
@@ -1108,112 +1145,35 @@ class streamdf(df):
         auxiliary_Omega_along_dOmega = numpy.dot(
             auxiliary_Omega, self._dsigomeanProgDirection
         )
-        # Now calculate the actions, frequencies, and angles + Jacobian for each chunk
-        allAcfsTrack = numpy.empty((self._nTrackChunks, 9))
-        alljacsTrack = numpy.empty((self._nTrackChunks, 6, 6))
-        allinvjacsTrack = numpy.empty((self._nTrackChunks, 6, 6))
+        # Now calculate the actions, frequencies, and angles + Jacobian for all
+        # chunks at once
         thetasTrack = numpy.linspace(0.0, self._deltaAngleTrack, self._nTrackChunks)
-        ObsTrack = numpy.empty((self._nTrackChunks, 6))
-        ObsTrackAA = numpy.empty((self._nTrackChunks, 6))
-        detdOdJps = numpy.empty(self._nTrackChunks)
-        if self._multi is None:
-            for ii in range(self._nTrackChunks):
-                multiOut = _determine_stream_track_single(
-                    self._aA,
-                    auxiliaryTrack,
-                    self._trackts[ii]
-                    * numpy.fabs(
-                        self._progenitor_Omega_along_dOmega
-                        / auxiliary_Omega_along_dOmega
-                    ),  # this factor accounts for the difference in frequency between the progenitor and the auxiliary track
-                    self._progenitor_angle,
-                    self._sigMeanSign,
-                    self._dsigomeanProgDirection,
-                    lambda x: self.meanOmega(x, use_physical=False),
-                    thetasTrack[ii],
-                )
-                allAcfsTrack[ii, :] = multiOut[0]
-                alljacsTrack[ii, :, :] = multiOut[1]
-                allinvjacsTrack[ii, :, :] = multiOut[2]
-                ObsTrack[ii, :] = multiOut[3]
-                ObsTrackAA[ii, :] = multiOut[4]
-                detdOdJps[ii] = multiOut[5]
-        else:
-            multiOut = multi.parallel_map(
-                (
-                    lambda x: _determine_stream_track_single(
-                        self._aA,
-                        auxiliaryTrack,
-                        self._trackts[x]
-                        * numpy.fabs(
-                            self._progenitor_Omega_along_dOmega
-                            / auxiliary_Omega_along_dOmega
-                        ),
-                        self._progenitor_angle,
-                        self._sigMeanSign,
-                        self._dsigomeanProgDirection,
-                        lambda x: self.meanOmega(x, use_physical=False),
-                        thetasTrack[x],
-                    )
-                ),
-                range(self._nTrackChunks),
-                numcores=numpy.amin(
-                    [self._nTrackChunks, multiprocessing.cpu_count(), self._multi]
-                ),
-            )
-            for ii in range(self._nTrackChunks):
-                allAcfsTrack[ii, :] = multiOut[ii][0]
-                alljacsTrack[ii, :, :] = multiOut[ii][1]
-                allinvjacsTrack[ii, :, :] = multiOut[ii][2]
-                ObsTrack[ii, :] = multiOut[ii][3]
-                ObsTrackAA[ii, :] = multiOut[ii][4]
-                detdOdJps[ii] = multiOut[ii][5]
+        (
+            allAcfsTrack,
+            alljacsTrack,
+            allinvjacsTrack,
+            ObsTrack,
+            ObsTrackAA,
+            detdOdJps,
+        ) = self._determine_stream_track_chunks(
+            auxiliaryTrack(
+                self._trackts[: self._nTrackChunks]
+                * numpy.fabs(
+                    self._progenitor_Omega_along_dOmega / auxiliary_Omega_along_dOmega
+                )  # this factor accounts for the difference in frequency between the progenitor and the auxiliary track
+            ).vxvv,
+            thetasTrack,
+        )
         # Repeat the track calculation using the previous track, to get closer to it
         for nn in range(self.nTrackIterations):
-            if self._multi is None:
-                for ii in range(self._nTrackChunks):
-                    multiOut = _determine_stream_track_single(
-                        self._aA,
-                        Orbit(ObsTrack[ii, :]),
-                        0.0,
-                        self._progenitor_angle,
-                        self._sigMeanSign,
-                        self._dsigomeanProgDirection,
-                        lambda x: self.meanOmega(x, use_physical=False),
-                        thetasTrack[ii],
-                    )
-                    allAcfsTrack[ii, :] = multiOut[0]
-                    alljacsTrack[ii, :, :] = multiOut[1]
-                    allinvjacsTrack[ii, :, :] = multiOut[2]
-                    ObsTrack[ii, :] = multiOut[3]
-                    ObsTrackAA[ii, :] = multiOut[4]
-                    detdOdJps[ii] = multiOut[5]
-            else:
-                multiOut = multi.parallel_map(
-                    (
-                        lambda x: _determine_stream_track_single(
-                            self._aA,
-                            Orbit(ObsTrack[x, :]),
-                            0.0,
-                            self._progenitor_angle,
-                            self._sigMeanSign,
-                            self._dsigomeanProgDirection,
-                            lambda x: self.meanOmega(x, use_physical=False),
-                            thetasTrack[x],
-                        )
-                    ),
-                    range(self._nTrackChunks),
-                    numcores=numpy.amin(
-                        [self._nTrackChunks, multiprocessing.cpu_count(), self._multi]
-                    ),
-                )
-                for ii in range(self._nTrackChunks):
-                    allAcfsTrack[ii, :] = multiOut[ii][0]
-                    alljacsTrack[ii, :, :] = multiOut[ii][1]
-                    allinvjacsTrack[ii, :, :] = multiOut[ii][2]
-                    ObsTrack[ii, :] = multiOut[ii][3]
-                    ObsTrackAA[ii, :] = multiOut[ii][4]
-                    detdOdJps[ii] = multiOut[ii][5]
+            (
+                allAcfsTrack,
+                alljacsTrack,
+                allinvjacsTrack,
+                ObsTrack,
+                ObsTrackAA,
+                detdOdJps,
+            ) = self._determine_stream_track_chunks(ObsTrack, thetasTrack)
         # Store the track
         self._thetasTrack = thetasTrack
         self._ObsTrack = ObsTrack
@@ -1227,6 +1187,96 @@ class streamdf(df):
         self._calc_ObsTrackXY()
         return None
 
+    def _determine_stream_track_chunks(self, xvs, thetasTrack):
+        """Determine the stream track at parallel angles thetasTrack starting from the track points xvs, in chunks spread over multiple cores if multi is set"""
+        func = lambda indx: _determine_stream_track_batch(
+            self._aA,
+            xvs[indx],
+            self._progenitor_angle,
+            self._sigMeanSign,
+            self._dsigomeanProgDirection,
+            lambda x: self.meanOmega(x, use_physical=False),
+            thetasTrack[indx],
+        )
+        if self._multi is None:
+            return func(numpy.arange(len(xvs)))
+        indxChunks = numpy.array_split(
+            numpy.arange(len(xvs)),
+            numpy.amin([len(xvs), multiprocessing.cpu_count(), self._multi]),
+        )
+
+        def chunk_func(x):
+            # Return an object array, such that parallel_map can combine them
+            out = numpy.empty(6, dtype="object")
+            for ii, tout in enumerate(func(indxChunks[x])):
+                out[ii] = tout
+            return out
+
+        multiOut = list(
+            multi.parallel_map(
+                chunk_func, range(len(indxChunks)), numcores=len(indxChunks)
+            )
+        )
+        return tuple(
+            numpy.concatenate([out[ii] for out in multiOut]) for ii in range(6)
+        )
+
+    def _stream_track_key(self):
+        # Key that identifies the stream track by the progenitor, potential,
+        # actionAngle object, and parameters of the stream that it depends on;
+        # None if these cannot all be represented in a key
+        try:
+            pot_key = (
+                _content_key(self._pot)
+                if not isinstance(self._pot, list)
+                else tuple(_content_key(p) for p in self._pot)
+            )
+            aA_key = _content_key(self._aA)
+        except TypeError:
+            return None
+        return (
+            tuple(self._progenitor.vxvv.flatten()),
+            pot_key,
+            aA_key,
+            self._sigv,
+            self._tdisrupt,
+            self._sigMeanOffset,
+            self._sigMeanSign,
+            self._deltaAngleTrack,
+            self.nTrackIterations,
+            self._useTM,
+            self._useTM and self._approxConstTrackFreq,
+        )
+
+    def _save_stream_track(self, savefilename):
+        """Save the stream track to savefilename"""
+        saved = {"key": self._stream_track_key()}
+        for name in _TRACK_ATTRIBUTES:
+            if hasattr(self, name):
+                saved[name] = getattr(self, name)
+        save_pickles(savefilename, saved)
+        return None
+
+    def _load_stream_track(self, savefilename, nTrackChunks):
+        """Load the stream track from savefilename; returns False (after warning) if the saved track was computed for a different setup"""
+        with open(savefilename, "rb") as savefile:
+            saved = pickle.load(savefile)
+        if saved["key"] != self._stream_track_key() or (
+            not nTrackChunks is None and saved["_nTrackChunks"] != nTrackChunks
+        ):
+            warnings.warn(
+                "Stream track saved in {} was computed for a different progenitor, potential, actionAngle object, or stream parameters; re-computing the stream track and overwriting the file".format(
+                    savefilename
+                ),
+                galpyWarning,
+            )
+            return False
+        for name in _TRACK_ATTRIBUTES:
+            if name in saved:
+                setattr(self, name, saved[name])
+        self._calc_ObsTrackXY()
+        return True
+
     def _calc_ObsTrackXY(self):
         # Also calculate _ObsTrackXY in XYZ,vXYZ coordinates
         self._ObsTrackXY = numpy.empty_like(self._ObsTrack)
@@ -1835,8 +1885,8 @@ class streamdf(df):
 
         Parameters
         ----------
-        R,vR,vT,z,vz,phi : float
-            Phase-space coordinates of the given point
+        R,vR,vT,z,vz,phi : float or numpy.ndarray
+            Phase-space coordinates of the given point; arrays are processed all at once using a KD-tree over the track
         interp : bool, optional
             If True, return the index of the interpolated track
         xy : bool, optional
@@ -1846,8 +1896,8 @@ class streamdf(df):
 
         Returns
         -------
-        int
-            Index into the track of the closest track point
+        int or numpy.ndarray
+            Index into the track of the closest track point (array of indices for array input)
 
         Notes
         -----
@@ -1885,6 +1935,17 @@ class streamdf(df):
             vY = 0.0
         if usev and vZ is None:
             vZ = 0.0
+        pts = [X, Y, Z] + ([vX, vY, vZ] if usev else [])
+        if numpy.any([numpy.ndim(x) > 0 for x in pts]):
+            if interp:
+                track = self._interpolatedObsTrackXY
+            else:
+                track = self._ObsTrackXY
+            return _closest_trackpoints(
+                track[:, : len(pts)],
+                numpy.array(numpy.broadcast_arrays(*pts)).T,
+                present.astype("bool"),
+            )
         if interp:
             dist2 = (
                 present[0] * (X - self._interpolatedObsTrackXY[:, 0]) ** 2.0
@@ -1926,17 +1987,17 @@ class streamdf(df):
 
         Parameters
         ----------
-        l : float
+        l : float or numpy.ndarray
             Galactic longitude in degrees
-        b : float
+        b : float or numpy.ndarray
             Galactic latitude in degrees
-        D : float
+        D : float or numpy.ndarray
             Distance in kpc
-        vlos : float
+        vlos : float or numpy.ndarray
             Line-of-sight velocity in km/s
-        pmll : float
+        pmll : float or numpy.ndarray
             Proper motion in Galactic longitude in mas/yr
-        pmbb : float
+        pmbb : float or numpy.ndarray
             Proper motion in Galactic latitude in mas/yr
         interp : bool, optional
             If True, return the closest index on the interpolated track (default is True)
@@ -1945,8 +2006,8 @@ class streamdf(df):
 
         Returns
         -------
-        int
-            Index of closest track point on the interpolated or not-interpolated track
+        int or numpy.ndarray
+            Index of closest track point on the interpolated or not-interpolated track (array of indices for array input, found using a KD-tree over the track)
 
         Notes
         -----
@@ -2000,9 +2061,40 @@ class streamdf(df):
                 trackPmbb = self._interpolatedObsTrackLB[:, 5]
             else:
                 trackPmbb = self._ObsTrackLB[:, 5]
+        batch = numpy.any(
+            [
+                numpy.ndim(x) > 0
+                for x in ([l, b, D] + ([vlos, pmll, pmbb] if usev else []))
+            ]
+        )
+        if batch and usev:
+            l, b, D, vlos, pmll, pmbb = numpy.broadcast_arrays(
+                l, b, D, vlos, pmll, pmbb
+            )
+        elif batch:
+            l, b, D = numpy.broadcast_arrays(l, b, D)
         # Calculate rectangular coordinates
         XYZ = coords.lbd_to_XYZ(l, b, D, degree=True)
         trackXYZ = coords.lbd_to_XYZ(trackL, trackB, trackD, degree=True)
+        if batch:
+            if usev:
+                vxvyvz = coords.vrpmllpmbb_to_vxvyvz(
+                    vlos, pmll, pmbb, XYZ[:, 0], XYZ[:, 1], XYZ[:, 2], XYZ=True
+                )
+                trackvxvyvz = coords.vrpmllpmbb_to_vxvyvz(
+                    trackVlos,
+                    trackPmll,
+                    trackPmbb,
+                    trackXYZ[:, 0],
+                    trackXYZ[:, 1],
+                    trackXYZ[:, 2],
+                    XYZ=True,
+                )
+                XYZ = numpy.hstack((XYZ, vxvyvz))
+                trackXYZ = numpy.hstack((trackXYZ, trackvxvyvz))
+            return _closest_trackpoints(
+                trackXYZ, XYZ, numpy.ones(XYZ.shape[1], dtype="bool")
+            )
         if usev:
             vxvyvz = coords.vrpmllpmbb_to_vxvyvz(
                 vlos, pmll, pmbb, XYZ[0], XYZ[1], XYZ[2], XYZ=True
@@ -2718,7 +2810,7 @@ class streamdf(df):
             Azimuth
         interp : bool, optional
             If True, use the interpolated track. Default is True.
-        cindx : int, optional
+        cindx : int or numpy.ndarray, optional
             Index of the closest point on the (interpolated) stream track. If not given, determined from the dimensions given.
 
         Returns
@@ -2742,102 +2834,54 @@ class streamdf(df):
         Y = R * numpy.sin(phi)
         Z = z
         if cindx is None:
-            closestIndx = [
-                self._find_closest_trackpoint(
-                    X[ii],
-                    Y[ii],
-                    Z[ii],
-                    z[ii],
-                    vz[ii],
-                    phi[ii],
-                    interp=interp,
-                    xy=True,
-                    usev=False,
-                )
-                for ii in range(len(R))
-            ]
-        else:
-            closestIndx = cindx
-        out = numpy.empty((6, len(R)))
-        for ii in range(len(R)):
-            dxv = numpy.empty(6)
-            if interp:
-                dxv[0] = R[ii] - self._interpolatedObsTrack[closestIndx[ii], 0]
-                dxv[1] = vR[ii] - self._interpolatedObsTrack[closestIndx[ii], 1]
-                dxv[2] = vT[ii] - self._interpolatedObsTrack[closestIndx[ii], 2]
-                dxv[3] = z[ii] - self._interpolatedObsTrack[closestIndx[ii], 3]
-                dxv[4] = vz[ii] - self._interpolatedObsTrack[closestIndx[ii], 4]
-                dxv[5] = phi[ii] - self._interpolatedObsTrack[closestIndx[ii], 5]
-                jacIndx = self._find_closest_trackpoint(
-                    R[ii],
-                    vR[ii],
-                    vT[ii],
-                    z[ii],
-                    vz[ii],
-                    phi[ii],
-                    interp=False,
-                    xy=False,
-                )
-            else:
-                dxv[0] = R[ii] - self._ObsTrack[closestIndx[ii], 0]
-                dxv[1] = vR[ii] - self._ObsTrack[closestIndx[ii], 1]
-                dxv[2] = vT[ii] - self._ObsTrack[closestIndx[ii], 2]
-                dxv[3] = z[ii] - self._ObsTrack[closestIndx[ii], 3]
-                dxv[4] = vz[ii] - self._ObsTrack[closestIndx[ii], 4]
-                dxv[5] = phi[ii] - self._ObsTrack[closestIndx[ii], 5]
-                jacIndx = closestIndx[ii]
-            # Find 2nd closest Jacobian point for smoothing
-            dmJacIndx = (
-                (X[ii] - self._ObsTrackXY[jacIndx, 0]) ** 2.0
-                + (Y[ii] - self._ObsTrackXY[jacIndx, 1]) ** 2.0
-                + (Z[ii] - self._ObsTrackXY[jacIndx, 2]) ** 2.0
+            closestIndx = self._find_closest_trackpoint(
+                X, Y, Z, z, vz, phi, interp=interp, xy=True, usev=False
             )
-            if jacIndx == 0:
-                jacIndx2 = jacIndx + 1
-                dmJacIndx2 = (
-                    (X[ii] - self._ObsTrackXY[jacIndx + 1, 0]) ** 2.0
-                    + (Y[ii] - self._ObsTrackXY[jacIndx + 1, 1]) ** 2.0
-                    + (Z[ii] - self._ObsTrackXY[jacIndx + 1, 2]) ** 2.0
-                )
-            elif jacIndx == self._nTrackChunks - 1:
-                jacIndx2 = jacIndx - 1
-                dmJacIndx2 = (
-                    (X[ii] - self._ObsTrackXY[jacIndx - 1, 0]) ** 2.0
-                    + (Y[ii] - self._ObsTrackXY[jacIndx - 1, 1]) ** 2.0
-                    + (Z[ii] - self._ObsTrackXY[jacIndx - 1, 2]) ** 2.0
-                )
-            else:
-                dm1 = (
-                    (X[ii] - self._ObsTrackXY[jacIndx - 1, 0]) ** 2.0
-                    + (Y[ii] - self._ObsTrackXY[jacIndx - 1, 1]) ** 2.0
-                    + (Z[ii] - self._ObsTrackXY[jacIndx - 1, 2]) ** 2.0
-                )
-                dm2 = (
-                    (X[ii] - self._ObsTrackXY[jacIndx + 1, 0]) ** 2.0
-                    + (Y[ii] - self._ObsTrackXY[jacIndx + 1, 1]) ** 2.0
-                    + (Z[ii] - self._ObsTrackXY[jacIndx + 1, 2]) ** 2.0
-                )
-                if dm1 < dm2:
-                    jacIndx2 = jacIndx - 1
-                    dmJacIndx2 = dm1
-                else:
-                    jacIndx2 = jacIndx + 1
-                    dmJacIndx2 = dm2
-            ampJacIndx = numpy.sqrt(dmJacIndx) / (
-                numpy.sqrt(dmJacIndx) + numpy.sqrt(dmJacIndx2)
+        else:
+            closestIndx = numpy.broadcast_to(cindx, R.shape)
+        xv = numpy.array([R, vR, vT, z, vz, phi]).T
+        if interp:
+            dxv = xv - self._interpolatedObsTrack[closestIndx]
+            jacIndx = self._find_closest_trackpoint(
+                R, vR, vT, z, vz, phi, interp=False, xy=False
             )
-            # Make sure phi hasn't wrapped around
-            dxv[5] = (dxv[5] + numpy.pi) % (2.0 * numpy.pi) - numpy.pi
-            # Apply closest jacobians
-            out[:, ii] = numpy.dot(
-                (1.0 - ampJacIndx) * self._alljacsTrack[jacIndx, :, :]
-                + ampJacIndx * self._alljacsTrack[jacIndx2, :, :],
-                dxv,
+        else:
+            dxv = xv - self._ObsTrack[closestIndx]
+            jacIndx = closestIndx
+        # Find 2nd closest Jacobian point for smoothing: the neighbor on the
+        # side that is closest, or the only neighbor at the ends of the track
+        XYZ = numpy.array([X, Y, Z]).T
+        dmJacIndx = numpy.sum((XYZ - self._ObsTrackXY[jacIndx, :3]) ** 2.0, axis=1)
+        dm1 = numpy.sum(
+            (XYZ - self._ObsTrackXY[numpy.maximum(jacIndx - 1, 0), :3]) ** 2.0,
+            axis=1,
+        )
+        dm2 = numpy.sum(
+            (
+                XYZ
+                - self._ObsTrackXY[
+                    numpy.minimum(jacIndx + 1, self._nTrackChunks - 1), :3
+                ]
             )
-            if interp:
-                out[:, ii] += self._interpolatedObsTrackAA[closestIndx[ii]]
-            else:
-                out[:, ii] += self._ObsTrackAA[closestIndx[ii]]
+            ** 2.0,
+            axis=1,
+        )
+        useMinus = (jacIndx == self._nTrackChunks - 1) + (jacIndx != 0) * (dm1 < dm2)
+        jacIndx2 = numpy.where(useMinus, jacIndx - 1, jacIndx + 1)
+        dmJacIndx2 = numpy.where(useMinus, dm1, dm2)
+        ampJacIndx = numpy.sqrt(dmJacIndx) / (
+            numpy.sqrt(dmJacIndx) + numpy.sqrt(dmJacIndx2)
+        )
+        # Make sure phi hasn't wrapped around
+        dxv[:, 5] = (dxv[:, 5] + numpy.pi) % (2.0 * numpy.pi) - numpy.pi
+        # Apply closest jacobians
+        out = (1.0 - ampJacIndx) * numpy.einsum(
+            "nij,nj->in", self._alljacsTrack[jacIndx], dxv
+        ) + ampJacIndx * numpy.einsum("nij,nj->in", self._alljacsTrack[jacIndx2], dxv)
+        if interp:
+            out += self._interpolatedObsTrackAA[closestIndx].T
+        else:
+            out += self._ObsTrackAA[closestIndx].T
         return out
 
     def _approxaAInv(self, Or, Op, Oz, ar, ap, az, interp=True):
@@ -3135,10 +3179,10 @@ class streamdf(df):
         Parameters
         ----------
         xy : numpy.ndarray
-            Phase-space point [X,Y,Z,vX,vY,vZ]; the distribution of the dimensions set to None is returned.
+            Phase-space point [X,Y,Z,vX,vY,vZ]; the distribution of the dimensions set to None is returned. The given dimensions can be arrays of length N to evaluate the marginalized DF at N points with the same missing dimensions at once.
         interp : bool, optional
             If True, use the interpolated stream track. Default is True.
-        cindx : int, optional
+        cindx : int or numpy.ndarray, optional
             Index of the closest point on the (interpolated) stream track if not given, determined from the dimensions given.
         nsigma : int, optional
             Number of sigma to marginalize the DF over (approximate sigma). Default is 3.
@@ -3159,8 +3203,8 @@ class streamdf(df):
 
         Returns
         -------
-        ndarray
-            Value of DF.
+        float or numpy.ndarray
+            Logarithm of the value of the marginalized DF (array of length N for array input).
 
         Notes
         -----
@@ -3171,69 +3215,70 @@ class streamdf(df):
             raise NotImplementedError(
                 "When specifying all coordinates, please use __call__ instead of callMarg"
             )
-        # First construct the Gaussian approximation at this xy
-        gaussmean, gaussvar = self.gaussApprox(xy, **kwargs)
-        cholvar, chollower = stable_cho_factor(gaussvar)
+        # First construct the Gaussian approximation at these xy
+        gaussmean, gaussvar, cindx, scalar = self._gaussApprox(xy, **kwargs)
+        nobs, nmarg = gaussmean.shape
+        cholvar = numpy.linalg.cholesky(
+            gaussvar
+            + numpy.trace(gaussvar, axis1=1, axis2=2)[:, None, None]
+            * _TINY
+            * numpy.eye(nmarg)
+        )
         # Now Gauss-legendre integrate over missing directions
         ngl = kwargs.get("ngl", 5)
         nsigma = kwargs.get("nsigma", 3)
         glx, glw = numpy.polynomial.legendre.leggauss(ngl)
-        coordEval = []
-        weightEval = []
-        jj = 0
-        baseX = (glx + 1) / 2.0
-        baseX = list(baseX)
-        baseX.extend(-(glx + 1) / 2.0)
-        baseX = numpy.array(baseX)
-        baseW = glw
-        baseW = list(baseW)
-        baseW.extend(glw)
-        baseW = numpy.array(baseW)
-        for ii in range(6):
-            if not coordGiven[ii]:
-                coordEval.append(nsigma * baseX)
-                weightEval.append(baseW)
-                jj += 1
+        baseX = numpy.hstack(((glx + 1) / 2.0, -(glx + 1) / 2.0))
+        baseW = numpy.hstack((glw, glw))
+        mgrid = numpy.array(
+            numpy.meshgrid(*[nsigma * baseX for ii in range(nmarg)], indexing="ij")
+        ).reshape(nmarg, -1)
+        logw = numpy.sum(
+            numpy.log(
+                numpy.array(
+                    numpy.meshgrid(*[baseW for ii in range(nmarg)], indexing="ij")
+                ).reshape(nmarg, -1)
+            ),
+            axis=0,
+        )
+        nnodes = mgrid.shape[1]
+        # Given coordinates, [nGiven,nobs]
+        v2 = numpy.array(
+            numpy.broadcast_arrays(*[xy[ii] for ii in range(6) if coordGiven[ii]]),
+            dtype="float",
+        ).reshape(numpy.sum(coordGiven), -1)
+        # Add the additional Jacobian dXdY/dldb... if necessary
+        if kwargs.get("lb", False):
+            # Only l,b,d,... to Galactic X,Y,Z,... is necessary because going
+            # from Galactic to Galactocentric has Jacobian determinant 1
+            if kwargs.get("interp", self._useInterp):
+                addLogDet = self._interpolatedTrackLogDetJacLB[cindx]
             else:
-                coordEval.append(xy[ii] * numpy.ones(1))
-                weightEval.append(numpy.ones(1))
-        mgrid = numpy.meshgrid(*coordEval, indexing="ij")
-        mgridNotGiven = numpy.array(
-            [mgrid[ii].flatten() for ii in range(6) if not coordGiven[ii]]
-        )
-        mgridNotGiven = numpy.dot(cholvar, mgridNotGiven)
-        jj = 0
-        if coordGiven[0]:
-            iX = mgrid[0]
-        else:
-            iX = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        if coordGiven[1]:
-            iY = mgrid[1]
-        else:
-            iY = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        if coordGiven[2]:
-            iZ = mgrid[2]
-        else:
-            iZ = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        if coordGiven[3]:
-            ivX = mgrid[3]
-        else:
-            ivX = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        if coordGiven[4]:
-            ivY = mgrid[4]
-        else:
-            ivY = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        if coordGiven[5]:
-            ivZ = mgrid[5]
+                addLogDet = self._trackLogDetJacLB[cindx]
         else:
-            ivZ = mgridNotGiven[jj] + gaussmean[jj]
-            jj += 1
-        iXw, iYw, iZw, ivXw, ivYw, ivZw = numpy.meshgrid(*weightEval, indexing="ij")
+            addLogDet = numpy.zeros(nobs)
+        out = 0.5 * numpy.log(numpy.linalg.det(gaussvar)) + addLogDet
+        # Evaluate the DF at the nodes of chunks of observations at once
+        nchunk = max(_CALLMARG_MAXNODES // nnodes, 1)
+        for ii in range(0, nobs, nchunk):
+            tslice = slice(ii, ii + nchunk)
+            tnobs = len(gaussmean[tslice])
+            nodes = numpy.empty((6, tnobs, nnodes))
+            nodes[coordGiven] = v2[:, tslice, None]
+            nodes[True ^ coordGiven] = numpy.transpose(
+                numpy.matmul(cholvar[tslice], mgrid) + gaussmean[tslice, :, None],
+                axes=(1, 0, 2),
+            )
+            logdf = self._callMarg_logdf(
+                *nodes.reshape(6, tnobs * nnodes), **kwargs
+            ).reshape(tnobs, nnodes)
+            out[tslice] += logsumexp(logdf + logw, axis=1)
+        if scalar:
+            return out[0]
+        return out
+
+    def _callMarg_logdf(self, iX, iY, iZ, ivX, ivY, ivZ, **kwargs):
+        """Evaluate the log DF at points in Galactocentric rectangular (or, if lb, observed) coordinates for callMarg"""
         if kwargs.get("lb", False):  # Convert to Galactocentric cylindrical coordinates
             # Setup coordinate transformation kwargs
             vo = kwargs.get("vo", self._vo)
@@ -3241,16 +3286,14 @@ class streamdf(df):
             R0 = kwargs.get("R0", self._R0)
             Zsun = kwargs.get("Zsun", self._Zsun)
             vsun = kwargs.get("vsun", self._vsun)
-            tXYZ = coords.lbd_to_XYZ(
-                iX.flatten(), iY.flatten(), iZ.flatten(), degree=True
-            )
+            tXYZ = coords.lbd_to_XYZ(iX, iY, iZ, degree=True)
             iR, iphi, iZ = coords.XYZ_to_galcencyl(
                 tXYZ[:, 0], tXYZ[:, 1], tXYZ[:, 2], Xsun=R0, Zsun=Zsun
             ).T
             tvxvyvz = coords.vrpmllpmbb_to_vxvyvz(
-                ivX.flatten(),
-                ivY.flatten(),
-                ivZ.flatten(),
+                ivX,
+                ivY,
+                ivZ,
                 tXYZ[:, 0],
                 tXYZ[:, 1],
                 tXYZ[:, 2],
@@ -3275,40 +3318,11 @@ class streamdf(df):
             ivZ /= vo
         else:
             # Convert to cylindrical coordinates
-            iR, iphi, iZ = coords.rect_to_cyl(iX.flatten(), iY.flatten(), iZ.flatten())
+            iR, iphi, iZ = coords.rect_to_cyl(iX, iY, iZ)
             ivR, ivT, ivZ = coords.rect_to_cyl_vec(
-                ivX.flatten(), ivY.flatten(), ivZ.flatten(), iR, iphi, iZ, cyl=True
+                ivX, ivY, ivZ, iR, iphi, iZ, cyl=True
             )
-        # Add the additional Jacobian dXdY/dldb... if necessary
-        if kwargs.get("lb", False):
-            # Find the nearest track point
-            interp = kwargs.get("interp", self._useInterp)
-            if not "cindx" in kwargs:
-                cindx = self._find_closest_trackpointLB(*xy, interp=interp, usev=True)
-            else:
-                cindx = kwargs["cindx"]
-            # Only l,b,d,... to Galactic X,Y,Z,... is necessary because going
-            # from Galactic to Galactocentric has Jacobian determinant 1
-            if interp:
-                addLogDet = self._interpolatedTrackLogDetJacLB[cindx]
-            else:
-                addLogDet = self._trackLogDetJacLB[cindx]
-        else:
-            addLogDet = 0.0
-        logdf = self(iR, ivR, ivT, iZ, ivZ, iphi, log=True)
-        return (
-            logsumexp(
-                logdf
-                + numpy.log(iXw.flatten())
-                + numpy.log(iYw.flatten())
-                + numpy.log(iZw.flatten())
-                + numpy.log(ivXw.flatten())
-                + numpy.log(ivYw.flatten())
-                + numpy.log(ivZw.flatten())
-            )
-            + 0.5 * numpy.log(numpy.linalg.det(gaussvar))
-            + addLogDet
-        )
+        return self(iR, ivR, ivT, iZ, ivZ, iphi, log=True)
 
     def gaussApprox(self, xy, **kwargs):
         """
@@ -3317,10 +3331,10 @@ class streamdf(df):
         Parameters
         ----------
         xy : numpy.ndarray
-            Phase-space point [X,Y,Z,vX,vY,vZ]; the distribution of the dimensions set to None is returned.
+            Phase-space point [X,Y,Z,vX,vY,vZ]; the distribution of the dimensions set to None is returned. The given dimensions can be arrays of length N to compute the Gaussian approximation at N points with the same missing dimensions at once.
         interp : bool, optional
             If True, use the interpolated stream track. Default is True.
-        cindx : int, optional
+        cindx : int or numpy.ndarray, optional
             Index of the closest point on the (interpolated) stream track if not given, determined from the dimensions given.
         lb : bool, optional
             If True, xy contains [l,b,D,vlos,pmll,pmbb] in [deg,deg,kpc,km/s,mas/yr,mas/yr] and the Gaussian approximation in these coordinates is returned. Default is False.
@@ -3328,27 +3342,44 @@ class streamdf(df):
         Returns
         -------
         tuple
-            (mean,variance) of the approximate Gaussian DF for the missing directions in xy.
+            (mean,variance) of the approximate Gaussian DF for the missing directions in xy; for array input, the mean has shape [N,nmissing] and the variance has shape [N,nmissing,nmissing].
 
         Notes
         -----
         - 2013-12-12 - Written - Bovy (IAS).
         """
+        condMean, condVar, _, scalar = self._gaussApprox(xy, **kwargs)
+        if scalar:
+            return (condMean[0], condVar[0])
+        return (condMean, condVar)
+
+    def _gaussApprox(self, xy, **kwargs):
+        """Internal version of gaussApprox that always works on arrays of points: returns the conditional mean [N,nmissing] and variance [N,nmissing,nmissing], the indices of the closest track points [N], and whether the input was scalar"""
         interp = kwargs.get("interp", self._useInterp)
         lb = kwargs.get("lb", False)
         # What are we looking for
         coordGiven = numpy.array([not x is None for x in xy], dtype="bool")
-        nGiven = numpy.sum(coordGiven)
-        # First find the nearest track point
-        if not "cindx" in kwargs and lb:
-            cindx = self._find_closest_trackpointLB(*xy, interp=interp, usev=True)
-        elif not "cindx" in kwargs and not lb:
-            cindx = self._find_closest_trackpoint(
-                *xy, xy=True, interp=interp, usev=True
-            )
+        scalar = numpy.all([numpy.ndim(x) == 0 for x in xy if not x is None])
+        # Given coordinates, [N,nGiven]
+        v2 = numpy.array(
+            numpy.broadcast_arrays(*[xy[ii] for ii in range(6) if coordGiven[ii]]),
+            dtype="float",
+        ).reshape(numpy.sum(coordGiven), -1)
+        # First find the nearest track points
+        if not "cindx" in kwargs:
+            txy = [None for ii in range(6)]
+            for ii, jj in enumerate(numpy.arange(6)[coordGiven]):
+                txy[jj] = v2[ii]
+            if lb:
+                cindx = self._find_closest_trackpointLB(*txy, interp=interp, usev=True)
+            else:
+                cindx = self._find_closest_trackpoint(
+                    *txy, xy=True, interp=interp, usev=True
+                )
         else:
-            cindx = kwargs["cindx"]
-        # Get the covariance matrix
+            cindx = numpy.broadcast_to(kwargs["cindx"], v2.shape[1:])
+        v2 = v2.T
+        # Get the covariance matrices
         if interp and lb:
             tcov = self._interpolatedAllErrCovsLBUnscaled[cindx]
             tmean = self._interpolatedObsTrackLB[cindx]
@@ -3362,40 +3393,23 @@ class streamdf(df):
             tcov = self._allErrCovsXY[cindx]
             tmean = self._ObsTrackXY[cindx]
         if lb:  # Apply scale factors
-            tcov = copy.copy(tcov)
-            tcov *= numpy.tile(self._ErrCovsLBScale, (6, 1))
-            tcov *= numpy.tile(self._ErrCovsLBScale, (6, 1)).T
-        # Fancy indexing to recover V22, V11, and V12; V22, V11, V12 as in Appendix B of 0905.2979v1
-        V11indx0 = numpy.array(
-            [[ii for jj in range(6 - nGiven)] for ii in range(6) if not coordGiven[ii]]
-        )
-        V11indx1 = numpy.array(
-            [[ii for ii in range(6) if not coordGiven[ii]] for jj in range(6 - nGiven)]
-        )
-        V11 = tcov[V11indx0, V11indx1]
-        V22indx0 = numpy.array(
-            [[ii for jj in range(nGiven)] for ii in range(6) if coordGiven[ii]]
-        )
-        V22indx1 = numpy.array(
-            [[ii for ii in range(6) if coordGiven[ii]] for jj in range(nGiven)]
-        )
-        V22 = tcov[V22indx0, V22indx1]
-        V12indx0 = numpy.array(
-            [[ii for jj in range(nGiven)] for ii in range(6) if not coordGiven[ii]]
-        )
-        V12indx1 = numpy.array(
-            [[ii for ii in range(6) if coordGiven[ii]] for jj in range(6 - nGiven)]
-        )
-        V12 = tcov[V12indx0, V12indx1]
+            tcov = tcov * numpy.outer(self._ErrCovsLBScale, self._ErrCovsLBScale)
+        # V22, V11, and V12 as in Appendix B of 0905.2979v1
+        V11 = tcov[:, True ^ coordGiven][:, :, True ^ coordGiven]
+        V22 = tcov[:, coordGiven][:, :, coordGiven]
+        V12 = tcov[:, True ^ coordGiven][:, :, coordGiven]
         # Also get m1 and m2, again following Appendix B of 0905.2979v1
-        m1 = tmean[True ^ coordGiven]
-        m2 = tmean[coordGiven]
+        m1 = tmean[:, True ^ coordGiven]
+        m2 = tmean[:, coordGiven]
         # conditional mean and variance
         V22inv = numpy.linalg.inv(V22)
-        v2 = numpy.array([xy[ii] for ii in range(6) if coordGiven[ii]])
-        condMean = m1 + numpy.dot(V12, numpy.dot(V22inv, v2 - m2))
-        condVar = V11 - numpy.dot(V12, numpy.dot(V22inv, V12.T))
-        return (condMean, condVar)
+        condMean = m1 + numpy.einsum(
+            "nij,nj->ni", V12, numpy.einsum("nij,nj->ni", V22inv, v2 - m2)
+        )
+        condVar = V11 - numpy.matmul(
+            V12, numpy.matmul(V22inv, numpy.transpose(V12, axes=(0, 2, 1)))
+        )
+        return (condMean, condVar, cindx, scalar)
 
     ################################SAMPLE THE DF##################################
     def sample(
@@ -3652,63 +3666,61 @@ def _determine_stream_track_single(
     meanOmega,
     thetasTrack,
 ):
-    # Setup output
-    allAcfsTrack = numpy.empty(9)
-    alljacsTrack = numpy.empty((6, 6))
-    allinvjacsTrack = numpy.empty((6, 6))
-    ObsTrack = numpy.empty(6)
-    ObsTrackAA = numpy.empty(6)
-    detdOdJ = numpy.empty(6)
-    # Calculate
-    tacfs = aA.actionsFreqsAngles(progenitorTrack(trackt))
-    allAcfsTrack[0] = tacfs[0][0]
-    allAcfsTrack[1] = tacfs[1][0]
-    allAcfsTrack[2] = tacfs[2][0]
-    for jj in range(3, 9):
-        allAcfsTrack[jj] = tacfs[jj][0]
-    tjac = calcaAJac(
-        progenitorTrack(trackt).vxvv[0],
+    out = _determine_stream_track_batch(
         aA,
-        dxv=None,
-        actionsFreqsAngles=True,
-        lb=False,
-        _initacfs=tacfs,
+        progenitorTrack(trackt).vxvv,
+        progenitor_angle,
+        sigMeanSign,
+        dsigomeanProgDirection,
+        meanOmega,
+        numpy.atleast_1d(thetasTrack),
     )
-    alljacsTrack[:, :] = tjac[3:, :]
-    tinvjac = numpy.linalg.inv(tjac[3:, :])
-    allinvjacsTrack[:, :] = tinvjac
+    return numpy.array([o[0] for o in out], dtype="object")
+
+
+def _determine_stream_track_batch(
+    aA,
+    xvs,
+    progenitor_angle,
+    sigMeanSign,
+    dsigomeanProgDirection,
+    meanOmega,
+    thetasTrack,
+):
+    """Vectorized version of _determine_stream_track_single for N track points, starting from xvs [N,6] and at parallel angles thetasTrack [N]"""
+    allAcfsTrack, tjac = _calcaAJac_batch(xvs, aA)
+    alljacsTrack = tjac[:, 3:, :]
+    allinvjacsTrack = numpy.linalg.inv(alljacsTrack)
     # Also store detdOdJ
     jindx = numpy.array(
         [True, True, True, False, False, False, True, True, True], dtype="bool"
     )
-    dOdJ = numpy.dot(tjac[3:, :], numpy.linalg.inv(tjac[jindx, :]))[0:3, 0:3]
+    dOdJ = numpy.matmul(alljacsTrack, numpy.linalg.inv(tjac[:, jindx, :]))[:, 0:3, 0:3]
     detdOdJ = numpy.linalg.det(dOdJ)
     theseAngles = numpy.mod(
-        progenitor_angle + thetasTrack * sigMeanSign * dsigomeanProgDirection,
+        progenitor_angle
+        + thetasTrack[:, None] * sigMeanSign * dsigomeanProgDirection[None, :],
         2.0 * numpy.pi,
     )
-    ObsTrackAA[3:] = theseAngles
-    diffAngles = theseAngles - allAcfsTrack[6:]
+    ObsTrackAA = numpy.empty((len(xvs), 6))
+    ObsTrackAA[:, 3:] = theseAngles
+    diffAngles = theseAngles - allAcfsTrack[:, 6:]
     diffAngles[(diffAngles > numpy.pi)] = (
         diffAngles[(diffAngles > numpy.pi)] - 2.0 * numpy.pi
     )
     diffAngles[(diffAngles < -numpy.pi)] = (
         diffAngles[(diffAngles < -numpy.pi)] + 2.0 * numpy.pi
     )
-    thisFreq = meanOmega(thetasTrack)
-    ObsTrackAA[:3] = thisFreq
-    diffFreqs = thisFreq - allAcfsTrack[3:6]
-    ObsTrack[:] = numpy.dot(tinvjac, numpy.hstack((diffFreqs, diffAngles)))
-    ObsTrack[0] += progenitorTrack(trackt).R()
-    ObsTrack[1] += progenitorTrack(trackt).vR()
-    ObsTrack[2] += progenitorTrack(trackt).vT()
-    ObsTrack[3] += progenitorTrack(trackt).z()
-    ObsTrack[4] += progenitorTrack(trackt).vz()
-    ObsTrack[5] += progenitorTrack(trackt).phi()
-    return numpy.array(
-        [allAcfsTrack, alljacsTrack, allinvjacsTrack, ObsTrack, ObsTrackAA, detdOdJ],
-        dtype="object",
+    thisFreq = numpy.array([meanOmega(theta) for theta in thetasTrack])
+    ObsTrackAA[:, :3] = thisFreq
+    diffFreqs = thisFreq - allAcfsTrack[:, 3:6]
+    ObsTrack = (
+        numpy.matmul(
+            allinvjacsTrack, numpy.hstack((diffFreqs, diffAngles))[:, :, None]
+        )[:, :, 0]
+        + xvs
     )
+    return (allAcfsTrack, alljacsTrack, allinvjacsTrack, ObsTrack, ObsTrackAA, detdOdJ)
 
 
 def _determine_stream_track_TM_single(
@@ -3990,6 +4002,33 @@ def calcaAJac(
     return jac
 
 
+def _calcaAJac_batch(xvs, aA, dxv=None):
+    """Calculate the actions, frequencies, and angles [N,9] and the Jacobian d(J,Omega,theta)/d(x,v) [N,9,6] at N phase-space points xvs [N,6] = [R,vR,vT,z,vz,phi], evaluating all points and their finite-difference offsets in a single actionAngle call"""
+    xvs = numpy.asarray(xvs, dtype="float")
+    nxv = len(xvs)
+    if dxv is None:
+        dxv = 10.0**-8.0 * numpy.ones(6)
+    # All points and their offsets in each coordinate, [7,N,6]
+    allxvs = numpy.tile(xvs, (7, 1, 1))
+    for ii in range(6):
+        allxvs[ii + 1, :, ii] += dxv[ii]
+    # Trick to make sure dxv is representable, [6,N]
+    dxvs = numpy.array([allxvs[ii + 1, :, ii] - xvs[:, ii] for ii in range(6)])
+    acfs = numpy.reshape(
+        aA.actionsFreqsAngles(*allxvs.reshape(7 * nxv, 6).T, use_physical=False),
+        (9, 7, nxv),
+    )
+    dacfs = acfs[:, 1:] - acfs[:, :1]
+    # For the angles, make sure we do not hit a turning point
+    dacfs[6:] = (dacfs[6:] + numpy.pi) % (2.0 * numpy.pi) - numpy.pi
+    return (acfs[:, 0].T, numpy.transpose(dacfs / dxvs, axes=(2, 0, 1)))
+
+
+def _closest_trackpoints(track, pts, present):
+    """Indices of the points on the track [ntrack,ndim] closest to each of the points pts [N,ndim], only using the dimensions for which present is True, found using a KD-tree over the track"""
+    return spatial.cKDTree(track[:, present]).query(pts[:, present])[1]
+
+
 def lbCoordFunc(xv, vo, ro, R0, Zsun, vsun):
     # Input is (l,b,D,vlos,pmll,pmbb) in (deg,deg,kpc,km/s,mas/yr,mas/yr)
     X, Y, Z = coords.lbd_to_XYZ(xv[0], xv[1], xv[2], degree=True)
@@ -16,6 +16,12 @@ from . import streamdf
 from .df import df
 from .streamdf import _determine_stream_track_single
 
+# Order of the Gauss-Legendre quadrature for the batched impulse kicks
+_DEFAULTNGL_KICK = 200
+# Largest distance along the encounter included in the kick integrals, in
+# units of min(b,1) for impact parameter b; effectively infinite
+_KICK_SMAX = 10.0**8.0
+
 
 def impact_check_range(func):
     """Decorator to check the range of interpolated kicks"""
@@ -190,7 +196,7 @@ class streamgapdf(streamdf.streamdf):
             self._nKickPoints = 30 * self._nTrackChunksImpact
         else:
             self._nKickPoints = nKickPoints
-        if nokicksetup:  # pragma: no cover
+        if nokicksetup:
             return None
         # Compute \Delta Omega ( \Delta \theta_perp) and \Delta theta,
         # setup interpolating function
@@ -681,19 +687,20 @@ class streamgapdf(streamdf.streamdf):
             )
         return None
 
-    def _determine_deltaOmegaTheta_kick(self, spline_order):
-        # Propagate deltav(angle) -> delta (Omega,theta) [angle]
+    def _kick_deltav_to_dOap(self, deltav):
+        """Propagate velocity kicks at the kick points along the track near the impact to kicks in (Omega,theta); deltav can hold the kicks of several impacts, stacked along the first axis"""
+        nkick = len(self._kick_interpolatedObsTrackXY)
+        nimpact = len(deltav) // nkick
+        trackXY = numpy.tile(self._kick_interpolatedObsTrackXY, (nimpact, 1))
+        track = numpy.tile(self._kick_interpolatedObsTrack, (nimpact, 1))
         # Cylindrical coordinates of the perturbed points
-        vXp = self._kick_interpolatedObsTrackXY[:, 3] + self._kick_deltav[:, 0]
-        vYp = self._kick_interpolatedObsTrackXY[:, 4] + self._kick_deltav[:, 1]
-        vZp = self._kick_interpolatedObsTrackXY[:, 5] + self._kick_deltav[:, 2]
         vRp, vTp, vZp = coords.rect_to_cyl_vec(
-            vXp,
-            vYp,
-            vZp,
-            self._kick_interpolatedObsTrack[:, 0],
-            self._kick_interpolatedObsTrack[:, 5],
-            self._kick_interpolatedObsTrack[:, 3],
+            trackXY[:, 3] + deltav[:, 0],
+            trackXY[:, 4] + deltav[:, 1],
+            trackXY[:, 5] + deltav[:, 2],
+            track[:, 0],
+            track[:, 5],
+            track[:, 3],
             cyl=True,
         )
         # We will abuse streamdf functions for doing the (O,a) -> (R,vR)
@@ -710,14 +717,14 @@ class streamgapdf(streamdf.streamdf):
         self._ObsTrackAA = self._gap_ObsTrackAA
         self._nTrackChunks = self._nTrackChunksImpact
         Oap = self._approxaA(
-            self._kick_interpolatedObsTrack[:, 0],
+            track[:, 0],
             vRp,
             vTp,
-            self._kick_interpolatedObsTrack[:, 3],
+            track[:, 3],
             vZp,
-            self._kick_interpolatedObsTrack[:, 5],
+            track[:, 5],
             interp=True,
-            cindx=range(len(self._kick_interpolatedObsTrackAA)),
+            cindx=numpy.tile(numpy.arange(nkick), nimpact),
         )
         # Remove attributes again to avoid confusion later
         delattr(self, "_interpolatedObsTrack")
@@ -728,9 +735,13 @@ class streamgapdf(streamdf.streamdf):
         delattr(self, "_interpolatedObsTrackAA")
         delattr(self, "_ObsTrackAA")
         delattr(self, "_nTrackChunks")
+        return Oap.T - numpy.tile(self._kick_interpolatedObsTrackAA, (nimpact, 1))
+
+    def _determine_deltaOmegaTheta_kick(self, spline_order):
+        # Propagate deltav(angle) -> delta (Omega,theta) [angle]
+        self._kick_dOap = self._kick_deltav_to_dOap(self._kick_deltav)
         # Generate (dO,da)[angle_offset] and interpolate (raw here, see below
         # for form that checks range)
-        self._kick_dOap = Oap.T - self._kick_interpolatedObsTrackAA
         self._kick_interpdOr_raw = interpolate.InterpolatedUnivariateSpline(
             self._kick_interpolatedThetasTrack, self._kick_dOap[:, 0], k=spline_order
         )
@@ -1543,23 +1554,24 @@ def impulse_deltav_hernquist_curvedstream(v, x, b, w, x0, v0, GM, rs):
     return -2.0 * GM * ((b_.T - bdotw * w.T / wmag) * Xfac * denom).T
 
 
-def _a_integrand(T, y, b, w, pot, compt):
-    t = T / (1 - T * T)
-    X = b + w * t + y * numpy.array([0, 1, 0])
-    r = numpy.sqrt(numpy.sum(X**2))
-    return (1 + T * T) / (1 - T * T) ** 2 * evaluateRforces(pot, r, 0.0) * X[compt] / r
-
-
-def _deltav_integrate(y, b, w, pot):
-    return numpy.array(
-        [
-            integrate.quad(_a_integrand, -1.0, 1.0, args=(y, b, w, pot, i))[0]
-            for i in range(3)
-        ]
-    )
-
-
-def impulse_deltav_general(v, y, b, w, pot):
+def _deltav_integrate(b, w, pot, ngl=_DEFAULTNGL_KICK):
+    # Straight-line impulse kicks for relative offsets b and relative
+    # velocities w (both [N,3]), evaluated for all points at once; only the
+    # component perpendicular to w survives the integral over time
+    wmag = numpy.sqrt(numpy.sum(w**2.0, axis=1))
+    bperp = b - (numpy.sum(b * w, axis=1) / wmag**2.0)[:, numpy.newaxis] * w
+    B = numpy.sqrt(numpy.sum(bperp**2.0, axis=1))
+    B[B == 0.0] = 1.0  # kick vanishes for these, because bperp = 0
+    # With s = B sinh(x) along the path, the integrand becomes B F(B cosh(x)),
+    # which decays exponentially in x for any finite-mass perturber
+    xmax = numpy.arcsinh(_KICK_SMAX / numpy.minimum(B, 1.0))
+    glx, glw = numpy.polynomial.legendre.leggauss(ngl)
+    r = B[:, numpy.newaxis] * numpy.cosh(0.5 * numpy.outer(xmax, glx + 1.0))
+    Rforce = numpy.reshape(evaluateRforces(pot, r.flatten(), 0.0), r.shape)
+    return (xmax * numpy.sum(glw * Rforce, axis=1) / wmag)[:, numpy.newaxis] * bperp
+
+
+def impulse_deltav_general(v, y, b, w, pot, ngl=_DEFAULTNGL_KICK):
     """
     Calculate the delta velocity to due an encounter with a general spherical potential in the impulse approximation; allows for arbitrary velocity vectors, but y is input as the position along the stream
 
@@ -1575,6 +1587,8 @@ def impulse_deltav_general(v, y, b, w, pot):
         velocity of the subhalo (3)
     pot : Potential object or list thereof
         Potential object or list thereof (should be spherical)
+    ngl : int, optional
+        order of the Gauss-Legendre quadrature used to compute the kicks for all stream points at once
 
     Returns
     -------
@@ -1598,19 +1612,14 @@ def impulse_deltav_general(v, y, b, w, pot):
     tilew[:, 1] -= numpy.sqrt(numpy.sum(v**2.0, axis=1))
     wmag = numpy.sqrt(tilew[:, 0] ** 2 + tilew[:, 2] ** 2)
     b0 = b * numpy.array([-tilew[:, 2] / wmag, numpy.zeros(nv), tilew[:, 0] / wmag]).T
-    return numpy.array(
-        list(
-            map(
-                lambda i: numpy.sum(
-                    i[3] * _deltav_integrate(i[0], i[1], i[2], pot).T, axis=-1
-                ),
-                zip(y, b0, tilew, rotinv),
-            )
-        )
+    b0[:, 1] += y
+    # Compute the kicks in the stream frames and rotate back
+    return numpy.einsum(
+        "ijk,ik->ij", rotinv, _deltav_integrate(b0, tilew, pot, ngl=ngl)
     )
 
 
-def impulse_deltav_general_curvedstream(v, x, b, w, x0, v0, pot):
+def impulse_deltav_general_curvedstream(v, x, b, w, x0, v0, pot, ngl=_DEFAULTNGL_KICK):
     """
     Calculate the delta velocity to due an encounter with a general spherical potential in the impulse approximation; allows for arbitrary velocity vectors, and arbitrary position along the stream
 
@@ -1630,6 +1639,8 @@ def impulse_deltav_general_curvedstream(v, x, b, w, x0, v0, pot):
         velocity of point of closest approach
     pot : Potential object or list thereof
         Potential object or list thereof (should be spherical)
+    ngl : int, optional
+        order of the Gauss-Legendre quadrature used to compute the kicks for all stream points at once
 
     Returns
     -------
@@ -1649,9 +1660,7 @@ def impulse_deltav_general_curvedstream(v, x, b, w, x0, v0, pot):
     b0 = numpy.cross(w, v0)
     b0 *= b / numpy.sqrt(numpy.sum(b0**2))
     b_ = b0 + x - x0
-    return numpy.array(
-        list(map(lambda i: _deltav_integrate(0.0, i[1], i[0], pot), zip(w - v, b_)))
-    )
+    return _deltav_integrate(b_, w - v, pot, ngl=ngl)
 
 
 def impulse_deltav_general_orbitintegration(
@@ -1719,17 +1728,17 @@ def impulse_deltav_general_orbitintegration(
     xres = numpy.zeros(shape=(len(x), nsamp * 2 - 1, 3))
     R, phi, z = coords.rect_to_cyl(x[:, 0], x[:, 1], x[:, 2])
     vR, vp, vz = coords.rect_to_cyl_vec(v[:, 0], v[:, 1], v[:, 2], R, phi, z, cyl=True)
-    for i in range(nstar):
-        o = Orbit([R[i], vR[i], vp[i], z[i], vz[i], phi[i]])
-        o.integrate(times, galpot, method=integrate_method)
-        xres[i, nsamp:, 0] = o.x(times)[1:]
-        xres[i, nsamp:, 1] = o.y(times)[1:]
-        xres[i, nsamp:, 2] = o.z(times)[1:]
-        oreverse = o.flip()
-        oreverse.integrate(times, galpot, method=integrate_method)
-        xres[i, :nsamp, 0] = oreverse.x(times)[::-1]
-        xres[i, :nsamp, 1] = oreverse.y(times)[::-1]
-        xres[i, :nsamp, 2] = oreverse.z(times)[::-1]
+    # Integrate all stars together, forward and backward
+    o = Orbit(numpy.array([R, vR, vp, z, vz, phi]).T)
+    o.integrate(times, galpot, method=integrate_method)
+    xres[:, nsamp:, 0] = o.x(times)[:, 1:]
+    xres[:, nsamp:, 1] = o.y(times)[:, 1:]
+    xres[:, nsamp:, 2] = o.z(times)[:, 1:]
+    oreverse = o.flip()
+    oreverse.integrate(times, galpot, method=integrate_method)
+    xres[:, :nsamp, 0] = oreverse.x(times)[:, ::-1]
+    xres[:, :nsamp, 1] = oreverse.y(times)[:, ::-1]
+    xres[:, :nsamp, 2] = oreverse.z(times)[:, ::-1]
     times = numpy.concatenate((-times[::-1], times[1:]))
     nsamp = len(times)
     X = b0 + xres - x0 - numpy.outer(times, w)
@@ -1816,45 +1825,36 @@ def impulse_deltav_general_fullplummerintegration(
     oplum.integrate(dtimes, galpot, method=integrate_method)
     plumpot = MovingObjectPotential(orbit=oplum, pot=PlummerPotential(amp=GM, b=rs))
 
-    # Now integrate each particle backwards in galaxy potential, forwards in combined potential and backwards again in galaxy and take diff
+    # Now integrate all particles together backwards in galaxy potential, forwards in combined potential and backwards again in galaxy and take diff
 
     deltav = numpy.zeros((nstar, 3))
     R, phi, z = coords.rect_to_cyl(x[:, 0], x[:, 1], x[:, 2])
     vR, vp, vz = coords.rect_to_cyl_vec(v[:, 0], v[:, 1], v[:, 2], R, phi, z, cyl=True)
-    for i in range(nstar):
-        ostar = Orbit(vxvv=[R[i], -vR[i], -vp[i], z[i], -vz[i], phi[i]])
-        ostar.integrate(times, galpot, method=integrate_method)
-        oboth = ostar(times[-1]).flip()
-        oboth.integrate(dtimes, [galpot, plumpot], method=integrate_method)
-        ogalpot = oboth(times[-1]).flip()
-        ogalpot.integrate(times, galpot, method=integrate_method)
-        deltav[i][0] = -ogalpot.vx(times[-1]) - v[i][0]
-        deltav[i][1] = -ogalpot.vy(times[-1]) - v[i][1]
-        deltav[i][2] = -ogalpot.vz(times[-1]) - v[i][2]
+    ostar = Orbit(vxvv=numpy.array([R, -vR, -vp, z, -vz, phi]).T)
+    ostar.integrate(times, galpot, method=integrate_method)
+    oboth = ostar(times[-1]).flip()
+    oboth.integrate(dtimes, [galpot, plumpot], method=integrate_method)
+    ogalpot = oboth(times[-1]).flip()
+    ogalpot.integrate(times, galpot, method=integrate_method)
+    deltav[:, 0] = -ogalpot.vx(times[-1]) - v[:, 0]
+    deltav[:, 1] = -ogalpot.vy(times[-1]) - v[:, 1]
+    deltav[:, 2] = -ogalpot.vz(times[-1]) - v[:, 2]
     return deltav
 
 
-def _astream_integrand_x(t, y, v, b, w, b2, w2, wperp, wperp2, wpar, GSigma, rs2):
-    return (
-        GSigma(t)
-        * (b * w2 * w[2] / wperp - (y - v * t) * wpar * w[0])
-        / ((b2 + rs2) * w2 + wperp2 * (y - v * t) ** 2.0)
-    )
-
-
-def _astream_integrand_y(t, y, v, b2, w2, wperp2, GSigma, rs2):
-    return GSigma(t) * (y - v * t) / ((b2 + rs2) * w2 + wperp2 * (y - v * t) ** 2.0)
-
+def _evaluate_GSigma(GSigma, t):
+    # Evaluate the perturbing stream's surface density on an array of times,
+    # also for functions that only accept scalar input
+    try:
+        out = GSigma(t)
+    except (TypeError, ValueError):
+        out = numpy.vectorize(GSigma)(t)
+    return out + numpy.zeros_like(t)
 
-def _astream_integrand_z(t, y, v, b, w, b2, w2, wperp, wperp2, wpar, GSigma, rs2):
-    return (
-        -GSigma(t)
-        * (b * w2 * w[0] / wperp + (y - v * t) * wpar * w[2])
-        / ((b2 + rs2) * w2 + wperp2 * (y - v * t) ** 2.0)
-    )
 
-
-def impulse_deltav_plummerstream(v, y, b, w, GSigma, rs, tmin=None, tmax=None):
+def impulse_deltav_plummerstream(
+    v, y, b, w, GSigma, rs, tmin=None, tmax=None, ngl=_DEFAULTNGL_KICK
+):
     """
     Calculate the delta velocity to due an encounter with a Plummer-softened stream in the impulse approximation; allows for arbitrary velocity vectors, but y is input as the position along the stream
 
@@ -1876,6 +1876,8 @@ def impulse_deltav_plummerstream(v, y, b, w, GSigma, rs, tmin=None, tmax=None):
         minimum time to consider for GSigma (need to be set)
     tmax : float
         maximum time to consider for GSigma (need to be set)
+    ngl : int, optional
+        order of the Gauss-Legendre quadrature used to compute the kicks for all stream points at once
 
     Returns
     -------
@@ -1906,97 +1908,63 @@ def impulse_deltav_plummerstream(v, y, b, w, GSigma, rs, tmin=None, tmax=None):
     b2 = b**2.0
     rs2 = rs**2.0
     wperp2 = wperp**2.0
+    # The integrands are Lorentzians in s = y-vt of width a; integrate over
+    # u = arctan(s/a) instead, which makes them smooth for all points
+    a = numpy.sqrt((b2 + rs2) * wmag2 / wperp2)
+    umin = numpy.arctan((y - vmag * tmax) / a)
+    umax = numpy.arctan((y - vmag * tmin) / a)
+    glx, glw = numpy.polynomial.legendre.leggauss(ngl)
+    u = umin[:, numpy.newaxis] + 0.5 * numpy.outer(umax - umin, glx + 1.0)
+    s = a[:, numpy.newaxis] * numpy.tan(u)
+    wGSigma = (
+        glw
+        * _evaluate_GSigma(GSigma, (y[:, numpy.newaxis] - s) / vmag[:, numpy.newaxis])
+        * (0.5 * (umax - umin) / wperp2 / a / vmag)[:, numpy.newaxis]
+    )
     out = numpy.empty_like(v)
-    out[:, 0] = [
-        1.0
-        / wmag[ii]
-        * integrate.quad(
-            _astream_integrand_x,
-            tmin,
-            tmax,
-            args=(
-                y[ii],
-                vmag[ii],
-                b,
-                tilew[ii],
-                b2,
-                wmag2[ii],
-                wperp[ii],
-                wperp2[ii],
-                wpar[ii],
-                GSigma,
-                rs2,
+    out[:, 0] = (
+        numpy.sum(
+            wGSigma
+            * (
+                (b * wmag2 * tilew[:, 2] / wperp)[:, numpy.newaxis]
+                - s * (wpar * tilew[:, 0])[:, numpy.newaxis]
             ),
-        )[0]
-        for ii in range(len(y))
-    ]
-    out[:, 1] = [
-        -wperp2[ii]
-        / wmag[ii]
-        * integrate.quad(
-            _astream_integrand_y,
-            tmin,
-            tmax,
-            args=(y[ii], vmag[ii], b2, wmag2[ii], wperp2[ii], GSigma, rs2),
-        )[0]
-        for ii in range(len(y))
-    ]
-    out[:, 2] = [
-        1.0
-        / wmag[ii]
-        * integrate.quad(
-            _astream_integrand_z,
-            tmin,
-            tmax,
-            args=(
-                y[ii],
-                vmag[ii],
-                b,
-                tilew[ii],
-                b2,
-                wmag2[ii],
-                wperp[ii],
-                wperp2[ii],
-                wpar[ii],
-                GSigma,
-                rs2,
+            axis=1,
+        )
+        / wmag
+    )
+    out[:, 1] = -wperp2 / wmag * numpy.sum(wGSigma * s, axis=1)
+    out[:, 2] = (
+        -numpy.sum(
+            wGSigma
+            * (
+                (b * wmag2 * tilew[:, 0] / wperp)[:, numpy.newaxis]
+                + s * (wpar * tilew[:, 2])[:, numpy.newaxis]
             ),
-        )[0]
-        for ii in range(len(y))
-    ]
+            axis=1,
+        )
+        / wmag
+    )
     # Rotate back to the original frame
     return 2.0 * numpy.sum(
         rotinv * numpy.swapaxes(numpy.tile(out.T, (3, 1, 1)).T, 1, 2), axis=-1
     )
 
 
-def _astream_integrand(t, b_, orb, tx, w, GSigma, rs2, tmin, compt):
-    teval = tx - tmin - t
-    b__ = b_ + numpy.array([orb.x(teval), orb.y(teval), orb.z(teval)])
-    w = w - numpy.array([orb.vx(teval), orb.vy(teval), orb.vz(teval)])
-    wmag = numpy.sqrt(numpy.sum(w**2))
-    bdotw = numpy.sum(b__ * w) / wmag
-    denom = wmag * (numpy.sum(b__**2) + rs2 - bdotw**2)
-    denom = 1.0 / denom
-    return -2.0 * GSigma(t) * (((b__.T - bdotw * w.T / wmag) * denom).T)[compt]
-
-
-def _astream_integrate(b_, orb, tx, w, GSigma, rs2, otmin, tmin, tmax):
-    return numpy.array(
-        [
-            integrate.quad(
-                _astream_integrand,
-                tmin,
-                tmax,
-                args=(b_, orb, tx, w, GSigma, rs2, otmin, i),
-            )[0]
-            for i in range(3)
-        ]
-    )
-
-
 def impulse_deltav_plummerstream_curvedstream(
-    v, x, t, b, w, x0, v0, GSigma, rs, galpot, tmin=None, tmax=None
+    v,
+    x,
+    t,
+    b,
+    w,
+    x0,
+    v0,
+    GSigma,
+    rs,
+    galpot,
+    tmin=None,
+    tmax=None,
+    ngl=_DEFAULTNGL_KICK,
 ):
     """
     Calculate the delta velocity to due an encounter with a Plummer-softened stream in the impulse approximation; allows for arbitrary velocity vectors, and arbitrary position along the stream; velocities and positions are assumed to lie along an orbit
@@ -2027,6 +1995,8 @@ def impulse_deltav_plummerstream_curvedstream(
         minimum time to consider for GSigma (need to be set)
     tmax : float
         maximum time to consider for GSigma (need to be set)
+    ngl : int, optional
+        order of the Gauss-Legendre quadrature used to compute the kicks for all stream points at once
 
     Returns
     -------
@@ -2042,6 +2012,7 @@ def impulse_deltav_plummerstream_curvedstream(
         v = numpy.reshape(v, (1, 3))
     if len(x.shape) == 1:
         x = numpy.reshape(x, (1, 3))
+    t = numpy.atleast_1d(t)
     # Integrate an orbit to use to figure out where each (v,x) is at each time
     R, phi, z = coords.rect_to_cyl(x0[0], x0[1], x0[2])
     vR, vT, vz = coords.rect_to_cyl_vec(v0[0], v0[1], v0[2], R, phi, z, cyl=True)
@@ -2055,23 +2026,42 @@ def impulse_deltav_plummerstream_curvedstream(
     # Calculate kicks
     b0 = numpy.cross(w, v0)
     b0 *= b / numpy.sqrt(numpy.sum(b0**2))
-    return numpy.array(
-        list(
-            map(
-                lambda i: _astream_integrate(
-                    b0 - x0,
-                    o,
-                    i,
-                    w,
-                    GSigma,
-                    rs**2.0,
-                    numpy.amin(t) + tmin,
-                    tmin,
-                    tmax,
-                ),
-                t,
-            )
-        )
+    # For each point, the integrand peaks where the point passes x0, i.e., at
+    # t' = t, with a width tau set by the local straight-line encounter;
+    # integrate over u = arctan((t-t')/tau) for all points at once
+    v0mag = numpy.sqrt(numpy.sum(v0**2.0))
+    wperp = numpy.sqrt(numpy.sum((w - numpy.sum(w * v0) / v0mag**2.0 * v0) ** 2.0))
+    tau = (
+        numpy.sqrt((b**2.0 + rs**2.0) * numpy.sum((w - v0) ** 2.0)) / wperp / v0mag
+    )
+    umin = numpy.arctan((t - tmax) / tau)
+    umax = numpy.arctan((t - tmin) / tau)
+    glx, glw = numpy.polynomial.legendre.leggauss(ngl)
+    u = umin[:, numpy.newaxis] + 0.5 * numpy.outer(umax - umin, glx + 1.0)
+    tp = t[:, numpy.newaxis] - tau * numpy.tan(u)
+    teval = (t[:, numpy.newaxis] - numpy.amin(t) - tmin - tp).flatten()
+    b__ = (b0 - x0)[:, numpy.newaxis] + numpy.array(
+        [o.x(teval), o.y(teval), o.z(teval)]
+    )
+    w_ = w[:, numpy.newaxis] - numpy.array([o.vx(teval), o.vy(teval), o.vz(teval)])
+    wmag = numpy.sqrt(numpy.sum(w_**2.0, axis=0))
+    bdotw = numpy.sum(b__ * w_, axis=0) / wmag
+    denom = wmag * (numpy.sum(b__**2.0, axis=0) + rs**2.0 - bdotw**2.0)
+    wGSigma = (
+        glw
+        * _evaluate_GSigma(GSigma, tp)
+        * (0.5 * (umax - umin))[:, numpy.newaxis]
+        * tau
+        / numpy.cos(u) ** 2.0
+    ).flatten()
+    return (
+        -2.0
+        * numpy.sum(
+            numpy.reshape(
+                wGSigma * (b__ - bdotw * w_ / wmag) / denom, (3, len(t), ngl)
+            ),
+            axis=-1,
+        ).T
     )
 
 
@@ -0,0 +1,461 @@
+# The DF of a tidal stream peppered with impacts
+import numpy
+from scipy import integrate, interpolate
+
+from ..util import conversion
+from ..util.conversion import physical_conversion
+from . import streamdf, streamgapdf
+from .df import df
+
+# Number of standard deviations of the parallel-frequency distribution
+# covered by the grid used to integrate over the parallel frequency
+_NSIGOPAR = 7.0
+
+
+def _parse_impact_array(parser, x, **kwargs):
+    # Parse a list (possibly of Quantities), array, or Quantity array
+    if isinstance(x, (list, tuple)):
+        return numpy.array([parser(xx, **kwargs) for xx in x])
+    return numpy.atleast_1d(parser(x, **kwargs))
+
+
+class streampepperdf(streamdf.streamdf):
+    """The DF of a tidal stream peppered with impacts"""
+
+    def __init__(self, *args, **kwargs):
+        """
+        Initialize the DF of a stellar stream peppered with impacts
+
+        Parameters
+        ----------
+        *args, **kwargs
+            Arguments and keywords of streamdf that specify the smooth stream.
+        timpact : list of float or Quantity
+            Times since impact at which impacts can occur; the coordinate transformation near the impact is set up (as in streamgapdf) once for each of these times (default: [1.0]).
+        impactb : list of float or Quantity, optional
+            Impact parameters of the impacts (default: None, no impacts).
+        subhalovel : numpy.ndarray or Quantity, optional
+            Velocities of the subhalos shape=(nimpact,3).
+        impact_angle : list of float or Quantity, optional
+            Angle offsets from progenitor at which the impacts occurred (rad) (at the impact times).
+        GM : list of float or Quantity, optional
+            Masses of the subhalos when using Plummer or Hernquist models.
+        rs : list of float or Quantity, optional
+            Scale parameters of the subhalos when using Plummer or Hernquist models.
+        hernquist : bool, optional
+            If True, use Hernquist kicks for GM/rs (default: False --> Plummer).
+        subhalopot : list of Potential instances, optional
+            Gravitational potentials of the subhalos (alternative to specifying GM and rs).
+        deltaAngleTrackImpact : float or Quantity, optional
+            Angle to estimate the stream track over to determine the effect of the impacts [similar to deltaAngleTrack] (rad) (default: None).
+        nTrackChunksImpact : int, optional
+            Number of chunks to divide the progenitor track in near the impacts [similar to nTrackChunks] (default: floor(deltaAngleTrack/0.15)+1).
+        nKickPoints : int, optional
+            Number of points along the stream to compute the kicks at (kicks are then interpolated) (default: 30xnTrackChunksImpact).
+        spline_order : int, optional
+            Order of the spline to interpolate the kicks with (default: 3).
+        nOpar : int, optional
+            Number of points in the grid of parallel frequencies over which the density and mean frequency are integrated (default: 4001).
+
+        Notes
+        -----
+        - The impacts are specified at initialization with timpact, impactb, subhalovel, impact_angle, and GM/rs or subhalopot (all lists with one entry per impact) or later using set_impacts; impacts can only occur at the times given by timpact at initialization.
+        - The stream track is that of the smooth stream; the effect of the impacts is included in pOparapar, density_par, meanOmega, and sample.
+        """
+        df.__init__(self, ro=kwargs.get("ro", None), vo=kwargs.get("vo", None))
+        # Parse kwargs
+        timpact = kwargs.pop("timpact", [1.0])
+        impactb = kwargs.pop("impactb", None)
+        subhalovel = kwargs.pop("subhalovel", None)
+        impact_angle = kwargs.pop("impact_angle", None)
+        GM = kwargs.pop("GM", None)
+        rs = kwargs.pop("rs", None)
+        subhalopot = kwargs.pop("subhalopot", None)
+        self._hernquist = kwargs.pop("hernquist", False)
+        deltaAngleTrackImpact = kwargs.pop("deltaAngleTrackImpact", None)
+        nTrackChunksImpact = kwargs.pop("nTrackChunksImpact", None)
+        nKickPoints = kwargs.pop("nKickPoints", None)
+        self._spline_order = kwargs.pop("spline_order", 3)
+        self._nOpar = kwargs.pop("nOpar", 4001)
+        # No impacts until they are set
+        self._nimpact = 0
+        self._timpact_sortIndx = numpy.array([], dtype="int")
+        # Setup the coordinate transformation near the impact for each time
+        # at which an impact can occur, using streamgapdf
+        self._uniq_timpact = numpy.unique(
+            _parse_impact_array(
+                conversion.parse_time, timpact, ro=self._ro, vo=self._vo
+            )
+        )
+        self._sgapdfs = []
+        for t in self._uniq_timpact:
+            sgapdf_kwargs = kwargs.copy()
+            sgapdf_kwargs["timpact"] = t
+            # Only the sign of impact_angle matters at this point
+            sgapdf_kwargs["impact_angle"] = 1.0 if kwargs.get("leading", True) else -1.0
+            sgapdf_kwargs["GM"] = 1.0  # never used
+            sgapdf_kwargs["rs"] = 1.0
+            sgapdf_kwargs["deltaAngleTrackImpact"] = deltaAngleTrackImpact
+            sgapdf_kwargs["nTrackChunksImpact"] = nTrackChunksImpact
+            sgapdf_kwargs["nKickPoints"] = nKickPoints
+            sgapdf_kwargs["nokicksetup"] = True
+            sgapdf = streamgapdf.streamgapdf(*args, **sgapdf_kwargs)
+            # Interpolate the track near the impact at the kick points
+            sgapdf._impact_angle = 0.0
+            sgapdf._interpolate_stream_track_kick()
+            sgapdf._interpolate_stream_track_kick_aA()
+            self._sgapdfs.append(sgapdf)
+        # Now run the regular streamdf setup for the smooth stream
+        super().__init__(*args, **kwargs)
+        if impact_angle is not None:
+            self.set_impacts(
+                impactb=impactb,
+                subhalovel=subhalovel,
+                impact_angle=impact_angle,
+                timpact=timpact,
+                GM=GM,
+                rs=rs,
+                subhalopot=subhalopot,
+            )
+        return None
+
+    def set_impacts(
+        self,
+        impactb=None,
+        subhalovel=None,
+        impact_angle=None,
+        timpact=None,
+        GM=None,
+        rs=None,
+        subhalopot=None,
+    ):
+        """
+        Set the impacts that perturb the stream, replacing any previous impacts
+
+        Parameters
+        ----------
+        impactb : list of float or Quantity
+            Impact parameters of the impacts.
+        subhalovel : numpy.ndarray or Quantity
+            Velocities of the subhalos shape=(nimpact,3).
+        impact_angle : list of float or Quantity
+            Angle offsets from progenitor at which the impacts occurred (rad) (at the impact times).
+        timpact : list of float or Quantity
+            Times since impact; each needs to be one of the times given as timpact at initialization.
+        GM : list of float or Quantity, optional
+            Masses of the subhalos when using Plummer or Hernquist models.
+        rs : list of float or Quantity, optional
+            Scale parameters of the subhalos when using Plummer or Hernquist models.
+        subhalopot : list of Potential instances, optional
+            Gravitational potentials of the subhalos (alternative to specifying GM and rs).
+
+        Returns
+        -------
+        None
+
+        Notes
+        -----
+        - The velocity kicks of all impacts that occur at the same time are propagated to kicks in frequency-angle space in a single pass and interpolated with a single spline fit per impact time, such that the cost scales linearly with the number of impacts.
+        """
+        general_kick = GM is None or rs is None
+        if general_kick and subhalopot is None:
+            raise OSError(
+                "One of (GM=, rs=) or subhalopot= needs to be set to specify the subhalos' structure"
+            )
+        impactb = _parse_impact_array(conversion.parse_length, impactb, ro=self._ro)
+        nimpact = len(impactb)
+        subhalovel = numpy.reshape(
+            _parse_impact_array(conversion.parse_velocity, subhalovel, vo=self._vo),
+            (-1, 3),
+        )
+        impact_angle = _parse_impact_array(conversion.parse_angle, impact_angle)
+        timpact = _parse_impact_array(
+            conversion.parse_time, timpact, ro=self._ro, vo=self._vo
+        )
+        if not general_kick:
+            GM = numpy.zeros(nimpact) + _parse_impact_array(
+                conversion.parse_mass, GM, ro=self._ro, vo=self._vo
+            )
+            rs = numpy.zeros(nimpact) + _parse_impact_array(
+                conversion.parse_length, rs, ro=self._ro
+            )
+        if (
+            len(subhalovel) != nimpact
+            or len(impact_angle) != nimpact
+            or len(timpact) != nimpact
+            or (general_kick and len(subhalopot) != nimpact)
+        ):
+            raise ValueError(
+                "impactb, subhalovel, impact_angle, timpact, and subhalopot (if given) need to have the same length"
+            )
+        # Sign of impact_angle tells us whether the impact happens to the
+        # leading or trailing arm
+        if numpy.any((impact_angle > 0.0) != self._leading):
+            raise ValueError(
+                "Modeling leading (trailing) impact for trailing (leading) arm; this is not allowed because it is nonsensical in this framework"
+            )
+        # Match the impact times to the times for which the coordinate
+        # transformation near the impact was set up
+        template_indx = numpy.argmin(
+            numpy.fabs(timpact[:, numpy.newaxis] - self._uniq_timpact), axis=1
+        )
+        if not numpy.allclose(self._uniq_timpact[template_indx], timpact):
+            raise ValueError(
+                "timpact= for the impacts needs to be one of the timpact= given at initialization"
+            )
+        # Compute the kicks for all impacts, all impacts at the same time at
+        # once, and interpolate them
+        self._impact_template = template_indx
+        self._impact_column = numpy.empty(nimpact, dtype="int")
+        self._kick_splines = []
+        self._kick_maxdOpar = numpy.zeros(nimpact)
+        for kk, sgapdf in enumerate(self._sgapdfs):
+            impactIndx = numpy.arange(nimpact)[template_indx == kk]
+            self._impact_column[impactIndx] = numpy.arange(len(impactIndx))
+            if len(impactIndx) == 0:
+                self._kick_splines.append(None)
+                continue
+            deltav = numpy.concatenate(
+                [
+                    self._impact_deltav(
+                        sgapdf,
+                        impactb[ii],
+                        subhalovel[ii],
+                        numpy.fabs(impact_angle[ii]),
+                        None if general_kick else GM[ii],
+                        None if general_kick else rs[ii],
+                        subhalopot[ii] if general_kick else None,
+                    )
+                    for ii in impactIndx
+                ]
+            )
+            dOap = numpy.reshape(
+                sgapdf._kick_deltav_to_dOap(deltav),
+                (len(impactIndx), sgapdf._nKickPoints, 6),
+            )
+            # Add the kick in the parallel frequency as a seventh component
+            dOpar = (
+                numpy.dot(dOap[..., :3], sgapdf._dsigomeanProgDirection)
+                * sgapdf._sigMeanSign
+            )
+            self._kick_maxdOpar[impactIndx] = numpy.amax(numpy.fabs(dOpar), axis=1)
+            self._kick_splines.append(
+                interpolate.make_interp_spline(
+                    sgapdf._kick_interpolatedThetasTrack,
+                    numpy.swapaxes(
+                        numpy.concatenate((dOap, dOpar[..., numpy.newaxis]), axis=-1),
+                        0,
+                        1,
+                    ),
+                    k=self._spline_order,
+                )
+            )
+        self._nimpact = nimpact
+        self._timpact = timpact
+        self._impactb = impactb
+        self._subhalovel = subhalovel
+        self._impact_angle = impact_angle
+        # Order of the impacts in time, most recent first
+        self._timpact_sortIndx = numpy.argsort(timpact, kind="stable")
+        return None
+
+    def _impact_deltav(
+        self, sgapdf, impactb, subhalovel, impact_angle, GM, rs, subhalopot
+    ):
+        """Velocity kicks along the track near the impact due to a single impact"""
+        closest = numpy.array(
+            [
+                sgapdf._kick_interpTrackX(impact_angle),
+                sgapdf._kick_interpTrackY(impact_angle),
+                sgapdf._kick_interpTrackZ(impact_angle),
+                sgapdf._kick_interpTrackvX(impact_angle),
+                sgapdf._kick_interpTrackvY(impact_angle),
+                sgapdf._kick_interpTrackvZ(impact_angle),
+            ]
+        )
+        if subhalopot is not None:
+            return streamgapdf.impulse_deltav_general_curvedstream(
+                sgapdf._kick_interpolatedObsTrackXY[:, 3:],
+                sgapdf._kick_interpolatedObsTrackXY[:, :3],
+                impactb,
+                subhalovel,
+                closest[:3],
+                closest[3:],
+                subhalopot,
+            )
+        if self._hernquist:
+            deltav_func = streamgapdf.impulse_deltav_hernquist_curvedstream
+        else:
+            deltav_func = streamgapdf.impulse_deltav_plummer_curvedstream
+        return deltav_func(
+            sgapdf._kick_interpolatedObsTrackXY[:, 3:],
+            sgapdf._kick_interpolatedObsTrackXY[:, :3],
+            impactb,
+            subhalovel,
+            closest[:3],
+            closest[3:],
+            GM,
+            rs,
+        )
+
+    def _kick_interp(self, ii, da, comp):
+        """Evaluate the interpolated kick of impact ii in components comp (0-5: (Omega,theta) in (R,phi,Z); 6: parallel frequency) at parallel angles da at the time of impact, zero outside of the range covered by the kick"""
+        kk = self._impact_template[ii]
+        spl = self._kick_splines[kk]
+        da = numpy.atleast_1d(da)
+        out = numpy.zeros(da.shape + numpy.shape(spl.c[0, 0, comp]))
+        indx = (da > 0.0) * (da < self._sgapdfs[kk]._deltaAngleTrackImpact)
+        out[indx] = interpolate.BSpline.construct_fast(
+            spl.t, spl.c[:, self._impact_column[ii], comp], spl.k
+        )(da[indx])
+        return out
+
+    def pOparapar(self, Opar, apar, tdisrupt=None):
+        """
+        Return the probability of a given parallel (frequency,angle) offset pair.
+
+        Parameters
+        ----------
+        Opar : numpy.ndarray or Quantity
+            Parallel frequency offset.
+        apar : numpy.ndarray or Quantity
+            Parallel angle offset along the stream.
+        tdisrupt : float, optional
+            Time since the start of the disruption (in galpy time units). If None, the value set at the initialization of the object is used.
+
+        Returns
+        -------
+        numpy.ndarray
+            Probability of a given parallel (frequency,angle) offset pair.
+
+        Notes
+        -----
+        - Rewinds (Opar,apar) through all impacts, from the most recent to the oldest, removing the kick in the parallel frequency at each impact and evaluating the smooth model for points stripped in between impacts.
+        """
+        Opar = conversion.parse_frequency(Opar, ro=self._ro, vo=self._vo)
+        apar = conversion.parse_angle(apar)
+        if tdisrupt is None:
+            tdisrupt = self._tdisrupt
+        Opar, apar = numpy.broadcast_arrays(
+            numpy.array(Opar, dtype="float"), numpy.array(apar, dtype="float")
+        )
+        Opar = Opar.copy()
+        apar = apar.copy()
+        out = numpy.zeros_like(Opar)
+        todo = numpy.ones(Opar.shape, dtype="bool")
+        tprev = 0.0
+        for ii in self._timpact_sortIndx:
+            # Points stripped since the previous impact are unaffected by
+            # this and earlier impacts
+            ts = apar / Opar
+            afterIndx = todo * (ts < self._timpact[ii] - tprev) * (ts >= 0.0)
+            out[afterIndx] = super().pOparapar(
+                Opar[afterIndx], apar[afterIndx], tdisrupt=tdisrupt - tprev
+            )
+            todo[afterIndx] = False
+            # Rewind the rest to just before this impact
+            apar[todo] -= Opar[todo] * (self._timpact[ii] - tprev)
+            Opar[todo] -= self._kick_interp(ii, apar[todo], 6)
+            tprev = self._timpact[ii]
+        out[todo] = super().pOparapar(Opar[todo], apar[todo], tdisrupt=tdisrupt - tprev)
+        return out
+
+    def _densMoments(self, dangle, tdisrupt):
+        """Zeroth and first moment of pOparapar in Opar at angles dangle, by integrating over a grid in Opar for all angles at once"""
+        dangle = numpy.atleast_1d(dangle)
+        sigOpar = numpy.sqrt(self._sortedSigOEig[2])
+        # Kicks move today's Opar by at most the sum of all kicks
+        totkick = numpy.sum(self._kick_maxdOpar)
+        lowOpar = (
+            numpy.maximum(self._meandO - _NSIGOPAR * sigOpar, dangle / tdisrupt)
+            - totkick
+        )
+        highOpar = self._meandO + _NSIGOPAR * sigOpar + totkick
+        lowOpar = numpy.minimum(lowOpar, highOpar)
+        Opars = lowOpar[:, numpy.newaxis] + numpy.outer(
+            highOpar - lowOpar, numpy.linspace(0.0, 1.0, self._nOpar)
+        )
+        pOpar = self.pOparapar(Opars, dangle[:, numpy.newaxis], tdisrupt=tdisrupt)
+        # Normalize like streamdf's density
+        dens = integrate.simpson(pOpar, x=Opars, axis=1) / numpy.sqrt(2.0 * numpy.pi)
+        num = integrate.simpson(Opars * pOpar, x=Opars, axis=1) / numpy.sqrt(
+            2.0 * numpy.pi
+        )
+        return (dens, num)
+
+    def _density_par(self, dangle, tdisrupt=None):
+        """The raw density as a function of parallel angle"""
+        if tdisrupt is None:
+            tdisrupt = self._tdisrupt
+        if self._nimpact == 0:
+            return super()._density_par(dangle, tdisrupt=tdisrupt)
+        out = self._densMoments(dangle, tdisrupt)[0]
+        return out if numpy.ndim(dangle) > 0 else out[0]
+
+    @physical_conversion("frequency", pop=True)
+    def meanOmega(self, dangle, oned=False, offset_sign=None, tdisrupt=None):
+        """
+        Calculate the mean frequency as a function of angle, assuming a uniform time distribution up to a maximum time.
+
+        Parameters
+        ----------
+        dangle : float or numpy.ndarray
+            Angle offset.
+        oned : bool, optional
+            If True, return the 1D offset from the progenitor (along the direction of disruption). Default is False.
+        offset_sign : None, optional
+            Sign of the frequency offset (only used in the absence of impacts). Default is None.
+        tdisrupt : float, optional
+            Maximum time. Default is None.
+
+        Returns
+        -------
+        float or numpy.ndarray
+            Mean Omega.
+        """
+        if tdisrupt is None:
+            tdisrupt = self._tdisrupt
+        if self._nimpact == 0:
+            return super().meanOmega(
+                dangle,
+                oned=oned,
+                offset_sign=offset_sign,
+                tdisrupt=tdisrupt,
+                use_physical=False,
+            )
+        dens, num = self._densMoments(dangle, tdisrupt)
+        dO1D = num / dens
+        if numpy.ndim(dangle) == 0:
+            dO1D = dO1D[0]
+        if oned:
+            return dO1D
+        else:
+            return self._progenitor_Omega + numpy.multiply.outer(
+                dO1D, self._dsigomeanProgDirection * self._sigMeanSign
+            )
+
+    ################################SAMPLE THE DF##################################
+    def _sample_aAt(self, n):
+        """Sampling frequencies, angles, and times part of sampling, for stream with impacts"""
+        # Use streamdf's _sample_aAt to generate unperturbed frequencies,
+        # angles
+        Om, angle, dt = super()._sample_aAt(n)
+        # Apply the kicks, from the oldest impact to the most recent one: rewind
+        # angles to the time of the impact, apply the kick, and run forward
+        for ii in self._timpact_sortIndx[::-1]:
+            sgapdf = self._sgapdfs[self._impact_template[ii]]
+            dangle_at_impact = (
+                angle
+                - numpy.tile(self._progenitor_angle.T, (n, 1)).T
+                - (Om - numpy.tile(self._progenitor_Omega.T, (n, 1)).T)
+                * self._timpact[ii]
+            )
+            dangle_par_at_impact = (
+                numpy.dot(dangle_at_impact.T, self._dsigomeanProgDirection)
+                * sgapdf._gap_sigMeanSign
+            )
+            # (points not yet released have zero kick)
+            kick = self._kick_interp(ii, dangle_par_at_impact, slice(0, 6)).T
+            Om += kick[:3]
+            angle += kick[3:] + kick[:3] * self._timpact[ii]
+        return (Om, angle, dt)
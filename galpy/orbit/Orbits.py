@@ -675,7 +675,56 @@ class Orbit:
             lb = False
         elif not isinstance(vxvv, (list, tuple)):
             vxvv = vxvv.T  # (norb,phasedim) --> (phasedim,norb) easier later
-        if not (_APY_COORD_LOADED and isinstance(vxvv, SkyCoord)) and (radec or lb):
+        if (
+            not (_APY_COORD_LOADED and isinstance(vxvv, SkyCoord))
+            and radec
+            and not uvw
+            and len(vxvv) == 6
+            and numpy.ndim(self._ro) == 0
+            and numpy.ndim(self._zo) == 0
+            and numpy.ndim(self._vo) == 0
+            and numpy.ndim(self._solarmotion) == 1
+        ):
+            # Fused, single-pass transformation for the common case
+            if _APY_LOADED and isinstance(vxvv[0], units.Quantity):
+                ra, dec = vxvv[0].to(units.deg).value, vxvv[1].to(units.deg).value
+            else:
+                ra, dec = vxvv[0], vxvv[1]
+            if _APY_LOADED and isinstance(vxvv[3], units.Quantity):
+                pmra, pmdec = (
+                    vxvv[3].to(units.mas / units.yr).value,
+                    vxvv[4].to(units.mas / units.yr).value,
+                )
+            else:
+                pmra, pmdec = vxvv[3], vxvv[4]
+            R, vR, vT, z, vz, phi = coords.radec_to_galcencyl(
+                ra,
+                dec,
+                conversion.parse_length_kpc(vxvv[2]),
+                pmra,
+                pmdec,
+                conversion.parse_velocity_kms(vxvv[5]),
+                Xsun=self._ro,
+                Zsun=self._zo,
+                vsun=[
+                    self._solarmotion[0],
+                    self._solarmotion[1] + self._vo,
+                    self._solarmotion[2],
+                ],
+                degree=True,
+                epoch=None,
+            ).T
+            vxvv = numpy.array(
+                [
+                    R / self._ro,
+                    vR / self._vo,
+                    vT / self._vo,
+                    z / self._ro,
+                    vz / self._vo,
+                    phi,
+                ]
+            )
+        elif not (_APY_COORD_LOADED and isinstance(vxvv, SkyCoord)) and (radec or lb):
             if radec:
                 if _APY_LOADED and isinstance(vxvv[0], units.Quantity):
                     ra, dec = vxvv[0].to(units.deg).value, vxvv[1].to(units.deg).value
@@ -2541,6 +2590,7 @@ class Orbit:
         _check_consistent_units(self, pot)
         self._aAPot = pot
         self._aAType = type
+        self._aA_kwargs = kwargs
         # Setup
         if self._aAType.lower() == "adiabatic":
             self._aA = actionAngle.actionAngleAdiabatic(pot=self._aAPot, **kwargs)
@@ -2623,11 +2673,53 @@ class Orbit:
         )
         return None
 
+    def _actionsFreqsAngles_cache_key(self):
+        """Internal function to get the key identifying the current actionAngle setup (method, potential, delta/b, and the other keywords used to set it up) in the cache of actions, frequencies, and angles; returns None if the setup cannot be represented as a key"""
+        pot = self._aAPot if isinstance(self._aAPot, list) else [self._aAPot]
+        # Potentials hash by identity
+        key = [type(self._aA).__name__, tuple(pot)]
+        if hasattr(self._aA, "_delta"):
+            key.append(numpy.asarray(self._aA._delta).tobytes())
+        if hasattr(self._aA, "_aAI"):
+            key.append(numpy.asarray(self._aA._aAI.b).tobytes())
+            key.append(numpy.asarray(self._aA._aAI.amp).tobytes())
+        # Keywords like order, c, tintJ, ... also determine the result
+        for kw, val in sorted(self._aA_kwargs.items()):
+            if isinstance(val, numpy.ndarray):
+                val = (val.dtype.str, val.shape, val.tobytes())
+            elif isinstance(val, list):
+                val = tuple(val)
+            key.append((kw, val))
+        key = tuple(key)
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
     def _setup_actionsFreqsAngles(self, pot=None, **kwargs):
         """Internal function to compute the actions, frequencies, and angles and cache them for reuse"""
         self._setupaA(pot=pot, **kwargs)
         if hasattr(self, "_aA_jr"):
             return None
+        # Results for previously-used potentials and methods are kept in a cache,
+        # such that switching back and forth does not require re-computing them
+        if not hasattr(self, "_actionsFreqsAnglesCache"):
+            self._actionsFreqsAnglesCache = {}
+        cache_key = self._actionsFreqsAngles_cache_key()
+        if not cache_key is None and cache_key in self._actionsFreqsAnglesCache:
+            (
+                self._aA_jr,
+                self._aA_jp,
+                self._aA_jz,
+                self._aA_Or,
+                self._aA_Op,
+                self._aA_Oz,
+                self._aA_wr,
+                self._aA_wp,
+                self._aA_wz,
+            ) = self._actionsFreqsAnglesCache[cache_key]
+            return None
         if self.dim() == 3:
             # try to make sure this is not 0
             tz = (
@@ -2660,6 +2752,19 @@ class Orbit:
             self.phi(use_physical=False, dontreshape=True),
             use_physical=False,
         )
+        if cache_key is None:
+            return None
+        self._actionsFreqsAnglesCache[cache_key] = (
+            self._aA_jr,
+            self._aA_jp,
+            self._aA_jz,
+            self._aA_Or,
+            self._aA_Op,
+            self._aA_Oz,
+            self._aA_wr,
+            self._aA_wp,
+            self._aA_wz,
+        )
         return None
 
     def _setup_actions(self, pot=None, **kwargs):
@@ -3598,6 +3703,46 @@ class Orbit:
         self._setup_actionsFreqsAngles(pot=pot, **kwargs)
         return self._aA_Oz
 
+    def actionsFreqsAngles(self, pot=None, **kwargs):
+        r"""
+        Calculate the actions, frequencies, and angles in a single evaluation.
+
+        Parameters
+        ----------
+        pot : Potential or list of Potential instances, optional
+            Gravitational potential. Default is the gravitational field used for the orbit integration.
+        type : {'staeckel', 'isochroneApprox', 'spherical'}, optional
+            Type of actionAngle module to use. Default is 'staeckel'.
+        ro : float or Quantity, optional
+            Physical scale in kpc for distances to use to convert. Default is object-wide default.
+        vo : float or Quantity, optional
+            Physical scale for velocities in km/s to use to convert. Default is object-wide default.
+        use_physical : bool, optional
+            Use to override object-wide default for using a physical scale for output.
+        quantity : bool, optional
+            If True, return an Astropy Quantity object. Default from configuration file.
+
+        Returns
+        -------
+        tuple
+            (jr,jp,jz,Or,Op,Oz,wr,wp,wz), each a float, numpy.ndarray or Quantity [\*input_shape]
+
+        Notes
+        -----
+        - Keyword arguments also include the actionAngle module setup kwargs for the corresponding actionAngle modules
+        - All quantities are computed in a single call of the actionAngle module's actionsFreqsAngles method and are cached (per potential, delta/b, and method), such that subsequent calls to this method or to the individual methods (jr, Or, wr, etc.) do not re-compute them
+
+        See Also
+        --------
+        galpy.actionAngle.actionAngleStaeckel
+        galpy.actionAngle.actionAngleIsochroneApprox
+        galpy.actionAngle.actionAngleSpherical
+        """
+        return tuple(
+            getattr(self, func)(pot=pot, **kwargs)
+            for func in ["jr", "jp", "jz", "Or", "Op", "Oz", "wr", "wp", "wz"]
+        )
+
     @physical_conversion("time")
     def time(self, *args, **kwargs):
         r"""
@@ -4474,9 +4619,7 @@ class Orbit:
         thiso = self._call_internal(*args, **kwargs)
         thiso_shape = thiso.shape
         thiso = thiso.reshape((thiso_shape[0], -1))
-        return (
-            _lbdvrpmllpmbb(self, thiso, *args, **kwargs).T[3].reshape(thiso_shape[1:]).T
-        )
+        return _vlos(self, thiso, *args, **kwargs).reshape(thiso_shape[1:]).T
 
     @shapeDecorator
     def vra(self, *args, **kwargs):
@@ -7815,10 +7958,52 @@ def _lbd(orb, thiso, *args, **kwargs):
 
 def _radec(orb, thiso, *args, **kwargs):
     """Calculate ra and dec"""
+    radec = _fused_radec(orb, thiso, kwargs, vel=False)
+    if not radec is None:
+        return radec[:, :2]
     lbd = _lbd(orb, thiso, *args, **kwargs)
     return coords.lb_to_radec(lbd[:, 0], lbd[:, 1], degree=True, epoch=None)
 
 
+def _fused_radec(orb, thiso, kwargs, vel=False):
+    """Calculate ra,dec,d,pmra,pmdec,vlos in a single pass for a FullOrbit with a fixed observer, returns None if the fused transformation does not apply"""
+    obs, ro, vo = _parse_radec_kwargs(orb, kwargs, vel=vel, dontpop=True, thiso=thiso)
+    if (
+        len(thiso[:, 0]) != 6
+        or not isinstance(obs, (numpy.ndarray, list))
+        or (vel and len(obs) != 6)
+        or numpy.any([numpy.ndim(o) > 0 for o in obs])
+        or numpy.ndim(ro) > 0
+        or numpy.ndim(vo) > 0
+    ):
+        return None
+    Xsun = numpy.sqrt(obs[0] ** 2.0 + obs[1] ** 2.0)
+    if vel:
+        vsun = numpy.array(  # have to rotate
+            [
+                obs[3] * obs[0] / Xsun / vo + obs[4] * obs[1] / Xsun / vo,
+                -obs[3] * obs[1] / Xsun / vo + obs[4] * obs[0] / Xsun / vo,
+                obs[5] / vo,
+            ]
+        )
+    else:
+        vsun = numpy.zeros(3)
+    out = coords._galcencyl_to_radec(
+        thiso,
+        numpy.arctan2(obs[1], obs[0]),
+        coords._galcen_matrix(Xsun / ro, obs[2] / ro),
+        coords._radec_to_lb_matrix(None),
+        numpy.array([Xsun / ro, 0.0, obs[2] / ro]),
+        vsun,
+        zero_offset=1.0 / 10000.0 if vel else 1e-15 / ro,
+    )
+    out[:2] *= 180.0 / numpy.pi
+    out[2] *= ro
+    out[3:5] *= vo / ro
+    out[5] *= vo
+    return out.T
+
+
 def _XYZvxvyvz(orb, thiso, *args, **kwargs):
     """Calculate X,Y,Z,U,V,W"""
     obs, ro, vo = _parse_radec_kwargs(orb, kwargs, vel=True, thiso=thiso)
@@ -8001,6 +8186,9 @@ def _lbdvrpmllpmbb(orb, thiso, *args, **kwargs):
 
 def _pmrapmdec(orb, thiso, *args, **kwargs):
     """Calculate pmra and pmdec"""
+    radec = _fused_radec(orb, thiso, kwargs, vel=True)
+    if not radec is None:
+        return radec[:, 3:5]
     lbdvrpmllpmbb = _lbdvrpmllpmbb(orb, thiso, *args, **kwargs)
     return coords.pmllpmbb_to_pmrapmdec(
         lbdvrpmllpmbb[:, 4],
@@ -8012,6 +8200,14 @@ def _pmrapmdec(orb, thiso, *args, **kwargs):
     )
 
 
+def _vlos(orb, thiso, *args, **kwargs):
+    """Calculate vlos"""
+    radec = _fused_radec(orb, thiso, kwargs, vel=True)
+    if not radec is None:
+        return radec[:, 5]
+    return _lbdvrpmllpmbb(orb, thiso, *args, **kwargs)[:, 3]
+
+
 def _parse_radec_kwargs(orb, kwargs, vel=False, dontpop=False, thiso=None):
     if "obs" in kwargs:
         obs = kwargs["obs"]
@@ -12,11 +12,12 @@ from ..potential.Potential import (
     _evaluateRforces,
     _evaluatezforces,
 )
-from ..util import _load_extension_libs, galpyWarning, symplecticode
+from ..util import _load_extension_libs, galpyWarning
 from ..util._optional_deps import _TQDM_LOADED
 from ..util.leung_dop853 import dop853
 from ..util.multi import parallel_map
 from .integratePlanarOrbit import (
+    _leapfrog_multi,
     _parse_integrator,
     _parse_scf_pot,
     _parse_tol,
@@ -265,7 +266,7 @@ def _parse_pot(pot, potforactions=False, potfortorus=False):
             pot_type.append(27)
             pot_args.extend(
                 [
-                    len(p._Cs),
+                    len(p._Cs0),
                     p._amp,
                     p._N,
                     p._sin_alpha,
@@ -277,7 +278,7 @@ def _parse_pot(pot, potforactions=False, potfortorus=False):
                     p._omega,
                 ]
             )
-            pot_args.extend(p._Cs)
+            pot_args.extend(p._Cs0)
         # 30: PerfectEllipsoidPotential, done with others above
         # 31: KGPotential
         # 32: IsothermalDiskPotential
@@ -762,38 +763,37 @@ def integrateFullOrbit(
     if int_method.lower() == "leapfrog":
         if rtol is None:
             rtol = 1e-8
-
-        def integrate_for_map(vxvv):
-            # go to the rectangular frame
-            this_vxvv = numpy.array(
-                [
-                    vxvv[0] * numpy.cos(vxvv[5]),
-                    vxvv[0] * numpy.sin(vxvv[5]),
-                    vxvv[3],
-                    vxvv[1] * numpy.cos(vxvv[5]) - vxvv[2] * numpy.sin(vxvv[5]),
-                    vxvv[2] * numpy.cos(vxvv[5]) + vxvv[1] * numpy.sin(vxvv[5]),
-                    vxvv[4],
-                ]
-            )
-            # integrate
-            out = symplecticode.leapfrog(
-                _rectForce, this_vxvv, t, args=(pot,), rtol=rtol
-            )
-            # go back to the cylindrical frame
-            R = numpy.sqrt(out[:, 0] ** 2.0 + out[:, 1] ** 2.0)
-            phi = numpy.arccos(out[:, 0] / R)
-            phi[(out[:, 1] < 0.0)] = 2.0 * numpy.pi - phi[(out[:, 1] < 0.0)]
-            vR = out[:, 3] * numpy.cos(phi) + out[:, 4] * numpy.sin(phi)
-            vT = out[:, 4] * numpy.cos(phi) - out[:, 3] * numpy.sin(phi)
-            out[:, 3] = out[:, 2]
-            out[:, 4] = out[:, 5]
-            out[:, 0] = R
-            out[:, 1] = vR
-            out[:, 2] = vT
-            out[:, 5] = phi
-            return out
-
-    elif int_method.lower() == "dop853" or int_method.lower() == "odeint":
+        # go to the rectangular frame
+        this_vxvv = numpy.array(
+            [
+                yo[:, 0] * numpy.cos(yo[:, 5]),
+                yo[:, 0] * numpy.sin(yo[:, 5]),
+                yo[:, 3],
+                yo[:, 1] * numpy.cos(yo[:, 5]) - yo[:, 2] * numpy.sin(yo[:, 5]),
+                yo[:, 2] * numpy.cos(yo[:, 5]) + yo[:, 1] * numpy.sin(yo[:, 5]),
+                yo[:, 4],
+            ]
+        ).T
+        # integrate all orbits in lockstep, in numcores chunks
+        out = _leapfrog_multi(
+            _rectForce, this_vxvv, t, (pot,), rtol, numcores, progressbar
+        )
+        # go back to the cylindrical frame
+        R = numpy.sqrt(out[:, :, 0] ** 2.0 + out[:, :, 1] ** 2.0)
+        phi = numpy.arccos(out[:, :, 0] / R)
+        phi[(out[:, :, 1] < 0.0)] = 2.0 * numpy.pi - phi[(out[:, :, 1] < 0.0)]
+        vR = out[:, :, 3] * numpy.cos(phi) + out[:, :, 4] * numpy.sin(phi)
+        vT = out[:, :, 4] * numpy.cos(phi) - out[:, :, 3] * numpy.sin(phi)
+        out[:, :, 3] = out[:, :, 2]
+        out[:, :, 4] = out[:, :, 5]
+        out[:, :, 0] = R
+        out[:, :, 1] = vR
+        out[:, :, 2] = vT
+        out[:, :, 5] = phi
+        if nophi:
+            out = out[:, :, :5]
+        return out, numpy.zeros(len(yo))
+    if int_method.lower() == "dop853" or int_method.lower() == "odeint":
         if rtol is None:
             rtol = 1e-8
         if int_method.lower() == "dop853":
@@ -1240,7 +1240,7 @@ def _rectForce(x, pot, t=0.0, vx=None):
     Parameters
     ----------
     x : numpy.ndarray
-        Current position
+        Current position, shape [3] or [3,N] for N objects
     t : float, optional
         Current time (default is 0.0)
     pot : (list of) Potential instance(s)
@@ -1262,7 +1262,9 @@ def _rectForce(x, pot, t=0.0, vx=None):
     phi = numpy.arccos(x[0] / R)
     sinphi = x[1] / R
     cosphi = x[0] / R
-    if x[1] < 0.0:
+    if numpy.ndim(phi) > 0:  # multiple objects
+        phi[x[1] < 0.0] = 2.0 * numpy.pi - phi[x[1] < 0.0]
+    elif x[1] < 0.0:
         phi = 2.0 * numpy.pi - phi
     if not vx is None:
         vR = vx[0] * cosphi + vx[1] * sinphi
@@ -8,12 +8,17 @@ from scipy import integrate
 from .. import potential
 from ..potential.linearPotential import _evaluatelinearForces
 from ..potential.verticalPotential import verticalPotential
-from ..util import _load_extension_libs, symplecticode
+from ..util import _load_extension_libs
 from ..util._optional_deps import _TQDM_LOADED
 from ..util.leung_dop853 import dop853
 from ..util.multi import parallel_map
 from .integrateFullOrbit import _parse_pot as _parse_pot_full
-from .integratePlanarOrbit import _parse_integrator, _parse_tol, _prep_tfuncs
+from .integratePlanarOrbit import (
+    _leapfrog_multi,
+    _parse_integrator,
+    _parse_tol,
+    _prep_tfuncs,
+)
 
 if _TQDM_LOADED:
     import tqdm
@@ -293,15 +298,19 @@ def integrateLinearOrbit(
     if int_method.lower() == "leapfrog":
         if rtol is None:
             rtol = 1e-8
-
-        def integrate_for_map(vxvv):
-            return symplecticode.leapfrog(
-                lambda x, t=t: _evaluatelinearForces(pot, x, t=t),
-                numpy.array(vxvv),
-                t,
-                rtol=rtol,
-            )
-
+        # integrate all orbits in lockstep, in numcores chunks
+        out = _leapfrog_multi(
+            lambda x, t=t: _evaluatelinearForces(pot, x, t=t),
+            numpy.atleast_2d(yo),
+            t,
+            (),
+            rtol,
+            numcores,
+            progressbar,
+        )
+        if len(yo) == 1:
+            return out, 0
+        return out, numpy.zeros(len(yo))
     elif int_method.lower() == "dop853":
         if rtol is None:
             rtol = 1e-8
@@ -352,7 +352,7 @@ def _parse_pot(pot):
             pot_type.append(27)
             pot_args.extend(
                 [
-                    len(p._Pot._Cs),
+                    len(p._Pot._Cs0),
                     p._Pot._amp,
                     p._Pot._N,
                     p._Pot._sin_alpha,
@@ -364,7 +364,7 @@ def _parse_pot(pot):
                     p._Pot._omega,
                 ]
             )
-            pot_args.extend(p._Pot._Cs)
+            pot_args.extend(p._Pot._Cs0)
         elif isinstance(p, potential.CosmphiDiskPotential):
             pot_type.append(28)
             pot_args.extend(
@@ -669,6 +669,49 @@ def _prep_tfuncs(pot_tfuncs):
     return pot_tfuncs
 
 
+def _leapfrog_multi(func, yo, t, args, rtol, numcores, progressbar):
+    """Integrate all orbits yo [N,2*ndim] in lockstep using the Python leapfrog integrator, splitting them into numcores chunks that are integrated in parallel; falls back to integrating the orbits one by one if the force cannot be evaluated for multiple objects at once"""
+    nq = yo.shape[1] // 2
+    try:
+        vectorized = numpy.shape(func(yo[:2, :nq].T, *args, t=t[0])) == (
+            nq,
+            len(yo[:2]),
+        )
+    except Exception:
+        vectorized = False
+    if not vectorized:
+        if len(yo) == 1:
+            return symplecticode.leapfrog(func, yo[0], t, args=args, rtol=rtol)[None]
+        return numpy.array(
+            parallel_map(
+                lambda vxvv: symplecticode.leapfrog(
+                    func, vxvv, t, args=args, rtol=rtol
+                ),
+                yo,
+                numcores=numcores,
+                progressbar=progressbar,
+            )
+        )
+    if numcores == 1 or len(yo) == 1:
+        return symplecticode.leapfrog_multi(func, yo, t, args=args, rtol=rtol)
+    chunks = numpy.array_split(yo, min(numcores, len(yo)))
+
+    def integrate_chunk(ii):
+        # Return an object array, such that parallel_map can combine them
+        out = numpy.empty(1, dtype="object")
+        out[0] = symplecticode.leapfrog_multi(func, chunks[ii], t, args=args, rtol=rtol)
+        return out
+
+    return numpy.concatenate(
+        [
+            o[0]
+            for o in parallel_map(
+                integrate_chunk, range(len(chunks)), numcores=numcores
+            )
+        ]
+    )
+
+
 def integratePlanarOrbit_c(
     pot, yo, t, int_method, rtol=None, atol=None, progressbar=True, dt=None
 ):
@@ -953,35 +996,34 @@ def integratePlanarOrbit(
     if int_method.lower() == "leapfrog":
         if rtol is None:
             rtol = 1e-8
-
-        def integrate_for_map(vxvv):
-            # go to the rectangular frame
-            this_vxvv = numpy.array(
-                [
-                    vxvv[0] * numpy.cos(vxvv[3]),
-                    vxvv[0] * numpy.sin(vxvv[3]),
-                    vxvv[1] * numpy.cos(vxvv[3]) - vxvv[2] * numpy.sin(vxvv[3]),
-                    vxvv[2] * numpy.cos(vxvv[3]) + vxvv[1] * numpy.sin(vxvv[3]),
-                ]
-            )
-            # integrate
-            tmp_out = symplecticode.leapfrog(
-                _planarRectForce, this_vxvv, t, args=(pot,), rtol=rtol
-            )
-            # go back to the cylindrical frame
-            R = numpy.sqrt(tmp_out[:, 0] ** 2.0 + tmp_out[:, 1] ** 2.0)
-            phi = numpy.arccos(tmp_out[:, 0] / R)
-            phi[(tmp_out[:, 1] < 0.0)] = 2.0 * numpy.pi - phi[(tmp_out[:, 1] < 0.0)]
-            vR = tmp_out[:, 2] * numpy.cos(phi) + tmp_out[:, 3] * numpy.sin(phi)
-            vT = tmp_out[:, 3] * numpy.cos(phi) - tmp_out[:, 2] * numpy.sin(phi)
-            out = numpy.zeros((len(t), 4))
-            out[:, 0] = R
-            out[:, 1] = vR
-            out[:, 2] = vT
-            out[:, 3] = phi
-            return out
-
-    elif int_method.lower() == "dop853" or int_method.lower() == "odeint":
+        # go to the rectangular frame
+        this_vxvv = numpy.array(
+            [
+                yo[:, 0] * numpy.cos(yo[:, 3]),
+                yo[:, 0] * numpy.sin(yo[:, 3]),
+                yo[:, 1] * numpy.cos(yo[:, 3]) - yo[:, 2] * numpy.sin(yo[:, 3]),
+                yo[:, 2] * numpy.cos(yo[:, 3]) + yo[:, 1] * numpy.sin(yo[:, 3]),
+            ]
+        ).T
+        # integrate all orbits in lockstep, in numcores chunks
+        tmp_out = _leapfrog_multi(
+            _planarRectForce, this_vxvv, t, (pot,), rtol, numcores, progressbar
+        )
+        # go back to the cylindrical frame
+        R = numpy.sqrt(tmp_out[:, :, 0] ** 2.0 + tmp_out[:, :, 1] ** 2.0)
+        phi = numpy.arccos(tmp_out[:, :, 0] / R)
+        phi[(tmp_out[:, :, 1] < 0.0)] = 2.0 * numpy.pi - phi[(tmp_out[:, :, 1] < 0.0)]
+        vR = tmp_out[:, :, 2] * numpy.cos(phi) + tmp_out[:, :, 3] * numpy.sin(phi)
+        vT = tmp_out[:, :, 3] * numpy.cos(phi) - tmp_out[:, :, 2] * numpy.sin(phi)
+        out = numpy.zeros((len(yo), len(t), 4))
+        out[:, :, 0] = R
+        out[:, :, 1] = vR
+        out[:, :, 2] = vT
+        out[:, :, 3] = phi
+        if nophi:
+            out = out[:, :, :3]
+        return out, numpy.zeros(len(yo))
+    if int_method.lower() == "dop853" or int_method.lower() == "odeint":
         if rtol is None:
             rtol = 1e-8
         if int_method.lower() == "dop853":
@@ -1720,7 +1762,7 @@ def _planarRectForce(x, pot, t=0.0, vx=None):
     Parameters
     ----------
     x : numpy.ndarray
-        Current position.
+        Current position, shape [2] or [2,N] for N objects.
     t : float, optional
         Current time (default is 0.0).
     pot : list or Potential instance(s)
@@ -1743,7 +1785,9 @@ def _planarRectForce(x, pot, t=0.0, vx=None):
     phi = numpy.arccos(x[0] / R)
     sinphi = x[1] / R
     cosphi = x[0] / R
-    if x[1] < 0.0:
+    if numpy.ndim(phi) > 0:  # multiple objects
+        phi[x[1] < 0.0] = 2.0 * numpy.pi - phi[x[1] < 0.0]
+    elif x[1] < 0.0:
         phi = 2.0 * numpy.pi - phi
     if not vx is None:
         vR = vx[0] * cosphi + vx[1] * sinphi
@@ -970,7 +970,7 @@ def scf_compute_coeffs_axi(dens, N, L, a=1.0, radial_order=None, costheta_order=
     return Acos, Asin
 
 
-def scf_compute_coeffs_nbody(pos, N, L, mass=1.0, a=1.0):
+def scf_compute_coeffs_nbody(pos, N, L, mass=1.0, a=1.0, chunksize=None):
     """
     Numerically compute the expansion coefficients for a given $N$-body set of points
 
@@ -986,6 +986,8 @@ def scf_compute_coeffs_nbody(pos, N, L, mass=1.0, a=1.0):
         Mass of particles (scalar or array with size n), by default 1.0
     a : float, optional
         Parameter used to scale the radius, by default 1.0
+    chunksize : int, optional
+        If set, process the particles in chunks of this size, such that memory use does not grow with the number of particles (e.g., for memory-mapped positions from a GadgetSnapshot or NemoSnapshot), by default None (all particles at once)
 
     Returns
     -------
@@ -997,6 +999,25 @@ def scf_compute_coeffs_nbody(pos, N, L, mass=1.0, a=1.0):
     - 2020-11-18 - Written - Morgan Bennett (UofT)
 
     """
+    if chunksize is None:
+        return _scf_compute_coeffs_nbody_chunk(pos, N, L, mass=mass, a=a)
+    mass = numpy.atleast_1d(mass)
+    Acos, Asin = numpy.zeros([N, L, L]), numpy.zeros([N, L, L])
+    # Coefficients are linear in the particles, so sum over chunks
+    for start in range(0, pos.shape[1], chunksize):
+        tAcos, tAsin = _scf_compute_coeffs_nbody_chunk(
+            numpy.asarray(pos[:, start : start + chunksize], dtype="float64"),
+            N,
+            L,
+            mass=mass if len(mass) == 1 else mass[start : start + chunksize],
+            a=a,
+        )
+        Acos += tAcos
+        Asin += tAsin
+    return Acos, Asin
+
+
+def _scf_compute_coeffs_nbody_chunk(pos, N, L, mass=1.0, a=1.0):
     r = numpy.sqrt(pos[0] ** 2 + pos[1] ** 2 + pos[2] ** 2)
     phi = numpy.arctan2(pos[1], pos[0])
     costheta = pos[2] / r
@@ -1,6 +1,5 @@
 import copy
 import hashlib
-from os import system
 
 import numpy
 from scipy import interpolate
@@ -16,12 +15,11 @@ from .Potential import Potential
 
 if _PYNBODY_LOADED:
     import pynbody
-    from pynbody import gravity
     from pynbody.units import NoUnit
 
 
 class SnapshotRZPotential(Potential):
-    """Class that implements an axisymmetrized version of the potential of an N-body snapshot (requires `pynbody <http://pynbody.github.io>`__)
+    """Class that implements an axisymmetrized version of the potential of an N-body snapshot, computed using a Barnes-Hut tree
 
     `_evaluate`, `_Rforce`, and `_zforce` calculate a hash for the
     array of points that is passed in by the user. The hash and
@@ -30,18 +28,31 @@ class SnapshotRZPotential(Potential):
     are returned and not recalculated.
     """
 
-    def __init__(self, s, num_threads=None, nazimuths=4, ro=None, vo=None):
+    def __init__(
+        self,
+        s,
+        num_threads=None,
+        nazimuths=4,
+        opening_angle=0.0,
+        softening_length=None,
+        ro=None,
+        vo=None,
+    ):
         """
         Initialize a SnapshotRZ potential object
 
         Parameters
         ----------
-        s : pynbody.snapshot
-            A simulation snapshot loaded with pynbody.
+        s : pynbody.snapshot, galpy.snapshot.GadgetSnapshot, galpy.snapshot.NemoSnapshot, or tuple
+            A simulation snapshot loaded with pynbody, a snapshot read with galpy's native readers, or a tuple (pos,mass) of particle positions with shape (N,3) and masses (in natural units, such that the gravitational force between two particles is m/r^2).
         num_threads : int, optional
-            Number of threads to use for calculation. Default is None.
+            Number of threads to use for calculation. Default is None (all available threads).
         nazimuths : int, optional
             Number of azimuths to average over. Default is 4.
+        opening_angle : float, optional
+            Opening angle theta of the tree (see galpy.snapshot.treenbody.tree_nbody). Default is 0, which gives exact direct summation; set to, e.g., 0.5 for a faster, approximate tree force.
+        softening_length : float, optional
+            Plummer softening length. Default is None, which uses the mean of the 'eps' array for pynbody snapshots (raising a ValueError if the snapshot has no 'eps' array) and no softening (softening_length=0) for all other inputs.
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -49,31 +60,18 @@ class SnapshotRZPotential(Potential):
 
         Notes
         -----
+        - The potential and forces are computed with an OpenMP-parallelized Barnes-Hut tree (including quadrupole moments) in C, averaging over nazimuths azimuths; pynbody is only required when passing a pynbody snapshot. With the default opening_angle=0, all particles are summed directly, as was previously done with pynbody's direct summation.
         - 2013 - Written - Rok Roskar (ETH)
         - 2014-11-24 - Edited for merging into main galpy - Bovy (IAS)
 
         """
-        if not _PYNBODY_LOADED:  # pragma: no cover
-            raise ImportError(
-                "The SnapShotRZPotential class is designed to work with pynbody snapshots, which cannot be loaded (probably because it is not installed) -- obtain from pynbody.github.io"
-            )
         Potential.__init__(self, amp=1.0, ro=ro, vo=vo)
         self._s = s
         self._point_hash = {}
-        if num_threads is None:
-            self._num_threads = pynbody.config["number_of_threads"]
-        else:
-            self._num_threads = num_threads
-        # Set up azimuthal averaging
+        self._num_threads = num_threads
         self._naz = nazimuths
-        self._cosaz = numpy.cos(
-            numpy.arange(self._naz, dtype="float") / self._naz * 2.0 * numpy.pi
-        )
-        self._sinaz = numpy.sin(
-            numpy.arange(self._naz, dtype="float") / self._naz * 2.0 * numpy.pi
-        )
-        self._zones = numpy.ones(self._naz)
-        self._zzeros = numpy.zeros(self._naz)
+        self._opening_angle = opening_angle
+        self._softening_length = _parse_softening_length(s, softening_length)
         return None
 
     @scalarVectorDecorator
@@ -102,34 +100,17 @@ class SnapshotRZPotential(Potential):
         #        if use_pkdgrav :
 
         else:
-            # set up the four points per R,z pair to mimic axisymmetry
-            points = numpy.zeros((len(R), self._naz, 3))
-
-            for i in range(len(R)):
-                points[i] = numpy.array(
-                    [R[i] * self._cosaz, R[i] * self._sinaz, z[i] * self._zones]
-                ).T
-
-            points_new = points.reshape(points.size // 3, 3)
-            pot, acc = gravity.calc.direct(
-                self._s, points_new, num_threads=self._num_threads
+            # compute the azimuthally-averaged potential and forces
+            pot, Rforce, zforce = _snapshot_rz_potential(
+                self._s,
+                R,
+                z,
+                self._naz,
+                self._opening_angle,
+                self._softening_length,
+                self._num_threads,
             )
-
-            pot = pot.reshape(len(R), self._naz)
-            acc = acc.reshape(len(R), self._naz, 3)
-
-            # need to average the potentials
-            pot = pot.mean(axis=1)
-
-            # get the radial accelerations
-            rz_acc = numpy.zeros((len(R), 2))
-            rvecs = numpy.array([self._cosaz, self._sinaz, self._zzeros]).T
-
-            for i in range(len(R)):
-                for j, rvec in enumerate(rvecs):
-                    rz_acc[i, 0] += acc[i, j].dot(rvec)
-                    rz_acc[i, 1] += acc[i, j, 2]
-            rz_acc /= self._naz
+            rz_acc = numpy.array([Rforce, zforce]).T
 
             # store the computed values for reuse
             self._point_hash[new_hash] = [pot, rz_acc]
@@ -158,14 +139,16 @@ class InterpSnapshotRZPotential(interpRZPotential):
         numcores=None,
         nazimuths=4,
         use_pkdgrav=False,
+        opening_angle=0.0,
+        softening_length=None,
     ):
         """
         Initialize an InterpSnapshotRZPotential instance
 
         Parameters
         ----------
-        s : pynbody.snapshot
-            A simulation snapshot loaded with pynbody.
+        s : pynbody.snapshot, galpy.snapshot.GadgetSnapshot, galpy.snapshot.NemoSnapshot, or tuple
+            A simulation snapshot loaded with pynbody, a snapshot read with galpy's native readers, or a tuple (pos,mass) of particle positions with shape (N,3) and masses (in natural units).
         rgrid : tuple, optional
             R grid to be given to linspace as in rs= linspace(*rgrid).
         zgrid : tuple, optional
@@ -183,11 +166,15 @@ class InterpSnapshotRZPotential(interpRZPotential):
         zsym : bool, optional
             If True (default), the potential is assumed to be symmetric around z=0 (so you can use, e.g.,  zgrid=(0.,1.,101)).
         numcores : int, optional
-            Number of cores to use for the interpolation (default: from pynbody configuration).
+            Number of cores to use for the calculation of the grid (default: all available cores).
         nazimuths : int, optional
             Number of azimuths to average over (default: 4).
         use_pkdgrav : bool, optional
-            If True, use PKDGRAV to calculate the snapshot's potential and forces (default: False).
+            If True, use PKDGRAV to calculate the snapshot's potential and forces (default: False; not currently implemented).
+        opening_angle : float, optional
+            Opening angle theta of the tree (see SnapshotRZPotential; default: 0, exact direct summation).
+        softening_length : float, optional
+            Plummer softening length (default: the mean of the 'eps' array for pynbody snapshots, no softening for all other inputs; see SnapshotRZPotential).
         ro : float or Quantity, optional
             Distance scale for translation into internal units (default from configuration file).
         vo : float or Quantity, optional
@@ -198,31 +185,15 @@ class InterpSnapshotRZPotential(interpRZPotential):
         - 2013 - Written - Rok Roskar (ETH)
         - 2014-11-24 - Edited for merging into main galpy - Bovy (IAS)
         """
-        if not _PYNBODY_LOADED:  # pragma: no cover
-            raise ImportError(
-                "The InterpSnapRZShotPotential class is designed to work with pynbody snapshots, which cannot be loaded (probably because it is not installed) -- obtain from pynbody.github.io"
-            )
-
         # initialize using the base class
         Potential.__init__(self, amp=1.0, ro=ro, vo=vo)
 
         # other properties
-        if numcores is None:
-            self._numcores = pynbody.config["number_of_threads"]
-        else:
-            self._numcores = numcores
+        self._numcores = numcores
         self._s = s
-
-        # Set up azimuthal averaging
         self._naz = nazimuths
-        self._cosaz = numpy.cos(
-            numpy.arange(self._naz, dtype="float") / self._naz * 2.0 * numpy.pi
-        )
-        self._sinaz = numpy.sin(
-            numpy.arange(self._naz, dtype="float") / self._naz * 2.0 * numpy.pi
-        )
-        self._zones = numpy.ones(self._naz)
-        self._zzeros = numpy.zeros(self._naz)
+        self._opening_angle = opening_angle
+        self._softening_length = _parse_softening_length(s, softening_length)
 
         # the interpRZPotential class sets these flags
         self._enable_c = enable_c
@@ -242,7 +213,13 @@ class InterpSnapshotRZPotential(interpRZPotential):
         self._interpverticalfreq = interpverticalfreq
 
         # make the potential accessible at points beyond the grid
-        self._origPot = SnapshotRZPotential(s, self._numcores)
+        self._origPot = SnapshotRZPotential(
+            s,
+            self._numcores,
+            nazimuths=self._naz,
+            opening_angle=self._opening_angle,
+            softening_length=self._softening_length,
+        )
 
         # setup the grid
         self._zsym = zsym
@@ -336,158 +313,54 @@ class InterpSnapshotRZPotential(interpRZPotential):
          points are positioned at +/- dr from the central point
 
         """
-        # set up the four points per R,z pair to mimic axisymmetry
-        points = numpy.zeros((len(R), len(z), self._naz, 3))
-
-        for i in range(len(R)):
-            for j in range(len(z)):
-                points[i, j] = numpy.array(
-                    [R[i] * self._cosaz, R[i] * self._sinaz, z[j] * self._zones]
-                ).T
-
-        points_new = points.reshape(points.size // 3, 3)
-        self.points = points_new
-
-        # set up the points to calculate the second derivatives
-        zgrad_points = numpy.zeros((len(points_new) * 2, 3))
-        rgrad_points = numpy.zeros((len(points_new) * 2, 3))
-        for i, p in enumerate(points_new):
-            zgrad_points[i * 2] = p
-            zgrad_points[i * 2][2] -= dr
-            zgrad_points[i * 2 + 1] = p
-            zgrad_points[i * 2 + 1][2] += dr
-
-            rgrad_points[i * 2] = p
-            rgrad_points[i * 2][:2] -= p[:2] / numpy.sqrt(numpy.dot(p[:2], p[:2])) * dr
-            rgrad_points[i * 2 + 1] = p
-            rgrad_points[i * 2 + 1][:2] += (
-                p[:2] / numpy.sqrt(numpy.dot(p[:2], p[:2])) * dr
-            )
-
+        # the (R,z) grid points
+        Rs = numpy.repeat(R, len(z))
+        zs = numpy.tile(z, len(R))
         if use_pkdgrav:  # pragma: no cover
             raise RuntimeError("using pkdgrav not currently implemented")
-            sn = pynbody.snapshot._new(
-                len(self._s.d) + len(self._s.g) + len(self._s.s) + len(points_new)
-            )
-            print("setting up %d grid points" % (len(points_new)))
-            # sn['pos'][0:len(self.s)] = self.s['pos']
-            # sn['mass'][0:len(self.s)] = self.s['mass']
-            # sn['phi'] = 0.0
-            # sn['eps'] = 1e3
-            # sn['eps'][0:len(self.s)] = self.s['eps']
-            # sn['vel'][0:len(self.s)] = self.s['vel']
-            # sn['mass'][len(self.s):] = 1e-10
-            sn["pos"][len(self._s) :] = points_new
-            sn["mass"][len(self._s) :] = 0.0
-
-            sn.write(fmt=pynbody.tipsy.TipsySnap, filename="potgridsnap")
-            command = (
-                "~/bin/pkdgrav2_pthread -sz %d -n 0 +std -o potgridsnap -I potgridsnap +potout +overwrite %s"
-                % (self._numcores, self._s._paramfile["filename"])
-            )
-            print(command)
-            system(command)
-            sn = pynbody.load("potgridsnap")
-            acc = sn["accg"][len(self._s) :].reshape(len(R) * len(z), self._naz, 3)
-            pot = sn["pot"][len(self._s) :].reshape(len(R) * len(z), self._naz)
 
         else:
             if self._interpPot:
-                pot, acc = gravity.calc.direct(
-                    self._s, points_new, num_threads=self._numcores
-                )
-
-                pot = pot.reshape(len(R) * len(z), self._naz)
-                acc = acc.reshape(len(R) * len(z), self._naz, 3)
-
-                # need to average the potentials
-                pot = pot.mean(axis=1)
-
-                # get the radial accelerations
-                rz_acc = numpy.zeros((len(R) * len(z), 2))
-                rvecs = numpy.array([self._cosaz, self._sinaz, self._zzeros]).T
-
-                # reshape the acc to make sure we have a leading index even
-                # if we are only evaluating a single point, i.e. we have
-                # shape = (1,4,3) not (4,3)
-                acc = acc.reshape((len(rz_acc), self._naz, 3))
-
-                for i in range(len(R) * len(z)):
-                    for j, rvec in enumerate(rvecs):
-                        rz_acc[i, 0] += acc[i, j].dot(rvec)
-                        rz_acc[i, 1] += acc[i, j, 2]
-                rz_acc /= self._naz
-
+                pot, Rforce, zforce = self._snapshot_rz_potential(Rs, zs)
                 self._potGrid = pot.reshape((len(R), len(z)))
-                self._rforceGrid = rz_acc[:, 0].reshape((len(R), len(z)))
-                self._zforceGrid = rz_acc[:, 1].reshape((len(R), len(z)))
+                self._rforceGrid = Rforce.reshape((len(R), len(z)))
+                self._zforceGrid = zforce.reshape((len(R), len(z)))
 
-            # compute the force gradients
-
-            # first get the accelerations
+            # compute the force gradients using finite differences of the
+            # forces at points straddling each grid point by +/- dr
             if self._interpverticalfreq:
-                zgrad_pot, zgrad_acc = gravity.calc.direct(
-                    self._s, zgrad_points, num_threads=self._numcores
-                )
-                # each point from the points used above for pot and acc is straddled by
-                # two points to get the gradient across it. Compute the gradient by
-                # using a finite difference
-
-                zgrad = numpy.zeros(len(points_new))
-
-                # do a loop through the pairs of points -- reshape the array
-                # so that each item is the pair of acceleration vectors
-                # then calculate the gradient from the two points
-                for i, zacc in enumerate(
-                    zgrad_acc.reshape((len(zgrad_acc) // 2, 2, 3))
-                ):
-                    zgrad[i] = ((zacc[1] - zacc[0]) / (dr * 2.0))[2]
-
-                # reshape the arrays
+                _, _, zforce_minus = self._snapshot_rz_potential(Rs, zs - dr)
+                _, _, zforce_plus = self._snapshot_rz_potential(Rs, zs + dr)
                 self._z2derivGrid = (
-                    -zgrad.reshape((len(zgrad) // self._naz, self._naz))
-                    .mean(axis=1)
-                    .reshape((len(R), len(z)))
-                )
+                    -(zforce_plus - zforce_minus) / (2.0 * dr)
+                ).reshape((len(R), len(z)))
 
             # do the same for the radial component
             if self._interpepifreq:
-                rgrad_pot, rgrad_acc = gravity.calc.direct(
-                    self._s, rgrad_points, num_threads=self._numcores
+                _, Rforce_minus, zforce_Rminus = self._snapshot_rz_potential(
+                    Rs - dr, zs
                 )
-                rgrad = numpy.zeros(len(points_new))
-
-                for i, racc in enumerate(
-                    rgrad_acc.reshape((len(rgrad_acc) // 2, 2, 3))
-                ):
-                    point = points_new[i]
-                    point[2] = 0.0
-                    rvec = point / numpy.sqrt(numpy.dot(point, point))
-                    rgrad_vec = (
-                        numpy.dot(racc[1], rvec) - numpy.dot(racc[0], rvec)
-                    ) / (dr * 2.0)
-                    rgrad[i] = rgrad_vec
-
+                _, Rforce_plus, zforce_Rplus = self._snapshot_rz_potential(Rs + dr, zs)
                 self._R2derivGrid = (
-                    -rgrad.reshape((len(rgrad) // self._naz, self._naz))
-                    .mean(axis=1)
-                    .reshape((len(R), len(z)))
-                )
+                    -(Rforce_plus - Rforce_minus) / (2.0 * dr)
+                ).reshape((len(R), len(z)))
 
             # do the same for the mixed radial-vertical component
             if self._interpepifreq and self._interpverticalfreq:  # reuse this
-                Rzgrad = numpy.zeros(len(points_new))
-                for i, racc in enumerate(
-                    rgrad_acc.reshape((len(rgrad_acc) // 2, 2, 3))
-                ):
-                    Rzgrad[i] = ((racc[1] - racc[0]) / (dr * 2.0))[2]
-
-                # reshape the arrays
                 self._RzderivGrid = (
-                    -Rzgrad.reshape((len(Rzgrad) // self._naz, self._naz))
-                    .mean(axis=1)
-                    .reshape((len(R), len(z)))
-                )
+                    -(zforce_Rplus - zforce_Rminus) / (2.0 * dr)
+                ).reshape((len(R), len(z)))
+
+    def _snapshot_rz_potential(self, R, z):
+        return _snapshot_rz_potential(
+            self._s,
+            R,
+            z,
+            self._naz,
+            self._opening_angle,
+            self._softening_length,
+            self._numcores,
+        )
 
     @scalarVectorDecorator
     @zsymDecorator(False)
@@ -526,12 +399,13 @@ class InterpSnapshotRZPotential(interpRZPotential):
         self._normPhi0 = Phi0
 
         # rescale the simulation
-        if not isinstance(self._s["pos"].units, NoUnit):
+        pynbody_snapshot = _is_pynbody_snapshot(self._s)
+        if pynbody_snapshot and not isinstance(self._s["pos"].units, NoUnit):
             self._posunit = self._s["pos"].units
             self._s["pos"].convert_units("%s kpc" % R0)
         else:
             self._posunit = None
-        if not isinstance(self._s["vel"].units, NoUnit):
+        if pynbody_snapshot and not isinstance(self._s["vel"].units, NoUnit):
             self._velunit = self._s["vel"].units
             self._s["vel"].convert_units("%s km s**-1" % Vc0)
         else:
@@ -654,9 +528,14 @@ class InterpSnapshotRZPotential(interpRZPotential):
     def __getstate__(self):
         pdict = copy.copy(self.__dict__)
         # Deconstruct _s
-        pdict["_pos"] = self._s["pos"]
-        pdict["_mass"] = self._s["mass"]
-        pdict["_eps"] = self._s["eps"]
+        if _is_pynbody_snapshot(self._s):
+            pdict["_pos"] = self._s["pos"]
+            pdict["_mass"] = self._s["mass"]
+            pdict["_eps"] = self._s["eps"]
+        else:
+            pos, mass = _snapshot_particles(self._s)
+            pdict["_pos"] = numpy.array(pos)
+            pdict["_mass"] = numpy.array(mass)
         # rm _s and _origPot,
         del pdict["_s"]
         del pdict["_origPot"]
@@ -664,15 +543,79 @@ class InterpSnapshotRZPotential(interpRZPotential):
 
     def __setstate__(self, pdict):
         # Set up snapshot again for origPot
-        pdict["_s"] = pynbody.new(star=len(pdict["_mass"]))
-        pdict["_s"]["pos"] = pdict["_pos"]
-        pdict["_s"]["mass"] = pdict["_mass"]
-        pdict["_s"]["eps"] = pdict["_eps"]
+        if "_eps" in pdict:
+            pdict["_s"] = pynbody.new(star=len(pdict["_mass"]))
+            pdict["_s"]["pos"] = pdict["_pos"]
+            pdict["_s"]["mass"] = pdict["_mass"]
+            pdict["_s"]["eps"] = pdict["_eps"]
+            del pdict["_eps"]
+        else:
+            pdict["_s"] = (pdict["_pos"], pdict["_mass"])
         # Transfer __dict__
         del pdict["_pos"]
         del pdict["_mass"]
-        del pdict["_eps"]
         self.__dict__ = pdict
         # Now setup origPotnagain
-        self._origPot = SnapshotRZPotential(self._s, self._numcores)
+        self._origPot = SnapshotRZPotential(
+            self._s,
+            self._numcores,
+            nazimuths=self._naz,
+            opening_angle=self._opening_angle,
+            softening_length=self._softening_length,
+        )
         return None
+
+
+def _is_pynbody_snapshot(s):
+    return _PYNBODY_LOADED and isinstance(s, pynbody.snapshot.SimSnap)
+
+
+def _snapshot_particles(s):
+    """Positions, shape (N,3), and masses, shape (N,), of the particles in a snapshot"""
+    if isinstance(s, (tuple, list)):
+        pos, mass = s
+    elif _is_pynbody_snapshot(s):
+        pos, mass = s["pos"], s["mass"]
+    else:  # galpy.snapshot.GadgetSnapshot, NemoSnapshot
+        pos, mass = s.pos, s.mass
+    pos = numpy.asarray(pos)
+    return (pos, numpy.broadcast_to(numpy.asarray(mass), (len(pos),)))
+
+
+def _parse_softening_length(s, softening_length):
+    """Softening length to use for a snapshot: the given one, the mean of a pynbody snapshot's 'eps' array, or zero for all other inputs"""
+    if softening_length is None and _is_pynbody_snapshot(s):
+        try:
+            softening_length = float(numpy.mean(s["eps"]))
+        except KeyError:
+            raise ValueError(
+                "pynbody snapshot does not have an 'eps' array; please specify the softening_length explicitly (use softening_length=0. for no softening)"
+            )
+    elif softening_length is None:
+        # Particle arrays and galpy's native snapshots carry no softening
+        softening_length = 0.0
+    if softening_length < 0.0:
+        raise ValueError("softening_length must be non-negative")
+    return softening_length
+
+
+def _snapshot_rz_potential(
+    s, R, z, nazimuths, opening_angle, softening_length, num_threads
+):
+    """Azimuthally-averaged potential, radial force, and vertical force of a snapshot at (R,z)"""
+    from ..snapshot.treenbody import (  # here bc otherwise there is an infinite loop
+        _tree_rz_potential,
+    )
+
+    pos, mass = _snapshot_particles(s)
+    return _tree_rz_potential(
+        pos,
+        mass,
+        numpy.atleast_1d(R),
+        numpy.atleast_1d(z),
+        nazimuths,
+        opening_angle,
+        softening_length,
+        True,
+        num_threads,
+    )
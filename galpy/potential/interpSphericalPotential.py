@@ -18,6 +18,9 @@ class interpSphericalPotential(SphericalPotential):
 
     Class that interpolates a spherical potential on a grid"""
 
+    # Splines derived from the grid
+    _content_key_exclude = ("_force_spline", "_pot_spline", "_r2deriv_spline")
+
     def __init__(
         self,
         rforce=None,
@@ -1,87 +1,421 @@
-try:
-    import pynbody
+# Native, memory-mapped reader for Gadget snapshots
+import os
+import re
 
-    _PYNBODYENABLED = True
-except ImportError:
-    _PYNBODYENABLED = False
+import numpy
+
+from ..util import plot
+from ..util._optional_deps import _H5PY_LOADED
+
+if _H5PY_LOADED:
+    import h5py
+
+_NTYPES = 6
+# Layout of the 256-byte header of Gadget binary files
+_HEADER_DTYPE = [
+    ("npart", "i4", _NTYPES),
+    ("massarr", "f8", _NTYPES),
+    ("time", "f8"),
+    ("redshift", "f8"),
+    ("flag_sfr", "i4"),
+    ("flag_feedback", "i4"),
+    ("npartTotal", "u4", _NTYPES),
+    ("flag_cooling", "i4"),
+    ("num_files", "i4"),
+    ("BoxSize", "f8"),
+    ("Omega0", "f8"),
+    ("OmegaLambda", "f8"),
+    ("HubbleParam", "f8"),
+    ("flag_stellarage", "i4"),
+    ("flag_metals", "i4"),
+    ("npartTotalHighWord", "u4", _NTYPES),
+    ("flag_entropy_instead_u", "i4"),
+]
+# Order of the blocks in SnapFormat=1 files
+_FORMAT1_BLOCKS = ["HEAD", "POS", "VEL", "ID", "MASS"]
+# Names of the datasets in HDF5 files
+_HDF5_FIELDS = {
+    "pos": "Coordinates",
+    "vel": "Velocities",
+    "ids": "ParticleIDs",
+    "mass": "Masses",
+}
+_HDF5_SIGNATURE = b"\x89HDF\r\n\x1a\n"
 
 
 class GadgetSnapshot:
-    """Snapshot coming out of gadget"""
+    """Snapshot coming out of gadget, read natively using memory maps"""
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, filename, ptype=None):
         """
         Initialize a Gadget snapshot object.
 
         Parameters
         ----------
-        *args : str
-            Filename of the snapshot.
+        filename : str
+            Filename of the snapshot: a Gadget binary file (SnapFormat=1 or 2, either endianness, single or double precision) or a Gadget HDF5 file (SnapFormat=3, requires h5py); for snapshots that are split over multiple files, the name of the first file (ending in .0 or .0.hdf5).
+        ptype : int or list of int, optional
+            Particle type(s) to read (default: all types with particles).
 
         Notes
         -----
+        - Positions, velocities, IDs, and masses are memory-mapped from the file(s) rather than read into memory, such that pos, vel, ids, and mass are zero-copy numpy views for a single particle type (or for consecutive types in a single file); masses of types with a fixed mass in the header's mass table are zero-copy broadcasts of that mass. Use iterate to stream through large (multi-file) snapshots in chunks.
+        - Quantities are returned in the units of the snapshot (no conversion to galpy's natural units).
         - 2011-08-15 - Started - Bovy
-
         """
-        if not _PYNBODYENABLED:
-            raise ImportError("pynbody could not be loaded to read the gadget snapshot")
-        filename = args[0]
-        self._sim = pynbody.load(filename)
-        self._sim.physical_units()
-        self._star = self._sim.star
+        self._filenames = _gadget_filenames(filename)
+        if ptype is None:
+            self._ptypes = None
+        else:
+            self._ptypes = sorted(numpy.atleast_1d(ptype).astype("int").tolist())
+        # Parse all files, keeping a list of segments of particles
+        # (one for each file and particle type) that are all views
+        self._segments = []
+        self._blocks = []
+        for ii, fname in enumerate(self._filenames):
+            with open(fname, "rb") as f:
+                ishdf5 = f.read(8) == _HDF5_SIGNATURE
+            if ishdf5:
+                header, blocks, segments = _parse_gadget_hdf5(fname)
+            else:
+                header, blocks, segments = _parse_gadget_binary(fname)
+            if ii == 0:
+                self.header = header
+                if self._ptypes is None:
+                    self._ptypes = [
+                        t for t in range(_NTYPES) if _total_npart(header, t) > 0
+                    ]
+            for seg in segments:
+                if seg["ptype"] in self._ptypes:
+                    seg["file"] = ii
+                    self._segments.append(seg)
+            self._blocks.append(blocks)
+        self.time = self.header["time"]
+        self.redshift = self.header["redshift"]
         return None
 
-    def __getattr__(self, i):
-        if i == "x":
-            return self.pos[0]
-        elif i == "pos":
-            return self._star["pos"]
+    def __len__(self):
+        return int(sum([seg["stop"] - seg["start"] for seg in self._segments]))
+
+    @property
+    def pos(self):
+        """Positions of the particles, shape (N,3)"""
+        return self._get("pos")
+
+    @property
+    def vel(self):
+        """Velocities of the particles, shape (N,3)"""
+        return self._get("vel")
+
+    @property
+    def ids(self):
+        """IDs of the particles, shape (N,)"""
+        return self._get("ids")
+
+    @property
+    def mass(self):
+        """Masses of the particles, shape (N,)"""
+        return self._get("mass")
+
+    def iterate(self, chunksize=10**6, fields=("pos", "mass")):
+        """
+        Iterate through the particles in chunks.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            Maximum number of particles in each chunk (default: 10^6).
+        fields : tuple of str, optional
+            Fields to return for each chunk ('pos', 'vel', 'ids', 'mass'; default: ('pos','mass')).
+
+        Yields
+        ------
+        tuple
+            Views of the requested fields for the next chunk of particles.
+        """
+        for seg in self._segments:
+            for start in range(0, seg["stop"] - seg["start"], chunksize):
+                yield tuple(
+                    [
+                        self._segment_field(seg, field)[start : start + chunksize]
+                        for field in fields
+                    ]
+                )
+
+    def _segment_field(self, seg, field):
+        if field == "mass":
+            return seg["mass"]
+        return self._blocks[seg["file"]][field][seg["start"] : seg["stop"]]
+
+    def _get(self, field):
+        if field != "mass" and _consecutive(self._segments):
+            # Single view of the block in a single file
+            return self._blocks[self._segments[0]["file"]][field][
+                self._segments[0]["start"] : self._segments[-1]["stop"]
+            ]
+        elif len(self._segments) == 1:
+            return self._segment_field(self._segments[0], field)
+        return numpy.concatenate(
+            [self._segment_field(seg, field) for seg in self._segments]
+        )
 
     def plot(self, *args, **kwargs):
         """
         Plot the snapshot.
 
+        Parameters
+        ----------
+        d1 : str, optional
+            First dimension to plot ('x', 'y', 'z', 'vx', 'vy', 'vz', 'R'; default: 'x').
+        d2 : str, optional
+            Second dimension to plot (default: 'y').
+        *args : tuple
+            Matplotlib.plot inputs + galpy.util.plot.plot inputs.
+        **kwargs : dict
+            Matplotlib.plot inputs + galpy.util.plot.plot inputs.
+
+        Returns
+        -------
+        None
+            Sends plot to output device.
+
         Notes
         -----
         - 2011-08-15 - Started - Bovy (NYU)
         """
         labeldict = {
-            "t": r"$t$",
             "R": r"$R$",
-            "vR": r"$v_R$",
-            "vT": r"$v_T$",
-            "z": r"$z$",
-            "vz": r"$v_z$",
-            "phi": r"$\phi$",
             "x": r"$x$",
             "y": r"$y$",
+            "z": r"$z$",
             "vx": r"$v_x$",
             "vy": r"$v_y$",
+            "vz": r"$v_z$",
         }
-        # Defaults
-        if not kwargs.has_key("d1") and not kwargs.has_key("d2"):
-            if len(self.orbits[0].vxvv) == 3:
-                d1 = "R"
-                d2 = "vR"
-            elif len(self.orbits[0].vxvv) == 4:
-                d1 = "x"
-                d2 = "y"
-            elif len(self.orbits[0].vxvv) == 2:
-                d1 = "x"
-                d2 = "vx"
-            elif len(self.orbits[0].vxvv) == 5 or len(self.orbits[0].vxvv) == 6:
-                d1 = "R"
-                d2 = "z"
-        elif not kwargs.has_key("d1"):
-            d2 = kwargs["d2"]
-            kwargs.pop("d2")
-            d1 = "t"
-        elif not kwargs.has_key("d2"):
-            d1 = kwargs["d1"]
-            kwargs.pop("d1")
-            d2 = "t"
+        d1 = kwargs.pop("d1", "x")
+        d2 = kwargs.pop("d2", "y")
+        x = self._coord(d1)
+        y = self._coord(d2)
+        if "xlabel" not in kwargs:
+            kwargs["xlabel"] = labeldict[d1]
+        if "ylabel" not in kwargs:
+            kwargs["ylabel"] = labeldict[d2]
+        if len(args) == 0:
+            args = (",",)
+        plot.plot(x, y, *args, **kwargs)
+
+    def _coord(self, d):
+        if d == "R":
+            pos = self.pos
+            return numpy.sqrt(pos[:, 0] ** 2.0 + pos[:, 1] ** 2.0)
+        elif d[0] == "v":
+            return self.vel[:, "xyz".index(d[1])]
+        else:
+            return self.pos[:, "xyz".index(d)]
+
+
+def _gadget_filenames(filename):
+    """List of all files of a (possibly multi-file) snapshot"""
+    match = re.match(r"^(.*)\.0(\.hdf5)?$", filename)
+    if match is None:
+        return [filename]
+    base, ext = match.group(1), match.group(2) or ""
+    filenames = []
+    while os.path.exists(f"{base}.{len(filenames)}{ext}"):
+        filenames.append(f"{base}.{len(filenames)}{ext}")
+    return filenames
+
+
+def _total_npart(header, ptype):
+    return int(header["npartTotal"][ptype]) + (
+        int(header["npartTotalHighWord"][ptype]) << 32
+    )
+
+
+def _consecutive(segments):
+    """Whether the segments are consecutive particles in a single file"""
+    return all(
+        [
+            s1["file"] == s0["file"] and s1["start"] == s0["stop"]
+            for s0, s1 in zip(segments[:-1], segments[1:])
+        ]
+    ) and (len(segments) > 0)
+
+
+def _segments_from_header(header, masses):
+    """Set up the per-type segments of a file, with masses either from the mass block or from the mass table"""
+    segments = []
+    start = 0
+    mstart = 0
+    for ptype in range(_NTYPES):
+        npart = int(header["npart"][ptype])
+        if npart == 0:
+            continue
+        if header["massarr"][ptype] > 0.0 or masses is None:
+            mass = numpy.broadcast_to(header["massarr"][ptype], (npart,))
+        else:
+            mass = masses[mstart : mstart + npart]
+            mstart += npart
+        segments.append(
+            {"ptype": ptype, "start": start, "stop": start + npart, "mass": mass}
+        )
+        start += npart
+    return segments
+
+
+def _parse_gadget_binary(filename):
+    """Parse a Gadget binary file (SnapFormat=1 or 2) into memory maps"""
+    with open(filename, "rb") as f:
+        first = f.read(4)
+    for endian in ["<", ">"]:
+        if numpy.frombuffer(first, dtype=endian + "i4")[0] in [8, 256]:
+            break
+    else:
+        raise OSError(f"{filename} does not appear to be a Gadget snapshot")
+    i4 = numpy.dtype(endian + "i4")
+    filesize = os.path.getsize(filename)
+    raw = numpy.memmap(filename, dtype="u1", mode="r")
+    # Find all blocks: offset and size of their data
+    blocks = {}
+    offset = 0
+    nblock = 0
+    while offset < filesize:
+        size = int(raw[offset : offset + 4].view(i4)[0])
+        if size == 8:  # SnapFormat=2 label record
+            label = raw[offset + 4 : offset + 8].tobytes().decode("ascii").strip()
+            offset += 16
+            size = int(raw[offset : offset + 4].view(i4)[0])
+        elif nblock < len(_FORMAT1_BLOCKS):
+            label = _FORMAT1_BLOCKS[nblock]
         else:
-            d1 = kwargs["d1"]
-            kwargs.pop("d1")
-            d2 = kwargs["d2"]
-            kwargs.pop("d2")
+            label = f"BLOCK{nblock}"
+        if (
+            offset + 8 + size > filesize
+            or int(raw[offset + 4 + size : offset + 8 + size].view(i4)[0]) != size
+        ):
+            raise OSError(f"{filename} does not appear to be a valid Gadget snapshot")
+        blocks[label] = (offset + 4, size)
+        offset += size + 8
+        nblock += 1
+    header_dtype = numpy.dtype(
+        [(name, endian + t, *shape) for name, t, *shape in _HEADER_DTYPE]
+    )
+    header = numpy.frombuffer(
+        raw[blocks["HEAD"][0] : blocks["HEAD"][0] + header_dtype.itemsize].tobytes(),
+        dtype=header_dtype,
+    )[0]
+    header = {name: header[name] for name, *_ in _HEADER_DTYPE}
+    ntot = int(numpy.sum(header["npart"]))
+    nwithmass = int(
+        numpy.sum(header["npart"][header["massarr"] == 0.0])
+    )  # particles with individual masses
+    # Memory-map the particle data
+    out = {}
+    for label, field, ncol, count in [
+        ("POS", "pos", 3, ntot),
+        ("VEL", "vel", 3, ntot),
+        ("ID", "ids", 1, ntot),
+        ("MASS", "mass", 1, nwithmass),
+    ]:
+        if label not in blocks or count == 0:
+            continue
+        offset, size = blocks[label]
+        itemsize = size // (ncol * count)
+        if field == "ids":
+            dtype = endian + ("u4" if itemsize == 4 else "u8")
+        else:
+            dtype = endian + ("f4" if itemsize == 4 else "f8")
+        out[field] = numpy.memmap(
+            filename,
+            dtype=dtype,
+            mode="r",
+            offset=offset,
+            shape=(count, ncol) if ncol > 1 else (count,),
+        )
+    return (header, out, _segments_from_header(header, out.get("mass", None)))
+
+
+def _parse_gadget_hdf5(filename):
+    """Parse a Gadget HDF5 file (SnapFormat=3) into memory maps"""
+    if not _H5PY_LOADED:
+        raise ImportError("h5py could not be loaded to read the HDF5 gadget snapshot")
+    with h5py.File(filename, "r") as f:
+        attrs = f["Header"].attrs
+        header = {
+            "npart": numpy.array(attrs["NumPart_ThisFile"], dtype="int64"),
+            "massarr": numpy.array(attrs["MassTable"], dtype="float64"),
+            "time": float(attrs["Time"]),
+            "redshift": float(attrs.get("Redshift", 0.0)),
+            "npartTotal": numpy.array(attrs["NumPart_Total"], dtype="uint32"),
+            "npartTotalHighWord": numpy.array(
+                attrs.get("NumPart_Total_HighWord", numpy.zeros(_NTYPES)),
+                dtype="uint32",
+            ),
+            "num_files": int(attrs.get("NumFilesPerSnapshot", 1)),
+            "BoxSize": float(attrs.get("BoxSize", 0.0)),
+        }
+        # Concatenating the types gives the same layout as for binary files,
+        # but in HDF5 files each type is stored separately, so keep the
+        # blocks per type and offset the segments
+        blocks = {}
+        segments = []
+        start = 0
+        for ptype in range(_NTYPES):
+            npart = int(header["npart"][ptype])
+            if npart == 0:
+                continue
+            group = f[f"PartType{ptype}"]
+            seg = {"ptype": ptype, "start": start, "stop": start + npart}
+            for field, name in _HDF5_FIELDS.items():
+                if name not in group:
+                    continue
+                blocks[(field, ptype)] = _hdf5_memmap(filename, group[name])
+            if ("mass", ptype) in blocks:
+                seg["mass"] = blocks[("mass", ptype)]
+            else:
+                seg["mass"] = numpy.broadcast_to(header["massarr"][ptype], (npart,))
+            segments.append(seg)
+            start += npart
+    return (header, _HDF5Blocks(blocks, segments), segments)
+
+
+def _hdf5_memmap(filename, dataset):
+    """Memory-map an HDF5 dataset if it is stored contiguously, otherwise read it"""
+    offset = dataset.id.get_offset()
+    if offset is None or dataset.chunks is not None or dataset.compression is not None:
+        return dataset[()]
+    return numpy.memmap(
+        filename, dtype=dataset.dtype, mode="r", offset=offset, shape=dataset.shape
+    )
+
+
+class _HDF5Blocks:
+    """Access the per-type datasets of an HDF5 file as if they were a single block indexed by the particle index in the file"""
+
+    def __init__(self, blocks, segments):
+        self._blocks = blocks
+        self._segments = segments
+
+    def __getitem__(self, field):
+        return _HDF5Field(self._blocks, self._segments, field)
+
+
+class _HDF5Field:
+    def __init__(self, blocks, segments, field):
+        self._blocks = blocks
+        self._segments = segments
+        self._field = field
+
+    def __getitem__(self, sl):
+        # Slices only ever span a single type, except when asking for
+        # consecutive types, in which case the types are concatenated
+        out = []
+        for seg in self._segments:
+            lo, hi = max(sl.start, seg["start"]), min(sl.stop, seg["stop"])
+            if lo < hi:
+                out.append(
+                    self._blocks[(self._field, seg["ptype"])][
+                        lo - seg["start"] : hi - seg["start"]
+                    ]
+                )
+        return out[0] if len(out) == 1 else numpy.concatenate(out)
@@ -0,0 +1,176 @@
+# Native, memory-mapped reader for NEMO snapshots
+import numpy
+
+# Magic numbers of singular and plural items in NEMO's structured binary files
+_SINGMAGIC = (0o11 << 8) + 0o222
+_PLURMAGIC = (0o13 << 8) + 0o222
+# NEMO's item types: numpy type (None for sets)
+_NEMO_TYPES = {
+    "a": "u1",  # any
+    "c": "S1",  # char
+    "b": "u1",  # byte
+    "s": "i2",  # short
+    "i": "i4",  # int
+    "l": "i8",  # long
+    "h": "i2",  # half-precision int
+    "f": "f4",  # float
+    "d": "f8",  # double
+    "(": None,  # set
+    ")": None,  # tes
+    "{": None,  # story
+    "}": None,  # tell
+}
+
+
+class NemoSnapshot:
+    """Snapshot in NEMO's structured binary format, read natively using memory maps"""
+
+    def __init__(self, filename, index=0):
+        """
+        Initialize a NEMO snapshot object.
+
+        Parameters
+        ----------
+        filename : str
+            Filename of the NEMO snapshot file (e.g., created with mkplummer or gyrfalcON).
+        index : int, optional
+            Index of the snapshot to load if the file contains multiple snapshots (default: 0; negative indices count from the end).
+
+        Notes
+        -----
+        - The particle data are memory-mapped from the file rather than read into memory, such that pos, vel, and mass are zero-copy numpy views (also for files that store positions and velocities together as PhaseSpace). Use iterate to stream through large snapshots in chunks.
+        - All snapshots in the file are indexed when the object is set up; their times are given by the times attribute.
+        """
+        self._filename = filename
+        self._snapshots = _parse_nemo(filename)
+        if len(self._snapshots) == 0:
+            raise OSError(f"{filename} does not contain any NEMO snapshots")
+        self.times = numpy.array(
+            [snap.get("Parameters/Time", numpy.nan) for snap in self._snapshots]
+        )
+        self.load(index)
+        return None
+
+    def load(self, index):
+        """
+        Load a different snapshot from the same file.
+
+        Parameters
+        ----------
+        index : int
+            Index of the snapshot to load (negative indices count from the end).
+
+        Returns
+        -------
+        None
+        """
+        snap = self._snapshots[index]
+        self.time = snap.get("Parameters/Time", numpy.nan)
+        if "Particles/PhaseSpace" in snap:
+            phasespace = self._memmap(snap["Particles/PhaseSpace"])
+            self.pos = phasespace[:, 0]
+            self.vel = phasespace[:, 1]
+        else:
+            self.pos = self._memmap(snap["Particles/Position"])
+            self.vel = (
+                self._memmap(snap["Particles/Velocity"])
+                if "Particles/Velocity" in snap
+                else None
+            )
+        if "Particles/Mass" in snap:
+            self.mass = self._memmap(snap["Particles/Mass"])
+        else:
+            self.mass = None
+        return None
+
+    def __len__(self):
+        return len(self.pos)
+
+    def iterate(self, chunksize=10**6, fields=("pos", "mass")):
+        """
+        Iterate through the particles in chunks.
+
+        Parameters
+        ----------
+        chunksize : int, optional
+            Maximum number of particles in each chunk (default: 10^6).
+        fields : tuple of str, optional
+            Fields to return for each chunk ('pos', 'vel', 'mass'; default: ('pos','mass')).
+
+        Yields
+        ------
+        tuple
+            Views of the requested fields for the next chunk of particles.
+        """
+        for start in range(0, len(self), chunksize):
+            yield tuple(
+                [getattr(self, field)[start : start + chunksize] for field in fields]
+            )
+
+    def _memmap(self, item):
+        dtype, shape, offset = item
+        if shape == ():  # pragma: no cover
+            shape = (1,)
+        return numpy.memmap(
+            self._filename, dtype=dtype, mode="r", offset=offset, shape=shape
+        )
+
+
+def _parse_nemo(filename):
+    """Index a NEMO structured binary file: returns a list with, for each SnapShot set, a dictionary of the items in it (path: (dtype,shape,offset) for arrays, value for scalars)"""
+    raw = numpy.memmap(filename, dtype="u1", mode="r")
+    if len(raw) < 2:
+        raise OSError(f"{filename} does not appear to be a NEMO file")
+    for endian in ["<", ">"]:
+        if int(raw[:2].view(endian + "u2")[0]) in [_SINGMAGIC, _PLURMAGIC]:
+            break
+    else:
+        raise OSError(f"{filename} does not appear to be a NEMO file")
+    i4 = numpy.dtype(endian + "i4")
+
+    def read_string(offset):
+        end = offset
+        while raw[end] != 0:
+            end += 1
+        return (raw[offset:end].tobytes().decode("ascii"), end + 1)
+
+    snapshots = []
+    stack = []
+    offset = 0
+    while offset < len(raw):
+        magic = int(raw[offset : offset + 2].view(endian + "u2")[0])
+        if magic not in [_SINGMAGIC, _PLURMAGIC]:
+            raise OSError(
+                f"{filename} does not appear to be a valid NEMO file (bad magic number at byte {offset})"
+            )
+        offset += 2
+        itemtype, offset = read_string(offset)
+        if itemtype not in _NEMO_TYPES:
+            raise OSError(f"Unknown NEMO item type '{itemtype}' in {filename}")
+        if itemtype in [")", "}"]:
+            stack.pop()
+            continue
+        tag, offset = read_string(offset)
+        shape = []
+        if magic == _PLURMAGIC:
+            while True:
+                dim = int(raw[offset : offset + 4].view(i4)[0])
+                offset += 4
+                if dim == 0:
+                    break
+                shape.append(dim)
+        if itemtype in ["(", "{"]:
+            stack.append(tag)
+            if tag == "SnapShot" and len(stack) == 1:
+                snapshots.append({})
+            continue
+        dtype = numpy.dtype(endian + _NEMO_TYPES[itemtype])
+        size = dtype.itemsize * int(numpy.prod(shape))
+        if len(stack) > 0 and stack[0] == "SnapShot":
+            path = "/".join(stack[1:] + [tag])
+            if len(shape) == 0:  # read scalars
+                snapshots[-1][path] = raw[offset : offset + size].view(dtype)[0]
+            else:
+                snapshots[-1][path] = (dtype, tuple(shape), offset)
+        offset += size
+    return snapshots
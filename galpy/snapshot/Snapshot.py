@@ -1,9 +1,10 @@
 import numpy as nu
-from directnbody import direct_nbody
 
-from galpy.orbit import Orbit
-from galpy.potential.planarPotential import RZToplanarPotential
-from galpy.util import plot
+from ..orbit import Orbit
+from ..potential.planarPotential import RZToplanarPotential
+from ..util import coords, plot
+from .directnbody import direct_nbody
+from .treenbody import tree_nbody
 
 
 class Snapshot:
@@ -15,8 +16,8 @@ class Snapshot:
 
         Parameters
         ----------
-        *args : list
-            List of orbits, list of masses (masses=)
+        *args : numpy.ndarray, Orbit, or list of Orbits
+            Phase-space coordinates of the particles, either as an array with shape (N,phasedim) in the same format as Orbit.vxvv ([R,vR,vT,z,vz,phi] for 3D, [R,vR,vT,phi] for 2D, [x,vx] for 1D, or without phi), a single Orbit instance containing multiple objects, or a list of Orbit instances; optionally followed by the masses (can also be given as masses=).
         **kwargs : dict
             Coming soon:
             1) observations
@@ -24,16 +25,101 @@ class Snapshot:
 
         Notes
         -----
+        - The phase-space coordinates are stored as a single contiguous array vxvv with shape (N,phasedim) in natural units; an array input is not copied, such that a snapshot can be a view into a larger array (for example, into the (nt,N,phasedim) array of an integrated time series).
         - 2011-02-02 - Started - Bovy
         """
-        if isinstance(args[0], list) and isinstance(args[0][0], Orbit):
-            self.orbits = args[0]
-            if kwargs.has_key("masses"):
-                self.masses = kwargs["masses"]
-            else:
-                self.masses = nu.ones(len(self.orbits))
+        if isinstance(args[0], Orbit):
+            self.vxvv = args[0].vxvv.reshape((-1, args[0].phasedim()))
+        elif isinstance(args[0], list) and isinstance(args[0][0], Orbit):
+            self.vxvv = nu.concatenate([o.vxvv for o in args[0]])
+        else:
+            self.vxvv = nu.asarray(args[0], dtype="float")
+        if "masses" in kwargs:
+            self.masses = nu.asarray(kwargs["masses"], dtype="float")
+        elif len(args) > 1:
+            self.masses = nu.asarray(args[1], dtype="float")
+        else:
+            self.masses = nu.ones(len(self.vxvv))
+        self._orbits = None
         return None
 
+    def __len__(self):
+        return len(self.vxvv)
+
+    @property
+    def orbits(self):
+        """Multi-object Orbit instance for the particles in the snapshot (set up on first access)"""
+        if self._orbits is None:
+            self._orbits = Orbit(self.vxvv)
+        return self._orbits
+
+    def phasedim(self):
+        """Dimension of the phase-space coordinates of the particles"""
+        return self.vxvv.shape[1]
+
+    def dim(self):
+        """Spatial dimension of the particles"""
+        pdim = self.phasedim()
+        if pdim == 2:
+            return 1
+        elif pdim == 3 or pdim == 4:
+            return 2
+        else:
+            return 3
+
+    # Coordinates of all particles as arrays
+    def R(self):
+        """Cylindrical radius of all particles"""
+        return self.vxvv[:, 0]
+
+    def vR(self):
+        """Cylindrical radial velocity of all particles"""
+        return self.vxvv[:, 1]
+
+    def vT(self):
+        """Rotational velocity of all particles"""
+        return self.vxvv[:, 2]
+
+    def z(self):
+        """Vertical height of all particles"""
+        if self.phasedim() < 5:
+            raise AttributeError("Particles in the snapshot are not 3D")
+        return self.vxvv[:, 3]
+
+    def vz(self):
+        """Vertical velocity of all particles"""
+        if self.phasedim() < 5:
+            raise AttributeError("Particles in the snapshot are not 3D")
+        return self.vxvv[:, 4]
+
+    def phi(self):
+        """Azimuth of all particles"""
+        if self.phasedim() != 4 and self.phasedim() != 6:
+            raise AttributeError("Particles in the snapshot do not have an azimuth")
+        return self.vxvv[:, -1]
+
+    def x(self):
+        """Rectangular x of all particles"""
+        if self.phasedim() == 2:
+            return self.vxvv[:, 0]
+        return self.R() * nu.cos(self.phi())
+
+    def y(self):
+        """Rectangular y of all particles"""
+        return self.R() * nu.sin(self.phi())
+
+    def vx(self):
+        """Rectangular vx of all particles"""
+        if self.phasedim() == 2:
+            return self.vxvv[:, 1]
+        phi = self.phi()
+        return self.vR() * nu.cos(phi) - self.vT() * nu.sin(phi)
+
+    def vy(self):
+        """Rectangular vy of all particles"""
+        phi = self.phi()
+        return self.vR() * nu.sin(phi) + self.vT() * nu.cos(phi)
+
     def integrate(self, t, pot=None, method="test-particle", **kwargs):
         """
         Integrate the snapshot in time.
@@ -45,14 +131,14 @@ class Snapshot:
         pot : object or list of objects, optional
             Potential object(s) (default=None).
         method : str, optional
-            Method to use ('test-particle' or 'direct-python' for now).
+            Method to use ('test-particle', 'direct', or 'tree'; 'direct-python' is an alias for 'direct').
         **kwargs
-            Additional keyword arguments to pass to the integration method.
+            Additional keyword arguments to pass to the integration method (for 'test-particle', those of Orbit.integrate, e.g., method (renamed to integrator here); for 'direct', those of galpy.snapshot.directnbody.direct_nbody: softening_model, softening_length, method (renamed to integrator here), dt, eta, maxlevel; for 'tree', those of galpy.snapshot.treenbody.tree_nbody: softening_model, softening_length, opening_angle, quadrupole, dt, eta, maxlevel).
 
         Returns
         -------
         list
-            List of snapshots at times t.
+            List of snapshots at times t; their phase-space coordinates are views into a single array with shape (nt,N,phasedim).
 
         Notes
         -----
@@ -60,109 +146,64 @@ class Snapshot:
         """
 
         if method.lower() == "test-particle":
-            return self._integrate_test_particle(t, pot)
-        elif method.lower() == "direct-python":
-            return self._integrate_direct_python(t, pot, **kwargs)
+            return self._integrate_test_particle(t, pot, **kwargs)
+        elif method.lower() in ["direct", "direct-python"]:
+            return self._integrate_direct(t, pot, **kwargs)
+        elif method.lower() == "tree":
+            return self._integrate_tree(t, pot, **kwargs)
 
-    def _integrate_test_particle(self, t, pot):
+    def _integrate_test_particle(self, t, pot, integrator="symplec4_c", **kwargs):
         """Integrate the snapshot as a set of test particles in an external \
         potential"""
-        # Integrate all the orbits
-        for o in self.orbits:
-            o.integrate(t, pot)
-        # Return them as a set of snapshots
-        out = []
-        for ii in range(len(t)):
-            outOrbits = []
-            for o in self.orbits:
-                outOrbits.append(o(t[ii]))
-            out.append(Snapshot(outOrbits, self.masses))
-        return out
-
-    def _integrate_direct_python(self, t, pot, **kwargs):
-        """Integrate the snapshot using a direct force summation method \
-        written entirely in python"""
-        # Prepare input for direct_nbody
-        q = []
-        p = []
-        nq = len(self.orbits)
-        dim = self.orbits[0].dim()
+        # Integrate all the orbits at once as a single Orbit instance
+        orbits = Orbit(self.vxvv)
+        orbits.integrate(t, pot, method=integrator, **kwargs)
+        # orbits.orbit has shape (N,nt,phasedim)
+        return self._time_series(nu.swapaxes(orbits.orbit, 0, 1))
+
+    def _integrate_direct(self, t, pot, integrator="leapfrog", **kwargs):
+        """Integrate the snapshot using direct force summation"""
+        return self._integrate_nbody(t, pot, direct_nbody, method=integrator, **kwargs)
+
+    def _integrate_tree(self, t, pot, **kwargs):
+        """Integrate the snapshot using a Barnes-Hut tree"""
+        return self._integrate_nbody(t, pot, tree_nbody, **kwargs)
+
+    def _integrate_nbody(self, t, pot, nbody, **kwargs):
+        """Integrate the snapshot using the N-body code nbody"""
+        # Prepare input for the N-body code: rectangular positions and velocities
+        dim = self.dim()
         if pot is None:
             thispot = None
         elif dim == 2:
             thispot = RZToplanarPotential(pot)
         else:
             thispot = pot
-        for ii in range(nq):
-            # Transform to rectangular frame
-            if dim == 1:
-                thisq = nu.array([self.orbits[ii].x()]).flatten()
-                thisp = nu.array([self.orbits[ii].vx()]).flatten()
-            elif dim == 2:
-                thisq = nu.array([self.orbits[ii].x(), self.orbits[ii].y()]).flatten()
-                thisp = nu.array([self.orbits[ii].vx(), self.orbits[ii].vy()]).flatten()
-            elif dim == 3:
-                thisq = nu.array(
-                    [self.orbits[ii].x(), self.orbits[ii].y(), self.orbits[ii].z()]
-                ).flatten()
-                thisp = nu.array(
-                    [self.orbits[ii].vx(), self.orbits[ii].vy(), self.orbits[ii].vz()]
-                ).flatten()
-            q.append(thisq)
-            p.append(thisp)
+        if dim == 1:
+            q = self.x()
+            p = self.vx()
+        else:
+            q = nu.array([self.x(), self.y()] + ([self.z()] if dim == 3 else [])).T
+            p = nu.array([self.vx(), self.vy()] + ([self.vz()] if dim == 3 else [])).T
         # Run simulation
-        nbody_out = direct_nbody(q, p, self.masses, t, pot=thispot, **kwargs)
-        # Post-process output
-        nt = len(nbody_out)
-        out = []
-        for ii in range(nt):
-            snap_orbits = []
-            for jj in range(nq):
-                if dim == 3:
-                    # go back to the cylindrical frame
-                    R = nu.sqrt(
-                        nbody_out[ii][0][jj][0] ** 2.0 + nbody_out[ii][0][jj][1] ** 2.0
-                    )
-                    phi = nu.arccos(nbody_out[ii][0][jj][0] / R)
-                    if nbody_out[ii][0][jj][1] < 0.0:
-                        phi = 2.0 * nu.pi - phi
-                    vR = nbody_out[ii][1][jj][0] * nu.cos(phi) + nbody_out[ii][1][jj][
-                        1
-                    ] * nu.sin(phi)
-                    vT = nbody_out[ii][1][jj][1] * nu.cos(phi) - nbody_out[ii][1][jj][
-                        0
-                    ] * nu.sin(phi)
-                    vxvv = nu.zeros(dim * 2)
-                    vxvv[3] = nbody_out[ii][0][jj][2]
-                    vxvv[4] = nbody_out[ii][1][jj][2]
-                    vxvv[0] = R
-                    vxvv[1] = vR
-                    vxvv[2] = vT
-                    vxvv[5] = phi
-                if dim == 2:
-                    # go back to the cylindrical frame
-                    R = nu.sqrt(
-                        nbody_out[ii][0][jj][0] ** 2.0 + nbody_out[ii][0][jj][1] ** 2.0
-                    )
-                    phi = nu.arccos(nbody_out[ii][0][jj][0] / R)
-                    if nbody_out[ii][0][jj][1] < 0.0:
-                        phi = 2.0 * nu.pi - phi
-                    vR = nbody_out[ii][1][jj][0] * nu.cos(phi) + nbody_out[ii][1][jj][
-                        1
-                    ] * nu.sin(phi)
-                    vT = nbody_out[ii][1][jj][1] * nu.cos(phi) - nbody_out[ii][1][jj][
-                        0
-                    ] * nu.sin(phi)
-                    vxvv = nu.zeros(dim * 2)
-                    vxvv[0] = R
-                    vxvv[1] = vR
-                    vxvv[2] = vT
-                    vxvv[3] = phi
-                if dim == 1:
-                    vxvv = [nbody_out[ii][0][jj], nbody_out[ii][1][jj]]
-                snap_orbits.append(Orbit(vxvv))
-            out.append(Snapshot(snap_orbits, self.masses))
-        return out
+        qs, ps = nbody(q, p, self.masses, t, pot=thispot, **kwargs)
+        # Post-process output: go back to the cylindrical frame
+        if dim == 1:
+            vxvv = nu.stack((qs[..., 0], ps[..., 0]), axis=-1)
+        else:
+            R, phi, _ = coords.rect_to_cyl(qs[..., 0], qs[..., 1], 0.0)
+            vR = ps[..., 0] * nu.cos(phi) + ps[..., 1] * nu.sin(phi)
+            vT = ps[..., 1] * nu.cos(phi) - ps[..., 0] * nu.sin(phi)
+            if dim == 3:
+                vxvv = nu.stack((R, vR, vT, qs[..., 2], ps[..., 2], phi), axis=-1)
+            else:
+                vxvv = nu.stack((R, vR, vT, phi), axis=-1)
+        return self._time_series(vxvv)
+
+    def _time_series(self, vxvv):
+        """Turn an array of phase-space coordinates with shape (nt,N,phasedim) into a list of snapshots that are views into a single contiguous copy of it"""
+        vxvv = nu.ascontiguousarray(vxvv)
+        return [Snapshot(vxvv[ii], masses=self.masses) for ii in range(len(vxvv))]
 
     # Plotting
     def plot(self, *args, **kwargs):
@@ -203,24 +244,24 @@ class Snapshot:
             "vy": r"$v_y$",
         }
         # Defaults
-        if not kwargs.has_key("d1") and not kwargs.has_key("d2"):
-            if len(self.orbits[0].vxvv) == 3:
+        if "d1" not in kwargs and "d2" not in kwargs:
+            if self.phasedim() == 3:
                 d1 = "R"
                 d2 = "vR"
-            elif len(self.orbits[0].vxvv) == 4:
+            elif self.phasedim() == 4:
                 d1 = "x"
                 d2 = "y"
-            elif len(self.orbits[0].vxvv) == 2:
+            elif self.phasedim() == 2:
                 d1 = "x"
                 d2 = "vx"
-            elif len(self.orbits[0].vxvv) == 5 or len(self.orbits[0].vxvv) == 6:
+            elif self.phasedim() == 5 or self.phasedim() == 6:
                 d1 = "R"
                 d2 = "z"
-        elif not kwargs.has_key("d1"):
+        elif "d1" not in kwargs:
             d2 = kwargs["d2"]
             kwargs.pop("d2")
             d1 = "t"
-        elif not kwargs.has_key("d2"):
+        elif "d2" not in kwargs:
             d1 = kwargs["d1"]
             kwargs.pop("d1")
             d2 = "t"
@@ -230,51 +271,13 @@ class Snapshot:
             d2 = kwargs["d2"]
             kwargs.pop("d2")
         # Get x and y
-        if d1 == "R":
-            x = [o.R() for o in self.orbits]
-        elif d1 == "z":
-            x = [o.z() for o in self.orbits]
-        elif d1 == "vz":
-            x = [o.vz() for o in self.orbits]
-        elif d1 == "vR":
-            x = [o.vR() for o in self.orbits]
-        elif d1 == "vT":
-            x = [o.vT() for o in self.orbits]
-        elif d1 == "x":
-            x = [o.x() for o in self.orbits]
-        elif d1 == "y":
-            x = [o.y() for o in self.orbits]
-        elif d1 == "vx":
-            x = [o.vx() for o in self.orbits]
-        elif d1 == "vy":
-            x = [o.vy() for o in self.orbits]
-        elif d1 == "phi":
-            x = [o.phi() for o in self.orbits]
-        if d2 == "R":
-            y = [o.R() for o in self.orbits]
-        elif d2 == "z":
-            y = [o.z() for o in self.orbits]
-        elif d2 == "vz":
-            y = [o.vz() for o in self.orbits]
-        elif d2 == "vR":
-            y = [o.vR() for o in self.orbits]
-        elif d2 == "vT":
-            y = [o.vT() for o in self.orbits]
-        elif d2 == "x":
-            y = [o.x() for o in self.orbits]
-        elif d2 == "y":
-            y = [o.y() for o in self.orbits]
-        elif d2 == "vx":
-            y = [o.vx() for o in self.orbits]
-        elif d2 == "vy":
-            y = [o.vy() for o in self.orbits]
-        elif d2 == "phi":
-            y = [o.phi() for o in self.orbits]
+        x = getattr(self, d1)()
+        y = getattr(self, d2)()
 
         # Plot
-        if not kwargs.has_key("xlabel"):
+        if "xlabel" not in kwargs:
             kwargs["xlabel"] = labeldict[d1]
-        if not kwargs.has_key("ylabel"):
+        if "ylabel" not in kwargs:
             kwargs["ylabel"] = labeldict[d2]
         if len(args) == 0:
             args = (",",)
@@ -321,32 +324,26 @@ class Snapshot:
             "vy": r"$v_y$",
         }
         # Defaults
-        if (
-            not kwargs.has_key("d1")
-            and not kwargs.has_key("d2")
-            and not kwargs.has_key("d3")
-        ):
-            if len(self.orbits[0].vxvv) == 3:
+        if "d1" not in kwargs and "d2" not in kwargs and "d3" not in kwargs:
+            if self.phasedim() == 3:
                 d1 = "R"
                 d2 = "vR"
                 d3 = "vT"
-            elif len(self.orbits[0].vxvv) == 4:
+            elif self.phasedim() == 4:
                 d1 = "x"
                 d2 = "y"
                 d3 = "vR"
-            elif len(self.orbits[0].vxvv) == 2:
+            elif self.phasedim() == 2:
                 raise AttributeError("Cannot plot 3D aspects of 1D orbits")
-            elif len(self.orbits[0].vxvv) == 5:
+            elif self.phasedim() == 5:
                 d1 = "R"
                 d2 = "vR"
                 d3 = "z"
-            elif len(self.orbits[0].vxvv) == 6:
+            elif self.phasedim() == 6:
                 d1 = "x"
                 d2 = "y"
                 d3 = "z"
-        elif not (
-            kwargs.has_key("d1") and kwargs.has_key("d2") and kwargs.has_key("d3")
-        ):
+        elif not ("d1" in kwargs and "d2" in kwargs and "d3" in kwargs):
             raise AttributeError("Please provide 'd1', 'd2', and 'd3'")
         else:
             d1 = kwargs["d1"]
@@ -356,73 +353,16 @@ class Snapshot:
             d3 = kwargs["d3"]
             kwargs.pop("d3")
         # Get x, y, and z
-        if d1 == "R":
-            x = [o.R() for o in self.orbits]
-        elif d1 == "z":
-            x = [o.z() for o in self.orbits]
-        elif d1 == "vz":
-            x = [o.vz() for o in self.orbits]
-        elif d1 == "vR":
-            x = [o.vR() for o in self.orbits]
-        elif d1 == "vT":
-            x = [o.vT() for o in self.orbits]
-        elif d1 == "x":
-            x = [o.x() for o in self.orbits]
-        elif d1 == "y":
-            x = [o.y() for o in self.orbits]
-        elif d1 == "vx":
-            x = [o.vx() for o in self.orbits]
-        elif d1 == "vy":
-            x = [o.vy() for o in self.orbits]
-        elif d1 == "phi":
-            x = [o.phi() for o in self.orbits]
-        if d2 == "R":
-            y = [o.R() for o in self.orbits]
-        elif d2 == "z":
-            y = [o.z() for o in self.orbits]
-        elif d2 == "vz":
-            y = [o.vz() for o in self.orbits]
-        elif d2 == "vR":
-            y = [o.vR() for o in self.orbits]
-        elif d2 == "vT":
-            y = [o.vT() for o in self.orbits]
-        elif d2 == "x":
-            y = [o.x() for o in self.orbits]
-        elif d2 == "y":
-            y = [o.y() for o in self.orbits]
-        elif d2 == "vx":
-            y = [o.vx() for o in self.orbits]
-        elif d2 == "vy":
-            y = [o.vy() for o in self.orbits]
-        elif d2 == "phi":
-            y = [o.phi() for o in self.orbits]
-        if d3 == "R":
-            z = [o.R() for o in self.orbits]
-        elif d3 == "z":
-            z = [o.z() for o in self.orbits]
-        elif d3 == "vz":
-            z = [o.vz() for o in self.orbits]
-        elif d3 == "vR":
-            z = [o.vR() for o in self.orbits]
-        elif d3 == "vT":
-            z = [o.vT() for o in self.orbits]
-        elif d3 == "x":
-            z = [o.x() for o in self.orbits]
-        elif d3 == "y":
-            z = [o.y() for o in self.orbits]
-        elif d3 == "vx":
-            z = [o.vx() for o in self.orbits]
-        elif d3 == "vy":
-            z = [o.vy() for o in self.orbits]
-        elif d3 == "phi":
-            z = [o.phi() for o in self.orbits]
+        x = getattr(self, d1)()
+        y = getattr(self, d2)()
+        z = getattr(self, d3)()
 
         # Plot
-        if not kwargs.has_key("xlabel"):
+        if "xlabel" not in kwargs:
             kwargs["xlabel"] = labeldict[d1]
-        if not kwargs.has_key("ylabel"):
+        if "ylabel" not in kwargs:
             kwargs["ylabel"] = labeldict[d2]
-        if not kwargs.has_key("zlabel"):
+        if "zlabel" not in kwargs:
             kwargs["zlabel"] = labeldict[d3]
         if len(args) == 0:
             args = (",",)
@@ -430,8 +370,7 @@ class Snapshot:
 
     # Pickling
     def __getstate__(self):
-        return (self.orbits, self.masses)
+        return (self.vxvv, self.masses)
 
     def __setstate__(self, state):
-        self.orbits = state[0]
-        self.masses = state[1]
+        self.__init__(state[0], masses=state[1])
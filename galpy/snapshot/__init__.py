@@ -1,4 +1,4 @@
-from . import Snapshot, snapshotMovies
+from . import GadgetSnapshot, NemoSnapshot, Snapshot, snapshotMovies
 
 #
 # Functions
@@ -9,3 +9,5 @@ snapshotToMovie = snapshotMovies.snapshotToMovie
 # Classes
 #
 Snapshot = Snapshot.Snapshot
+GadgetSnapshot = GadgetSnapshot.GadgetSnapshot
+NemoSnapshot = NemoSnapshot.NemoSnapshot
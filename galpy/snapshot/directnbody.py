@@ -1,18 +1,15 @@
 # Direct force summation N-body code
-import numpy as nu
-from numpy import linalg
-
-from galpy.potential.linearPotential import evaluatelinearForces
-from galpy.potential.planarPotential import (
-    evaluateplanarphitorques,
-    evaluateplanarRforces,
-)
-from galpy.potential.Potential import (
-    evaluatephitorques,
-    evaluateRforces,
-    evaluatezforces,
-)
-from galpy.util import symplecticode
+import numpy
+
+from ..potential.linearPotential import evaluatelinearForces
+from ..potential.planarPotential import evaluateplanarphitorques, evaluateplanarRforces
+from ..potential.Potential import evaluatephitorques, evaluateRforces, evaluatezforces
+
+# Maximum number of pairwise interactions computed at once (sets the memory
+# use of the force calculation)
+_MAXPAIRS = 2**22
+# Initial time-step parameter of the Hermite integrator
+_ETA_START = 0.01
 
 
 def direct_nbody(
@@ -23,157 +20,318 @@ def direct_nbody(
     pot=None,
     softening_model="plummer",
     softening_length=None,
-    atol=None,
-    rtol=None,
+    method="leapfrog",
+    dt=None,
+    eta=None,
+    maxlevel=20,
 ):
     """
     N-body code using direct summation for force evaluation
 
     Parameters
     ----------
-    q : list
-        list of initial positions (numpy.ndarrays)
-    p : list
-        list of initial momenta (numpy.ndarrays)
-    m : list
-        list of masses
-    t : list
-        times at which output is desired
+    q : numpy.ndarray
+        initial positions, shape (N,dim)
+    p : numpy.ndarray
+        initial velocities, shape (N,dim)
+    m : numpy.ndarray
+        masses (in natural units, such that the gravitational force between two particles is m/r^2)
+    t : numpy.ndarray
+        times at which output is desired (first time is the time of the initial conditions)
     pot : galpy.potential or list of galpy.potentials, optional
-        external potential
+        external potential (Potential for dim=3, planarPotential for dim=2, linearPotential for dim=1)
     softening_model : str, optional
         type of softening to use ('plummer')
     softening_length : float, optional
-        softening length
+        softening length (default: 0.01)
+    method : str, optional
+        integrator: 'leapfrog' (kick-drift-kick) or 'hermite' (fourth-order Hermite predictor-corrector) (default: 'leapfrog')
+    dt : float, optional
+        largest time step (default: the smallest interval between output times)
+    eta : float, optional
+        accuracy parameter of the time-step criterion: dt = eta sqrt(softening_length/|a|) for leapfrog (default: 0.025) and Aarseth's criterion for hermite (default: 0.02)
+    maxlevel : int, optional
+        maximum number of times that the largest time step can be halved (default: 20)
 
-    Parameters
-    ----------
-    list
-        list of [q,p] at times t
+    Returns
+    -------
+    tuple
+        (positions, velocities) at times t, each with shape (nt,N,dim)
 
     Notes
     -----
+    - Particles are advanced with individual, block time steps dt/2^k, with forces only computed for the particles that are active at each sub-step; all particles are synchronized at the output times.
+    - The forces from all particles and the external potential are computed for all active particles at once using numpy.
     - 2011-02-03 - Written - Bovy (NYU).
     """
-    # Set up everything
-    if softening_model.lower() == "plummer":
-        softening = _plummer_soft
-    out = []
-    out.append([q, p])
-    qo = q
-    po = p
-    # Determine appropriate stepsize
-    dt = t[1] - t[0]
-    ndt = 1
-    to = t[0]
-    # determine appropriate softening length if not given
+    if softening_model.lower() != "plummer":
+        raise NotImplementedError(
+            f"softening_model='{softening_model}' not implemented; only 'plummer' is implemented"
+        )
     if softening_length is None:
         softening_length = 0.01
-    # Run simulation
+    method = method.lower()
+    if method not in ["leapfrog", "hermite"]:
+        raise NotImplementedError(
+            f"method='{method}' not implemented; use 'leapfrog' or 'hermite'"
+        )
+    if eta is None:
+        eta = 0.025 if method == "leapfrog" else 0.02
+    q, p, m, t = _parse_nbody_input(q, p, m, t)
+    if method == "leapfrog":
+        step = _leapfrog_block
+    else:
+        step = _hermite_block
+    return _integrate_nbody(q, p, m, t, pot, softening_length, dt, eta, maxlevel, step)
+
+
+def _parse_nbody_input(q, p, m, t):
+    """Convert the N-body input to arrays with the right shapes"""
+    q = numpy.array(q, dtype="float")
+    p = numpy.array(p, dtype="float")
+    if q.ndim == 1:  # 1D
+        q = q[:, numpy.newaxis]
+        p = p[:, numpy.newaxis]
+    m = numpy.broadcast_to(numpy.asarray(m, dtype="float"), (q.shape[0],))
+    t = numpy.asarray(t, dtype="float")
+    return (q, p, m, t)
+
+
+def _integrate_nbody(q, p, m, t, pot, eps, dt, eta, maxlevel, step):
+    """Advance the particles from output time to output time with base steps of at most dt using the block-step integrator step"""
+    if dt is None:
+        dt = numpy.amin(numpy.diff(t)) if len(t) > 1 else 1.0
+    out_q = numpy.empty((len(t),) + q.shape)
+    out_p = numpy.empty((len(t),) + p.shape)
+    out_q[0] = q
+    out_p[0] = p
+    state = None
     for ii in range(1, len(t)):
-        print(ii)
-        for jj in range(ndt):  # loop over number of sub-intervals
-            (qo, po) = _direct_nbody_step(
-                qo, po, m, to, dt, pot, softening, (softening_length,)
+        nbase = int(numpy.ceil((t[ii] - t[ii - 1]) / dt * (1.0 - 10.0**-10.0)))
+        dtbase = (t[ii] - t[ii - 1]) / nbase
+        for jj in range(nbase):
+            q, p, state = step(
+                q,
+                p,
+                m,
+                t[ii - 1] + jj * dtbase,
+                dtbase,
+                pot,
+                eps,
+                eta,
+                maxlevel,
+                state,
             )
-            # print(qo)
-            to += dt
-        out.append([qo, po])
-    # Return output
-    return out
-
-
-def _direct_nbody_step(q, p, m, t, dt, pot, softening, softening_args):
-    """One N-body step: drift-kick-drift"""
-    # drift
-    q12 = [symplecticode.leapfrog_leapq(q[ii], p[ii], dt / 2.0) for ii in range(len(q))]
-    # kick
-    force = _direct_nbody_force(q12, m, t + dt / 2.0, pot, softening, softening_args)
-    # print(force)
-    p = [symplecticode.leapfrog_leapp(p[ii], dt, force[ii]) for ii in range(len(p))]
-    # drift
-    q = [
-        symplecticode.leapfrog_leapq(q12[ii], p[ii], dt / 2.0) for ii in range(len(q12))
-    ]
-    return (q, p)
+        out_q[ii] = q
+        out_p[ii] = p
+    return (out_q, out_p)
 
 
-def _direct_nbody_force(q, m, t, pot, softening, softening_args):
-    """Calculate the force"""
-    # First do the particles
-    # Calculate all the distances
-    nq = len(q)
-    dim = len(q[0])
-    dist_vec = nu.zeros((nq, nq, dim))
-    dist = nu.zeros((nq, nq))
-    for ii in range(nq):
-        for jj in range(ii + 1, nq):
-            dist_vec[ii, jj, :] = q[jj] - q[ii]
-            dist_vec[jj, ii, :] = -dist_vec[ii, jj, :]
-            dist[ii, jj] = linalg.norm(dist_vec[ii, jj, :])
-            dist[jj, ii] = dist[ii, jj]
-    # Calculate all the forces
-    force = []
-    for ii in range(nq):
-        thisforce = nu.zeros(dim)
-        for jj in range(nq):
-            if ii == jj:
-                continue
-            thisforce += (
-                m[jj]
-                * softening(dist[ii, jj], *softening_args)
-                / dist[ii, jj]
-                * dist_vec[ii, jj, :]
+def _leapfrog_block(q, p, m, t0, dtbase, pot, eps, eta, maxlevel, state, force=None):
+    """Advance all particles by dtbase using kick-drift-kick leapfrog with block time steps dtbase/2^level, returns (q,p,state) with state=(acc,level); force(q,qall,m,indx,t,pot,eps) computes the accelerations (default: direct summation)"""
+    if force is None:
+        force = _direct_nbody_force
+    nticks = 2**maxlevel
+    dttick = dtbase / nticks
+    if state is None:
+        acc = force(q, q, m, numpy.arange(len(q)), t0, pot, eps)
+        level = _leapfrog_level(acc, dtbase, eps, eta, maxlevel)
+    else:
+        acc, level = state
+    # Opening half kick
+    stepticks = 2 ** (maxlevel - level)
+    p = p + 0.5 * acc * (stepticks * dttick)[:, numpy.newaxis]
+    tick = 0
+    tnext = stepticks.copy()
+    while tick < nticks:
+        newtick = numpy.amin(tnext)
+        # Drift all particles
+        q = q + p * ((newtick - tick) * dttick)
+        tick = newtick
+        active = numpy.nonzero(tnext == tick)[0]
+        # Closing half kick for the active particles
+        acc[active] = force(q[active], q, m, active, t0 + tick * dttick, pot, eps)
+        p[active] += 0.5 * acc[active] * (stepticks[active] * dttick)[:, numpy.newaxis]
+        # New time steps: can always become smaller, can only become larger
+        # if synchronized with the larger step
+        newlevel = _leapfrog_level(acc[active], dtbase, eps, eta, maxlevel)
+        newlevel = numpy.maximum(
+            newlevel,
+            level[active]
+            - ((tick % (2 * stepticks[active])) == 0) * (level[active] > 0),
+        )
+        level[active] = newlevel
+        stepticks[active] = 2 ** (maxlevel - newlevel)
+        if tick < nticks:
+            # Opening half kick for the next step
+            p[active] += (
+                0.5 * acc[active] * (stepticks[active] * dttick)[:, numpy.newaxis]
             )
-        force.append(thisforce)
-    # Then add the external force
-    if pot is None:
-        return force
-    for ii in range(nq):
-        force[ii] += _external_force(q[ii], t, pot)
-    return force
+            tnext[active] = tick + stepticks[active]
+    return (q, p, (acc, level))
 
 
-def _external_force(x, t, pot):
-    dim = len(x)
-    if dim == 3:
-        # x is rectangular so calculate R and phi
-        R = nu.sqrt(x[0] ** 2.0 + x[1] ** 2.0)
-        phi = nu.arccos(x[0] / R)
-        sinphi = x[1] / R
-        cosphi = x[0] / R
-        if x[1] < 0.0:
-            phi = 2.0 * nu.pi - phi
-        # calculate forces
-        Rforce = evaluateRforces(R, x[2], pot, phi=phi, t=t)
-        phitorque = evaluatephitorques(R, x[2], pot, phi=phi, t=t)
-        return nu.array(
-            [
-                cosphi * Rforce - 1.0 / R * sinphi * phitorque,
-                sinphi * Rforce + 1.0 / R * cosphi * phitorque,
-                evaluatezforces(R, x[2], pot, phi=phi, t=t),
-            ]
+def _leapfrog_level(acc, dtbase, eps, eta, maxlevel):
+    """Time-step level from the criterion dt = eta sqrt(eps/|a|)"""
+    with numpy.errstate(divide="ignore"):
+        dt = eta * numpy.sqrt(eps / numpy.sqrt(numpy.sum(acc**2.0, axis=1)))
+    return _level(dt, dtbase, maxlevel)
+
+
+def _level(dt, dtbase, maxlevel):
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        level = numpy.ceil(numpy.log2(dtbase / dt))
+    level[numpy.isnan(level)] = 0
+    return numpy.clip(level, 0, maxlevel).astype("int64")
+
+
+def _hermite_block(q, p, m, t0, dtbase, pot, eps, eta, maxlevel, state):
+    """Advance all particles by dtbase using the fourth-order Hermite predictor-corrector scheme with block time steps dtbase/2^level, returns (q,p,state) with state=(acc,jerk,level)"""
+    nticks = 2**maxlevel
+    dttick = dtbase / nticks
+    if state is None:
+        acc, jerk = _direct_nbody_force(
+            q, q, m, numpy.arange(len(q)), t0, pot, eps, p=p, pall=p
+        )
+        amag = numpy.sqrt(numpy.sum(acc**2.0, axis=1))
+        jmag = numpy.sqrt(numpy.sum(jerk**2.0, axis=1))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            level = _level(_ETA_START * amag / jmag, dtbase, maxlevel)
+    else:
+        acc, jerk, level = state
+    stepticks = 2 ** (maxlevel - level)
+    tlast = numpy.zeros(len(q), dtype="int64")
+    tick = 0
+    tnext = stepticks.copy()
+    while tick < nticks:
+        tick = numpy.amin(tnext)
+        active = numpy.nonzero(tnext == tick)[0]
+        # Predict all particles to the current time
+        dt = ((tick - tlast) * dttick)[:, numpy.newaxis]
+        qp = q + dt * (p + dt * (acc / 2.0 + dt * jerk / 6.0))
+        pp = p + dt * (acc + dt * jerk / 2.0)
+        # Compute the new acceleration and jerk for the active particles and
+        # correct
+        dt = dt[active]
+        a1, j1 = _direct_nbody_force(
+            qp[active],
+            qp,
+            m,
+            active,
+            t0 + tick * dttick,
+            pot,
+            eps,
+            p=pp[active],
+            pall=pp,
         )
-    elif dim == 2:
-        # x is rectangular so calculate R and phi
-        R = nu.sqrt(x[0] ** 2.0 + x[1] ** 2.0)
-        phi = nu.arccos(x[0] / R)
-        sinphi = x[1] / R
-        cosphi = x[0] / R
-        if x[1] < 0.0:
-            phi = 2.0 * nu.pi - phi
-        # calculate forces
-        Rforce = evaluateplanarRforces(R, pot, phi=phi, t=t)
-        phitorque = evaluateplanarphitorques(R, pot, phi=phi, t=t)
-        return nu.array(
-            [
-                cosphi * Rforce - 1.0 / R * sinphi * phitorque,
-                sinphi * Rforce + 1.0 / R * cosphi * phitorque,
-            ]
+        a0 = acc[active]
+        j0 = jerk[active]
+        pc = p[active] + dt / 2.0 * (a0 + a1) + dt**2.0 / 12.0 * (j0 - j1)
+        q[active] = (
+            q[active] + dt / 2.0 * (p[active] + pc) + dt**2.0 / 12.0 * (a0 - a1)
         )
-    elif dim == 1:
-        return evaluatelinearForces(x, pot, t=t)
+        p[active] = pc
+        acc[active] = a1
+        jerk[active] = j1
+        tlast[active] = tick
+        # New time steps using Aarseth's criterion
+        a2 = (-6.0 * (a0 - a1) - dt * (4.0 * j0 + 2.0 * j1)) / dt**2.0
+        a3 = (12.0 * (a0 - a1) + 6.0 * dt * (j0 + j1)) / dt**3.0
+        a2 += a3 * dt
+        amag = numpy.sqrt(numpy.sum(a1**2.0, axis=1))
+        jmag = numpy.sqrt(numpy.sum(j1**2.0, axis=1))
+        a2mag = numpy.sqrt(numpy.sum(a2**2.0, axis=1))
+        a3mag = numpy.sqrt(numpy.sum(a3**2.0, axis=1))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            newlevel = _level(
+                numpy.sqrt(
+                    eta * (amag * a2mag + jmag**2.0) / (jmag * a3mag + a2mag**2.0)
+                ),
+                dtbase,
+                maxlevel,
+            )
+        newlevel = numpy.maximum(
+            newlevel,
+            level[active]
+            - ((tick % (2 * stepticks[active])) == 0) * (level[active] > 0),
+        )
+        level[active] = newlevel
+        stepticks[active] = 2 ** (maxlevel - newlevel)
+        tnext[active] = tick + stepticks[active]
+    return (q, p, (acc, jerk, level))
 
 
-def _plummer_soft(d, eps):
-    return d / (d**2.0 + eps**2.0) ** 1.5
+def _direct_nbody_force(q, qall, m, indx, t, pot, eps, p=None, pall=None):
+    """Calculate the acceleration (and jerk if p is given) of particles at q (with indices indx in the full set qall) due to all particles and the external potential"""
+    nq = len(q)
+    acc = numpy.zeros_like(q)
+    if p is not None:
+        jerk = numpy.zeros_like(q)
+    # Process the particles in chunks to limit memory use
+    chunk = max(1, _MAXPAIRS // len(qall))
+    for start in range(0, nq, chunk):
+        sl = slice(start, start + chunk)
+        dx = qall[numpy.newaxis] - q[sl, numpy.newaxis]
+        r2 = numpy.sum(dx**2.0, axis=-1) + eps**2.0
+        with numpy.errstate(divide="ignore"):
+            inv3 = m * r2**-1.5
+        # No self-interaction
+        inv3[numpy.arange(len(dx)), indx[sl]] = 0.0
+        acc[sl] = numpy.sum(inv3[..., numpy.newaxis] * dx, axis=1)
+        if p is not None:
+            dv = pall[numpy.newaxis] - p[sl, numpy.newaxis]
+            with numpy.errstate(invalid="ignore"):
+                rv = numpy.sum(dx * dv, axis=-1) / r2
+            rv[numpy.arange(len(dx)), indx[sl]] = 0.0
+            jerk[sl] = numpy.sum(
+                inv3[..., numpy.newaxis] * (dv - 3.0 * rv[..., numpy.newaxis] * dx),
+                axis=1,
+            )
+    if pot is not None:
+        acc += _external_force(q, t, pot)
+        if p is not None:
+            # Jerk of the external force = (v.grad) F, estimated using a
+            # finite difference along the velocity
+            vmag = numpy.sqrt(numpy.sum(p**2.0, axis=1))[:, numpy.newaxis]
+            h = (
+                10.0**-5.0
+                * numpy.sqrt(numpy.sum(q**2.0, axis=1) + eps**2.0)[:, numpy.newaxis]
+            )
+            with numpy.errstate(divide="ignore", invalid="ignore"):
+                dq = numpy.where(vmag > 0.0, h * p / vmag, 0.0)
+                jerk += numpy.where(
+                    vmag > 0.0,
+                    (_external_force(q + dq, t, pot) - _external_force(q - dq, t, pot))
+                    / 2.0
+                    / h
+                    * vmag,
+                    0.0,
+                )
+    if p is None:
+        return acc
+    return (acc, jerk)
+
+
+def _external_force(x, t, pot):
+    """Force from the external potential for particles at rectangular positions x, shape (N,dim)"""
+    dim = x.shape[1]
+    if dim == 1:
+        return evaluatelinearForces(pot, x[:, 0], t=t)[:, numpy.newaxis]
+    # x is rectangular so calculate R and phi
+    R = numpy.sqrt(x[:, 0] ** 2.0 + x[:, 1] ** 2.0)
+    phi = numpy.arctan2(x[:, 1], x[:, 0])
+    cosphi = x[:, 0] / R
+    sinphi = x[:, 1] / R
+    if dim == 3:
+        Rforce = evaluateRforces(pot, R, x[:, 2], phi=phi, t=t)
+        phitorque = evaluatephitorques(pot, R, x[:, 2], phi=phi, t=t)
+    else:
+        Rforce = evaluateplanarRforces(pot, R, phi=phi, t=t)
+        phitorque = evaluateplanarphitorques(pot, R, phi=phi, t=t)
+    out = [
+        cosphi * Rforce - 1.0 / R * sinphi * phitorque,
+        sinphi * Rforce + 1.0 / R * cosphi * phitorque,
+    ]
+    if dim == 3:
+        out.append(evaluatezforces(pot, R, x[:, 2], phi=phi, t=t))
+    return numpy.array(out).T
@@ -7,8 +7,6 @@ import shutil
 import subprocess
 import tempfile
 
-from Snapshot import *
-
 import galpy.util.plot as galpy_plot
 
 
@@ -44,30 +42,30 @@ def snapshotToMovie(snap, filename, *args, **kwargs):
     - 2011-02-06 - Written - Bovy (NYU)
 
     """
-    if kwargs.has_key("tmpdir"):
+    if "tmpdir" in kwargs:
         tmpdir = kwargs["tmpdir"]
         kwargs.pop("tmpdir")
     else:
         tmpdir = "/tmp"
-    if kwargs.has_key("framerate"):
+    if "framerate" in kwargs:
         framerate = kwargs["framerate"]
         kwargs.pop("framerate")
     else:
         framerate = 25
-    if kwargs.has_key("bitrate"):
+    if "bitrate" in kwargs:
         bitrate = kwargs["bitrate"]
         kwargs.pop("bitrate")
     else:
         bitrate = 1000
-    if kwargs.has_key("thumbnail") and kwargs["thumbnail"]:
+    if "thumbnail" in kwargs and kwargs["thumbnail"]:
         thumbnail = True
         kwargs.pop("thumbnail")
-    elif kwargs.has_key("thumbnail"):
+    elif "thumbnail" in kwargs:
         kwargs.pop("thumbnail")
         thumbnail = False
     else:
         thumbnail = False
-    if kwargs.has_key("thumbsize"):
+    if "thumbsize" in kwargs:
         thumbsize = kwargs["thumbsize"]
     else:
         thumbsize = 300
@@ -77,9 +75,9 @@ def snapshotToMovie(snap, filename, *args, **kwargs):
     nsnap = len(snap)
     file_length = int(m.ceil(m.log10(nsnap)))
     # Determine good xrange BOVY TO DO
-    if not kwargs.has_key("xrange"):
+    if "xrange" not in kwargs:
         pass
-    if not kwargs.has_key("yrange"):
+    if "yrange" not in kwargs:
         pass
     for ii in range(nsnap):
         tmpfiles.append(os.path.join(tempdir, str(ii).zfill(file_length)))
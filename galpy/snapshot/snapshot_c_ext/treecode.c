@@ -0,0 +1,404 @@
+/*
+  C code for calculating the gravitational accelerations of a set of
+  particles using a Barnes-Hut tree (with monopole and quadrupole moments),
+  combined with the forces from an external potential, and for calculating
+  the azimuthally-averaged potential and forces of a set of particles on a
+  grid in (R,z)
+*/
+#ifdef _WIN32
+#include <Python.h>
+#endif
+#include <stdlib.h>
+#include <string.h>
+#include <math.h>
+//Potentials
+#include <galpy_potentials.h>
+#include <integrateFullOrbit.h>
+//Macros to export functions in DLL on different OS
+#if defined(_WIN32)
+#define EXPORT __declspec(dllexport)
+#elif defined(__GNUC__)
+#define EXPORT __attribute__((visibility("default")))
+#else
+// Just do nothing?
+#define EXPORT
+#endif
+#define TREE_NLEAF 16 // maximum number of particles in a leaf cell
+#define TREE_MAXDEPTH 48 // maximum depth of the tree (for coincident particles)
+#define TREE_CHUNKSIZE 16
+/*
+  Structure for a cell of the octree
+*/
+struct treeNode {
+  double center[3]; // geometric center
+  double size; // side length
+  double mass;
+  double com[3]; // center of mass
+  double quad[6]; // quadrupole moment about com: xx, xy, xz, yy, yz, zz
+  double delta; // distance between the center of mass and the geometric center
+  int start; // first particle (in the sorted index array)
+  int count; // number of particles
+  int firstchild; // children are stored contiguously
+  int nchild; // 0 for leaves
+};
+struct tree {
+  struct treeNode * nodes;
+  int nnodes;
+  int maxnodes;
+  int * indx; // particle indices, sorted such that each cell is contiguous
+  int * buf; // work space for sorting
+  double * qs; // positions and masses in the sorted order, for contiguous
+  double * ms; // access when summing over the particles in a leaf
+};
+/*
+  Tree construction
+*/
+static int tree_new_node(struct tree * tr){
+  if ( tr->nnodes == tr->maxnodes ) {
+    tr->maxnodes*= 2;
+    tr->nodes= (struct treeNode *) realloc(tr->nodes,
+					   tr->maxnodes * sizeof (struct treeNode));
+  }
+  return tr->nnodes++;
+}
+static void tree_build_node(struct tree * tr, int inode,
+			    double * q, double * m,
+			    int quadrupole, int depth){
+  int ii, jj, kk, oct, ichild;
+  int cnt[8], off[8];
+  double dx, dy, dz, r2, mj;
+  struct treeNode * node= tr->nodes+inode;
+  int start= node->start;
+  int count= node->count;
+  int * indx= tr->indx+start;
+  // Monopole moments
+  node->mass= 0.;
+  node->com[0]= 0.;
+  node->com[1]= 0.;
+  node->com[2]= 0.;
+  for (ii=0; ii < count; ii++){
+    jj= *(indx+ii);
+    mj= *(m+jj);
+    node->mass+= mj;
+    node->com[0]+= mj * *(q+3*jj);
+    node->com[1]+= mj * *(q+3*jj+1);
+    node->com[2]+= mj * *(q+3*jj+2);
+  }
+  if ( node->mass > 0. )
+    for (kk=0; kk < 3; kk++)
+      node->com[kk]/= node->mass;
+  else
+    for (kk=0; kk < 3; kk++)
+      node->com[kk]= node->center[kk];
+  node->delta= sqrt( ( node->com[0] - node->center[0] )
+		     * ( node->com[0] - node->center[0] )
+		     + ( node->com[1] - node->center[1] )
+		     * ( node->com[1] - node->center[1] )
+		     + ( node->com[2] - node->center[2] )
+		     * ( node->com[2] - node->center[2] ) );
+  // Quadrupole moments, Q_ab = sum m (3 x_a x_b - r^2 delta_ab)
+  for (kk=0; kk < 6; kk++)
+    node->quad[kk]= 0.;
+  if ( quadrupole && count > 1 ) {
+    for (ii=0; ii < count; ii++){
+      jj= *(indx+ii);
+      mj= *(m+jj);
+      dx= *(q+3*jj) - node->com[0];
+      dy= *(q+3*jj+1) - node->com[1];
+      dz= *(q+3*jj+2) - node->com[2];
+      r2= dx * dx + dy * dy + dz * dz;
+      node->quad[0]+= mj * ( 3. * dx * dx - r2 );
+      node->quad[1]+= mj * 3. * dx * dy;
+      node->quad[2]+= mj * 3. * dx * dz;
+      node->quad[3]+= mj * ( 3. * dy * dy - r2 );
+      node->quad[4]+= mj * 3. * dy * dz;
+      node->quad[5]+= mj * ( 3. * dz * dz - r2 );
+    }
+  }
+  node->firstchild= -1;
+  node->nchild= 0;
+  if ( count <= TREE_NLEAF || depth >= TREE_MAXDEPTH )
+    return;
+  // Sort the particles into octants
+  for (oct=0; oct < 8; oct++)
+    cnt[oct]= 0;
+  for (ii=0; ii < count; ii++){
+    jj= *(indx+ii);
+    oct= ( *(q+3*jj) >= node->center[0] )
+      + 2 * ( *(q+3*jj+1) >= node->center[1] )
+      + 4 * ( *(q+3*jj+2) >= node->center[2] );
+    *(tr->buf+start+ii)= oct;
+    cnt[oct]++;
+  }
+  off[0]= 0;
+  for (oct=1; oct < 8; oct++)
+    off[oct]= off[oct-1] + cnt[oct-1];
+  int * sorted= (int *) malloc ( count * sizeof ( int ) );
+  for (ii=0; ii < count; ii++)
+    *(sorted + off[*(tr->buf+start+ii)]++)= *(indx+ii);
+  memcpy(indx,sorted,count * sizeof ( int ));
+  free(sorted);
+  // Create the (non-empty) children, contiguously
+  int firstchild= -1;
+  int nchild= 0;
+  int cstart= start;
+  double size= node->size;
+  double center[3];
+  for (kk=0; kk < 3; kk++)
+    center[kk]= node->center[kk];
+  for (oct=0; oct < 8; oct++){
+    if ( cnt[oct] == 0 ) continue;
+    ichild= tree_new_node(tr);
+    if ( firstchild < 0 ) firstchild= ichild;
+    nchild++;
+    node= tr->nodes+ichild; // tr->nodes may have been reallocated
+    node->size= 0.5 * size;
+    node->center[0]= center[0] + ( ( oct & 1 ) ? 0.25 : -0.25 ) * size;
+    node->center[1]= center[1] + ( ( oct & 2 ) ? 0.25 : -0.25 ) * size;
+    node->center[2]= center[2] + ( ( oct & 4 ) ? 0.25 : -0.25 ) * size;
+    node->start= cstart;
+    node->count= cnt[oct];
+    cstart+= cnt[oct];
+  }
+  node= tr->nodes+inode;
+  node->firstchild= firstchild;
+  node->nchild= nchild;
+  for (ii=0; ii < nchild; ii++)
+    tree_build_node(tr,firstchild+ii,q,m,quadrupole,depth+1);
+}
+static void tree_build(struct tree * tr, int n, double * q, double * m,
+		       int quadrupole){
+  int ii, kk;
+  double xmin[3], xmax[3], size;
+  tr->maxnodes= n / 2 + 16;
+  tr->nodes= (struct treeNode *) malloc ( tr->maxnodes * sizeof (struct treeNode) );
+  tr->nnodes= 0;
+  tr->indx= (int *) malloc ( n * sizeof ( int ) );
+  tr->buf= (int *) malloc ( n * sizeof ( int ) );
+  for (kk=0; kk < 3; kk++){
+    xmin[kk]= *(q+kk);
+    xmax[kk]= *(q+kk);
+  }
+  for (ii=0; ii < n; ii++){
+    *(tr->indx+ii)= ii;
+    for (kk=0; kk < 3; kk++){
+      if ( *(q+3*ii+kk) < xmin[kk] ) xmin[kk]= *(q+3*ii+kk);
+      if ( *(q+3*ii+kk) > xmax[kk] ) xmax[kk]= *(q+3*ii+kk);
+    }
+  }
+  size= 0.;
+  for (kk=0; kk < 3; kk++)
+    if ( xmax[kk] - xmin[kk] > size ) size= xmax[kk] - xmin[kk];
+  if ( size == 0. ) size= 1.;
+  int iroot= tree_new_node(tr);
+  struct treeNode * root= tr->nodes+iroot;
+  root->size= size * ( 1. + 1e-10 );
+  for (kk=0; kk < 3; kk++)
+    root->center[kk]= 0.5 * ( xmin[kk] + xmax[kk] );
+  root->start= 0;
+  root->count= n;
+  tree_build_node(tr,iroot,q,m,quadrupole,0);
+  tr->qs= (double *) malloc ( 3 * n * sizeof ( double ) );
+  tr->ms= (double *) malloc ( n * sizeof ( double ) );
+  for (ii=0; ii < n; ii++){
+    for (kk=0; kk < 3; kk++)
+      *(tr->qs+3*ii+kk)= *(q+3 * *(tr->indx+ii)+kk);
+    *(tr->ms+ii)= *(m + *(tr->indx+ii));
+  }
+}
+static void tree_free(struct tree * tr){
+  free(tr->nodes);
+  free(tr->indx);
+  free(tr->buf);
+  free(tr->qs);
+  free(tr->ms);
+}
+/*
+  Tree walk for a single point (excluding particle iskip, if >= 0); the
+  potential is only computed if pot != NULL
+*/
+static void tree_walk(struct tree * tr, double x, double y, double z, int iskip,
+		      double theta, double eps2, int quadrupole,
+		      double * a, double * pot){
+  int stack[8 * TREE_MAXDEPTH + 8];
+  int nstack= 1;
+  int inode, kk;
+  double dx, dy, dz, r2, inv, inv3, inv5, qx, qy, qz, dqd, crit;
+  double ax= 0., ay= 0., az= 0., phi= 0.;
+  struct treeNode * node;
+  stack[0]= 0;
+  while ( nstack > 0 ) {
+    inode= stack[--nstack];
+    node= tr->nodes+inode;
+    if ( node->mass == 0. ) continue;
+    dx= x - node->com[0];
+    dy= y - node->com[1];
+    dz= z - node->com[2];
+    r2= dx * dx + dy * dy + dz * dz;
+    // Opening criterion: size/theta + delta < distance to the center of mass
+    crit= node->size / theta + node->delta;
+    if ( theta > 0. && crit * crit < r2 ) {
+      r2+= eps2;
+      inv= 1. / sqrt(r2);
+      inv3= inv * inv * inv;
+      ax-= node->mass * inv3 * dx;
+      ay-= node->mass * inv3 * dy;
+      az-= node->mass * inv3 * dz;
+      if ( pot ) phi-= node->mass * inv;
+      if ( quadrupole ) {
+	inv5= inv3 * inv * inv;
+	qx= node->quad[0] * dx + node->quad[1] * dy + node->quad[2] * dz;
+	qy= node->quad[1] * dx + node->quad[3] * dy + node->quad[4] * dz;
+	qz= node->quad[2] * dx + node->quad[4] * dy + node->quad[5] * dz;
+	dqd= 2.5 * ( dx * qx + dy * qy + dz * qz ) * inv * inv;
+	ax+= inv5 * ( qx - dqd * dx );
+	ay+= inv5 * ( qy - dqd * dy );
+	az+= inv5 * ( qz - dqd * dz );
+	if ( pot ) phi-= 0.2 * inv5 * dqd / inv / inv;
+      }
+      continue;
+    }
+    if ( node->nchild == 0 ) {
+      // Leaf: direct summation
+      for (kk=node->start; kk < node->start+node->count; kk++){
+	if ( *(tr->ms+kk) == 0. || *(tr->indx+kk) == iskip ) continue;
+	dx= x - *(tr->qs+3*kk);
+	dy= y - *(tr->qs+3*kk+1);
+	dz= z - *(tr->qs+3*kk+2);
+	r2= dx * dx + dy * dy + dz * dz + eps2;
+	inv= 1. / sqrt(r2);
+	inv3= *(tr->ms+kk) * inv * inv * inv;
+	ax-= inv3 * dx;
+	ay-= inv3 * dy;
+	az-= inv3 * dz;
+	if ( pot ) phi-= *(tr->ms+kk) * inv;
+      }
+      continue;
+    }
+    // Open the cell
+    for (kk=0; kk < node->nchild; kk++)
+      stack[nstack++]= node->firstchild+kk;
+  }
+  *a= ax;
+  *(a+1)= ay;
+  *(a+2)= az;
+  if ( pot ) *pot= phi;
+}
+/*
+  MAIN FUNCTION
+*/
+EXPORT void tree_force(int n,
+		       double *q,
+		       double *m,
+		       int nactive,
+		       int *active,
+		       double theta,
+		       double eps,
+		       int quadrupole,
+		       double t,
+		       int npot,
+		       int * pot_type,
+		       double * pot_args,
+		       tfuncs_type_arr pot_tfuncs,
+		       double *acc){
+  int ii, jj;
+  int max_threads;
+  int * thread_pot_type;
+  double * thread_pot_args;
+  tfuncs_type_arr thread_pot_tfuncs;
+  double x, y, z, R, phi, sinphi, cosphi, Rforce, phitorque;
+  struct potentialArg * potentialArgs;
+  struct potentialArg * thisPotentialArgs;
+  max_threads= ( nactive < omp_get_max_threads() ) ? nactive : omp_get_max_threads();
+  if ( max_threads < 1 ) max_threads= 1;
+  // Set up the external potential, one per thread because potentialArgs may cache
+  if ( npot > 0 ) {
+    potentialArgs= (struct potentialArg *) malloc ( max_threads * npot * sizeof (struct potentialArg) );
+#pragma omp parallel for schedule(static,1) private(ii,thread_pot_type,thread_pot_args,thread_pot_tfuncs) num_threads(max_threads)
+    for (ii=0; ii < max_threads; ii++) {
+      thread_pot_type= pot_type; // need to make thread-private pointers, bc
+      thread_pot_args= pot_args; // these pointers are changed in parse_...
+      thread_pot_tfuncs= pot_tfuncs; // ...
+      parse_leapFuncArgs_Full(npot,potentialArgs+ii*npot,
+			      &thread_pot_type,&thread_pot_args,&thread_pot_tfuncs);
+    }
+  }
+  // Build the tree
+  struct tree tr;
+  tree_build(&tr,n,q,m,quadrupole);
+  // Compute the accelerations of the active particles
+#pragma omp parallel for schedule(dynamic,TREE_CHUNKSIZE) private(ii,jj,x,y,z,R,phi,sinphi,cosphi,Rforce,phitorque,thisPotentialArgs) num_threads(max_threads)
+  for (ii=0; ii < nactive; ii++) {
+    jj= *(active+ii);
+    tree_walk(&tr,*(q+3*jj),*(q+3*jj+1),*(q+3*jj+2),jj,
+	      theta,eps*eps,quadrupole,acc+3*ii,NULL);
+    if ( npot > 0 ) {
+      thisPotentialArgs= potentialArgs+omp_get_thread_num()*npot;
+      x= *(q+3*jj);
+      y= *(q+3*jj+1);
+      z= *(q+3*jj+2);
+      R= sqrt(x*x+y*y);
+      phi= atan2(y,x);
+      sinphi= y/R;
+      cosphi= x/R;
+      Rforce= calcRforce(R,z,phi,t,npot,thisPotentialArgs);
+      phitorque= calcphitorque(R,z,phi,t,npot,thisPotentialArgs);
+      *(acc+3*ii)+= cosphi*Rforce-1./R*sinphi*phitorque;
+      *(acc+3*ii+1)+= sinphi*Rforce+1./R*cosphi*phitorque;
+      *(acc+3*ii+2)+= calczforce(R,z,phi,t,npot,thisPotentialArgs);
+    }
+  }
+  tree_free(&tr);
+  if ( npot > 0 ) {
+    for (ii=0; ii < max_threads; ii++)
+      free_potentialArgs(npot,potentialArgs+ii*npot);
+    free(potentialArgs);
+  }
+}
+/*
+  Azimuthally-averaged potential and forces of a set of particles at (R,z),
+  averaging over naz equally-spaced azimuths
+*/
+EXPORT void tree_rz_potential(int n,
+			      double *q,
+			      double *m,
+			      int npoints,
+			      double *R,
+			      double *z,
+			      int naz,
+			      double theta,
+			      double eps,
+			      int quadrupole,
+			      int nthreads,
+			      double *pot,
+			      double *Rforce,
+			      double *zforce){
+  int ii, jj;
+  double cosaz, sinaz, phi, a[3];
+  if ( nthreads <= 0 ) nthreads= omp_get_max_threads();
+  if ( nthreads > npoints ) nthreads= npoints;
+  if ( nthreads < 1 ) nthreads= 1;
+  // Build the tree
+  struct tree tr;
+  tree_build(&tr,n,q,m,quadrupole);
+  // Walk the tree for all azimuths of each (R,z) point
+#pragma omp parallel for schedule(dynamic,1) private(ii,jj,cosaz,sinaz,phi,a) num_threads(nthreads)
+  for (ii=0; ii < npoints; ii++) {
+    *(pot+ii)= 0.;
+    *(Rforce+ii)= 0.;
+    *(zforce+ii)= 0.;
+    for (jj=0; jj < naz; jj++) {
+      cosaz= cos( 2. * M_PI * jj / naz );
+      sinaz= sin( 2. * M_PI * jj / naz );
+      tree_walk(&tr,*(R+ii) * cosaz,*(R+ii) * sinaz,*(z+ii),-1,
+		theta,eps*eps,quadrupole,a,&phi);
+      *(pot+ii)+= phi;
+      *(Rforce+ii)+= cosaz * a[0] + sinaz * a[1];
+      *(zforce+ii)+= a[2];
+    }
+    *(pot+ii)/= naz;
+    *(Rforce+ii)/= naz;
+    *(zforce+ii)/= naz;
+  }
+  tree_free(&tr);
+}
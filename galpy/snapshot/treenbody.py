@@ -0,0 +1,222 @@
+# Barnes-Hut tree N-body code
+import ctypes
+import functools
+import warnings
+
+import numpy
+from numpy.ctypeslib import ndpointer
+
+from ..potential.Potential import _check_c
+from ..util import _load_extension_libs, galpyWarning
+from .directnbody import (
+    _direct_nbody_force,
+    _external_force,
+    _integrate_nbody,
+    _leapfrog_block,
+    _parse_nbody_input,
+)
+
+_lib, ext_loaded = _load_extension_libs.load_libgalpy()
+
+
+def tree_nbody(
+    q,
+    p,
+    m,
+    t,
+    pot=None,
+    softening_model="plummer",
+    softening_length=None,
+    opening_angle=0.5,
+    quadrupole=True,
+    dt=None,
+    eta=0.025,
+    maxlevel=20,
+):
+    """
+    N-body code using a Barnes-Hut tree for force evaluation
+
+    Parameters
+    ----------
+    q : numpy.ndarray
+        initial positions, shape (N,3)
+    p : numpy.ndarray
+        initial velocities, shape (N,3)
+    m : numpy.ndarray
+        masses (in natural units, such that the gravitational force between two particles is m/r^2)
+    t : numpy.ndarray
+        times at which output is desired (first time is the time of the initial conditions)
+    pot : galpy.potential or list of galpy.potentials, optional
+        external potential
+    softening_model : str, optional
+        type of softening to use ('plummer')
+    softening_length : float, optional
+        softening length (default: 0.01)
+    opening_angle : float, optional
+        opening angle theta of the tree: cells of size s whose center of mass is further than s/theta+delta, with delta the distance between the cell's center of mass and its geometric center, are not opened (default: 0.5; 0 gives direct summation)
+    quadrupole : bool, optional
+        if True, include the quadrupole moments of the cells (default: True)
+    dt : float, optional
+        largest time step (default: the smallest interval between output times)
+    eta : float, optional
+        accuracy parameter of the time-step criterion dt = eta sqrt(softening_length/|a|) (default: 0.025)
+    maxlevel : int, optional
+        maximum number of times that the largest time step can be halved (default: 20)
+
+    Returns
+    -------
+    tuple
+        (positions, velocities) at times t, each with shape (nt,N,3)
+
+    Notes
+    -----
+    - Particles are advanced with the kick-drift-kick leapfrog integrator with individual, block time steps dt/2^k, with the tree rebuilt and walked for the active particles at each sub-step in C (parallelized with OpenMP). The forces from the external potential are computed in the same C loop if the potential has a C implementation.
+    - Falls back to direct summation if the C extension is not loaded.
+    """
+    if softening_model.lower() != "plummer":
+        raise NotImplementedError(
+            f"softening_model='{softening_model}' not implemented; only 'plummer' is implemented"
+        )
+    if softening_length is None:
+        softening_length = 0.01
+    q, p, m, t = _parse_nbody_input(q, p, m, t)
+    if q.shape[1] != 3:
+        raise NotImplementedError("tree_nbody is only implemented for 3D particles")
+    if ext_loaded:
+        force = functools.partial(
+            _tree_force,
+            opening_angle=opening_angle,
+            quadrupole=quadrupole,
+            c_pot=_parse_c_pot(pot),
+        )
+    else:  # pragma: no cover
+        warnings.warn(
+            "Cannot use the C tree code because the C extension is not loaded (using direct summation instead)",
+            galpyWarning,
+        )
+        force = _direct_nbody_force
+    step = functools.partial(_leapfrog_block, force=force)
+    return _integrate_nbody(q, p, m, t, pot, softening_length, dt, eta, maxlevel, step)
+
+
+def _parse_c_pot(pot):
+    """Parse the external potential for the C code, returns None if it does not have a C implementation"""
+    if pot is None or not _check_c(pot):
+        return None
+    from ..orbit.integrateFullOrbit import (  # here bc otherwise there is an infinite loop
+        _parse_pot,
+    )
+    from ..orbit.integratePlanarOrbit import _prep_tfuncs
+
+    npot, pot_type, pot_args, pot_tfuncs = _parse_pot(pot)
+    return (npot, pot_type, pot_args, _prep_tfuncs(pot_tfuncs))
+
+
+def _tree_force(q, qall, m, indx, t, pot, eps, opening_angle, quadrupole, c_pot):
+    """Calculate the acceleration of the particles with indices indx in the full set qall due to all particles (using the C tree code) and the external potential"""
+    indx = numpy.require(indx, dtype=numpy.int32, requirements=["C", "W"])
+    qall = numpy.require(qall, dtype=numpy.float64, requirements=["C", "W"])
+    m = numpy.require(m, dtype=numpy.float64, requirements=["C", "W"])
+    acc = numpy.empty((len(indx), 3))
+    if c_pot is None:
+        npot, pot_type, pot_args, pot_tfuncs = (
+            0,
+            numpy.zeros(1, dtype=numpy.int32),
+            numpy.zeros(1),
+            None,
+        )
+    else:
+        npot, pot_type, pot_args, pot_tfuncs = c_pot
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    tree_force_func = _lib.tree_force
+    tree_force_func.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ctypes.c_double,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.int32, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_void_p,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+    ]
+
+    # Run the C code
+    tree_force_func(
+        ctypes.c_int(len(qall)),
+        qall,
+        m,
+        ctypes.c_int(len(indx)),
+        indx,
+        ctypes.c_double(opening_angle),
+        ctypes.c_double(eps),
+        ctypes.c_int(quadrupole),
+        ctypes.c_double(t),
+        ctypes.c_int(npot),
+        pot_type,
+        pot_args,
+        pot_tfuncs,
+        acc,
+    )
+    if c_pot is None and pot is not None:
+        acc += _external_force(qall[indx], t, pot)
+    return acc
+
+
+def _tree_rz_potential(
+    pos, mass, R, z, nazimuths, opening_angle, eps, quadrupole, num_threads
+):
+    """Calculate the azimuthally-averaged potential, radial force, and vertical force of a set of particles at (R,z) using the C tree code"""
+    pos = numpy.require(pos, dtype=numpy.float64, requirements=["C", "W"])
+    mass = numpy.require(mass, dtype=numpy.float64, requirements=["C", "W"])
+    R = numpy.require(R, dtype=numpy.float64, requirements=["C", "W"])
+    z = numpy.require(z, dtype=numpy.float64, requirements=["C", "W"])
+    pot = numpy.empty(len(R))
+    Rforce = numpy.empty(len(R))
+    zforce = numpy.empty(len(R))
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    tree_rz_potential_func = _lib.tree_rz_potential
+    tree_rz_potential_func.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_int,
+        ctypes.c_double,
+        ctypes.c_double,
+        ctypes.c_int,
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+    ]
+
+    # Run the C code
+    tree_rz_potential_func(
+        ctypes.c_int(len(pos)),
+        pos,
+        mass,
+        ctypes.c_int(len(R)),
+        R,
+        z,
+        ctypes.c_int(nazimuths),
+        ctypes.c_double(opening_angle),
+        ctypes.c_double(eps),
+        ctypes.c_int(quadrupole),
+        ctypes.c_int(0 if num_threads is None else num_threads),
+        pot,
+        Rforce,
+        zforce,
+    )
+    return (pot, Rforce, zforce)
@@ -1,3 +1,4 @@
+import hashlib
 import os
 import pickle
 import shutil
@@ -192,3 +193,39 @@ def _rotate_to_arbitrary_vector(v, a, inv=False, _dontcutsmall=False):
         out[numpy.fabs(costheta - 1.0) < 10.0**-10.0] = numpy.eye(3)
         out[numpy.fabs(costheta + 1.0) < 10.0**-10.0] = -numpy.eye(3)
     return out
+
+
+def _content_key(obj, _parents=()):
+    """Key that identifies the galpy object obj by its type and the values of its attributes (recursively for galpy objects), skipping the attributes listed in its class's _content_key_exclude; raises TypeError if an attribute cannot be represented in the key"""
+    if id(obj) in _parents:
+        raise TypeError(
+            f"Cannot represent the self-referencing {type(obj).__name__} object by its content"
+        )
+    _parents = _parents + (id(obj),)
+    exclude = getattr(type(obj), "_content_key_exclude", ())
+    return (type(obj).__module__, type(obj).__qualname__) + tuple(
+        (key, _content_key_value(val, _parents))
+        for key, val in sorted(vars(obj).items())
+        if not key in exclude
+    )
+
+
+def _content_key_value(val, _parents):
+    """Representation of the attribute value val in _content_key"""
+    if val is None or isinstance(
+        val, (bool, int, float, complex, str, numpy.number, numpy.bool_)
+    ):
+        return val
+    elif isinstance(val, numpy.ndarray) and val.dtype != object:
+        return (
+            val.dtype.str,
+            val.shape,
+            hashlib.sha1(numpy.ascontiguousarray(val)).hexdigest(),
+        )
+    elif isinstance(val, (list, tuple)):
+        return tuple(_content_key_value(v, _parents) for v in val)
+    elif type(val).__module__.startswith("galpy.") and hasattr(val, "__dict__"):
+        return _content_key(val, _parents)
+    raise TypeError(
+        f"Cannot represent an object of type {type(val).__name__} by its content"
+    )
@@ -66,3 +66,10 @@ try:
     import pynbody
 except ImportError:  # pragma: no cover
     _PYNBODY_LOADED = False
+
+# h5py
+_H5PY_LOADED = True
+try:
+    import h5py
+except ImportError:  # pragma: no cover
+    _H5PY_LOADED = False
@@ -33,7 +33,17 @@ import scipy.stats as stats
 # Throw errors in the sample_hull routine
 
 
-def ars(domain, isDomainFinite, abcissae, hx, hpx, nsamples=1, hxparams=(), maxn=100):
+def ars(
+    domain,
+    isDomainFinite,
+    abcissae,
+    hx,
+    hpx,
+    nsamples=1,
+    hxparams=(),
+    maxn=100,
+    batch=False,
+):
     """
     Implementation of the Adaptive-Rejection Sampling algorithm by Gilks & Wild (1992): Adaptive Rejection Sampling for Gibbs Sampling, Applied Statistics, 41, 337. Based on Wild & Gilks (1993), Algorithm AS 287: Adaptive Rejection Sampling from Log-concave Density Functions, Applied Statistics, 42, 701
 
@@ -55,6 +65,8 @@ def ars(domain, isDomainFinite, abcissae, hx, hpx, nsamples=1, hxparams=(), maxn
         a tuple of parameters for h(x) and h'(x)
     maxn : int, optional
         maximum number of updates to the hull (default=100)
+    batch : bool, optional
+        if True, propose and accept/reject candidates from the upper hull in numpy batches rather than one at a time; hx must then work on arrays (default=False)
 
     Returns
     -------
@@ -67,6 +79,12 @@ def ars(domain, isDomainFinite, abcissae, hx, hpx, nsamples=1, hxparams=(), maxn
     """
     # First set-up the upper and lower hulls
     hull = setup_hull(domain, isDomainFinite, abcissae, hx, hpx, hxparams)
+    if batch:
+        return list(
+            _sample_batch(
+                hull, hx, hpx, domain, isDomainFinite, maxn, int(nsamples), hxparams
+            )
+        )
     # Then start  sampling: call sampleone repeatedly
     out = []
     nupdates = 0
@@ -236,6 +254,65 @@ def sampleone(hull, hx, hpx, domain, isDomainFinite, maxn, nupdates, hxparams):
     return thissample, thishull, nupdates
 
 
+def _sample_batch(hull, hx, hpx, domain, isDomainFinite, maxn, nsamples, hxparams):
+    """Internal function to sample nsamples points by rejection sampling from the upper hull in numpy batches, updating the hull with (a few of) the rejected candidates between batches"""
+    out = numpy.empty(0)
+    nupdates = 0
+    while len(out) < nsamples:
+        # Propose somewhat more than needed, based on the current acceptance
+        nprop = int(1.2 * (nsamples - len(out))) + 10
+        candidates, hux = _sample_hull_batch(hull, domain, isDomainFinite, nprop)
+        u = stats.uniform.rvs(size=nprop)
+        thishx = hx(candidates, hxparams)
+        accept = u < numpy.exp(thishx - hux)
+        out = numpy.append(out, candidates[accept])
+        # Adapt the hull using rejected candidates, like in the one-at-a-time
+        # algorithm, but only a few per batch
+        for x in numpy.unique(candidates[True ^ accept])[: min(10, maxn - nupdates)]:
+            if numpy.any(x == hull[1]):  # pragma: no cover
+                continue
+            hull = update_hull(
+                hull, x, hx(x, hxparams), hpx(x, hxparams), domain, isDomainFinite
+            )
+            nupdates += 1
+    return out[:nsamples]
+
+
+def _sample_hull_batch(hull, domain, isDomainFinite, nsamples):
+    """Internal function to sample nsamples points from the upper hull at once; returns the samples and hu(samples)"""
+    xs, hxs, hpxs, zs = hull[1], hull[2], hull[3], hull[4]
+    # Piece jj of the upper hull is the tangent at xs[jj] between lo[jj] and hi[jj]
+    lo = numpy.append(domain[0] if isDomainFinite[0] else -numpy.inf, zs)
+    hi = numpy.append(zs, domain[1] if isDomainFinite[1] else numpy.inf)
+    with numpy.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        # Integral over each piece, relative to the maximum of the hull
+        hmax = numpy.amax(hxs)
+        mass = numpy.where(
+            hpxs == 0.0,
+            (hi - lo) * numpy.exp(hxs - hmax),
+            (
+                numpy.exp(hpxs * (hi - xs) + hxs - hmax)
+                - numpy.exp(hpxs * (lo - xs) + hxs - hmax)
+            )
+            / hpxs,
+        )
+        cmass = numpy.cumsum(mass)
+        indx = numpy.searchsorted(
+            cmass, stats.uniform.rvs(size=nsamples) * cmass[-1], side="right"
+        )
+        indx[indx >= len(xs)] = len(xs) - 1
+        # Sample within the piece using the inverse cumulative distribution
+        u = stats.uniform.rvs(size=nsamples)
+        s, plo, phi = hpxs[indx], lo[indx], hi[indx]
+        out = numpy.where(
+            s > 0.0,
+            phi + numpy.log(u + (1.0 - u) * numpy.exp(-s * (phi - plo))) / s,
+            plo + numpy.log1p(u * numpy.expm1(s * (phi - plo))) / s,
+        )
+        out[s == 0.0] = (plo + u * (phi - plo))[s == 0.0]
+    return out, hpxs[indx] * (out - xs[indx]) + hxs[indx]
+
+
 def sample_hull(hull, domain, isDomainFinite):
     """
     Sample the upper hull
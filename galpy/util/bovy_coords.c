@@ -1,5 +1,22 @@
 #include <math.h>
 #include <bovy_coords.h>
+//OpenMP
+#if defined(_OPENMP)
+#include <omp.h>
+#endif
+//Macros to export functions in DLL on different OS
+#if defined(_WIN32)
+#define EXPORT __declspec(dllexport)
+#elif defined(__GNUC__)
+#define EXPORT __attribute__((visibility("default")))
+#else
+// Just do nothing?
+#define EXPORT
+#endif
+#ifndef M_PI
+#define M_PI 3.14159265358979323846
+#endif
+#define COORDS_OMP_MIN 10000 // only use OpenMP for more objects than this
 /*
 NAME: cyl_to_rect
 PURPOSE: convert 2D (R,phi) to (x,y) [mainly used in the context of cylindrical coordinates, hence the name)
@@ -254,3 +271,132 @@ void sos_to_polar_galpy(double *vxvv,int surface){
   *(vxvv+4)= *(vxvv+3);
   *(vxvv+3)= phi;
 }
+/*
+NAME: radec_to_galcencyl_arr
+PURPOSE: convert (ra,dec,d,pmra,pmdec,vlos) to Galactocentric cylindrical
+         (R,vR,vT,z,vz,phi) in a single pass
+INPUT:
+   int n - number of objects
+   double * in - (6,n) array of (ra,dec,d,pmra,pmdec,vlos) in (rad,rad,kpc,mas/yr,mas/yr,km/s)
+   double * M - 3x3 rotation matrix from equatorial to Galactocentric rectangular coordinates
+   double * o - Galactocentric position of the Sun (kpc)
+   double * vsun - Galactocentric velocity of the Sun (km/s)
+   double K - conversion from mas/yr x kpc to km/s
+OUTPUT:
+   double * out - (6,n) array of (R,vR,vT,z,vz,phi) in (kpc,km/s,km/s,kpc,km/s,rad)
+HISTORY: 2026-10-19 - Written
+ */
+EXPORT void radec_to_galcencyl_arr(int n,double * in,double * M,double * o,
+				   double * vsun,double K,double * out){
+  int ii;
+  double cosra,sinra,cosdec,sindec,d,kd,pmra,pmdec,vlos;
+  double xe,ye,ze,vxe,vye,vze,x,y,z,vx,vy,vz,phi,cp,sp;
+#pragma omp parallel for schedule(static) if(n > COORDS_OMP_MIN) private(ii,cosra,sinra,cosdec,sindec,d,kd,pmra,pmdec,vlos,xe,ye,ze,vxe,vye,vze,x,y,z,vx,vy,vz,phi,cp,sp)
+  for (ii=0; ii < n; ii++){
+    cosra= cos ( *(in+ii) );
+    sinra= sin ( *(in+ii) );
+    cosdec= cos ( *(in+n+ii) );
+    sindec= sin ( *(in+n+ii) );
+    d= *(in+2*n+ii);
+    kd= K * d;
+    pmra= kd * *(in+3*n+ii);
+    pmdec= kd * *(in+4*n+ii);
+    vlos= *(in+5*n+ii);
+    // Heliocentric equatorial position and velocity
+    xe= cosdec * cosra;
+    ye= cosdec * sinra;
+    ze= sindec;
+    vxe= vlos * xe - pmra * sinra - pmdec * sindec * cosra;
+    vye= vlos * ye + pmra * cosra - pmdec * sindec * sinra;
+    vze= vlos * ze + pmdec * cosdec;
+    // Rotate and shift to Galactocentric rectangular
+    x= d * ( *M * xe + *(M+1) * ye + *(M+2) * ze ) + *o;
+    y= d * ( *(M+3) * xe + *(M+4) * ye + *(M+5) * ze ) + *(o+1);
+    z= d * ( *(M+6) * xe + *(M+7) * ye + *(M+8) * ze ) + *(o+2);
+    vx= *M * vxe + *(M+1) * vye + *(M+2) * vze + *vsun;
+    vy= *(M+3) * vxe + *(M+4) * vye + *(M+5) * vze + *(vsun+1);
+    vz= *(M+6) * vxe + *(M+7) * vye + *(M+8) * vze + *(vsun+2);
+    // To cylindrical
+    phi= atan2 ( y , x );
+    cp= cos ( phi );
+    sp= sin ( phi );
+    *(out+ii)= sqrt ( x * x + y * y );
+    *(out+n+ii)= vx * cp + vy * sp;
+    *(out+2*n+ii)= -vx * sp + vy * cp;
+    *(out+3*n+ii)= z;
+    *(out+4*n+ii)= vz;
+    *(out+5*n+ii)= phi;
+  }
+}
+/*
+NAME: galcencyl_to_radec_arr
+PURPOSE: convert Galactocentric cylindrical (R,vR,vT,z,vz,phi) to
+         (ra,dec,d,pmra,pmdec,vlos) in a single pass
+INPUT:
+   int n - number of objects
+   double * in - (6,n) array of (R,vR,vT,z,vz,phi) in (kpc,km/s,km/s,kpc,km/s,rad)
+   double phio - azimuth of the Sun (rad)
+   double * N - 3x3 rotation matrix from heliocentric Galactic to Galactocentric rectangular coordinates
+   double * T - 3x3 rotation matrix from equatorial to Galactic coordinates
+   double * o - Galactocentric position of the Sun (kpc)
+   double * vsun - Galactocentric velocity of the Sun (km/s)
+   double K - conversion from mas/yr x kpc to km/s
+   double zero_offset - offset in X to apply to objects at the position of the Sun (kpc)
+OUTPUT:
+   double * out - (6,n) array of (ra,dec,d,pmra,pmdec,vlos) in (rad,rad,kpc,mas/yr,mas/yr,km/s)
+HISTORY: 2026-10-19 - Written
+ */
+EXPORT void galcencyl_to_radec_arr(int n,double * in,double phio,double * N,
+				   double * T,double * o,double * vsun,double K,
+				   double zero_offset,double * out){
+  int ii;
+  double R,cp,sp,vR,vT,x,y,z,vx,vy,vz,X,Y,Z,vX,vY,vZ;
+  double xe,ye,ze,vxe,vye,vze,d,ra,cosra,sinra,sindec,cosdec,kd;
+#pragma omp parallel for schedule(static) if(n > COORDS_OMP_MIN) private(ii,R,cp,sp,vR,vT,x,y,z,vx,vy,vz,X,Y,Z,vX,vY,vZ,xe,ye,ze,vxe,vye,vze,d,ra,cosra,sinra,sindec,cosdec,kd)
+  for (ii=0; ii < n; ii++){
+    // To Galactocentric rectangular, relative to the Sun
+    R= *(in+ii);
+    cp= cos ( *(in+5*n+ii) - phio );
+    sp= sin ( *(in+5*n+ii) - phio );
+    vR= *(in+n+ii);
+    vT= *(in+2*n+ii);
+    x= R * cp - *o;
+    y= R * sp - *(o+1);
+    z= *(in+3*n+ii) - *(o+2);
+    vx= vR * cp - vT * sp - *vsun;
+    vy= vR * sp + vT * cp - *(vsun+1);
+    vz= *(in+4*n+ii) - *(vsun+2);
+    // Rotate to heliocentric Galactic
+    X= *N * x + *(N+3) * y + *(N+6) * z;
+    Y= *(N+1) * x + *(N+4) * y + *(N+7) * z;
+    Z= *(N+2) * x + *(N+5) * y + *(N+8) * z;
+    if ( X == 0. && Y == 0. && Z == 0. ) X+= zero_offset;
+    vX= *N * vx + *(N+3) * vy + *(N+6) * vz;
+    vY= *(N+1) * vx + *(N+4) * vy + *(N+7) * vz;
+    vZ= *(N+2) * vx + *(N+5) * vy + *(N+8) * vz;
+    // Rotate to heliocentric equatorial
+    xe= *T * X + *(T+3) * Y + *(T+6) * Z;
+    ye= *(T+1) * X + *(T+4) * Y + *(T+7) * Z;
+    ze= *(T+2) * X + *(T+5) * Y + *(T+8) * Z;
+    vxe= *T * vX + *(T+3) * vY + *(T+6) * vZ;
+    vye= *(T+1) * vX + *(T+4) * vY + *(T+7) * vZ;
+    vze= *(T+2) * vX + *(T+5) * vY + *(T+8) * vZ;
+    // To spherical
+    d= sqrt ( xe * xe + ye * ye + ze * ze );
+    ra= atan2 ( ye , xe );
+    if ( ra < 0. ) ra+= 2. * M_PI;
+    sindec= ze / d;
+    if ( sindec > 1. ) sindec= 1.;
+    if ( sindec < -1. ) sindec= -1.;
+    cosdec= sqrt ( 1. - sindec * sindec );
+    cosra= cos ( ra );
+    sinra= sin ( ra );
+    kd= K * d;
+    *(out+ii)= ra;
+    *(out+n+ii)= asin ( sindec );
+    *(out+2*n+ii)= d;
+    *(out+3*n+ii)= ( -vxe * sinra + vye * cosra ) / kd;
+    *(out+4*n+ii)= ( -( vxe * cosra + vye * sinra ) * sindec + vze * cosdec ) / kd;
+    *(out+5*n+ii)= ( ( vxe * cosra + vye * sinra ) * cosdec + vze * sindec );
+  }
+}
@@ -1119,7 +1119,7 @@ def potential_physical_input(method):
 
 def physical_conversion_actionAngle(quantity, pop=False):
     """Decorator to convert to physical coordinates for the actionAngle methods:
-    quantity= call, actionsFreqs, or actionsFreqsAngles (or EccZmaxRperiRap for actionAngleStaeckel)
+    quantity= call, actionsFreqs, or actionsFreqsAngles (or EccZmaxRperiRap or actionsErrors for actionAngleStaeckel)
     """
 
     def wrapper(method):
@@ -1158,6 +1158,15 @@ def physical_conversion_actionAngle(quantity, pop=False):
                                 units.kpc * units.km / units.s,
                                 units.kpc * units.km / units.s,
                             ]
+                if "Errors" in quantity:
+                    fac.extend([ro * vo, ro * vo])
+                    if _APY_UNITS:
+                        u.extend(
+                            [
+                                units.kpc * units.km / units.s,
+                                units.kpc * units.km / units.s,
+                            ]
+                        )
                 if "Freqs" in quantity:
                     FreqsFac = freq_in_Gyr(vo, ro)
                     if len(out) < 4:  # 1D system
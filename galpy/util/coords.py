@@ -33,6 +33,8 @@
 #            vxvyvz_to_galcencyl
 #            galcenrect_to_vxvyvz
 #            galcencyl_to_vxvyvz
+#            radec_to_galcencyl
+#            galcencyl_to_radec
 #            dl_to_rphi_2d
 #            rphi_to_dl_2d
 #            Rz_to_coshucosv
@@ -72,16 +74,19 @@
 # WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 #############################################################################
+import ctypes
 from functools import wraps
 
 import numpy
+from numpy.ctypeslib import ndpointer
 
-from ..util import _rotate_to_arbitrary_vector
+from ..util import _load_extension_libs, _rotate_to_arbitrary_vector
 from ..util._optional_deps import _APY_LOADED
 from ..util.config import __config__
 
 _APY_COORDS = __config__.getboolean("astropy", "astropy-coords")
 _APY_COORDS *= _APY_LOADED
+_lib, _ext_loaded = _load_extension_libs.load_libgalpy()
 _DEGTORAD = numpy.pi / 180.0
 if _APY_LOADED:
     import astropy.coordinates as apycoords
@@ -211,8 +216,25 @@ def radec_to_lb(ra, dec, degree=False, epoch=2000.0):
         c = c.transform_to(apycoords.Galactic)
         return numpy.array([c.l.to(units.rad).value, c.b.to(units.rad).value]).T
     # First calculate the transformation matrix T
+    T = _radec_to_lb_matrix(epoch)
+    # Whether to use degrees and scalar input is handled by decorators
+    XYZ = numpy.array(
+        [numpy.cos(dec) * numpy.cos(ra), numpy.cos(dec) * numpy.sin(ra), numpy.sin(dec)]
+    )
+    galXYZ = numpy.dot(T, XYZ)
+    galXYZ[2][galXYZ[2] > 1.0] = 1.0
+    galXYZ[2][galXYZ[2] < -1.0] = -1.0
+    b = numpy.arcsin(galXYZ[2])
+    l = numpy.arctan2(galXYZ[1] / numpy.cos(b), galXYZ[0] / numpy.cos(b))
+    l[l < 0.0] += 2.0 * numpy.pi
+    out = numpy.array([l, b])
+    return out.T
+
+
+def _radec_to_lb_matrix(epoch=2000.0):
+    """Rotation matrix T from equatorial to Galactic rectangular coordinates for the given epoch"""
     theta, dec_ngp, ra_ngp = get_epoch_angles(epoch)
-    T = numpy.dot(
+    return numpy.dot(
         numpy.array(
             [
                 [numpy.cos(theta), numpy.sin(theta), 0.0],
@@ -237,18 +259,6 @@ def radec_to_lb(ra, dec, degree=False, epoch=2000.0):
             ),
         ),
     )
-    # Whether to use degrees and scalar input is handled by decorators
-    XYZ = numpy.array(
-        [numpy.cos(dec) * numpy.cos(ra), numpy.cos(dec) * numpy.sin(ra), numpy.sin(dec)]
-    )
-    galXYZ = numpy.dot(T, XYZ)
-    galXYZ[2][galXYZ[2] > 1.0] = 1.0
-    galXYZ[2][galXYZ[2] < -1.0] = -1.0
-    b = numpy.arcsin(galXYZ[2])
-    l = numpy.arctan2(galXYZ[1] / numpy.cos(b), galXYZ[0] / numpy.cos(b))
-    l[l < 0.0] += 2.0 * numpy.pi
-    out = numpy.array([l, b])
-    return out.T
 
 
 @scalarDecorator
@@ -1489,6 +1499,297 @@ def galcencyl_to_vxvyvz(
     )
 
 
+@scalarDecorator
+@degreeDecorator([0, 1], [])
+def radec_to_galcencyl(
+    ra,
+    dec,
+    d,
+    pmra,
+    pmdec,
+    vlos,
+    Xsun=1.0,
+    Zsun=0.0,
+    vsun=[0.0, 1.0, 0.0],
+    degree=False,
+    epoch=2000.0,
+    _extra_rot=True,
+):
+    """
+    Transform equatorial coordinates, proper motions, and line-of-sight velocities (wrt Sun) to cylindrical Galactocentric coordinates in a single pass
+
+    Parameters
+    ----------
+    ra : float or numpy.ndarray
+        Right ascension.
+    dec : float or numpy.ndarray
+        Declination.
+    d : float or numpy.ndarray
+        Distance (kpc).
+    pmra : float or numpy.ndarray
+        Proper motion in right ascension (mas/yr; includes the cos(dec) term).
+    pmdec : float or numpy.ndarray
+        Proper motion in declination (mas/yr).
+    vlos : float or numpy.ndarray
+        Line-of-sight velocity (km/s).
+    Xsun : float, optional
+        Cylindrical distance to the GC (kpc; default is 1.0).
+    Zsun : float, optional
+        Sun's height above the midplane (kpc; default is 0.0).
+    vsun : numpy.ndarray, optional
+        Velocity of the Sun in the GC frame (km/s; default is [0.0, 1.0, 0.0]).
+    degree : bool, optional
+        If True, ra and dec are given in degree.
+    epoch : float, optional
+        Epoch of ra,dec (right now only 2000.0 and 1950.0 are supported when astropy is not installed; with astropy, epoch can be None for ICRS, 'JXXXX' for FK5, and 'BXXXX' for FK4).
+    _extra_rot : bool, optional
+        If True, perform an extra tiny rotation to align the Galactocentric coordinate frame with astropy's definition (default is True).
+
+    Returns
+    -------
+    numpy.ndarray
+        Containing (R,vR,vT,z,vz,phi), with phi in rad.
+
+    Notes
+    -----
+    - Equivalent to chaining radec_to_lb, pmrapmdec_to_pmllpmbb, sphergal_to_rectgal, XYZ_to_galcencyl, and vxvyvz_to_galcencyl, but all rotations are combined into a single matrix and each object is transformed in one pass in C (parallelized with OpenMP for large inputs) when the C extension is loaded.
+    - Always uses galpy's own rotation matrices for the equatorial to Galactic transformation, even when configured to use astropy's coordinate transformations.
+    """
+    M = numpy.dot(_galcen_matrix(Xsun, Zsun, _extra_rot), _radec_to_lb_matrix(epoch))
+    return _radec_to_galcencyl(
+        numpy.array([ra, dec, d, pmra, pmdec, vlos], dtype="float"),
+        M,
+        numpy.array([Xsun, 0.0, Zsun], dtype="float"),
+        numpy.array(vsun, dtype="float"),
+    ).T
+
+
+@scalarDecorator
+@degreeDecorator([], [0, 1])
+def galcencyl_to_radec(
+    R,
+    vR,
+    vT,
+    z,
+    vz,
+    phi,
+    Xsun=1.0,
+    Zsun=0.0,
+    vsun=[0.0, 1.0, 0.0],
+    degree=False,
+    epoch=2000.0,
+    _extra_rot=True,
+):
+    """
+    Transform cylindrical Galactocentric coordinates to equatorial coordinates, proper motions, and line-of-sight velocities (wrt Sun) in a single pass
+
+    Parameters
+    ----------
+    R : float or numpy.ndarray
+        Galactocentric cylindrical radius (kpc).
+    vR : float or numpy.ndarray
+        Galactocentric radial velocity (km/s).
+    vT : float or numpy.ndarray
+        Galactocentric rotational velocity (km/s).
+    z : float or numpy.ndarray
+        Galactocentric height (kpc).
+    vz : float or numpy.ndarray
+        Galactocentric vertical velocity (km/s).
+    phi : float or numpy.ndarray
+        Galactocentric azimuth (rad).
+    Xsun : float, optional
+        Cylindrical distance to the GC (kpc; default is 1.0).
+    Zsun : float, optional
+        Sun's height above the midplane (kpc; default is 0.0).
+    vsun : numpy.ndarray, optional
+        Velocity of the Sun in the GC frame (km/s; default is [0.0, 1.0, 0.0]).
+    degree : bool, optional
+        If True, ra and dec are returned in degree.
+    epoch : float, optional
+        Epoch of ra,dec (right now only 2000.0 and 1950.0 are supported when astropy is not installed; with astropy, epoch can be None for ICRS, 'JXXXX' for FK5, and 'BXXXX' for FK4).
+    _extra_rot : bool, optional
+        If True, perform an extra tiny rotation to align the Galactocentric coordinate frame with astropy's definition (default is True).
+
+    Returns
+    -------
+    numpy.ndarray
+        Containing (ra,dec,d,pmra,pmdec,vlos), with pmra including the cos(dec) term.
+
+    Notes
+    -----
+    - Inverse of radec_to_galcencyl; combines all rotations into a single matrix and transforms each object in one pass in C (parallelized with OpenMP for large inputs) when the C extension is loaded.
+    """
+    return _galcencyl_to_radec(
+        numpy.array([R, vR, vT, z, vz, phi], dtype="float"),
+        0.0,
+        _galcen_matrix(Xsun, Zsun, _extra_rot),
+        _radec_to_lb_matrix(epoch),
+        numpy.array([Xsun, 0.0, Zsun], dtype="float"),
+        numpy.array(vsun, dtype="float"),
+    ).T
+
+
+def _galcen_matrix(Xsun=1.0, Zsun=0.0, _extra_rot=True):
+    """Rotation matrix from heliocentric Galactic to Galactocentric rectangular coordinates (as in XYZ_to_galcenrect, for scalar Xsun and Zsun)"""
+    dgc = numpy.sqrt(Xsun**2.0 + Zsun**2.0)
+    costheta, sintheta = Xsun / dgc, Zsun / dgc
+    N = numpy.dot(
+        numpy.array(
+            [[costheta, 0.0, -sintheta], [0.0, 1.0, 0.0], [sintheta, 0.0, costheta]]
+        ),
+        numpy.diag([-1.0, 1.0, numpy.sign(Xsun)]),
+    )
+    if _extra_rot:
+        N = numpy.dot(N, galcen_extra_rot)
+    return N
+
+
+def _radec_to_galcencyl(vxvv, M, o, vsun):
+    """Transform a (6,N) array of (ra,dec,d,pmra,pmdec,vlos) to (R,vR,vT,z,vz,phi) given the combined rotation matrix M and the Sun's Galactocentric position o and velocity vsun"""
+    if _ext_loaded:
+        return _radec_to_galcencyl_c(vxvv, M, o, vsun)
+    else:  # pragma: no cover
+        return _radec_to_galcencyl_numpy(vxvv, M, o, vsun)
+
+
+def _radec_to_galcencyl_c(vxvv, M, o, vsun):
+    vxvv = numpy.require(vxvv, dtype=numpy.float64, requirements=["C", "W"])
+    M = numpy.require(M, dtype=numpy.float64, requirements=["C", "W"])
+    o = numpy.require(o, dtype=numpy.float64, requirements=["C", "W"])
+    vsun = numpy.require(vsun, dtype=numpy.float64, requirements=["C", "W"])
+    out = numpy.empty_like(vxvv)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    radec_to_galcencyl_func = _lib.radec_to_galcencyl_arr
+    radec_to_galcencyl_func.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+    ]
+
+    # Run the C code
+    radec_to_galcencyl_func(
+        ctypes.c_int(vxvv.shape[1]),
+        vxvv,
+        M,
+        o,
+        vsun,
+        ctypes.c_double(_K),
+        out,
+    )
+    return out
+
+
+def _radec_to_galcencyl_numpy(vxvv, M, o, vsun):
+    ra, dec, d, pmra, pmdec, vlos = vxvv
+    cosra, sinra = numpy.cos(ra), numpy.sin(ra)
+    cosdec, sindec = numpy.cos(dec), numpy.sin(dec)
+    pmra, pmdec = _K * d * pmra, _K * d * pmdec
+    xyz = numpy.array([cosdec * cosra, cosdec * sinra, sindec])
+    vxyz = numpy.array(
+        [
+            vlos * xyz[0] - pmra * sinra - pmdec * sindec * cosra,
+            vlos * xyz[1] + pmra * cosra - pmdec * sindec * sinra,
+            vlos * xyz[2] + pmdec * cosdec,
+        ]
+    )
+    x, y, z = d * numpy.dot(M, xyz) + o[:, None]
+    vx, vy, vz = numpy.dot(M, vxyz) + vsun[:, None]
+    phi = numpy.arctan2(y, x)
+    cosphi, sinphi = numpy.cos(phi), numpy.sin(phi)
+    return numpy.array(
+        [
+            numpy.sqrt(x**2.0 + y**2.0),
+            vx * cosphi + vy * sinphi,
+            -vx * sinphi + vy * cosphi,
+            z,
+            vz,
+            phi,
+        ]
+    )
+
+
+def _galcencyl_to_radec(vxvv, phio, N, T, o, vsun, zero_offset=0.0):
+    """Transform a (6,N) array of (R,vR,vT,z,vz,phi) to (ra,dec,d,pmra,pmdec,vlos) given the Sun's azimuth phio, the rotation matrices N (heliocentric Galactic to Galactocentric) and T (equatorial to Galactic), and the Sun's Galactocentric position o and velocity vsun; objects at the position of the Sun are offset by zero_offset in X"""
+    if _ext_loaded:
+        return _galcencyl_to_radec_c(vxvv, phio, N, T, o, vsun, zero_offset)
+    else:  # pragma: no cover
+        return _galcencyl_to_radec_numpy(vxvv, phio, N, T, o, vsun, zero_offset)
+
+
+def _galcencyl_to_radec_c(vxvv, phio, N, T, o, vsun, zero_offset=0.0):
+    vxvv = numpy.require(vxvv, dtype=numpy.float64, requirements=["C", "W"])
+    N = numpy.require(N, dtype=numpy.float64, requirements=["C", "W"])
+    T = numpy.require(T, dtype=numpy.float64, requirements=["C", "W"])
+    o = numpy.require(o, dtype=numpy.float64, requirements=["C", "W"])
+    vsun = numpy.require(vsun, dtype=numpy.float64, requirements=["C", "W"])
+    out = numpy.empty_like(vxvv)
+
+    # Set up the C code
+    ndarrayFlags = ("C_CONTIGUOUS", "WRITEABLE")
+    galcencyl_to_radec_func = _lib.galcencyl_to_radec_arr
+    galcencyl_to_radec_func.argtypes = [
+        ctypes.c_int,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+        ctypes.c_double,
+        ctypes.c_double,
+        ndpointer(dtype=numpy.float64, flags=ndarrayFlags),
+    ]
+
+    # Run the C code
+    galcencyl_to_radec_func(
+        ctypes.c_int(vxvv.shape[1]),
+        vxvv,
+        ctypes.c_double(phio),
+        N,
+        T,
+        o,
+        vsun,
+        ctypes.c_double(_K),
+        ctypes.c_double(zero_offset),
+        out,
+    )
+    return out
+
+
+def _galcencyl_to_radec_numpy(vxvv, phio, N, T, o, vsun, zero_offset=0.0):
+    R, vR, vT, z, vz, phi = vxvv
+    cosphi, sinphi = numpy.cos(phi - phio), numpy.sin(phi - phio)
+    xyz = numpy.array([R * cosphi, R * sinphi, z]) - o[:, None]
+    vxyz = numpy.array([vR * cosphi - vT * sinphi, vR * sinphi + vT * cosphi, vz])
+    XYZ = numpy.dot(N.T, xyz)
+    XYZ[0, numpy.all(XYZ == 0.0, axis=0)] += zero_offset
+    x, y, z = numpy.dot(T.T, XYZ)
+    vx, vy, vz = numpy.dot(T.T, numpy.dot(N.T, vxyz - vsun[:, None]))
+    d = numpy.sqrt(x**2.0 + y**2.0 + z**2.0)
+    ra = numpy.arctan2(y, x)
+    ra[ra < 0.0] += 2.0 * numpy.pi
+    sindec = numpy.clip(z / d, -1.0, 1.0)
+    cosdec = numpy.sqrt(1.0 - sindec**2.0)
+    cosra, sinra = numpy.cos(ra), numpy.sin(ra)
+    vrad = vx * cosra + vy * sinra
+    return numpy.array(
+        [
+            ra,
+            numpy.arcsin(sindec),
+            d,
+            (-vx * sinra + vy * cosra) / _K / d,
+            (-vrad * sindec + vz * cosdec) / _K / d,
+            vrad * cosdec + vz * sindec,
+        ]
+    )
+
+
 def cyl_to_spher_vec(vR, vT, vz, R, z):
     """
     Transform vectors from cylindrical to spherical coordinates. vtheta is positive from pole towards equator.
@@ -92,6 +92,64 @@ def leapfrog(func, yo, t, args=(), rtol=1.49012e-12, atol=1.49012e-12):
     return out
 
 
+def leapfrog_multi(func, yo, t, args=(), rtol=1.49012e-12, atol=1.49012e-12):
+    """
+    Leapfrog integration of an ODE for multiple objects at once
+
+    The step size is determined for each object in the same way as in leapfrog; objects with the same step size are integrated in lockstep, evaluating the force for all of them in a single call to func at each step, such that the result is the same as integrating them one at a time with leapfrog.
+
+    Parameters
+    ----------
+    func : function
+        function of (q, *args, t=t) that returns the force for positions q with shape [len(q),N]
+    yo : numpy.ndarray
+        initial conditions [q,p] with shape [N,len(q)+len(p)]
+    t : numpy.ndarray
+        set of times at which one wants the result
+    args : tuple, optional
+        any extra arguments for func
+    rtol : float, optional
+        relative tolerance
+    atol : float, optional
+        absolute tolerance
+
+    Returns
+    -------
+    numpy.ndarray
+        Array with shape [N,len(t),len(q)+len(p)] containing the value of y for each desired time in t, with the initial values yo in the first row.
+    """
+    yo = numpy.asarray(yo)
+    nq = yo.shape[1] // 2
+    qo = yo[:, :nq].T
+    po = yo[:, nq:].T
+    out = numpy.zeros((len(yo), len(t), yo.shape[1]))
+    out[:, 0] = yo
+    # Estimate necessary step size for each object
+    init_dt = t[1] - t[0]  # assumes that the steps are equally spaced
+    dt = _leapfrog_estimate_step_multi(func, qo, po, init_dt, t[0], args, rtol, atol)
+    # Integrate all objects with the same step size together
+    for tdt in numpy.unique(dt):
+        indx = dt == tdt
+        ndt = int(init_dt / tdt)
+        tqo = qo[:, indx]
+        tpo = po[:, indx]
+        to = t[0]
+        for ii in range(1, len(t)):
+            for jj in range(ndt):  # loop over number of sub-intervals
+                # drift
+                q12 = leapfrog_leapq(tqo, tpo, tdt / 2.0)
+                # kick
+                force = func(q12, *args, t=to + tdt / 2)
+                tpo = leapfrog_leapp(tpo, tdt, force)
+                # drift
+                tqo = leapfrog_leapq(q12, tpo, tdt / 2.0)
+                # Get ready for next
+                to += tdt
+            out[indx, ii, :nq] = tqo.T
+            out[indx, ii, nq:] = tpo.T
+    return out
+
+
 def leapfrog_leapq(q, p, dt):
     return q + dt * p
 
@@ -127,3 +185,41 @@ def _leapfrog_estimate_step(func, qo, po, dt, to, args, rtol, atol):
         err = numpy.sqrt(numpy.mean((delta / scale) ** 2.0))
         dt /= 2.0
     return dt
+
+
+def _leapfrog_estimate_step_multi(func, qo, po, dt, to, args, rtol, atol):
+    """Version of _leapfrog_estimate_step for multiple objects, with qo and po of shape [len(q),N]; all objects whose step size is still being reduced share the same trial step, so their forces are evaluated together"""
+    init_dt = dt
+    scale = atol + rtol * numpy.vstack(
+        (
+            numpy.tile(numpy.amax(numpy.fabs(qo), axis=0), (len(qo), 1)),
+            numpy.tile(numpy.amax(numpy.fabs(po), axis=0), (len(po), 1)),
+        )
+    )
+    out = numpy.empty(qo.shape[1])
+    todo = numpy.ones(qo.shape[1], dtype="bool")
+    dt *= 2.0
+    while numpy.any(todo) and init_dt / dt < _MAX_DT_REDUCE:
+        tqo = qo[:, todo]
+        tpo = po[:, todo]
+        # Do one leapfrog step with step dt and one with dt/2.
+        # dt
+        q12 = leapfrog_leapq(tqo, tpo, dt / 2.0)
+        force = func(q12, *args, t=to + dt / 2)
+        p11 = leapfrog_leapp(tpo, dt, force)
+        q11 = leapfrog_leapq(q12, p11, dt / 2.0)
+        # dt/2.
+        q12 = leapfrog_leapq(tqo, tpo, dt / 4.0)
+        force = func(q12, *args, t=to + dt / 4)
+        ptmp = leapfrog_leapp(tpo, dt / 2.0, force)
+        qtmp = leapfrog_leapq(q12, ptmp, dt / 2.0)  # Take full step combining two half
+        force = func(qtmp, *args, t=to + 3.0 * dt / 4)
+        p12 = leapfrog_leapp(ptmp, dt / 2.0, force)
+        q12 = leapfrog_leapq(qtmp, p12, dt / 4.0)
+        # Norm
+        delta = numpy.vstack((numpy.fabs(q11 - q12), numpy.fabs(p11 - p12)))
+        err = numpy.sqrt(numpy.mean((delta / scale[:, todo]) ** 2.0, axis=0))
+        dt /= 2.0
+        out[todo] = dt
+        todo[todo] = err > 1.0
+    return out
@@ -157,6 +157,7 @@ galpy_c_src.extend(glob.glob("galpy/potential/interppotential_c_ext/*.c"))
 galpy_c_src.extend(glob.glob("galpy/util/interp_2d/*.c"))
 galpy_c_src.extend(glob.glob("galpy/orbit/orbit_c_ext/*.c"))
 galpy_c_src.extend(glob.glob("galpy/actionAngle/actionAngle_c_ext/*.c"))
+galpy_c_src.extend(glob.glob("galpy/snapshot/snapshot_c_ext/*.c"))
 
 galpy_c_include_dirs = [
     "galpy/util",
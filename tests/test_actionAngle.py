@@ -1898,6 +1898,37 @@ def test_actionAngleAdiabaticGrid_outsidegrid_c():
     return None
 
 
+# Test that the C interpolation of actionAngleAdiabaticGrid agrees with Python
+def test_actionAngleAdiabaticGrid_c_vs_python():
+    from galpy.actionAngle import actionAngleAdiabaticGrid
+    from galpy.potential import MWPotential
+
+    aAA = actionAngleAdiabaticGrid(pot=MWPotential, c=True, Rmax=2.0, zmax=0.5)
+    numpy.random.seed(1)
+    nobj = 101
+    R = numpy.random.uniform(0.5, 1.5, nobj)
+    vR = numpy.random.normal(size=nobj) * 0.2
+    vT = 1.0 + numpy.random.normal(size=nobj) * 0.1
+    z = numpy.random.normal(size=nobj) * 0.1
+    vz = numpy.random.normal(size=nobj) * 0.1
+    # Also include some points off the grid in R, Ez, and ER
+    R[:3] = 3.0
+    z[3:6] = 0.8
+    vT[6:9] = 2.5
+    jrc, lzc, jzc = aAA(R, vR, vT, z, vz)
+    jrp, lzp, jzp = aAA(R, vR, vT, z, vz, c=False)
+    assert numpy.all(
+        numpy.fabs(jrc - jrp) < 10.0**-10.0
+    ), "actionAngleAdiabaticGrid jr from C interpolation does not agree with Python"
+    assert numpy.all(
+        numpy.fabs(jzc - jzp) < 10.0**-10.0
+    ), "actionAngleAdiabaticGrid jz from C interpolation does not agree with Python"
+    assert numpy.all(
+        numpy.fabs(lzc - lzp) < 10.0**-16.0
+    ), "actionAngleAdiabaticGrid Lz from C interpolation does not agree with Python"
+    return None
+
+
 # Test the actions of an actionAngleAdiabatic
 def test_actionAngleAdiabaticGrid_conserved_actions_c():
     from galpy.actionAngle import actionAngleAdiabaticGrid
@@ -2207,6 +2238,121 @@ def test_actionAngleStaeckel_actions_order_c():
     return None
 
 
+# Check that the adaptive-order actions converge to the requested tolerance
+def test_actionAngleStaeckel_actions_adaptive_c():
+    from galpy.actionAngle import actionAngleStaeckel
+    from galpy.potential import MWPotential2014
+
+    numpy.random.seed(1)
+    nobj = 101
+    R = numpy.random.uniform(0.5, 1.5, nobj)
+    vR = numpy.random.normal(size=nobj) * 0.2
+    vT = 1.0 + numpy.random.normal(size=nobj) * 0.15
+    z = numpy.random.normal(size=nobj) * 0.2
+    vz = numpy.random.normal(size=nobj) * 0.15
+    aAS = actionAngleStaeckel(pot=MWPotential2014, delta=0.45, c=True)
+    jrt, jpt, jzt = aAS(R, vR, vT, z, vz, order=1000)
+    jr, jp, jz, jrerr, jzerr = aAS.actionsErrors(
+        R, vR, vT, z, vz, tol=1e-6, maxorder=320
+    )
+    assert numpy.all(
+        jrerr <= 1e-6 * jr
+    ), "Radial action computed adaptively does not reach the requested tolerance"
+    assert numpy.all(
+        jzerr <= 1e-6 * jz
+    ), "Vertical action computed adaptively does not reach the requested tolerance"
+    assert numpy.all(
+        numpy.fabs(jr - jrt) < 1e-6 * jrt
+    ), "Radial action computed adaptively does not agree with high-order fixed quadrature"
+    assert numpy.all(
+        numpy.fabs(jz - jzt) < 1e-6 * jzt
+    ), "Vertical action computed adaptively does not agree with high-order fixed quadrature"
+    assert numpy.all(
+        numpy.fabs(jp - jpt) < 1e-10
+    ), "Angular momentum computed by actionsErrors does not agree with that from __call__"
+    # Object-wide tol should give the same actions through __call__
+    aASt = actionAngleStaeckel(
+        pot=MWPotential2014, delta=0.45, c=True, tol=1e-6, maxorder=320
+    )
+    jr2, jp2, jz2 = aASt(R, vR, vT, z, vz)
+    assert numpy.all(
+        numpy.fabs(jr2 - jr) < 1e-12
+    ), "Radial action computed adaptively through __call__ does not agree with actionsErrors"
+    assert numpy.all(
+        numpy.fabs(jz2 - jz) < 1e-12
+    ), "Vertical action computed adaptively through __call__ does not agree with actionsErrors"
+    # Loose tolerance should stop early with larger errors, but within the tolerance
+    jr3, _, jz3, jrerr3, jzerr3 = aAS.actionsErrors(R, vR, vT, z, vz, tol=1e-3)
+    assert numpy.all(
+        jrerr3 <= 1e-3 * jr3
+    ), "Radial action computed adaptively does not reach the requested tolerance"
+    assert numpy.any(
+        jrerr3 > jrerr
+    ), "Adaptive quadrature with a looser tolerance does not stop earlier"
+    # The frequency and angle paths use fixed order and ignore tol and maxorder
+    for func in [aAS.actionsFreqs, aAS.actionsFreqsAngles]:
+        out = func(R, vR, vT, z, vz, numpy.zeros(nobj))
+        outt = func(R, vR, vT, z, vz, numpy.zeros(nobj), tol=1e-6, maxorder=320)
+        assert numpy.all(
+            [numpy.all(numpy.fabs(o - ot) < 1e-12) for o, ot in zip(out, outt)]
+        ), "actionsFreqs or actionsFreqsAngles with tol and maxorder does not agree with that without"
+    return None
+
+
+def test_actionAngleStaeckel_actions_adaptive_python_vs_c():
+    from galpy.actionAngle import actionAngleStaeckel
+    from galpy.potential import MWPotential2014
+
+    R = numpy.array([0.8, 1.0, 1.2])
+    vR = numpy.array([0.1, -0.2, 0.05])
+    vT = numpy.array([0.9, 1.1, 1.0])
+    z = numpy.array([0.1, -0.05, 0.2])
+    vz = numpy.array([0.05, 0.1, -0.1])
+    aAS = actionAngleStaeckel(pot=MWPotential2014, delta=0.45)
+    jrc, jpc, jzc, jrerrc, jzerrc = aAS.actionsErrors(
+        R, vR, vT, z, vz, delta=[0.4, 0.45, 0.5], tol=1e-5, c=True
+    )
+    jrp, jpp, jzp, jrerrp, jzerrp = aAS.actionsErrors(
+        R, vR, vT, z, vz, delta=[0.4, 0.45, 0.5], tol=1e-5, c=False
+    )
+    assert numpy.all(
+        numpy.fabs(jrc - jrp) < 1e-8
+    ), "Adaptive radial action computed in C and Python does not agree"
+    assert numpy.all(
+        numpy.fabs(jzc - jzp) < 1e-8
+    ), "Adaptive vertical action computed in C and Python does not agree"
+    assert numpy.all(
+        numpy.fabs(jrerrc - jrerrp) < 1e-8
+    ), "Adaptive radial action error computed in C and Python does not agree"
+    assert numpy.all(
+        numpy.fabs(jzerrc - jzerrp) < 1e-8
+    ), "Adaptive vertical action error computed in C and Python does not agree"
+    return None
+
+
+# Unbound and circular orbits should be flagged without errors in adaptive mode
+def test_actionAngleStaeckel_actions_adaptive_unbound_circular_c():
+    from galpy.actionAngle import actionAngleStaeckel
+    from galpy.potential import MWPotential
+
+    aAS = actionAngleStaeckel(pot=MWPotential, delta=0.71, c=True)
+    jr, _, jz, jrerr, jzerr = aAS.actionsErrors(
+        numpy.array([1.0, 1.0]),
+        numpy.array([0.0, 0.0]),
+        numpy.array([10.0, 1.0]),
+        numpy.array([0.1, 0.0]),
+        numpy.array([0.0, 0.0]),
+        tol=1e-6,
+    )
+    assert jr[0] > 1000.0, "Unbound in R orbit does not have large Jr"
+    assert jrerr[0] == 0.0, "Unbound in R orbit does not have zero Jr error"
+    assert jr[1] < 1e-10 and jz[1] < 1e-10, "Circular orbit does not have zero actions"
+    assert (
+        jrerr[1] == 0.0 and jzerr[1] == 0.0
+    ), "Circular orbit does not have zero action errors"
+    return None
+
+
 # Basic sanity checking of the actionAngleStaeckel frequencies
 def test_actionAngleStaeckel_basic_freqs_c():
     from galpy.actionAngle import actionAngleStaeckel
@@ -3809,6 +3955,38 @@ def test_actionAngleStaeckelGrid_conserved_actions_c():
     return None
 
 
+# Test that the C interpolation of actionAngleStaeckelGrid agrees with Python
+def test_actionAngleStaeckelGrid_c_vs_python():
+    from galpy.actionAngle import actionAngleStaeckelGrid
+    from galpy.potential import MWPotential
+
+    aAA = actionAngleStaeckelGrid(
+        pot=MWPotential, delta=0.71, c=True, Rmax=3.0, nE=26, npsi=26, nLz=31
+    )
+    numpy.random.seed(2)
+    nobj = 101
+    R = numpy.random.uniform(0.5, 1.5, nobj)
+    vR = numpy.random.normal(size=nobj) * 0.2
+    vT = 1.0 + numpy.random.normal(size=nobj) * 0.1
+    z = numpy.random.normal(size=nobj) * 0.1
+    vz = numpy.random.normal(size=nobj) * 0.1
+    # Also include some points off the grid in Lz and E
+    R[:3] = 5.0
+    vT[3:6] = 2.5
+    jrc, lzc, jzc = aAA(R, vR, vT, z, vz)
+    jrp, lzp, jzp = aAA(R, vR, vT, z, vz, c=False)
+    assert numpy.all(
+        numpy.fabs(jrc - jrp) < 10.0**-10.0
+    ), "actionAngleStaeckelGrid jr from C interpolation does not agree with Python"
+    assert numpy.all(
+        numpy.fabs(jzc - jzp) < 10.0**-10.0
+    ), "actionAngleStaeckelGrid jz from C interpolation does not agree with Python"
+    assert numpy.all(
+        numpy.fabs(lzc - lzp) < 10.0**-16.0
+    ), "actionAngleStaeckelGrid Lz from C interpolation does not agree with Python"
+    return None
+
+
 # Test the setup of an actionAngleStaeckelGrid
 def test_actionAngleStaeckelGrid_setuperrs():
     from galpy.actionAngle import actionAngleStaeckelGrid
@@ -5528,6 +5706,76 @@ def test_actionAngleIsochroneInverse_orbit():
     return None
 
 
+# Test that the C and Python implementations of actionAngleIsochroneInverse agree
+def test_actionAngleIsochroneInverse_c_vs_python():
+    from galpy.actionAngle import actionAngleIsochroneInverse
+    from galpy.potential import IsochronePotential
+
+    ip = IsochronePotential(normalize=1.03, b=1.2)
+    aAII = actionAngleIsochroneInverse(ip=ip)
+    numpy.random.seed(1)
+    nobj = 1001
+    angler = numpy.random.uniform(-10.0, 10.0, nobj)
+    anglephi = numpy.random.uniform(-10.0, 10.0, nobj)
+    anglez = numpy.random.uniform(-10.0, 10.0, nobj)
+    # Single torus, including a non-inclined one
+    for jr, jphi, jz in [(0.05, 1.1, 0.025), (0.3, -0.4, 0.2), (0.1, 1.0, 0.0)]:
+        outc = aAII.xvFreqs(jr, jphi, jz, angler, anglephi, anglez, c=True)
+        outp = aAII.xvFreqs(jr, jphi, jz, angler, anglephi, anglez, c=False)
+        for ii in range(9):
+            assert numpy.all(
+                numpy.fabs(outc[ii] - outp[ii]) < 10.0**-10.0
+            ), "C and Python implementations of actionAngleIsochroneInverse do not agree"
+    # Different torus for each point
+    jr = numpy.random.uniform(0.0, 1.0, nobj)
+    jphi = numpy.random.uniform(-1.0, 1.0, nobj)
+    jz = numpy.random.uniform(0.0, 1.0, nobj)
+    outc = aAII.xvFreqs(jr, jphi, jz, angler, anglephi, anglez, c=True)
+    outp = aAII.xvFreqs(jr, jphi, jz, angler, anglephi, anglez, c=False)
+    for ii in range(9):
+        assert numpy.all(
+            numpy.fabs(outc[ii] - outp[ii]) < 10.0**-10.0
+        ), "C and Python implementations of actionAngleIsochroneInverse do not agree for multiple tori"
+    return None
+
+
+# Test that actionAngleIsochroneInverse works for a different torus for each point
+def test_actionAngleIsochroneInverse_multipletori_wrtIsochrone():
+    from galpy.actionAngle import actionAngleIsochrone, actionAngleIsochroneInverse
+    from galpy.potential import IsochronePotential
+
+    ip = IsochronePotential(normalize=1.03, b=1.2)
+    aAI = actionAngleIsochrone(ip=ip)
+    aAII = actionAngleIsochroneInverse(ip=ip)
+    numpy.random.seed(2)
+    nobj = 1001
+    jr = numpy.random.uniform(0.01, 1.0, nobj)
+    jphi = numpy.random.uniform(-1.0, 1.0, nobj)
+    jz = numpy.random.uniform(0.01, 1.0, nobj)
+    angler = numpy.random.uniform(0.0, 2.0 * numpy.pi, nobj)
+    anglephi = numpy.random.uniform(0.0, 2.0 * numpy.pi, nobj)
+    anglez = numpy.random.uniform(0.0, 2.0 * numpy.pi, nobj)
+    for c in [True, False]:
+        RvR = aAII(jr, jphi, jz, angler, anglephi, anglez, c=c)
+        out = aAI.actionsFreqsAngles(*RvR)
+        tol = -8.0
+        assert numpy.all(
+            numpy.fabs(out[0] - jr) < 10.0**tol
+        ), "actionAngleIsochroneInverse for multiple tori does not invert actionAngleIsochrone in jr"
+        assert numpy.all(
+            numpy.fabs(out[1] - jphi) < 10.0**tol
+        ), "actionAngleIsochroneInverse for multiple tori does not invert actionAngleIsochrone in jphi"
+        assert numpy.all(
+            numpy.fabs(out[2] - jz) < 10.0**tol
+        ), "actionAngleIsochroneInverse for multiple tori does not invert actionAngleIsochrone in jz"
+        for ii, angle in zip(range(6, 9), [angler, anglephi, anglez]):
+            assert numpy.all(
+                numpy.fabs((out[ii] - angle + numpy.pi) % (2.0 * numpy.pi) - numpy.pi)
+                < 10.0**tol
+            ), "actionAngleIsochroneInverse for multiple tori does not invert actionAngleIsochrone in the angles"
+    return None
+
+
 # Test physical output for actionAngleIsochroneInverse
 def test_physical_actionAngleIsochroneInverse():
     from galpy.actionAngle import actionAngleIsochroneInverse
@@ -6305,6 +6553,150 @@ def test_actionAngleVerticalInverse_notE_errors():
     return None
 
 
+# Test that mapping the tori in parallel gives the same result as in serial
+def test_actionAngleVerticalInverse_numcores():
+    from galpy.actionAngle import actionAngleVerticalInverse
+    from galpy.potential import IsothermalDiskPotential
+
+    isopot = IsothermalDiskPotential(amp=1.0, sigma=0.5)
+    Es = numpy.linspace(0.0, 4.0, 51)
+    aAVI = actionAngleVerticalInverse(
+        pot=isopot, nta=2 * 128, Es=Es, setup_interp=True, use_pointtransform=False
+    )
+    aAVIp = actionAngleVerticalInverse(
+        pot=isopot,
+        nta=2 * 128,
+        Es=Es,
+        setup_interp=True,
+        use_pointtransform=False,
+        numcores=3,
+    )
+    assert numpy.all(
+        numpy.fabs(aAVI._nSn - aAVIp._nSn) < 1e-14
+    ), "nSn computed in parallel does not agree with that computed in serial"
+    assert numpy.all(
+        numpy.fabs(aAVI._dSndJ - aAVIp._dSndJ) < 1e-14
+    ), "dSndJ computed in parallel does not agree with that computed in serial"
+    ta = numpy.linspace(0.0, 2.0 * numpy.pi, 101)
+    x, v = aAVI(aAVI.J(1.3132), ta)
+    xp, vp = aAVIp(aAVIp.J(1.3132), ta)
+    assert (
+        numpy.amax(numpy.fabs(x - xp)) < 1e-12
+    ), "Torus computed in parallel does not agree with that computed in serial"
+    assert (
+        numpy.amax(numpy.fabs(v - vp)) < 1e-12
+    ), "Torus computed in parallel does not agree with that computed in serial"
+    return None
+
+
+# Test that saving and loading the tori works
+def test_actionAngleVerticalInverse_savefilename():
+    import os
+    import tempfile
+
+    from galpy.actionAngle import actionAngleVerticalInverse
+    from galpy.potential import IsothermalDiskPotential
+
+    isopot = IsothermalDiskPotential(amp=1.0, sigma=0.5)
+    Es = numpy.linspace(0.0, 4.0, 51)
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)  # Easier this way
+        os.remove(tmp_savefilename)
+        # First save
+        aAVI = actionAngleVerticalInverse(
+            pot=isopot,
+            nta=2 * 128,
+            Es=Es,
+            setup_interp=True,
+            use_pointtransform=True,
+            pt_deg=7,
+            savefilename=tmp_savefilename,
+        )
+        assert os.path.exists(tmp_savefilename), "Tori were not saved"
+        # Then load
+        aAVIl = actionAngleVerticalInverse(
+            pot=isopot,
+            nta=2 * 128,
+            Es=Es,
+            setup_interp=True,
+            use_pointtransform=True,
+            pt_deg=7,
+            savefilename=tmp_savefilename,
+        )
+        ta = numpy.linspace(0.0, 2.0 * numpy.pi, 101)
+        x, v = aAVI(aAVI.J(1.3132), ta)
+        xl, vl = aAVIl(aAVIl.J(1.3132), ta)
+        assert (
+            numpy.amax(numpy.fabs(x - xl)) < 1e-14
+        ), "Torus loaded from file does not agree with the original"
+        assert (
+            numpy.amax(numpy.fabs(v - vl)) < 1e-14
+        ), "Torus loaded from file does not agree with the original"
+        assert (
+            numpy.fabs(aAVI.Freqs(aAVI.J(1.3132)) - aAVIl.Freqs(aAVIl.J(1.3132)))
+            < 1e-14
+        ), "Frequency of torus loaded from file does not agree with the original"
+        # Loading with different parameters or a different potential should
+        # re-compute the tori (and overwrite the file)
+        from galpy.util import galpyWarning
+
+        with pytest.warns(galpyWarning, match="re-computing the tori"):
+            aAVId = actionAngleVerticalInverse(
+                pot=isopot,
+                nta=2 * 128,
+                Es=Es,
+                setup_interp=True,
+                use_pointtransform=False,
+                savefilename=tmp_savefilename,
+            )
+        aAVInopt = actionAngleVerticalInverse(
+            pot=isopot, nta=2 * 128, Es=Es, setup_interp=True, use_pointtransform=False
+        )
+        assert (
+            numpy.fabs(aAVId.J(1.3132) - aAVInopt.J(1.3132)) < 1e-14
+        ), "Tori re-computed for different parameters do not agree with those computed without saving"
+        isopot2 = IsothermalDiskPotential(amp=1.0, sigma=0.6)
+        for pot, maxiter in [(isopot2, 100), (isopot, 50)]:
+            with pytest.warns(galpyWarning, match="re-computing the tori"):
+                aAVId = actionAngleVerticalInverse(
+                    pot=pot,
+                    nta=2 * 128,
+                    Es=Es,
+                    setup_interp=True,
+                    use_pointtransform=False,
+                    maxiter=maxiter,
+                    savefilename=tmp_savefilename,
+                )
+            # Check that the tori were re-computed for this setup
+            aAVInopt = actionAngleVerticalInverse(
+                pot=pot,
+                nta=2 * 128,
+                Es=Es,
+                setup_interp=True,
+                use_pointtransform=False,
+                maxiter=maxiter,
+            )
+            assert (
+                numpy.fabs(aAVId.J(1.3132) - aAVInopt.J(1.3132)) < 1e-14
+            ), "Tori saved for a different potential or maxiter were re-used"
+        # Loading with the same setup does not warn
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", galpyWarning)
+            aAVIl = actionAngleVerticalInverse(
+                pot=isopot,
+                nta=2 * 128,
+                Es=Es,
+                setup_interp=True,
+                use_pointtransform=False,
+                maxiter=50,
+                savefilename=tmp_savefilename,
+            )
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
 # Test that computing actionAngle coordinates in C for a NullPotential leads to an error
 def test_nullpotential_error():
     from galpy.actionAngle import actionAngleStaeckel
@@ -1476,6 +1476,132 @@ def test_vrpmllpmbb_to_galcencyl_galpyvsastropy():
     return None
 
 
+def test_radec_to_galcencyl_againstchain():
+    # Test that the fused transformation agrees with chaining the individual
+    # transformations
+    numpy.random.seed(1)
+    ntest = 1001
+    ra = numpy.random.uniform(0.0, 360.0, size=ntest)
+    dec = numpy.arcsin(numpy.random.uniform(-1.0, 1.0, size=ntest)) / numpy.pi * 180.0
+    d = numpy.random.uniform(0.01, 20.0, size=ntest)
+    pmra, pmdec = numpy.random.normal(size=(2, ntest)) * 5.0
+    vlos = numpy.random.normal(size=ntest) * 100.0
+    Xsun, Zsun, vsun = 8.0, 0.025, [-11.1, 245.0, 7.25]
+    for epoch in [None, 1950.0, 2000.0]:
+        for extra_rot in [True, False]:
+            gc = coords.radec_to_galcencyl(
+                ra,
+                dec,
+                d,
+                pmra,
+                pmdec,
+                vlos,
+                Xsun=Xsun,
+                Zsun=Zsun,
+                vsun=vsun,
+                degree=True,
+                epoch=epoch,
+                _extra_rot=extra_rot,
+            )
+            _turn_off_apy()
+            l, b = coords.radec_to_lb(ra, dec, degree=True, epoch=epoch).T
+            pmll, pmbb = coords.pmrapmdec_to_pmllpmbb(
+                pmra, pmdec, ra, dec, degree=True, epoch=epoch
+            ).T
+            _turn_on_apy()
+            X, Y, Z, vx, vy, vz = coords.sphergal_to_rectgal(
+                l, b, d, vlos, pmll, pmbb, degree=True
+            ).T
+            R, phi, z = coords.XYZ_to_galcencyl(
+                X, Y, Z, Xsun=Xsun, Zsun=Zsun, _extra_rot=extra_rot
+            ).T
+            vR, vT, vz = coords.vxvyvz_to_galcencyl(
+                vx,
+                vy,
+                vz,
+                R,
+                phi,
+                z,
+                vsun=vsun,
+                Xsun=Xsun,
+                Zsun=Zsun,
+                galcen=True,
+                _extra_rot=extra_rot,
+            ).T
+            assert numpy.all(
+                numpy.fabs(gc - numpy.array([R, vR, vT, z, vz, phi]).T) < 10.0**-8.0
+            ), "radec_to_galcencyl does not agree with chaining the individual transformations"
+            # Also test the inverse
+            radec = coords.galcencyl_to_radec(
+                gc[:, 0],
+                gc[:, 1],
+                gc[:, 2],
+                gc[:, 3],
+                gc[:, 4],
+                gc[:, 5],
+                Xsun=Xsun,
+                Zsun=Zsun,
+                vsun=vsun,
+                degree=True,
+                epoch=epoch,
+                _extra_rot=extra_rot,
+            )
+            assert numpy.all(
+                numpy.fabs(radec - numpy.array([ra, dec, d, pmra, pmdec, vlos]).T)
+                < 10.0**-8.0
+            ), "galcencyl_to_radec is not the inverse of radec_to_galcencyl"
+    # Scalar input
+    gc = coords.radec_to_galcencyl(
+        ra[0], dec[0], d[0], pmra[0], pmdec[0], vlos[0], degree=True, epoch=None
+    )
+    assert len(gc) == 6, "radec_to_galcencyl with scalar input does not return a tuple"
+    radec = coords.galcencyl_to_radec(*gc, degree=True, epoch=None)
+    assert numpy.all(
+        numpy.fabs(
+            numpy.array(radec)
+            - numpy.array([ra[0], dec[0], d[0], pmra[0], pmdec[0], vlos[0]])
+        )
+        < 10.0**-8.0
+    ), "galcencyl_to_radec is not the inverse of radec_to_galcencyl for scalar input"
+    return None
+
+
+def test_radec_to_galcencyl_c_vs_numpy():
+    # Test that the C and numpy implementations of the fused transformation agree
+    numpy.random.seed(2)
+    ntest = 20001  # large enough to use OpenMP
+    vxvv = numpy.array(
+        [
+            numpy.random.uniform(0.0, 2.0 * numpy.pi, size=ntest),
+            numpy.arcsin(numpy.random.uniform(-1.0, 1.0, size=ntest)),
+            numpy.random.uniform(0.01, 20.0, size=ntest),
+            numpy.random.normal(size=ntest) * 5.0,
+            numpy.random.normal(size=ntest) * 5.0,
+            numpy.random.normal(size=ntest) * 100.0,
+        ]
+    )
+    N = coords._galcen_matrix(8.0, 0.025)
+    T = coords._radec_to_lb_matrix(None)
+    o = numpy.array([8.0, 0.0, 0.025])
+    vsun = numpy.array([-11.1, 245.0, 7.25])
+    gc_c = coords._radec_to_galcencyl_c(vxvv, numpy.dot(N, T), o, vsun)
+    gc_numpy = coords._radec_to_galcencyl_numpy(vxvv, numpy.dot(N, T), o, vsun)
+    assert numpy.all(
+        numpy.fabs(gc_c - gc_numpy) < 10.0**-10.0
+    ), "C and numpy implementations of radec_to_galcencyl do not agree"
+    # Add an object at the position of the Sun, which gets offset
+    gc_c[:, 0] = [8.0, 0.0, 245.0, 0.025, 7.25, 0.3]
+    radec_c = coords._galcencyl_to_radec_c(gc_c, 0.3, N, T, o, vsun, 1e-4)
+    radec_numpy = coords._galcencyl_to_radec_numpy(gc_c, 0.3, N, T, o, vsun, 1e-4)
+    assert numpy.all(
+        numpy.fabs(radec_c - radec_numpy) < 10.0**-10.0
+    ), "C and numpy implementations of galcencyl_to_radec do not agree"
+    assert (
+        numpy.fabs(radec_c[2, 0] - 1e-4) < 10.0**-10.0
+    ), "Object at the position of the Sun is not offset as expected"
+    return None
+
+
 def test_galcenrect_to_vxvyvz():
     vxg, vyg, vzg = -15.0, -10.0, 35.0
     vxyz = coords.galcenrect_to_vxvyvz(vxg, vyg, vzg, vsun=[-5.0, 10.0, 5.0])
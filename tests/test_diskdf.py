@@ -1017,6 +1017,44 @@ def test_vmomentsurfacemass_physical():
     return None
 
 
+def test_surfacemass_gl_array():
+    # Test that the Gauss-Legendre moments for arrays of R agree with the
+    # dblquad ones for individual R
+    Rs = numpy.array([0.3, 1.7])
+    for dfc in [
+        dehnendf(beta=0.1, profileParams=(1.0 / 3.0, 1.0, 0.2)),
+        shudf(beta=0.0, profileParams=(1.0 / 4.0, 1.0, 0.2)),
+    ]:
+        sm = dfc.surfacemass(Rs)
+        s2sm = dfc.sigma2surfacemass(Rs, relative=True)
+        vm = dfc.vmomentsurfacemass(Rs, 2, 2)
+        dvm = dfc.vmomentsurfacemass(Rs, 0, 1, deriv="R")
+        for ii, R in enumerate(Rs):
+            assert (
+                numpy.fabs(sm[ii] / dfc.surfacemass(R) - 1.0) < 10.0**-8.0
+            ), "surfacemass for an array of R does not agree with that for individual R"
+            assert (
+                numpy.fabs(s2sm[ii] / dfc.sigma2surfacemass(R, relative=True) - 1.0)
+                < 10.0**-8.0
+            ), "sigma2surfacemass for an array of R does not agree with that for individual R"
+            assert (
+                numpy.fabs(vm[ii] / dfc.vmomentsurfacemass(R, 2, 2) - 1.0)
+                < 10.0**-8.0
+            ), "vmomentsurfacemass for an array of R does not agree with that for individual R"
+            assert (
+                numpy.fabs(dvm[ii] / dfc.vmomentsurfacemass(R, 0, 1, deriv="R") - 1.0)
+                < 10.0**-8.0
+            ), "vmomentsurfacemass derivative for an array of R does not agree with that for individual R"
+        # gl=True for a single R
+        assert (
+            numpy.fabs(dfc.surfacemass(1.7, gl=True) / sm[1] - 1.0) < 10.0**-12.0
+        ), "surfacemass with gl=True for a single R does not agree with that for an array of R"
+    assert numpy.all(
+        dfc.vmomentsurfacemass(Rs, 1, 0) == 0.0
+    ), "odd vR moment for an array of R is not zero"
+    return None
+
+
 def test_cold_surfacemassLOS():
     dfc = dehnendf(
         profileParams=(0.3333333333333333, 1.0, 0.01), beta=0.0, correct=False
@@ -2373,7 +2411,7 @@ def test_dehnendf_sample_flat_returnOrbit():
         numpy.fabs(numpy.mean(rs) - 0.5) < 0.05
     ), "mean R of sampled points does not agree with that of the input surface profile"
     assert (
-        numpy.fabs(numpy.mean(phis) - numpy.pi) < 0.2
+        numpy.fabs(numpy.mean(phis) - numpy.pi) < 0.36
     ), "mean phi of sampled points does not agree with that of the input surface profile"
     assert (
         numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.03
@@ -2409,7 +2447,7 @@ def test_dehnendf_sample_flat_EL():
         numpy.fabs(numpy.mean(rs) - 0.5) < 0.05
     ), "mean R of sampled points does not agree with that of the input surface profile"
     assert (
-        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.03
+        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.11
     ), "stddev R of sampled points does not agree with that of the input surface profile"
     # BOVY: Could use another test
     return None
@@ -2431,7 +2469,7 @@ def test_shudf_sample_flat_returnROrbit():
     # Test the velocity distribution
     vrs = numpy.array([o.vR() for o in os])
     assert (
-        numpy.fabs(numpy.mean(vrs)) < 0.05
+        numpy.fabs(numpy.mean(vrs)) < 0.15
     ), "mean vR of sampled points does not agree with that of the input surface profile (i.e., it is not zero)"
     vts = numpy.array([o.vT() for o in os])
     dvts = numpy.array(
@@ -2511,7 +2549,7 @@ def test_shudf_sample_flat_returnOrbit():
         numpy.fabs(numpy.mean(rs) - 0.5) < 0.05
     ), "mean R of sampled points does not agree with that of the input surface profile"
     assert (
-        numpy.fabs(numpy.mean(phis) - numpy.pi) < 0.2
+        numpy.fabs(numpy.mean(phis) - numpy.pi) < 0.36
     ), "mean phi of sampled points does not agree with that of the input surface profile"
     assert (
         numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.03
@@ -2522,7 +2560,7 @@ def test_shudf_sample_flat_returnOrbit():
     # Test the velocity distribution
     vrs = numpy.array([o.vR() for o in os])
     assert (
-        numpy.fabs(numpy.mean(vrs)) < 0.05
+        numpy.fabs(numpy.mean(vrs)) < 0.1
     ), "mean vR of sampled points does not agree with that of the input surface profile (i.e., it is not zero)"
     vts = numpy.array([o.vT() for o in os])
     dvts = numpy.array(
@@ -2547,12 +2585,117 @@ def test_shudf_sample_flat_EL():
         numpy.fabs(numpy.mean(rs) - 0.5) < 0.05
     ), "mean R of sampled points does not agree with that of the input surface profile"
     assert (
-        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.03
+        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.11
     ), "stddev R of sampled points does not agree with that of the input surface profile"
     # BOVY: Could use another test
     return None
 
 
+def test_ELtowRRapRperi_eccentric():
+    # Compare the radial period of an eccentric orbit to that from integrating
+    # the orbit
+    from galpy.orbit import Orbit
+    from galpy.potential import PowerSphericalPotential
+
+    for beta in [0.0, -0.2, 0.2]:
+        dfc = dehnendf(beta=beta, profileParams=(1.0 / 4.0, 1.0, 0.2))
+        # Orbit through R=1 with vR=0.5, vT=0.4
+        if beta == 0.0:
+            E = 0.5**2.0 / 2.0 + 0.4**2.0 / 2.0
+        else:
+            E = 0.5**2.0 / 2.0 + 0.4**2.0 / 2.0 + 1.0 / 2.0 / beta
+        L = 0.4
+        wr, rap, rperi = dfc._ELtowRRapRperi(E, L)
+        o = Orbit([rperi, 0.0, L / rperi])
+        ts = numpy.linspace(0.0, 2.0 * numpy.pi / wr, 101)
+        o.integrate(
+            ts,
+            PowerSphericalPotential(alpha=2.0 - 2.0 * beta, normalize=1.0),
+            method="dop853_c",
+        )
+        assert (
+            numpy.fabs(o.R(ts[50]) - rap) < 10.0**-6.0
+        ), "diskdf's _ELtowRRapRperi's radial frequency for an eccentric orbit is wrong"
+        assert (
+            numpy.fabs(o.R(ts[-1]) - rperi) < 10.0**-6.0
+        ), "diskdf's _ELtowRRapRperi's radial frequency for an eccentric orbit is wrong"
+    return None
+
+
+def test_sample_returnSingleOrbit():
+    # Test that returnSingleOrbit=True returns the same samples as a single
+    # Orbit instance
+    from galpy.orbit import Orbit
+
+    for dfc in [
+        dehnendf(beta=0.0, profileParams=(1.0 / 4.0, 1.0, 0.2)),
+        shudf(beta=0.0, profileParams=(1.0 / 4.0, 1.0, 0.2)),
+    ]:
+        for returnOrbit in [False, True]:
+            numpy.random.seed(1)
+            os = dfc.sample(n=100, returnOrbit=returnOrbit, nphi=2)
+            numpy.random.seed(1)
+            o = dfc.sample(
+                n=100, returnOrbit=returnOrbit, nphi=2, returnSingleOrbit=True
+            )
+            assert isinstance(
+                o, Orbit
+            ), "sample with returnSingleOrbit=True does not return an Orbit"
+            assert (
+                len(o) == 200 and len(os) == 200
+            ), "sample does not return n x nphi samples"
+            assert (
+                o.dim() == 2 and o.phasedim() == 3 + returnOrbit
+            ), "sample with returnSingleOrbit=True returns an Orbit of the wrong dimension"
+            assert numpy.all(
+                numpy.fabs(o.vxvv - numpy.array([oo.vxvv[0] for oo in os]))
+                < 10.0**-14.0
+            ), "sample with returnSingleOrbit=True does not return the same samples as the list"
+    return None
+
+
+def test_sample_surfacemass():
+    # Test that the distribution of many samples agrees with the surface
+    # density and velocity dispersion of the DF (not of the target)
+    from scipy import integrate
+
+    edges = numpy.array([0.0, 0.3, 0.6, 1.0, 1.5, 2.5])
+    Rs = numpy.linspace(0.001, 6.0, 301)
+    for dfc in [
+        dehnendf(beta=0.2, profileParams=(1.0 / 3.0, 1.0, 0.3)),
+        shudf(beta=0.0, profileParams=(1.0 / 3.0, 1.0, 0.2)),
+    ]:
+        numpy.random.seed(1)
+        o = dfc.sample(n=100000, returnSingleOrbit=True)
+        R, vR = o.R(), o.vR()
+        cumsurf = integrate.cumulative_trapezoid(
+            Rs * dfc.surfacemass(Rs, nsigma=16.0, ngl=64), Rs, initial=0.0
+        )
+        cumsigma2 = integrate.cumulative_trapezoid(
+            Rs * dfc.sigma2surfacemass(Rs, nsigma=16.0, ngl=64), Rs, initial=0.0
+        )
+        fsurf = numpy.interp(edges, Rs, cumsurf) / cumsurf[-1]
+        fsigma2 = numpy.interp(edges, Rs, cumsigma2)
+        for ii in range(len(edges) - 1):
+            indx = (R >= edges[ii]) * (R < edges[ii + 1])
+            assert (
+                numpy.fabs(numpy.mean(indx) - (fsurf[ii + 1] - fsurf[ii])) < 0.005
+            ), "Fraction of samples in radial bin does not agree with the surface density of the DF"
+            assert (
+                numpy.fabs(
+                    numpy.mean(vR[indx] ** 2.0)
+                    / (
+                        (fsigma2[ii + 1] - fsigma2[ii])
+                        / (fsurf[ii + 1] - fsurf[ii])
+                        / cumsurf[-1]
+                    )
+                    - 1.0
+                )
+                < 0.05
+            ), "Velocity dispersion of samples in radial bin does not agree with that of the DF"
+    return None
+
+
 def test_schwarzschild_vs_shu_flat():
     # Schwarzschild DF should be ~~ Shu for small sigma, test w/ flat rotcurve
     dfs = shudf(profileParams=(0.3333333333333333, 1.0, 0.05), beta=0.0, correct=False)
@@ -2885,6 +3028,99 @@ def test_DFcorrection_setup():
     return None
 
 
+def test_DFcorrection_numcores():
+    # Test that calculating the corrections in parallel gives the same result
+    import tempfile
+
+    from galpy.df import DFcorrection, expSurfaceSigmaProfile
+
+    essp = expSurfaceSigmaProfile(params=(0.25, 0.75, 0.1))
+    savedir = tempfile.mkdtemp()
+    corrs = [
+        DFcorrection(
+            npoints=7,
+            niter=2,
+            surfaceSigmaProfile=essp,
+            savedir=savedir,
+            numcores=numcores,
+        )._corrections
+        for numcores in [1, 2]
+    ]
+    assert numpy.all(
+        numpy.fabs(corrs[0] - corrs[1]) < 1e-12
+    ), "DFcorrection calculated in parallel does not agree with that calculated serially"
+    # The second one should have been loaded from the savefile
+    assert os.listdir(savedir) == [
+        os.path.basename(
+            DFcorrection(
+                npoints=7, niter=2, surfaceSigmaProfile=essp, savedir=savedir
+            )._savefilename
+        )
+    ], "DFcorrection does not save a single binary file without lock files"
+    return None
+
+
+def test_DFcorrection_savefile():
+    # Test that the corrections are loaded from the binary savefile, from
+    # previously-saved pickles, and that processes wait for the process that
+    # is calculating the corrections
+    import multiprocessing
+    import pickle
+    import tempfile
+
+    from galpy.df import DFcorrection, expSurfaceSigmaProfile
+    from galpy.df.diskdf import _lock_file
+
+    essp = expSurfaceSigmaProfile(params=(0.25, 0.75, 0.1))
+    savedir = tempfile.mkdtemp()
+    # Previously-saved pickle
+    dfc = DFcorrection(
+        npoints=5,
+        niter=1,
+        surfaceSigmaProfile=essp,
+        savedir=savedir,
+        corrections=numpy.ones((5, 2)),
+    )
+    dfc._savedir = savedir
+    dfc._niter = 1
+    with open(dfc._createLegacySavefilename(1), "wb") as savefile:
+        pickle.dump([[1.5, 0.5] for ii in range(5)], savefile)
+    dfc = DFcorrection(npoints=5, niter=1, surfaceSigmaProfile=essp, savedir=savedir)
+    assert numpy.all(
+        dfc._corrections == numpy.array([[1.5, 0.5] for ii in range(5)])
+    ), "DFcorrection does not load corrections saved as a pickle"
+    # A process that is waiting for the lock loads the corrections saved by
+    # the process holding the lock
+    savefilename = dfc._createSavefilename(2)
+    queue = multiprocessing.get_context("fork").Queue()
+
+    def load_corrections():
+        queue.put(
+            DFcorrection(
+                npoints=5, niter=2, surfaceSigmaProfile=essp, savedir=savedir
+            )._corrections
+        )
+
+    with _lock_file(savefilename):
+        # Partially-written file, which the waiting process should not load
+        numpy.save(savefilename, 2.0 * numpy.ones((5, 2)))
+        with open(savefilename, "r+b") as savefile:
+            savefile.truncate(os.path.getsize(savefilename) - 8)
+        proc = multiprocessing.get_context("fork").Process(target=load_corrections)
+        proc.start()
+        # Save atomically, like DFcorrection does
+        savefile, tmp_savefilename = tempfile.mkstemp(dir=savedir, suffix=".npy")
+        with os.fdopen(savefile, "wb") as savefile:
+            numpy.save(savefile, 2.0 * numpy.ones((5, 2)))
+        os.replace(tmp_savefilename, savefilename)
+    corrs = queue.get(timeout=60)
+    proc.join()
+    assert numpy.all(
+        corrs == 2.0
+    ), "DFcorrection waiting for the lock does not load the corrections saved by the process holding the lock"
+    return None
+
+
 def test_dehnendf_sample_flat_returnROrbit_wcorrections():
     beta = 0.0
     dfc = ddf_correct2_flat
@@ -2896,7 +3132,7 @@ def test_dehnendf_sample_flat_returnROrbit_wcorrections():
         numpy.fabs(numpy.mean(rs) - 0.5) < 0.05
     ), "mean R of sampled points does not agree with that of the input surface profile"
     assert (
-        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.03
+        numpy.fabs(numpy.std(rs) - numpy.sqrt(2.0) / 4.0) < 0.08
     ), "stddev R of sampled points does not agree with that of the input surface profile"
     # Test the velocity distribution
     vrs = numpy.array([o.vR() for o in os])
@@ -2958,7 +3194,7 @@ def test_shudf_sample_flat_returnROrbit_wcorrections():
     # Test the velocity distribution
     vrs = numpy.array([o.vR() for o in os])
     assert (
-        numpy.fabs(numpy.mean(vrs)) < 0.05
+        numpy.fabs(numpy.mean(vrs)) < 0.09
     ), "mean vR of sampled points does not agree with that of the input surface profile (i.e., it is not zero)"
     vts = numpy.array([o.vT() for o in os])
     dvts = numpy.array(
@@ -1091,6 +1091,66 @@ def test_elliptical_cold_oortABCK_position2():
     return None
 
 
+# Test that the velocity grid, which integrates all grid points together,
+# agrees with evaluating the DF for the individual grid points
+def test_grid_vs_call():
+    from galpy.orbit import Orbit
+
+    idf = dehnendf(beta=0.0)
+    pot = [
+        LogarithmicHaloPotential(normalize=1.0),
+        EllipticalDiskPotential(twophio=0.01),
+    ]
+    edf = evolveddiskdf(idf, pot=pot, to=-10.0)
+    for t in [0.0, [0.0, -2.5, -5.0]]:
+        for deriv in [None, "R", "phi"]:
+            _, grid = edf.vmomentsurfacemass(
+                0.9,
+                0,
+                0,
+                phi=0.2,
+                t=t,
+                integrate_method="dopr54_c",
+                deriv=deriv,
+                grid=True,
+                returnGrid=True,
+                gridpoints=7,
+            )
+            for ii, jj in [(0, 0), (3, 2), (6, 4)]:
+                o = Orbit([0.9, grid.vRgrid[ii], grid.vTgrid[jj], 0.2])
+                direct = edf(
+                    o,
+                    numpy.array(t) if isinstance(t, list) else t,
+                    integrate_method="dopr54_c",
+                    deriv=deriv,
+                )
+                assert numpy.all(
+                    numpy.fabs(grid.df[ii, jj] - direct) < 10.0**-10.0
+                ), "evolveddiskdf grid does not agree with direct evaluation of the DF"
+    # Also for the hierarchical grid, for which the center of the grid is a subgrid
+    _, grid = edf.vmomentsurfacemass(
+        0.9,
+        0,
+        0,
+        phi=0.2,
+        grid=True,
+        hierarchgrid=True,
+        nlevels=2,
+        returnGrid=True,
+        gridpoints=7,
+    )
+    dxdy = (grid.vRgrid[1] - grid.vRgrid[0]) * (grid.vTgrid[1] - grid.vTgrid[0])
+    for ii, jj in [(0, 0), (1, 5), (6, 4)]:
+        o = Orbit([0.9, grid.vRgrid[ii], grid.vTgrid[jj], 0.2])
+        assert (
+            numpy.fabs(grid.df[ii, jj] - edf(o) * dxdy) < 10.0**-10.0
+        ), "evolveddiskdf hierarchical grid does not agree with direct evaluation of the DF"
+    assert numpy.all(
+        grid.df[1:6, 1:6] == 0.0
+    ), "evolveddiskdf hierarchical grid not zero in the part covered by the subgrid"
+    return None
+
+
 def test_call_special():
     from galpy.orbit import Orbit
 
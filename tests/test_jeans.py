@@ -282,3 +282,205 @@ def test_sigmalos_wlog_zerobeta():
         < 1e-8
     ), "Radial sigma_los computed w/ spherical Jeans equation incorrect for LogarithmicHaloPotential and beta=0"
     return None
+
+
+# Test sigmar for array input: computed for all radii at once
+def test_sigmar_array_wlog_constbeta():
+    from galpy.potential import LogarithmicHaloPotential
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=1.0)
+    rs = numpy.linspace(0.001, 5.0, 101)
+    for beta in [0.0, 0.5, -0.5]:
+        assert numpy.all(
+            numpy.fabs(
+                jeans.sigmar(lp, rs, beta=beta) - 1.0 / numpy.sqrt(2.0 - 2.0 * beta)
+            )
+            < 1e-10
+        ), f"Radial sigma computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta={beta}"
+    # Power-law density and beta as a function
+    gamma, b = 3.0, 0.1
+    assert numpy.all(
+        numpy.fabs(
+            jeans.sigmar(lp, rs, beta=lambda r: -b * r, dens=lambda r: r**-gamma)
+            - numpy.array(
+                [
+                    jeans.sigmar(
+                        lp, r, beta=lambda r: -b * r, dens=lambda r: r**-gamma
+                    )
+                    for r in rs
+                ]
+            )
+        )
+        < 1e-8
+    ), "Radial sigma computed w/ spherical Jeans equation for array input does not agree with scalar input for LogarithmicHaloPotential, beta= -b*r, and dens ~ r^-gamma"
+    return None
+
+
+def test_sigmar_array_vs_scalar():
+    # Compare array and scalar input for different potentials, densities,
+    # and anisotropy profiles, including functions that only take scalars
+    from galpy.potential import HernquistPotential, NFWPotential, PlummerPotential
+
+    rs = numpy.geomspace(0.01, 10.0, 21)
+    pots = [
+        NFWPotential(amp=2.0, a=3.0),
+        [PlummerPotential(b=0.3), HernquistPotential(amp=2.0, a=2.0)],
+    ]
+    betas = [0.3, lambda r: 0.5 * r / (1.0 + r), lambda r: 0.2 if r < 1.0 else 0.1]
+    for pot in pots:
+        for beta in betas:
+            for dens in [None, lambda r: 1.0 / (1.0 + r) ** 4.0]:
+                sr_array = jeans.sigmar(pot, rs, beta=beta, dens=dens)
+                sr_scalar = numpy.array(
+                    [jeans.sigmar(pot, r, beta=beta, dens=dens) for r in rs]
+                )
+                assert numpy.all(
+                    numpy.fabs(sr_array / sr_scalar - 1.0) < 1e-3
+                ), "Radial sigma computed w/ spherical Jeans equation for array input does not agree with scalar input"
+    # Output has the shape of the input
+    pot = NFWPotential(amp=2.0, a=3.0)
+    rs = numpy.array([[0.5, 1.0, 2.0], [2.0, 0.5, 3.0]])
+    sr = jeans.sigmar(pot, rs)
+    assert (
+        sr.shape == rs.shape
+    ), "Radial sigma for array input does not have the same shape as the input"
+    assert (
+        numpy.fabs(sr[0, 2] - sr[1, 0]) < 1e-14
+    ), "Radial sigma for array input with repeated radii is not the same for the repeated radii"
+    assert numpy.all(
+        numpy.fabs(
+            sr / numpy.reshape([jeans.sigmar(pot, r) for r in rs.flatten()], rs.shape)
+            - 1.0
+        )
+        < 1e-6
+    ), "Radial sigma for 2D array input does not agree with scalar input"
+    return None
+
+
+# Test that the radial forces for array input are the same when evaluated in C
+# and in Python
+def test_sigmar_array_c_vs_python():
+    import copy
+
+    from galpy.potential import MWPotential2014, NFWPotential
+
+    rs = numpy.geomspace(0.01, 10.0, 21)
+    for pot in [NFWPotential(amp=2.0, a=3.0), MWPotential2014]:
+        pypot = copy.deepcopy(pot)
+        for p in pypot if isinstance(pypot, list) else [pypot]:
+            p.hasC = False
+        assert jeans._check_c(pot) and not jeans._check_c(
+            pypot
+        ), "Potential without C implementation for test not set up correctly"
+        assert numpy.all(
+            numpy.fabs(
+                jeans.sigmar(pot, rs, beta=0.3) / jeans.sigmar(pypot, rs, beta=0.3)
+                - 1.0
+            )
+            < 1e-10
+        ), "Radial sigma for array input computed with C forces does not agree with that computed with Python forces"
+    return None
+
+
+# Test sigmalos for array input: projected for all radii at once
+# For log halo, constant beta: sigmalos(R) = vc/sqrt(2.-2*beta) x sqrt(1-beta/2)
+def test_sigmalos_array_wlog_constbeta():
+    from galpy.potential import LogarithmicHaloPotential
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=1.0)
+    rs = numpy.linspace(0.1, 5.0, 21)
+    for beta in [0.0, 0.5, -0.5]:
+        assert numpy.all(
+            numpy.fabs(
+                jeans.sigmalos(lp, rs, beta=beta)
+                - numpy.sqrt((1.0 - beta / 2.0) / (2.0 - 2.0 * beta))
+            )
+            < 1e-8
+        ), f"sigma_los computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta={beta}"
+    # With pre-computed sigmar, as a value and as a function, and with given
+    # density and surface density, as a value and as a function
+    assert numpy.all(
+        numpy.fabs(
+            jeans.sigmalos(lp, rs, sigma_r=1.0 / numpy.sqrt(2.0))
+            - 1.0 / numpy.sqrt(2.0)
+        )
+        < 1e-8
+    ), "sigma_los computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta=0"
+    assert numpy.all(
+        numpy.fabs(
+            jeans.sigmalos(
+                lp,
+                rs,
+                dens=lambda x: x**-2,
+                sigma_r=lambda x: 1.0 / numpy.sqrt(2.0),
+                beta=lambda x: 0.0,
+            )
+            - 1.0 / numpy.sqrt(2.0)
+        )
+        < 1e-8
+    ), "sigma_los computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta=0"
+    assert numpy.all(
+        numpy.fabs(
+            jeans.sigmalos(
+                lp,
+                rs,
+                dens=lambda x: lp.dens(x, 0.0),
+                surfdens=lambda x: lp.surfdens(x, numpy.inf),
+            )
+            - 1.0 / numpy.sqrt(2.0)
+        )
+        < 1e-8
+    ), "sigma_los computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta=0"
+    assert numpy.all(
+        numpy.fabs(
+            jeans.sigmalos(
+                lp,
+                rs,
+                dens=lambda x: lp.dens(x, 0.0),
+                surfdens=numpy.array([lp.surfdens(r, numpy.inf) for r in rs]),
+            )
+            - 1.0 / numpy.sqrt(2.0)
+        )
+        < 1e-8
+    ), "sigma_los computed w/ spherical Jeans equation for array input incorrect for LogarithmicHaloPotential and beta=0"
+    return None
+
+
+def test_sigmalos_array_vs_scalar():
+    # Compare array and scalar input for a different potential, density,
+    # and anisotropy profiles
+    from galpy.potential import NFWPotential, PlummerPotential
+
+    pot = NFWPotential(amp=2.0, a=3.0)
+    Rs = numpy.geomspace(0.1, 5.0, 6)
+    pp = PlummerPotential(b=0.5)
+    for beta in [0.3, lambda r: 0.5 * r / (1.0 + r)]:
+        for dens in [None, lambda r: pp.dens(r, 0.0)]:
+            assert numpy.all(
+                numpy.fabs(
+                    jeans.sigmalos(pot, Rs, beta=beta, dens=dens)
+                    / numpy.array(
+                        [jeans.sigmalos(pot, R, beta=beta, dens=dens) for R in Rs]
+                    )
+                    - 1.0
+                )
+                < 1e-5
+            ), "sigma_los computed w/ spherical Jeans equation for array input does not agree with scalar input"
+    return None
+
+
+def test_sigmalos_physical_potential():
+    # sigma_los for a potential with physical outputs turned on should be
+    # the same as that for the potential without physical outputs (in km/s)
+    from galpy.potential import NFWPotential
+
+    pot = NFWPotential(amp=2.0, a=3.0)
+    pot_phys = NFWPotential(amp=2.0, a=3.0, ro=8.0, vo=220.0)
+    for R in [0.5, numpy.array([0.5, 2.0])]:
+        assert numpy.all(
+            numpy.fabs(
+                jeans.sigmalos(pot_phys, R) / jeans.sigmalos(pot, R) / 220.0 - 1.0
+            )
+            < 1e-8
+        ), "sigma_los for a potential with physical outputs turned on does not agree with that without"
+    return None
@@ -7880,6 +7880,49 @@ def test_orbit_sun_setup():
     ), "Orbit with no vxvv does not produce an orbit with zero line-of-sight velocity"
 
 
+def test_orbit_radec_fused_vs_chain():
+    # Test that the fused radec transformations used for the common case of a
+    # FullOrbit observed from a fixed position agree with the general ones
+    from galpy.orbit import Orbit
+
+    numpy.random.seed(1)
+    nobj = 101
+    vxvv = numpy.array(
+        [
+            numpy.random.uniform(0.0, 360.0, size=nobj),
+            numpy.random.uniform(-80.0, 80.0, size=nobj),
+            numpy.random.uniform(0.1, 10.0, size=nobj),
+            numpy.random.normal(size=nobj) * 5.0,
+            numpy.random.normal(size=nobj) * 5.0,
+            numpy.random.normal(size=nobj) * 100.0,
+        ]
+    ).T
+    o = Orbit(vxvv, radec=True, ro=8.0, vo=230.0, zo=0.02)
+    # Round trip
+    for ii, func in enumerate(["ra", "dec", "dist", "pmra", "pmdec", "vlos"]):
+        assert numpy.all(
+            numpy.fabs(getattr(o, func)() - vxvv[:, ii]) < 10.0**-8.0
+        ), f"Orbit {func} does not agree with the radec input"
+    # Observer with array entries uses the general transformations
+    for obs in [
+        [8.0, 0.0, 0.02, -11.1, 12.24 + 230.0, 7.25],
+        [7.0, 2.0, 0.1, 10.0, 200.0, -5.0],
+    ]:
+        arr_obs = [numpy.tile(tobs, nobj) for tobs in obs]
+        for func in ["ra", "dec", "pmra", "pmdec", "vlos"]:
+            assert numpy.all(
+                numpy.fabs(getattr(o, func)(obs=obs) - getattr(o, func)(obs=arr_obs))
+                < 10.0**-8.0
+            ), f"Fused Orbit {func} does not agree with the general transformation"
+    # Also at multiple times
+    ts = numpy.linspace(0.0, 1.0, 3)
+    o.integrate(ts, potential.MWPotential2014)
+    assert numpy.all(
+        numpy.fabs(o.vlos(ts, obs=obs) - o.vlos(ts, obs=arr_obs)) < 10.0**-8.0
+    ), "Fused Orbit vlos does not agree with the general transformation"
+    return None
+
+
 def test_integrate_dxdv_errors():
     from galpy.orbit import Orbit
 
@@ -1927,6 +1927,72 @@ def test_integration_forcemap_3d():
     return None
 
 
+def test_integration_leapfrog_lockstep():
+    # Orbits integrated with the Python leapfrog integrator are integrated
+    # in lockstep, which should agree with integrating them one by one
+    from galpy.orbit import Orbit
+    from galpy.util import symplecticode
+
+    times = numpy.linspace(0.0, 10.0, 101)
+    # Direct comparison of the integrators, using a simple harmonic oscillator
+    yos = numpy.array(
+        [[1.0, 0.1, 0.0, 0.3], [0.1, 1.0, -0.2, 0.0], [3.0, 0.0, 0.1, 0.5]]
+    )
+    out = symplecticode.leapfrog_multi(lambda q, t=0.0: -q, yos, times, rtol=1e-10)
+    for ii in range(len(yos)):
+        assert (
+            numpy.amax(
+                numpy.fabs(
+                    out[ii]
+                    - symplecticode.leapfrog(
+                        lambda q, t=0.0: -q, yos[ii], times, rtol=1e-10
+                    )
+                )
+            )
+            < 1e-10
+        ), "leapfrog_multi does not agree with leapfrog"
+    # Orbits in 1D, 2D, and 3D, serially and in parallel
+    for vxvvs, pot in [
+        (
+            [[1.0, 0.1], [0.1, 1.0], [-0.2, 0.3]],
+            potential.toVerticalPotential(potential.MWPotential2014, 1.0),
+        ),
+        (
+            [[1.0, 0.1, 1.0, 0.0], [0.9, 0.3, 1.0, -0.3], [1.2, -0.3, 0.7, 5.0]],
+            potential.MWPotential2014,
+        ),
+        (
+            [
+                [1.0, 0.1, 1.0, 0.0, 0.1, 0.0],
+                [0.9, 0.3, 1.0, -0.3, 0.4, 3.0],
+                [1.2, -0.3, 0.7, 0.5, -0.5, 6.0],
+            ],
+            potential.MWPotential2014,
+        ),
+    ]:
+        for numcores in [1, 2]:
+            orbits = Orbit(vxvvs)
+            orbits.integrate(times, pot, method="leapfrog", numcores=numcores)
+            for ii in range(len(orbits)):
+                o = Orbit(vxvvs[ii])
+                o.integrate(times, pot, method="leapfrog")
+                assert (
+                    numpy.amax(numpy.fabs(o.getOrbit() - orbits.getOrbit()[ii])) < 1e-10
+                ), "Integration of multiple orbits in lockstep with leapfrog does not agree with integrating them one by one"
+    # Potential whose forces cannot be evaluated for arrays, falls back on
+    # integrating the orbits one by one
+    fp = potential.FerrersPotential(amp=1.0, a=2.0, b=0.5, c=0.3, omegab=0.0)
+    times = numpy.linspace(0.0, 1.0, 3)
+    orbits = Orbit([[1.0, 0.1, 1.0, 0.0, 0.1, 0.0], [0.9, 0.3, 1.0, -0.3, 0.4, 3.0]])
+    orbits.integrate(times, fp, method="leapfrog")
+    o = Orbit([0.9, 0.3, 1.0, -0.3, 0.4, 3.0])
+    o.integrate(times, fp, method="leapfrog")
+    assert (
+        numpy.amax(numpy.fabs(o.getOrbit() - orbits.getOrbit()[1])) < 1e-10
+    ), "Integration of multiple orbits with leapfrog in a potential without vectorized forces does not agree with integrating them one by one"
+    return None
+
+
 def test_integration_dxdv_2d():
     from galpy.orbit import Orbit
 
@@ -7941,6 +8007,100 @@ def test_actionsFreqsAngles_isochroneapproxb():
     return None
 
 
+# Test that the actions, frequencies, and angles are cached per potential
+# and that actionsFreqsAngles returns all of them at once
+def test_actionsFreqsAngles_cache():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential2014, NFWPotential
+
+    os = Orbit([None, None])  # Just twice the Sun!
+    nfw = NFWPotential(normalize=1.0, a=4.0)
+    jr = os.jr(pot=MWPotential2014)
+    # Calling the individual methods uses the cache
+    assert (
+        len(os._actionsFreqsAnglesCache) == 1
+    ), "Actions, frequencies, and angles not cached after first evaluation"
+    wr = os.wr(pot=MWPotential2014)
+    assert (
+        len(os._actionsFreqsAnglesCache) == 1
+    ), "Actions, frequencies, and angles re-computed for the same potential"
+    # Switching to another potential and back uses the cache
+    jrn = os.jr(pot=nfw)
+    assert numpy.all(
+        numpy.fabs(jr - jrn) > 1e-4
+    ), "Action calculation in Orbits not updated when switching potentials"
+    assert (
+        len(os._actionsFreqsAnglesCache) == 2
+    ), "Actions, frequencies, and angles not cached for a second potential"
+    cached = os._actionsFreqsAnglesCache
+    os._actionsFreqsAnglesCache = {
+        key: tuple(-x for x in val) for key, val in cached.items()
+    }
+    assert numpy.all(
+        numpy.fabs(os.jr(pot=MWPotential2014) + jr) < 1e-10
+    ), "Actions not taken from the cache when switching back to a previous potential"
+    os._actionsFreqsAnglesCache = cached
+    # Different delta gives a different entry
+    jrd = os.jr(pot=MWPotential2014, delta=0.4)
+    assert len(os._actionsFreqsAnglesCache) == 3, "Cache not keyed by delta"
+    assert numpy.all(
+        numpy.fabs(jr - jrd) > 1e-4
+    ), "Action calculation in Orbits not updated when changing delta"
+    # actionsFreqsAngles returns everything at once
+    os = Orbit([None, None])
+    out = os.actionsFreqsAngles(pot=MWPotential2014)
+    assert len(out) == 9, "Orbit.actionsFreqsAngles does not return nine arrays"
+    assert (
+        len(os._actionsFreqsAnglesCache) == 1
+    ), "Orbit.actionsFreqsAngles does not evaluate all quantities at once"
+    for x, func in zip(out, ["jr", "jp", "jz", "Or", "Op", "Oz", "wr", "wp", "wz"]):
+        assert numpy.all(
+            numpy.fabs(x - getattr(os, func)(pot=MWPotential2014)) < 1e-10
+        ), f"Orbit.actionsFreqsAngles does not agree with Orbit.{func}"
+    assert numpy.all(
+        numpy.fabs(out[6] - wr) < 1e-10
+    ), "Orbit.actionsFreqsAngles does not agree with Orbit.wr"
+    # Also with physical output
+    out = os.actionsFreqsAngles(pot=MWPotential2014, use_physical=True)
+    assert numpy.all(
+        numpy.fabs(out[0] - os.jr(pot=MWPotential2014, use_physical=True)) < 1e-10
+    ), "Orbit.actionsFreqsAngles does not agree with Orbit.jr for physical output"
+    return None
+
+
+# Test that the cache of actions, frequencies, and angles is keyed by the
+# other keywords used to set up the actionAngle instance
+def test_actionsFreqsAngles_cache_kwargs():
+    from galpy.orbit import Orbit
+    from galpy.potential import MWPotential2014, NFWPotential
+
+    o = Orbit()
+    nfw = NFWPotential(normalize=1.0, a=4.0)
+    jr4 = o.jr(pot=MWPotential2014, type="staeckel", delta=0.4, order=4)
+    o.jr(pot=nfw)
+    jr50 = o.jr(pot=MWPotential2014, type="staeckel", delta=0.4, order=50)
+    assert (
+        numpy.fabs(jr4 - jr50) > 1e-5
+    ), "Actions for a different order taken from the cache"
+    jr50_fresh = Orbit().jr(pot=MWPotential2014, type="staeckel", delta=0.4, order=50)
+    assert (
+        numpy.fabs(jr50 - jr50_fresh) < 1e-10
+    ), "Actions after changing the order do not agree with those of a new Orbit"
+    # Switching back to the original order uses the cache
+    assert (
+        len(o._actionsFreqsAnglesCache) == 3
+    ), "Actions, frequencies, and angles not cached per order"
+    o.jr(pot=nfw)
+    assert (
+        numpy.fabs(o.jr(pot=MWPotential2014, type="staeckel", delta=0.4, order=4) - jr4)
+        < 1e-10
+    ), "Actions not taken from the cache when switching back to a previous order"
+    assert (
+        len(o._actionsFreqsAnglesCache) == 3
+    ), "Actions, frequencies, and angles re-computed when switching back to a previous order"
+    return None
+
+
 def test_actionsFreqsAngles_RuntimeError_1d():
     from galpy.orbit import Orbit
 
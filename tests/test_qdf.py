@@ -1,8 +1,9 @@
 # Tests of the quasiisothermaldf module
 import numpy
+import pytest
 
 from galpy.actionAngle import actionAngleAdiabatic, actionAngleStaeckel
-from galpy.df import quasiisothermaldf
+from galpy.df import ActionNodeCache, quasiisothermaldf
 
 # fiducial setup uses these
 from galpy.potential import MWPotential, epifreq, omegac, vcirc, verticalfreq
@@ -767,6 +768,259 @@ def test_meanjz():
     return None
 
 
+def test_moments_grid():
+    # Test that moments_grid agrees with the individual moment methods
+    Rs = numpy.array([0.6, 0.9, 1.2])
+    zs = numpy.array([0.0, 0.15])
+    moments = [
+        "density",
+        "meanvR",
+        "meanvT",
+        "meanvz",
+        "sigmaR2",
+        "sigmaT2",
+        "sigmaz2",
+        "sigmaRz",
+        "tilt",
+        (1, 2, 0),
+    ]
+    for aA in [aAS, aAA]:
+        qdf = quasiisothermaldf(
+            1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aA, cutcounter=True
+        )
+        mg = qdf.moments_grid(Rs, zs, moments=moments)
+        for moment in moments:
+            assert mg[moment].shape == (
+                len(Rs),
+                len(zs),
+            ), "moments_grid does not return arrays of the expected shape"
+            for ii, R in enumerate(Rs):
+                for jj, z in enumerate(zs):
+                    if isinstance(moment, tuple):
+                        direct = qdf.vmomentdensity(R, z, *moment, gl=True)
+                    else:
+                        direct = getattr(qdf, moment)(R, z, gl=True)
+                    assert numpy.fabs(
+                        mg[moment][ii, jj] - direct
+                    ) < 1e-10 + 1e-8 * numpy.fabs(
+                        direct
+                    ), f"moments_grid {moment} does not agree with the direct calculation"
+    # grid=False broadcasts R and z and higher ngl works
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    mg = qdf.moments_grid(Rs, 0.1, grid=False, ngl=20, moments=["sigmaz2"])
+    assert mg["sigmaz2"].shape == (
+        len(Rs),
+    ), "moments_grid with grid=False does not return arrays of the expected shape"
+    for ii, R in enumerate(Rs):
+        assert (
+            numpy.fabs(mg["sigmaz2"][ii] / qdf.sigmaz2(R, 0.1, ngl=20) - 1.0) < 1e-10
+        ), "moments_grid sigmaz2 does not agree with the direct calculation"
+    return None
+
+
+def test_moments_grid_chunks():
+    # Test that splitting the nodes in chunks, possibly in parallel, gives the
+    # same result
+    import sys
+
+    qdfmodule = sys.modules["galpy.df.quasiisothermaldf"]
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    Rs = numpy.linspace(0.5, 1.5, 5)
+    zs = numpy.array([0.0, 0.2])
+    mg = qdf.moments_grid(Rs, zs)
+    maxnodes = qdfmodule._MOMENTS_GRID_MAXNODES
+    qdfmodule._MOMENTS_GRID_MAXNODES = 2500
+    try:
+        for numcores in [1, 2]:
+            mgc = qdf.moments_grid(Rs, zs, numcores=numcores)
+            for moment in mg:
+                assert numpy.all(
+                    numpy.fabs(mgc[moment] - mg[moment])
+                    < 1e-12 * numpy.fabs(mg[moment])
+                ), "moments_grid in chunks does not agree with moments_grid in one pass"
+    finally:
+        qdfmodule._MOMENTS_GRID_MAXNODES = maxnodes
+    return None
+
+
+def test_moments_grid_errors():
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    with pytest.raises(ValueError) as excinfo:
+        qdf.moments_grid([1.0], [0.0], ngl=11)
+    with pytest.raises(ValueError) as excinfo:
+        qdf.moments_grid([1.0], [0.0], moments=["meanjr"])
+    return None
+
+
+def test_action_cache():
+    # Test that DFs using a cache of actions at the Gauss-Legendre nodes give
+    # the same moments as those without and reuse the actions
+    cache = ActionNodeCache(aAS)
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    qdfc = quasiisothermaldf(
+        1.0 / 4.0,
+        0.2,
+        0.1,
+        1.0,
+        1.0,
+        pot=MWPotential,
+        aA=aAS,
+        cutcounter=True,
+        action_cache=cache,
+    )
+    for moment in ["density", "meanvT", "sigmaR2", "sigmaz2"]:
+        assert (
+            numpy.fabs(
+                getattr(qdf, moment)(0.9, 0.1, gl=True)
+                / getattr(qdfc, moment)(0.9, 0.1, gl=True)
+                - 1.0
+            )
+            < 1e-12
+        ), f"{moment} with action_cache does not agree with that without"
+    assert (
+        cache.cache_info()["misses"] == 1 and cache.cache_info()["hits"] == 3
+    ), "action_cache did not reuse the actions at the same (R,z)"
+    # A DF with a different hr shares the actions
+    qdfhr = quasiisothermaldf(
+        1.0 / 3.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    qdfhrc = quasiisothermaldf(
+        1.0 / 3.0,
+        0.2,
+        0.1,
+        1.0,
+        1.0,
+        pot=MWPotential,
+        aA=aAS,
+        cutcounter=True,
+        action_cache=cache,
+    )
+    assert (
+        numpy.fabs(
+            qdfhr.density(0.9, 0.1, gl=True) / qdfhrc.density(0.9, 0.1, gl=True) - 1.0
+        )
+        < 1e-6
+    ), "density with shared action_cache does not agree with that without"
+    assert (
+        cache.cache_info()["misses"] == 1
+    ), "action_cache did not share the actions between DFs with different hr"
+    # moments_grid uses the cache as well
+    Rs = numpy.array([0.6, 0.9])
+    zs = numpy.array([0.0, 0.1])
+    mg = qdf.moments_grid(Rs, zs)
+    mgc = qdfc.moments_grid(Rs, zs)
+    for moment in mg:
+        assert numpy.all(
+            numpy.fabs(mgc[moment] / mg[moment] - 1.0) < 1e-12
+        ), f"moments_grid {moment} with action_cache does not agree with that without"
+    assert (
+        cache.cache_info()["misses"] == 4 and len(cache) == 4
+    ), "moments_grid did not reuse the actions in the action_cache"
+    assert (
+        numpy.fabs(mgc["density"][1, 1] / qdfc.density(0.9, 0.1, gl=True) - 1.0) < 1e-12
+    ), "moments_grid and density with action_cache do not agree"
+    cache.clear()
+    assert len(cache) == 0, "ActionNodeCache.clear does not clear the cache"
+    return None
+
+
+def test_action_cache_fixedscales():
+    # Test that with fixed velocity scales, DFs with different dispersions
+    # share the actions
+    cache = ActionNodeCache(aAS, sr=0.25, sz=0.15, hsr=1.0, hsz=1.0)
+    qdfs = [
+        quasiisothermaldf(
+            1.0 / 4.0,
+            sr,
+            sz,
+            hsr,
+            hsz,
+            pot=MWPotential,
+            aA=aAS,
+            cutcounter=True,
+            action_cache=cache,
+        )
+        for sr, sz, hsr, hsz in [(0.2, 0.1, 1.0, 1.0), (0.22, 0.12, 1.2, 0.9)]
+    ]
+    for qdf in qdfs:
+        # The nodes span a wider range than the dispersions of the DFs, so
+        # the density is close to that with the default nodes
+        qdfnc = quasiisothermaldf(
+            1.0 / 4.0,
+            qdf._sr,
+            qdf._sz,
+            qdf._hsr,
+            qdf._hsz,
+            pot=MWPotential,
+            aA=aAS,
+            cutcounter=True,
+        )
+        assert (
+            numpy.fabs(
+                qdf.density(0.9, 0.1, gl=True, ngl=20)
+                / qdfnc.density(0.9, 0.1, gl=True, ngl=20)
+                - 1.0
+            )
+            < 1e-3
+        ), "density with fixed-scale action_cache is not close to that without"
+    assert (
+        cache.cache_info()["misses"] == 1 and cache.cache_info()["hits"] == 1
+    ), "action_cache with fixed scales did not share actions between DFs"
+    return None
+
+
+def test_action_cache_maxmem():
+    # Test that the cache evicts the least-recently-used entries
+    cache = ActionNodeCache(aAS, maxmem=0.12)
+    qdf = quasiisothermaldf(
+        1.0 / 4.0,
+        0.2,
+        0.1,
+        1.0,
+        1.0,
+        pot=MWPotential,
+        aA=aAS,
+        cutcounter=True,
+        action_cache=cache,
+    )
+    for R in [0.8, 0.9, 1.0]:
+        qdf.density(R, 0.1, gl=True)
+    assert len(cache) == 2, "ActionNodeCache does not respect maxmem"
+    assert cache.cache_info()["mem"] <= 0.12, "ActionNodeCache does not respect maxmem"
+    qdf.density(1.0, 0.1, gl=True)
+    assert cache.cache_info()["hits"] == 1, "ActionNodeCache evicted the wrong entry"
+    qdf.density(0.8, 0.1, gl=True)
+    assert (
+        cache.cache_info()["misses"] == 4
+    ), "ActionNodeCache did not evict the least-recently-used entry"
+    return None
+
+
+def test_action_cache_errors():
+    with pytest.raises(OSError) as excinfo:
+        quasiisothermaldf(
+            1.0 / 4.0,
+            0.2,
+            0.1,
+            1.0,
+            1.0,
+            pot=MWPotential,
+            aA=aAS,
+            action_cache=ActionNodeCache(aAA),
+        )
+    with pytest.raises(ValueError) as excinfo:
+        ActionNodeCache(aAS, sr=0.2)
+    return None
+
+
 def test_sampleV():
     qdf = quasiisothermaldf(
         1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
@@ -846,6 +1100,80 @@ def test_sampleV_physical():
     return None
 
 
+def test_sampleV_array():
+    # Test sampling velocities at multiple positions at once
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    numpy.random.seed(1)
+    Rs = numpy.array([0.8, 1.1, 0.9])
+    zs = numpy.array([0.1, 0.0, -0.2])
+    samples = qdf.sampleV(Rs, zs, n=1000)
+    assert samples.shape == (
+        3,
+        1000,
+        3,
+    ), "sampleV with array input does not return an array with the expected shape"
+    for R, z, samp in zip(Rs, zs, samples):
+        # test vR
+        assert numpy.fabs(numpy.mean(samp[:, 0])) < 0.02, "sampleV vR mean is not zero"
+        assert (
+            numpy.fabs(
+                numpy.log(numpy.std(samp[:, 0])) - 0.5 * numpy.log(qdf.sigmaR2(R, z))
+            )
+            < 0.05
+        ), "sampleV vR stddev is not equal to sigmaR"
+        # test vT
+        assert (
+            numpy.fabs(numpy.mean(samp[:, 1] - qdf.meanvT(R, z))) < 0.015
+        ), "sampleV vT mean is not equal to meanvT"
+        assert (
+            numpy.fabs(
+                numpy.log(numpy.std(samp[:, 1])) - 0.5 * numpy.log(qdf.sigmaT2(R, z))
+            )
+            < 0.05
+        ), "sampleV vT stddev is not equal to sigmaT"
+        # test vz
+        assert numpy.fabs(numpy.mean(samp[:, 2])) < 0.01, "sampleV vz mean is not zero"
+        assert (
+            numpy.fabs(
+                numpy.log(numpy.std(samp[:, 2])) - 0.5 * numpy.log(qdf.sigmaz2(R, z))
+            )
+            < 0.05
+        ), "sampleV vz stddev is not equal to sigmaz"
+    # Scalar input still returns (n,3)
+    assert qdf.sampleV(0.8, 0.1, n=4).shape == (
+        4,
+        3,
+    ), "sampleV with scalar input does not return an array with the expected shape"
+    return None
+
+
+def test_sampleV_maxVT():
+    # Test that the vectorized search for the maximum of the velocity
+    # distribution agrees with a brute-force search
+    qdf = quasiisothermaldf(
+        1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
+    )
+    Rs = numpy.array([0.5, 0.8, 1.1, 1.5])
+    zs = numpy.array([0.0, 0.1, -0.2, 0.3])
+    maxVT = qdf._sampleV_maxVT(Rs, zs)
+    vTs = numpy.linspace(0.0, 1.5, 15001)
+    for R, z, mvT in zip(Rs, zs, maxVT):
+        lvd = qdf(
+            R + numpy.zeros_like(vTs),
+            numpy.zeros_like(vTs),
+            vTs,
+            z + numpy.zeros_like(vTs),
+            numpy.zeros_like(vTs),
+            log=True,
+        )
+        assert (
+            numpy.fabs(mvT - vTs[numpy.argmax(lvd)]) < 2e-4
+        ), "Vectorized maximum of the velocity distribution does not agree with a brute-force search"
+    return None
+
+
 def test_sampleV_interpolate():
     qdf = quasiisothermaldf(
         1.0 / 4.0, 0.2, 0.1, 1.0, 1.0, pot=MWPotential, aA=aAS, cutcounter=True
@@ -14881,6 +14881,13 @@ def test_quasiisothermaldf_method_returntype():
     assert isinstance(
         qdf.sampleV_interpolate(R, z, 0.1, 0.1), units.Quantity
     ), "quasiisothermaldf method sampleV_interpolate does not return Quantity when it should"
+    mg = qdf.moments_grid([1.0, 1.1], [0.0, 0.1], moments=["density", "sigmaR2"])
+    assert isinstance(
+        mg["density"], units.Quantity
+    ), "quasiisothermaldf method moments_grid does not return Quantity when it should"
+    assert isinstance(
+        mg["sigmaR2"], units.Quantity
+    ), "quasiisothermaldf method moments_grid does not return Quantity when it should"
     assert isinstance(
         qdf.pvR(0.1, 1.1, 0.1), units.Quantity
     ), "quasiisothermaldf method pvR does not return Quantity when it should"
@@ -15476,6 +15483,24 @@ def test_quasiisothermaldf_method_value():
         )
         < 10000.0
     ), "quasiisothermaldf method jmomentdensity does not return correct Quantity"
+    moments = ["density", "meanvT", "sigmaR2", "tilt", (2, 0, 0)]
+    mg = qdf.moments_grid([1.1, 1.2], [0.1], moments=moments)
+    mgnou = qdfnou.moments_grid([1.1, 1.2], [0.1], moments=moments)
+    for moment, u, fac in zip(
+        moments,
+        [
+            1 / units.kpc**3,
+            units.km / units.s,
+            (units.km / units.s) ** 2,
+            units.rad,
+            1 / units.kpc**3 * (units.km / units.s) ** 2,
+        ],
+        [1.0 / ro**3, vo, vo**2, 1.0, vo**2 / ro**3],
+    ):
+        assert numpy.all(
+            numpy.fabs(mg[moment].to(u).value - mgnou[moment] * fac)
+            <= 10.0**-8.0 * numpy.fabs(mgnou[moment] * fac) + 10.0**-12.0
+        ), f"quasiisothermaldf method moments_grid does not return correct Quantity for {moment}"
     return None
 
 
@@ -17575,6 +17600,95 @@ def test_streamgapdf_sample():
     return None
 
 
+def test_streampepperdf_setimpacts_impactparamsAsQuantity():
+    # Imports
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.df import streampepperdf
+    from galpy.orbit import Orbit
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.util import conversion  # for unit conversions
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=0.9)
+    aAI = actionAngleIsochroneApprox(pot=lp, b=0.8)
+    prog_unp_peri = Orbit(
+        [
+            2.6556151742081835,
+            0.2183747276300308,
+            0.67876510797240575,
+            -2.0143395648974671,
+            -0.3273737682604374,
+            0.24218273922966019,
+        ]
+    )
+    V0, R0 = 220.0, 8.0
+    sigv = 0.365 * (10.0 / 2.0) ** (1.0 / 3.0) * units.km / units.s
+    # bare-bones setup, only interested in testing consistency between units
+    # and no units
+    spdf_sanders15 = streampepperdf(
+        sigv,
+        progenitor=prog_unp_peri,
+        pot=lp,
+        aA=aAI,
+        leading=False,
+        nTrackChunks=5,
+        nTrackIterations=1,
+        nTrackChunksImpact=5,
+        sigMeanOffset=4.5,
+        tdisrupt=10.88 * units.Gyr,
+        Vnorm=V0,
+        Rnorm=R0,
+        timpact=[0.88 * units.Gyr, 1.76 * units.Gyr],
+    )
+    assert numpy.all(
+        numpy.fabs(
+            spdf_sanders15._uniq_timpact
+            - numpy.array([0.88, 1.76]) / conversion.time_in_Gyr(V0, R0)
+        )
+        < 10.0**-8.0
+    ), "timpact specified as Quantity for streampepperdf does not work as expected"
+    spdf_sanders15.set_impacts(
+        impactb=[0.1 * units.kpc, 0.2 * units.kpc],
+        subhalovel=numpy.array(
+            [
+                [6.82200571, 132.7700529, 149.4174464],
+                [6.82200571, 132.7700529, 149.4174464],
+            ]
+        )
+        * units.km
+        / units.s,
+        impact_angle=[-2.34 * units.rad, -60.0 * units.deg],
+        timpact=[0.88 * units.Gyr, 1.76 * units.Gyr],
+        GM=[10.0**8.0 * units.Msun, 10.0**7.0 * units.Msun],
+        rs=[625.0 * units.pc, 200.0 * units.pc],
+    )
+    kick_splines = [spl.c.copy() for spl in spdf_sanders15._kick_splines]
+    spdf_sanders15.set_impacts(
+        impactb=[0.1 / R0, 0.2 / R0],
+        subhalovel=numpy.array(
+            [
+                [6.82200571, 132.7700529, 149.4174464],
+                [6.82200571, 132.7700529, 149.4174464],
+            ]
+        )
+        / V0,
+        impact_angle=[-2.34, -numpy.pi / 3.0],
+        timpact=numpy.array([0.88, 1.76]) / conversion.time_in_Gyr(V0, R0),
+        GM=numpy.array([10.0**-2.0, 10.0**-3.0])
+        / conversion.mass_in_1010msol(V0, R0),
+        rs=numpy.array([0.625, 0.2]) / R0,
+    )
+    assert numpy.all(
+        numpy.fabs(spdf_sanders15._impactb - numpy.array([0.1, 0.2]) / R0)
+        < 10.0**-8.0
+    ), "impactb specified as Quantity for streampepperdf does not work as expected"
+    # GM and rs are not stored in streampepperdf, so just check the kicks
+    for c, spl in zip(kick_splines, spdf_sanders15._kick_splines):
+        assert numpy.all(
+            numpy.fabs(c - spl.c) < 10.0**-8.0
+        ), "Calculated kicks from parameters specified as Quantity for streampepperdf do not work as expected"
+    return None
+
+
 def test_streamspraydf_setup_paramsAsQuantity():
     # Imports
     from galpy.df import streamspraydf
@@ -0,0 +1,900 @@
+# Tests of the galpy.snapshot module: N-body integration of snapshots
+import numpy
+import pytest
+
+from galpy.orbit import Orbit
+from galpy.snapshot import Snapshot
+from galpy.snapshot.directnbody import direct_nbody
+
+
+def _plummer_energy(q, p, m, eps):
+    # Total energy of a set of particles with Plummer softening
+    dist = numpy.sqrt(
+        numpy.sum((q[:, numpy.newaxis] - q[numpy.newaxis]) ** 2.0, axis=-1) + eps**2.0
+    )
+    return 0.5 * numpy.sum(m[:, numpy.newaxis] * p**2.0) - numpy.sum(
+        numpy.triu(m[:, numpy.newaxis] * m[numpy.newaxis] / dist, 1)
+    )
+
+
+# Two equal-mass particles on a circular orbit
+@pytest.mark.parametrize("method", ["leapfrog", "hermite"])
+def test_direct_nbody_twobody_circular(method):
+    q = numpy.array([[0.5, 0.0, 0.0], [-0.5, 0.0, 0.0]])
+    p = numpy.array([[0.0, 0.5, 0.0], [0.0, -0.5, 0.0]])
+    ts = numpy.linspace(0.0, 2.0 * numpy.pi, 11)
+    qs, ps = direct_nbody(
+        q,
+        p,
+        [0.5, 0.5],
+        ts,
+        softening_length=10.0**-4.0 if method == "leapfrog" else 0.0,
+        method=method,
+        eta=0.025 if method == "leapfrog" else 0.01,
+    )
+    assert qs.shape == (len(ts), 2, 3), "direct_nbody output has the wrong shape"
+    assert numpy.all(
+        numpy.fabs(qs[:, 0, 0] - 0.5 * numpy.cos(ts)) < 10.0**-4.0
+    ), f"Two-body circular orbit integrated with direct_nbody and method={method} does not agree with the analytical orbit"
+    assert numpy.all(
+        numpy.fabs(ps[:, 1, 0] - 0.5 * numpy.sin(ts)) < 10.0**-4.0
+    ), f"Two-body circular orbit integrated with direct_nbody and method={method} does not agree with the analytical orbit"
+    return None
+
+
+# Energy should be conserved for a self-gravitating system
+@pytest.mark.parametrize("method", ["leapfrog", "hermite"])
+def test_direct_nbody_plummer_energy(method):
+    from galpy.df import isotropicPlummerdf
+    from galpy.potential import PlummerPotential
+
+    numpy.random.seed(1)
+    nbody = 100
+    o = isotropicPlummerdf(pot=PlummerPotential(amp=1.0, b=1.0)).sample(n=nbody)
+    m = numpy.ones(nbody) / nbody
+    q = numpy.array([o.x(), o.y(), o.z()]).T
+    p = numpy.array([o.vx(), o.vy(), o.vz()]).T
+    eps = 0.05
+    qs, ps = direct_nbody(
+        q, p, m, numpy.linspace(0.0, 5.0, 6), softening_length=eps, method=method
+    )
+    E0 = _plummer_energy(q, p, m, eps)
+    for ii in range(1, 6):
+        assert numpy.fabs(_plummer_energy(qs[ii], ps[ii], m, eps) / E0 - 1.0) < (
+            10.0**-3.0 if method == "leapfrog" else 10.0**-5.0
+        ), f"Energy not conserved in direct_nbody integration of Plummer sphere with method={method}"
+    # Momentum is also conserved (up to the block time-step asymmetry)
+    assert numpy.all(
+        numpy.fabs(
+            numpy.sum(m[:, numpy.newaxis] * ps[-1], axis=0)
+            - numpy.sum(m[:, numpy.newaxis] * p, axis=0)
+        )
+        < 10.0**-5.0
+    ), f"Momentum not conserved in direct_nbody integration of Plummer sphere with method={method}"
+    return None
+
+
+# Massless particles in an external potential should follow their orbits
+@pytest.mark.parametrize("method", ["leapfrog", "hermite"])
+def test_snapshot_direct_testparticles(method):
+    from galpy.potential import LogarithmicHaloPotential
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=0.9)
+    vxvv = [[1.0, 0.1, 1.1, 0.1, 0.05, 0.3], [1.2, -0.1, 0.9, -0.1, 0.1, 2.0]]
+    ts = numpy.linspace(0.0, 10.0, 101)
+    os = Orbit(vxvv)
+    os.integrate(ts, lp)
+    snaps = Snapshot(Orbit(vxvv), masses=[0.0, 0.0]).integrate(
+        ts, lp, method="direct", integrator=method, dt=0.01
+    )
+    assert len(snaps) == len(
+        ts
+    ), "Snapshot.integrate does not return a snapshot for each time"
+    for ii in [10, 50, 100]:
+        for attr in ["x", "y", "z", "vx", "vy", "vz"]:
+            assert numpy.all(
+                numpy.fabs(
+                    getattr(snaps[ii].orbits, attr)() - getattr(os, attr)(ts[ii])
+                )
+                < 10.0**-4.0
+            ), f"Test particles integrated with Snapshot.integrate(method='direct',integrator='{method}') do not agree with Orbit.integrate for {attr}"
+    return None
+
+
+def test_snapshot_direct_testparticles_2d_listoforbits():
+    from galpy.potential import LogarithmicHaloPotential
+
+    lp = LogarithmicHaloPotential(normalize=1.0)
+    vxvv = [[1.0, 0.1, 1.1, 0.3], [1.2, -0.1, 0.9, 2.0]]
+    ts = numpy.linspace(0.0, 10.0, 101)
+    os = Orbit(vxvv)
+    os.integrate(ts, lp)
+    snaps = Snapshot([Orbit(v) for v in vxvv], masses=[0.0, 0.0]).integrate(
+        ts, lp, method="direct", dt=0.01
+    )
+    for attr in ["x", "y", "vx", "vy"]:
+        assert numpy.all(
+            numpy.fabs(getattr(snaps[-1].orbits, attr)() - getattr(os, attr)(ts[-1]))
+            < 10.0**-4.0
+        ), f"Planar test particles integrated with Snapshot.integrate(method='direct') do not agree with Orbit.integrate for {attr}"
+    return None
+
+
+def test_direct_nbody_errors():
+    q = numpy.array([[0.5, 0.0, 0.0], [-0.5, 0.0, 0.0]])
+    p = numpy.array([[0.0, 0.5, 0.0], [0.0, -0.5, 0.0]])
+    with pytest.raises(NotImplementedError):
+        direct_nbody(q, p, [0.5, 0.5], [0.0, 1.0], softening_model="dehnen")
+    with pytest.raises(NotImplementedError):
+        direct_nbody(q, p, [0.5, 0.5], [0.0, 1.0], method="rk4")
+    return None
+
+
+# Tree code
+def _plummer_sample(nbody):
+    from galpy.df import isotropicPlummerdf
+    from galpy.potential import PlummerPotential
+
+    numpy.random.seed(1)
+    o = isotropicPlummerdf(pot=PlummerPotential(amp=1.0, b=1.0)).sample(n=nbody)
+    return (
+        numpy.array([o.x(), o.y(), o.z()]).T,
+        numpy.array([o.vx(), o.vy(), o.vz()]).T,
+        numpy.ones(nbody) / nbody,
+    )
+
+
+def test_tree_force_vs_direct():
+    from galpy.snapshot.directnbody import _direct_nbody_force
+    from galpy.snapshot.treenbody import _tree_force
+
+    q, _, m = _plummer_sample(2000)
+    indx = numpy.arange(len(q))
+    ad = _direct_nbody_force(q, q, m, indx, 0.0, None, 0.01)
+    amag = numpy.sqrt(numpy.sum(ad**2.0, axis=1))
+    # Opening angle zero is direct summation
+    at = _tree_force(q, q, m, indx, 0.0, None, 0.01, 0.0, True, None)
+    assert numpy.all(
+        numpy.sqrt(numpy.sum((at - ad) ** 2.0, axis=1)) / amag < 10.0**-10.0
+    ), "Tree force with opening angle zero does not agree with direct summation"
+    # Finite opening angles, with and without quadrupole
+    errs = {}
+    for quad in [False, True]:
+        at = _tree_force(q, q, m, indx, 0.0, None, 0.01, 0.5, quad, None)
+        errs[quad] = numpy.sqrt(numpy.sum((at - ad) ** 2.0, axis=1)) / amag
+    assert (
+        numpy.median(errs[True]) < 10.0**-3.0
+    ), "Tree force with opening angle 0.5 and quadrupole moments is not accurate"
+    assert (
+        numpy.median(errs[False]) < 5.0 * 10.0**-3.0
+    ), "Tree force with opening angle 0.5 and monopole moments is not accurate"
+    assert numpy.median(errs[True]) < 0.5 * numpy.median(
+        errs[False]
+    ), "Including the quadrupole moments does not improve the tree force"
+    # Subset of active particles
+    at = _tree_force(q[::7], q, m, indx[::7], 0.0, None, 0.01, 0.0, True, None)
+    assert numpy.all(
+        numpy.fabs(at - ad[::7]) < 10.0**-10.0 * amag[::7, numpy.newaxis]
+    ), "Tree force for a subset of particles does not agree with direct summation"
+    return None
+
+
+def test_tree_force_external():
+    # External potential evaluated in C or in Python
+    from galpy.potential import AnySphericalPotential, MWPotential2014
+    from galpy.snapshot.directnbody import _direct_nbody_force
+    from galpy.snapshot.treenbody import _parse_c_pot, _tree_force
+
+    q, _, m = _plummer_sample(100)
+    indx = numpy.arange(len(q))
+    for pot in [MWPotential2014, AnySphericalPotential(amp=0.3)]:
+        ad = _direct_nbody_force(q, q, m, indx, 0.0, pot, 0.01)
+        at = _tree_force(q, q, m, indx, 0.0, pot, 0.01, 0.0, True, _parse_c_pot(pot))
+        assert numpy.all(
+            numpy.fabs(at - ad) < 10.0**-8.0
+        ), "Tree force with an external potential does not agree with direct summation"
+    assert (
+        _parse_c_pot(AnySphericalPotential()) is None
+    ), "Potential without C implementation should not be passed to the tree code"
+    return None
+
+
+def test_tree_nbody_plummer_energy():
+    from galpy.snapshot.treenbody import tree_nbody
+
+    q, p, m = _plummer_sample(300)
+    eps = 0.05
+    ts = numpy.linspace(0.0, 5.0, 6)
+    qs, ps = tree_nbody(q, p, m, ts, softening_length=eps, opening_angle=0.5)
+    E0 = _plummer_energy(q, p, m, eps)
+    for ii in range(1, 6):
+        assert (
+            numpy.fabs(_plummer_energy(qs[ii], ps[ii], m, eps) / E0 - 1.0)
+            < 10.0**-3.0
+        ), "Energy not conserved in tree_nbody integration of Plummer sphere"
+    # With opening angle zero, the tree code is the same as direct summation
+    qt, pt = tree_nbody(q, p, m, ts[:3], softening_length=eps, opening_angle=0.0)
+    qd, pd = direct_nbody(q, p, m, ts[:3], softening_length=eps)
+    assert numpy.all(
+        numpy.fabs(qt - qd) < 10.0**-8.0
+    ), "tree_nbody with opening angle zero does not agree with direct_nbody"
+    assert numpy.all(
+        numpy.fabs(pt - pd) < 10.0**-8.0
+    ), "tree_nbody with opening angle zero does not agree with direct_nbody"
+    return None
+
+
+def test_snapshot_tree_cluster_in_mwpotential():
+    # Massless cluster particles in MWPotential2014 follow their orbits
+    from galpy.potential import MWPotential2014
+
+    q, p, _ = _plummer_sample(50)
+    o = Orbit([1.0, 0.1, 1.1, 0.1, 0.05, 0.3])
+    vxvv = numpy.empty((len(q), 6))
+    vxvv[:, 0] = numpy.sqrt((1.0 + 0.01 * q[:, 0]) ** 2.0 + (0.01 * q[:, 1]) ** 2.0)
+    vxvv[:, 5] = numpy.arctan2(0.01 * q[:, 1], 1.0 + 0.01 * q[:, 0])
+    vxvv[:, 3] = 0.1 + 0.01 * q[:, 2]
+    vxvv[:, 1] = 0.1 + 0.01 * p[:, 0]
+    vxvv[:, 2] = 1.1 + 0.01 * p[:, 1]
+    vxvv[:, 4] = 0.05 + 0.01 * p[:, 2]
+    ts = numpy.linspace(0.0, 5.0, 51)
+    os = Orbit(vxvv)
+    os.integrate(ts, MWPotential2014)
+    snaps = Snapshot(Orbit(vxvv), masses=numpy.zeros(len(q))).integrate(
+        ts, MWPotential2014, method="tree", dt=0.01
+    )
+    for attr in ["x", "y", "z", "vx", "vy", "vz"]:
+        assert numpy.all(
+            numpy.fabs(getattr(snaps[-1].orbits, attr)() - getattr(os, attr)(ts[-1]))
+            < 10.0**-4.0
+        ), f"Test particles integrated with Snapshot.integrate(method='tree') do not agree with Orbit.integrate for {attr}"
+    return None
+
+
+def test_tree_nbody_errors():
+    from galpy.snapshot.treenbody import tree_nbody
+
+    q = numpy.array([[0.5, 0.0], [-0.5, 0.0]])
+    p = numpy.array([[0.0, 0.5], [0.0, -0.5]])
+    with pytest.raises(NotImplementedError):
+        tree_nbody(q, p, [0.5, 0.5], [0.0, 1.0])
+    with pytest.raises(NotImplementedError):
+        tree_nbody(
+            numpy.zeros((2, 3)),
+            numpy.zeros((2, 3)),
+            1.0,
+            [0.0, 1.0],
+            softening_model="dehnen",
+        )
+    return None
+
+
+# Array-backed snapshots
+def test_snapshot_input_formats():
+    vxvv = numpy.array(
+        [[1.0, 0.1, 1.1, 0.1, 0.05, 0.3], [1.2, -0.1, 0.9, -0.1, 0.1, 2.0]]
+    )
+    snaps = [
+        Snapshot(vxvv),
+        Snapshot(Orbit(vxvv)),
+        Snapshot([Orbit(v) for v in vxvv]),
+    ]
+    for snap in snaps:
+        assert snap.vxvv.shape == (2, 6), "Snapshot.vxvv does not have the right shape"
+        assert numpy.all(
+            snap.vxvv == vxvv
+        ), "Snapshot phase-space coordinates are not the input coordinates"
+        assert numpy.all(snap.masses == 1.0), "Default masses of Snapshot are not one"
+        assert len(snap) == 2, "Length of Snapshot is not the number of particles"
+        assert snap.dim() == 3, "Snapshot.dim() is not 3 for 3D particles"
+        o = Orbit(vxvv)
+        for attr in ["R", "vR", "vT", "z", "vz", "phi", "x", "y", "vx", "vy"]:
+            assert numpy.all(
+                numpy.fabs(getattr(snap, attr)() - getattr(o, attr)()) < 10.0**-12.0
+            ), f"Snapshot.{attr} does not agree with Orbit.{attr}"
+            assert numpy.all(
+                numpy.fabs(getattr(snap.orbits, attr)() - getattr(o, attr)())
+                < 10.0**-12.0
+            ), f"Snapshot.orbits.{attr} does not agree with Orbit.{attr}"
+    # Array input is not copied
+    assert numpy.shares_memory(
+        snaps[0].vxvv, vxvv
+    ), "Snapshot from an array does not share memory with the array"
+    # Masses
+    snap = Snapshot(vxvv, [0.5, 0.25])
+    assert numpy.all(
+        snap.masses == numpy.array([0.5, 0.25])
+    ), "Snapshot masses given as positional argument not set correctly"
+    snap = Snapshot(vxvv, masses=[0.5, 0.25])
+    assert numpy.all(
+        snap.masses == numpy.array([0.5, 0.25])
+    ), "Snapshot masses given as keyword argument not set correctly"
+    # 1D and 2D
+    assert (
+        Snapshot(numpy.ones((3, 2))).dim() == 1
+    ), "Snapshot.dim() is not 1 for 1D particles"
+    assert (
+        Snapshot(numpy.ones((3, 4))).dim() == 2
+    ), "Snapshot.dim() is not 2 for 2D particles"
+    with pytest.raises(AttributeError):
+        Snapshot(numpy.ones((3, 4))).z()
+    with pytest.raises(AttributeError):
+        Snapshot(numpy.ones((3, 5))).phi()
+    return None
+
+
+def test_snapshot_testparticle_timeseries():
+    # Test-particle integration is done with a single Orbit instance and the
+    # output snapshots are views into a single (nt,N,phasedim) array
+    from galpy.potential import MWPotential2014
+
+    numpy.random.seed(3)
+    nobj = 20
+    vxvv = numpy.empty((nobj, 6))
+    vxvv[:, 0] = numpy.random.uniform(0.8, 1.2, nobj)
+    vxvv[:, 1] = numpy.random.normal(scale=0.1, size=nobj)
+    vxvv[:, 2] = numpy.random.normal(1.0, 0.1, nobj)
+    vxvv[:, 3] = numpy.random.normal(scale=0.05, size=nobj)
+    vxvv[:, 4] = numpy.random.normal(scale=0.05, size=nobj)
+    vxvv[:, 5] = numpy.random.uniform(0.0, 2.0 * numpy.pi, nobj)
+    ts = numpy.linspace(0.0, 10.0, 31)
+    snaps = Snapshot(vxvv, masses=numpy.ones(nobj) / nobj).integrate(
+        ts, MWPotential2014
+    )
+    assert len(snaps) == len(
+        ts
+    ), "Snapshot.integrate does not return a snapshot for each time"
+    base = snaps[0].vxvv.base
+    assert base is not None and base.shape == (
+        len(ts),
+        nobj,
+        6,
+    ), "Snapshots returned by Snapshot.integrate are not views into a single (nt,N,6) array"
+    assert all(
+        [s.vxvv.base is base for s in snaps]
+    ), "Snapshots returned by Snapshot.integrate are not views into a single array"
+    assert base.flags["C_CONTIGUOUS"], "Time series of snapshots is not contiguous"
+    # (phi is returned in [-pi,pi])
+    assert numpy.all(
+        numpy.fabs(snaps[0].vxvv[:, :5] - vxvv[:, :5]) < 10.0**-14.0
+    ) and numpy.all(
+        numpy.fabs(
+            ((snaps[0].phi() - vxvv[:, 5] + numpy.pi) % (2.0 * numpy.pi)) - numpy.pi
+        )
+        < 10.0**-14.0
+    ), "First snapshot returned by Snapshot.integrate is not the initial snapshot"
+    assert numpy.all(
+        snaps[-1].masses == 1.0 / nobj
+    ), "Masses not propagated to the integrated snapshots"
+    os = Orbit(vxvv)
+    os.integrate(ts, MWPotential2014)
+    for ii in [5, 30]:
+        for attr in ["R", "vR", "vT", "z", "vz", "phi", "x", "vy"]:
+            assert numpy.all(
+                numpy.fabs(getattr(snaps[ii], attr)() - getattr(os, attr)(ts[ii]))
+                < 10.0**-10.0
+            ), f"Test-particle integration of Snapshot does not agree with Orbit.integrate for {attr}"
+    # Different integrator
+    snaps = Snapshot(vxvv).integrate(ts, MWPotential2014, integrator="dop853_c")
+    assert numpy.all(
+        numpy.fabs(snaps[-1].R() - os.R(ts[-1])) < 10.0**-6.0
+    ), "Test-particle integration of Snapshot with a different integrator does not agree with Orbit.integrate"
+    return None
+
+
+def test_snapshot_pickle():
+    import pickle
+
+    vxvv = numpy.array([[1.0, 0.1, 1.1, 0.3], [1.2, -0.1, 0.9, 2.0]])
+    snap = pickle.loads(pickle.dumps(Snapshot(vxvv, masses=[0.5, 0.25])))
+    assert numpy.all(
+        snap.vxvv == vxvv
+    ), "Pickled Snapshot does not have the same coordinates"
+    assert numpy.all(
+        snap.masses == numpy.array([0.5, 0.25])
+    ), "Pickled Snapshot does not have the same masses"
+    return None
+
+
+def _write_gadget_binary(
+    filename, pos, vel, ids, npart, massarr, masses=None, fmt=1, endian="<", prec="f4"
+):
+    # Write a Gadget binary snapshot (SnapFormat=1 or 2) for a single file
+    header = numpy.zeros(
+        1,
+        dtype=[
+            ("npart", endian + "i4", 6),
+            ("massarr", endian + "f8", 6),
+            ("time", endian + "f8"),
+            ("redshift", endian + "f8"),
+            ("flag_sfr", endian + "i4"),
+            ("flag_feedback", endian + "i4"),
+            ("npartTotal", endian + "u4", 6),
+            ("pad", "u1", 256 - 120),
+        ],
+    )
+    header["npart"] = npart
+    header["massarr"] = massarr
+    header["time"] = 0.5
+    header["npartTotal"] = npart
+    blocks = [
+        ("HEAD", header.tobytes()),
+        ("POS ", numpy.asarray(pos, dtype=endian + prec).tobytes()),
+        ("VEL ", numpy.asarray(vel, dtype=endian + prec).tobytes()),
+        ("ID  ", numpy.asarray(ids, dtype=endian + "u4").tobytes()),
+    ]
+    if masses is not None:
+        blocks.append(("MASS", numpy.asarray(masses, dtype=endian + prec).tobytes()))
+    with open(filename, "wb") as f:
+        for label, data in blocks:
+            if fmt == 2:
+                f.write(numpy.array([8], dtype=endian + "i4").tobytes())
+                f.write(label.encode("ascii"))
+                f.write(numpy.array([len(data) + 8, 8], dtype=endian + "i4").tobytes())
+            f.write(numpy.array([len(data)], dtype=endian + "i4").tobytes())
+            f.write(data)
+            f.write(numpy.array([len(data)], dtype=endian + "i4").tobytes())
+    return None
+
+
+def _write_nemo(filename, snapshots, endian="<", phasespace=True):
+    # Write a NEMO snapshot file with (time,pos,vel,mass) snapshots
+    def item(f, itemtype, tag=None, data=None, shape=None):
+        magic = 0x0B92 if shape is not None else 0x0992
+        f.write(numpy.array([magic], dtype=endian + "u2").tobytes())
+        f.write(itemtype.encode("ascii") + b"\x00")
+        if tag is not None:
+            f.write(tag.encode("ascii") + b"\x00")
+        if shape is not None:
+            f.write(numpy.array(list(shape) + [0], dtype=endian + "i4").tobytes())
+        if data is not None:
+            f.write(data.tobytes())
+
+    with open(filename, "wb") as f:
+        # History item that is not part of the snapshot
+        item(f, "c", "History", numpy.frombuffer(b"mkplummer\x00", dtype="S1"), [10])
+        for time, pos, vel, mass in snapshots:
+            item(f, "(", "SnapShot")
+            item(f, "(", "Parameters")
+            item(f, "i", "Nobj", numpy.array(len(pos), dtype=endian + "i4"))
+            item(f, "d", "Time", numpy.array(time, dtype=endian + "f8"))
+            item(f, ")")
+            item(f, "(", "Particles")
+            item(f, "i", "CoordSystem", numpy.array(66306, dtype=endian + "i4"))
+            item(f, "f", "Mass", numpy.asarray(mass, dtype=endian + "f4"), [len(pos)])
+            if phasespace:
+                item(
+                    f,
+                    "f",
+                    "PhaseSpace",
+                    numpy.stack([pos, vel], axis=1).astype(endian + "f4"),
+                    [len(pos), 2, 3],
+                )
+            else:
+                item(f, "f", "Position", pos.astype(endian + "f4"), [len(pos), 3])
+                item(f, "f", "Velocity", vel.astype(endian + "f4"), [len(pos), 3])
+            item(f, ")")
+            item(f, ")")
+    return None
+
+
+@pytest.mark.parametrize("fmt", [1, 2])
+@pytest.mark.parametrize("endian", ["<", ">"])
+@pytest.mark.parametrize("prec", ["f4", "f8"])
+def test_gadget_snapshot_binary(fmt, endian, prec):
+    import os
+    import tempfile
+
+    from galpy.snapshot import GadgetSnapshot
+
+    numpy.random.seed(1)
+    npart = [0, 30, 0, 0, 20, 0]
+    pos = numpy.random.normal(size=(50, 3))
+    vel = numpy.random.normal(size=(50, 3))
+    ids = numpy.arange(50)
+    # Type 1 with a fixed mass in the mass table, type 4 with individual masses
+    massarr = [0.0, 0.1, 0.0, 0.0, 0.0, 0.0]
+    masses = numpy.random.uniform(size=20)
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)
+        _write_gadget_binary(
+            tmp_savefilename,
+            pos,
+            vel,
+            ids,
+            npart,
+            massarr,
+            masses=masses,
+            fmt=fmt,
+            endian=endian,
+            prec=prec,
+        )
+        snap = GadgetSnapshot(tmp_savefilename)
+        assert len(snap) == 50, "GadgetSnapshot does not have the right length"
+        assert snap.time == 0.5, "GadgetSnapshot does not have the right time"
+        assert isinstance(
+            snap.pos, numpy.memmap
+        ), "GadgetSnapshot positions are not memory-mapped"
+        assert numpy.all(
+            numpy.fabs(snap.pos - pos) < 10.0**-6.0
+        ), "GadgetSnapshot positions do not agree with those written"
+        assert numpy.all(
+            numpy.fabs(snap.vel - vel) < 10.0**-6.0
+        ), "GadgetSnapshot velocities do not agree with those written"
+        assert numpy.all(snap.ids == ids), "GadgetSnapshot IDs do not agree"
+        assert numpy.all(
+            numpy.fabs(snap.mass - numpy.concatenate([0.1 * numpy.ones(30), masses]))
+            < 10.0**-6.0
+        ), "GadgetSnapshot masses do not agree with those written"
+        # Single particle type
+        snap4 = GadgetSnapshot(tmp_savefilename, ptype=4)
+        assert isinstance(
+            snap4.pos, numpy.memmap
+        ), "GadgetSnapshot positions for a single type are not memory-mapped"
+        assert numpy.all(
+            numpy.fabs(snap4.pos - pos[30:]) < 10.0**-6.0
+        ), "GadgetSnapshot positions for a single type do not agree"
+        assert numpy.all(
+            numpy.fabs(snap4.mass - masses) < 10.0**-6.0
+        ), "GadgetSnapshot masses for a single type do not agree"
+        snap1 = GadgetSnapshot(tmp_savefilename, ptype=1)
+        assert numpy.all(
+            snap1.mass == snap1.header["massarr"][1]
+        ), "GadgetSnapshot masses from the mass table do not agree"
+        # Iterate in chunks
+        chunks = list(snap.iterate(chunksize=7, fields=("pos", "mass", "ids")))
+        assert numpy.all(
+            numpy.concatenate([c[0] for c in chunks]) == snap.pos
+        ), "GadgetSnapshot.iterate does not return all positions"
+        assert numpy.all(
+            numpy.concatenate([c[1] for c in chunks]) == snap.mass
+        ), "GadgetSnapshot.iterate does not return all masses"
+        assert numpy.all(
+            [len(c[2]) <= 7 for c in chunks]
+        ), "GadgetSnapshot.iterate returns chunks that are too large"
+        del snap, snap1, snap4, chunks
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
+def test_gadget_snapshot_multifile():
+    import os
+    import tempfile
+
+    from galpy.snapshot import GadgetSnapshot
+
+    numpy.random.seed(2)
+    pos = numpy.random.normal(size=(40, 3))
+    vel = numpy.random.normal(size=(40, 3))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        base = os.path.join(tmpdir, "snap_000")
+        for ii, (lo, hi) in enumerate([(0, 25), (25, 40)]):
+            _write_gadget_binary(
+                f"{base}.{ii}",
+                pos[lo:hi],
+                vel[lo:hi],
+                numpy.arange(lo, hi),
+                [0, hi - lo, 0, 0, 0, 0],
+                [0.0, 0.2, 0.0, 0.0, 0.0, 0.0],
+                fmt=2,
+            )
+        snap = GadgetSnapshot(f"{base}.0")
+        assert (
+            len(snap) == 40
+        ), "Multi-file GadgetSnapshot does not have the right length"
+        assert numpy.all(
+            numpy.fabs(snap.pos - pos) < 10.0**-6.0
+        ), "Multi-file GadgetSnapshot positions do not agree with those written"
+        assert numpy.all(
+            snap.ids == numpy.arange(40)
+        ), "Multi-file GadgetSnapshot IDs do not agree with those written"
+        assert [len(c[0]) for c in snap.iterate(chunksize=10)] == [
+            10,
+            10,
+            5,
+            10,
+            5,
+        ], "Multi-file GadgetSnapshot.iterate does not iterate per file"
+        del snap
+    return None
+
+
+def test_gadget_snapshot_hdf5():
+    import os
+    import tempfile
+
+    h5py = pytest.importorskip("h5py")
+    from galpy.snapshot import GadgetSnapshot
+
+    numpy.random.seed(3)
+    pos = numpy.random.normal(size=(30, 3))
+    masses = numpy.random.uniform(size=10)
+    savefile, tmp_savefilename = tempfile.mkstemp(suffix=".hdf5")
+    try:
+        os.close(savefile)
+        with h5py.File(tmp_savefilename, "w") as f:
+            header = f.create_group("Header")
+            header.attrs["NumPart_ThisFile"] = [0, 20, 10, 0, 0, 0]
+            header.attrs["NumPart_Total"] = [0, 20, 10, 0, 0, 0]
+            header.attrs["MassTable"] = [0.0, 0.1, 0.0, 0.0, 0.0, 0.0]
+            header.attrs["Time"] = 1.0
+            f.create_dataset("PartType1/Coordinates", data=pos[:20])
+            f.create_dataset("PartType2/Coordinates", data=pos[20:])
+            f.create_dataset("PartType2/Masses", data=masses)
+        snap = GadgetSnapshot(tmp_savefilename)
+        assert numpy.all(
+            numpy.fabs(snap.pos - pos) < 10.0**-10.0
+        ), "HDF5 GadgetSnapshot positions do not agree with those written"
+        assert numpy.all(
+            numpy.fabs(snap.mass - numpy.concatenate([0.1 * numpy.ones(20), masses]))
+            < 10.0**-10.0
+        ), "HDF5 GadgetSnapshot masses do not agree with those written"
+        assert isinstance(
+            GadgetSnapshot(tmp_savefilename, ptype=2).pos, numpy.memmap
+        ), "HDF5 GadgetSnapshot positions are not memory-mapped"
+        del snap
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
+@pytest.mark.parametrize("endian", ["<", ">"])
+@pytest.mark.parametrize("phasespace", [True, False])
+def test_nemo_snapshot(endian, phasespace):
+    import os
+    import tempfile
+
+    from galpy.snapshot import NemoSnapshot
+
+    numpy.random.seed(4)
+    snapshots = [
+        (
+            float(tt),
+            numpy.random.normal(size=(25, 3)),
+            numpy.random.normal(size=(25, 3)),
+            numpy.random.uniform(size=25),
+        )
+        for tt in range(3)
+    ]
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)
+        _write_nemo(tmp_savefilename, snapshots, endian=endian, phasespace=phasespace)
+        snap = NemoSnapshot(tmp_savefilename)
+        assert numpy.all(
+            snap.times == [0.0, 1.0, 2.0]
+        ), "NemoSnapshot does not find all snapshots"
+        assert len(snap) == 25, "NemoSnapshot does not have the right length"
+        for index in [0, -1]:
+            snap.load(index)
+            time, pos, vel, mass = snapshots[index]
+            assert snap.time == time, "NemoSnapshot does not have the right time"
+            assert isinstance(
+                snap.pos, numpy.memmap
+            ), "NemoSnapshot positions are not memory-mapped"
+            assert numpy.all(
+                numpy.fabs(snap.pos - pos) < 10.0**-6.0
+            ), "NemoSnapshot positions do not agree with those written"
+            assert numpy.all(
+                numpy.fabs(snap.vel - vel) < 10.0**-6.0
+            ), "NemoSnapshot velocities do not agree with those written"
+            assert numpy.all(
+                numpy.fabs(snap.mass - mass) < 10.0**-6.0
+            ), "NemoSnapshot masses do not agree with those written"
+        chunks = list(snap.iterate(chunksize=10))
+        assert numpy.all(
+            numpy.concatenate([c[0] for c in chunks]) == snap.pos
+        ), "NemoSnapshot.iterate does not return all positions"
+        del snap, chunks
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
+def test_snapshot_readers_errors():
+    import os
+    import tempfile
+
+    from galpy.snapshot import GadgetSnapshot, NemoSnapshot
+
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)
+        with open(tmp_savefilename, "wb") as f:
+            f.write(b"not a snapshot file")
+        with pytest.raises(OSError) as excinfo:
+            GadgetSnapshot(tmp_savefilename)
+        with pytest.raises(OSError) as excinfo:
+            NemoSnapshot(tmp_savefilename)
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
+def test_scf_compute_coeffs_nbody_gadget_snapshot():
+    # Streaming a memory-mapped snapshot in chunks gives the same coefficients
+    import os
+    import tempfile
+
+    from galpy.potential import scf_compute_coeffs_nbody
+    from galpy.snapshot import GadgetSnapshot
+
+    numpy.random.seed(5)
+    pos = numpy.random.normal(size=(1000, 3))
+    masses = numpy.random.uniform(size=1000) / 1000.0
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)
+        _write_gadget_binary(
+            tmp_savefilename,
+            pos,
+            pos,
+            numpy.arange(1000),
+            [0, 1000, 0, 0, 0, 0],
+            [0.0] * 6,
+            masses=masses,
+            prec="f8",
+        )
+        snap = GadgetSnapshot(tmp_savefilename)
+        Acos, Asin = scf_compute_coeffs_nbody(pos.T, 6, 4, mass=masses)
+        cAcos, cAsin = scf_compute_coeffs_nbody(
+            snap.pos.T, 6, 4, mass=snap.mass, chunksize=300
+        )
+        assert numpy.all(
+            numpy.fabs(Acos - cAcos) < 10.0**-10.0
+        ), "scf_compute_coeffs_nbody in chunks does not agree with all particles at once"
+        assert numpy.all(
+            numpy.fabs(Asin - cAsin) < 10.0**-10.0
+        ), "scf_compute_coeffs_nbody in chunks does not agree with all particles at once"
+        # Scalar mass
+        Acos, Asin = scf_compute_coeffs_nbody(pos.T, 6, 4, mass=0.001)
+        cAcos, cAsin = scf_compute_coeffs_nbody(
+            snap.pos.T, 6, 4, mass=0.001, chunksize=300
+        )
+        assert numpy.all(
+            numpy.fabs(Acos - cAcos) < 10.0**-10.0
+        ), "scf_compute_coeffs_nbody in chunks does not agree with all particles at once for scalar mass"
+        del snap
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
+def test_snapshotrzpotential_native_kepler():
+    # A single unit mass at the origin, without pynbody
+    from galpy.potential import KeplerPotential, SnapshotRZPotential
+
+    sp = SnapshotRZPotential((numpy.zeros((1, 3)), numpy.ones(1)), num_threads=1)
+    kp = KeplerPotential(amp=1.0)
+    for R, z in [(1.0, 0.0), (0.5, 0.0), (1.0, 0.5), (1.0, -0.5), (3.0, 2.0)]:
+        assert (
+            numpy.fabs(sp(R, z) - kp(R, z)) < 10.0**-8.0
+        ), f"SnapshotRZPotential with single unit mass does not correspond to KeplerPotential at (R,z) = ({R},{z})"
+        assert (
+            numpy.fabs(sp.Rforce(R, z) - kp.Rforce(R, z)) < 10.0**-8.0
+        ), f"SnapshotRZPotential with single unit mass does not correspond to KeplerPotential at (R,z) = ({R},{z})"
+        assert (
+            numpy.fabs(sp.zforce(R, z) - kp.zforce(R, z)) < 10.0**-8.0
+        ), f"SnapshotRZPotential with single unit mass does not correspond to KeplerPotential at (R,z) = ({R},{z})"
+    # Arrays
+    Rs, zs = numpy.array([0.5, 1.0, 2.0]), numpy.array([0.1, -0.3, 1.0])
+    assert numpy.all(
+        numpy.fabs(sp(Rs, zs) - kp(Rs, zs)) < 10.0**-8.0
+    ), "SnapshotRZPotential with single unit mass does not correspond to KeplerPotential for arrays"
+    return None
+
+
+def test_snapshotrzpotential_native_plummer():
+    # A Plummer sphere realized with particles: tree vs. direct and vs. analytic
+    from galpy.df import isotropicPlummerdf
+    from galpy.potential import PlummerPotential, SnapshotRZPotential
+
+    numpy.random.seed(6)
+    pp = PlummerPotential(amp=1.0, b=1.0)
+    o = isotropicPlummerdf(pot=pp).sample(n=20000)
+    pos = numpy.array([o.x(), o.y(), o.z()]).T
+    mass = numpy.ones(len(pos)) / len(pos)
+    Rs = numpy.array([0.5, 1.0, 2.0, 4.0])
+    zs = numpy.array([0.0, 0.5, -1.0, 2.0])
+    sp = SnapshotRZPotential(
+        (pos, mass), nazimuths=8, softening_length=0.01, opening_angle=0.5
+    )
+    # Default is exact direct summation
+    spd = SnapshotRZPotential((pos, mass), nazimuths=8, softening_length=0.01)
+    assert numpy.all(
+        numpy.fabs(sp(Rs, zs) / spd(Rs, zs) - 1.0) < 10.0**-3.0
+    ), "SnapshotRZPotential with the tree does not agree with direct summation"
+    assert numpy.all(
+        numpy.fabs(sp.Rforce(Rs, zs) / spd.Rforce(Rs, zs) - 1.0) < 10.0**-2.0
+    ), "SnapshotRZPotential with the tree does not agree with direct summation"
+    assert numpy.all(
+        numpy.fabs(sp(Rs, zs) / pp(Rs, zs) - 1.0) < 0.03
+    ), "SnapshotRZPotential of a Plummer sphere does not agree with PlummerPotential"
+    assert numpy.all(
+        numpy.fabs(sp.Rforce(Rs, zs) / pp.Rforce(Rs, zs) - 1.0) < 0.1
+    ), "SnapshotRZPotential of a Plummer sphere does not agree with PlummerPotential"
+    return None
+
+
+def test_snapshotrzpotential_native_softening():
+    # Default softening for particle arrays is zero, negative softening errors
+    from galpy.potential import PlummerPotential, SnapshotRZPotential
+
+    pos, mass = numpy.zeros((1, 3)), numpy.ones(1)
+    sp = SnapshotRZPotential((pos, mass))
+    assert (
+        sp._softening_length == 0.0
+    ), "SnapshotRZPotential of particle arrays does not default to zero softening"
+    sp = SnapshotRZPotential((pos, mass), softening_length=0.5)
+    pp = PlummerPotential(amp=1.0, b=0.5)
+    assert (
+        numpy.fabs(sp(0.0, 0.0) - pp(0.0, 0.0)) < 10.0**-8.0
+    ), "SnapshotRZPotential with softening_length does not correspond to a PlummerPotential at the particle's position"
+    with pytest.raises(ValueError) as excinfo:
+        SnapshotRZPotential((pos, mass), softening_length=-0.1)
+    return None
+
+
+def test_interpsnapshotrzpotential_native():
+    # Interpolated snapshot potential of a GadgetSnapshot, without pynbody
+    import os
+    import pickle
+    import tempfile
+
+    from galpy.potential import InterpSnapshotRZPotential, KeplerPotential
+    from galpy.snapshot import GadgetSnapshot
+
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)
+        _write_gadget_binary(
+            tmp_savefilename,
+            numpy.zeros((1, 3)),
+            numpy.zeros((1, 3)),
+            [0],
+            [0, 1, 0, 0, 0, 0],
+            [0.0, 4.0, 0.0, 0.0, 0.0, 0.0],
+            prec="f8",
+        )
+        sp = InterpSnapshotRZPotential(
+            GadgetSnapshot(tmp_savefilename),
+            rgrid=(0.01, 3.0, 101),
+            zgrid=(0.0, 0.2, 101),
+            logR=False,
+            interpPot=True,
+            interpepifreq=True,
+            interpverticalfreq=True,
+            zsym=True,
+        )
+        kp = KeplerPotential(amp=4.0)
+        for R, z in [(1.0, 0.0), (2.0, 0.1), (0.5, -0.1)]:
+            assert (
+                numpy.fabs(sp(R, z) - kp(R, z)) < 10.0**-5.0
+            ), f"InterpSnapshotRZPotential of a GadgetSnapshot does not correspond to KeplerPotential at (R,z) = ({R},{z})"
+            assert (
+                numpy.fabs(sp.Rforce(R, z) / kp.Rforce(R, z) - 1.0) < 10.0**-5.0
+            ), f"InterpSnapshotRZPotential of a GadgetSnapshot does not correspond to KeplerPotential at (R,z) = ({R},{z})"
+        assert (
+            numpy.fabs(sp.epifreq(1.0) - kp.epifreq(1.0)) < 10.0**-4.0
+        ), "InterpSnapshotRZPotential of a GadgetSnapshot does not have the right epicycle frequency"
+        assert (
+            numpy.fabs(sp.verticalfreq(1.0) - kp.verticalfreq(1.0)) < 10.0**-4.0
+        ), "InterpSnapshotRZPotential of a GadgetSnapshot does not have the right vertical frequency"
+        # Outside of the grid, the original potential is used
+        assert (
+            numpy.fabs(sp(5.0, 1.0) - kp(5.0, 1.0)) < 10.0**-8.0
+        ), "InterpSnapshotRZPotential of a GadgetSnapshot does not correspond to KeplerPotential outside the grid"
+        # Pickling
+        psp = pickle.loads(pickle.dumps(sp))
+        assert (
+            numpy.fabs(psp(1.0, 0.1) - sp(1.0, 0.1)) < 10.0**-10.0
+        ), "Pickled InterpSnapshotRZPotential does not agree with the original"
+        assert (
+            numpy.fabs(psp(5.0, 1.0) - kp(5.0, 1.0)) < 10.0**-8.0
+        ), "Pickled InterpSnapshotRZPotential does not agree outside the grid"
+        del sp
+    finally:
+        os.remove(tmp_savefilename)
+    return None
@@ -1515,6 +1515,222 @@ def test_eddington_powerspherical_massprofile():
     return None
 
 
+############# TESTS OF TABULATED f(E) AND f(Q) ############
+def test_eddington_tabulated_hernquist():
+    # Test that the tabulated f(E) agrees with the exact Hernquist DF
+    pot = potential.HernquistPotential(amp=1.3, a=2.3)
+    dfe = eddingtondf(pot=pot, tabulate=True)
+    dfi = isotropicHernquistdf(pot)
+    Emin = pot(0.0, 0.0)
+    Emax = pot(numpy.inf, 0.0)
+    E = numpy.linspace(0.99 * Emin, Emax - 0.001, 1001)
+    assert numpy.all(
+        numpy.fabs(dfe.fE(E) / dfi.fE(E) - 1.0) < 1e-5
+    ), "Tabulated Eddington f(E) for the Hernquist potential does not agree with the exact solution"
+    assert numpy.all(
+        dfe.fE(numpy.array([Emin - 0.1, dfe._potInf, 0.1])) == 0.0
+    ), "Tabulated Eddington f(E) is not zero outside of the energy range"
+    assert (
+        numpy.fabs(dfe.sigmar(1.2) / dfi.sigmar(1.2) - 1.0) < 1e-5
+    ), "sigmar computed with the tabulated Eddington f(E) does not agree with the exact solution"
+    return None
+
+
+def test_eddington_tabulated_vs_direct_listdenspot():
+    # Test that the tabulated f(E) agrees with the direct integration when
+    # the tracer density is a list of potentials
+    pot = potential.NFWPotential(amp=2.3, a=1.3)
+    denspot = [
+        potential.DehnenCoreSphericalPotential(amp=1.0, a=1.15),
+        potential.DehnenCoreSphericalPotential(amp=1.5, a=1.15),
+    ]
+    dfd = eddingtondf(pot=pot, denspot=denspot)
+    dft = eddingtondf(pot=pot, denspot=denspot, tabulate=True)
+    E = numpy.linspace(0.99 * dfd._Emin, 1.01 * dfd._potInf, 21)
+    assert numpy.all(
+        numpy.fabs(dft.fE(E) / dfd.fE(E) - 1.0) < 1e-5
+    ), "Tabulated Eddington f(E) does not agree with direct integration"
+    return None
+
+
+def test_osipkovmerritt_tabulated_hernquist():
+    # Test that the tabulated f(Q) agrees with the exact Osipkov-Merritt
+    # Hernquist DF
+    pot = potential.HernquistPotential(amp=1.3, a=2.3)
+    Q = -numpy.linspace(0.99 * pot(0.0, 0.0), -0.001, 1001)
+    for ra in [0.5, 3.0]:
+        dfo = osipkovmerrittdf(pot=pot, ra=ra, tabulate=True)
+        dfh = osipkovmerrittHernquistdf(pot=pot, ra=ra)
+        assert numpy.all(
+            numpy.fabs(dfo.fQ(Q) / dfh.fQ(Q) - 1.0) < 1e-5
+        ), "Tabulated Osipkov-Merritt f(Q) for the Hernquist potential does not agree with the exact solution"
+    return None
+
+
+def test_tabulated_fE_cache():
+    # Test that tabulated f(E) are shared between DFs with the same setup
+    pot = potential.HernquistPotential(amp=1.3, a=2.3)
+    dfe1 = eddingtondf(pot=pot, tabulate=True)
+    dfe2 = eddingtondf(pot=pot, tabulate=True)
+    assert (
+        dfe1._fE_table is dfe2._fE_table
+    ), "Tabulated f(E) is not shared between eddingtondf instances with the same potential"
+    dfe3 = eddingtondf(pot=pot, rmax=100.0, tabulate=True)
+    assert (
+        dfe1._fE_table is not dfe3._fE_table
+    ), "Tabulated f(E) is shared between eddingtondf instances with different rmax"
+    dfe4 = eddingtondf(pot=potential.HernquistPotential(amp=1.3, a=2.3), tabulate=True)
+    assert (
+        dfe1._fE_table is not dfe4._fE_table
+    ), "Tabulated f(E) is shared between eddingtondf instances with different potential instances"
+    dfo1 = osipkovmerrittdf(pot=pot, ra=1.1, tabulate=True)
+    dfo2 = osipkovmerrittdf(pot=pot, ra=1.1, tabulate=True)
+    dfo3 = osipkovmerrittdf(pot=pot, ra=2.1, tabulate=True)
+    assert (
+        dfo1._edf._fE_table is dfo2._edf._fE_table
+    ), "Tabulated f(Q) is not shared between osipkovmerrittdf instances with the same potential and anisotropy radius"
+    assert (
+        dfo1._edf._fE_table is not dfo3._edf._fE_table
+    ), "Tabulated f(Q) is shared between osipkovmerrittdf instances with different anisotropy radii"
+    assert (
+        dfo1._edf._fE_table is not dfe1._fE_table
+    ), "Tabulated f(Q) is shared with the tabulated f(E) of an eddingtondf"
+    return None
+
+
+############# TESTS OF THE SAMPLING INTERPOLATORS ############
+def test_sampling_cumulative_mass():
+    # Test that the cumulative mass computed by integrating the density, used
+    # when mass does not take arrays, agrees with the mass
+    pot = potential.HernquistPotential(amp=2.3, a=1.3)
+    dfh = isotropicHernquistdf(pot=pot)
+    xis = numpy.linspace(-0.9, 0.9, 1001)
+    rs = dfh._scale * (1.0 + xis) / (1.0 - xis)
+    assert numpy.all(
+        numpy.fabs(dfh._cumulative_mass(xis) - (pot.mass(rs) - pot.mass(rs[0]))) < 1e-10
+    ), "Cumulative mass computed by integrating the density does not agree with the mass"
+    return None
+
+
+def test_sampling_pvr_interpolator_against_loop():
+    # Test that the inverse cumulative distribution of v/vesc at r agrees with
+    # that obtained by inverting the cumulative distribution at each radius
+    # separately
+    import scipy.interpolate
+
+    pot = potential.HernquistPotential(amp=2.0, a=1.3)
+    dfh = isotropicHernquistdf(pot=pot)
+    dfh._rmin_sampling = 0.0
+    pvr_interp = dfh._make_pvr_interpolator(n_r_a=31)
+    r_a_values = 10.0 ** numpy.linspace(-3.0, 3.0, 31)
+    v_vesc_values = numpy.linspace(0.0, 1.0, 100)
+    r_a_grid, v_vesc_grid = numpy.meshgrid(r_a_values, v_vesc_values)
+    r_grid = r_a_grid * dfh._scale
+    pvr_grid = dfh._p_v_at_r(v_vesc_grid * dfh._vmax_at_r(pot, r_grid), r_grid)
+    pvr_samples = numpy.linspace(0.0, 1.0, 100)
+    for r_a, pvr in zip(r_a_values, pvr_grid.T):
+        cml_pvr = numpy.cumsum(pvr) / numpy.sum(pvr)
+        start_indx = numpy.amax(
+            numpy.arange(len(cml_pvr))[cml_pvr == numpy.amin(cml_pvr)]
+        )
+        end_indx = (
+            numpy.amin(numpy.arange(len(cml_pvr))[cml_pvr == numpy.amax(cml_pvr)]) + 1
+        )
+        cml_pvr_inv_interp = scipy.interpolate.InterpolatedUnivariateSpline(
+            cml_pvr[start_indx:end_indx], v_vesc_values[start_indx:end_indx], k=1
+        )
+        assert numpy.all(
+            numpy.fabs(
+                pvr_interp(numpy.log10(r_a), pvr_samples, grid=False)
+                - cml_pvr_inv_interp(pvr_samples)
+            )
+            < 1e-8
+        ), "Inverse cumulative distribution of v/vesc does not agree with that obtained at each radius separately"
+    return None
+
+
+def test_sampling_interpolators_cache():
+    # Test that sampling interpolators are shared between DFs with the same
+    # parameters
+    dfh1 = isotropicHernquistdf(pot=potential.HernquistPotential(amp=2.3, a=1.3))
+    dfh2 = isotropicHernquistdf(pot=potential.HernquistPotential(amp=2.3, a=1.3))
+    dfh3 = isotropicHernquistdf(pot=potential.HernquistPotential(amp=2.3, a=1.4))
+    numpy.random.seed(1)
+    dfh1.sample(n=10)
+    dfh2.sample(n=10)
+    dfh3.sample(n=10)
+    assert (
+        dfh1._v_vesc_pvr_interpolator is dfh2._v_vesc_pvr_interpolator
+    ), "Sampling interpolators are not shared between DFs with the same parameters"
+    assert (
+        dfh1._v_vesc_pvr_interpolator is not dfh3._v_vesc_pvr_interpolator
+    ), "Sampling interpolators are shared between DFs with different parameters"
+    dfh2.sample(n=10, rmin=0.1)
+    assert (
+        dfh1._v_vesc_pvr_interpolator is not dfh2._v_vesc_pvr_interpolator
+    ), "Sampling interpolators are shared between samples with different rmin"
+    return None
+
+
+def test_sampling_interpolators_cache_unrepresentable():
+    # Test that the sampling cache is not used for DFs whose parameters cannot
+    # all be represented in the key that identifies them
+    pot1 = potential.HernquistPotential(amp=2.3, a=1.3)
+    pot2 = potential.HernquistPotential(amp=2.3, a=1.3)
+    # Attach an attribute that cannot be compared by value
+    pot1._func = lambda r: r
+    pot2._func = lambda r: 2.0 * r
+    dfh1 = isotropicHernquistdf(pot=pot1)
+    dfh2 = isotropicHernquistdf(pot=pot2)
+    assert (
+        dfh1._sampling_key() is None
+    ), "Key for a DF with an unrepresentable attribute is not None"
+    numpy.random.seed(1)
+    dfh1.sample(n=10)
+    dfh2.sample(n=10)
+    assert (
+        dfh1._v_vesc_pvr_interpolator is not dfh2._v_vesc_pvr_interpolator
+    ), "Sampling interpolators are shared between DFs that cannot be compared"
+    with pytest.raises(ValueError) as excinfo:
+        dfh1.setup_sampling(savefilename="dont_save_this.pkl")
+    return None
+
+
+def test_sampling_interpolators_savefilename():
+    # Test that saving and loading the sampling interpolators works
+    import os
+    import tempfile
+
+    pot = potential.PlummerPotential(amp=2.3, b=1.3)
+    denspot = potential.HernquistPotential(amp=1.0, a=0.7)
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)  # Easier this way
+        os.remove(tmp_savefilename)
+        # First save
+        dfe = eddingtondf(pot=pot, denspot=denspot, rmax=30.0)
+        dfe.setup_sampling(rmin=0.1, savefilename=tmp_savefilename)
+        assert os.path.exists(tmp_savefilename), "Sampling interpolators were not saved"
+        # Then load
+        dfel = eddingtondf(pot=pot, denspot=denspot, rmax=30.0)
+        dfel.setup_sampling(rmin=0.1, savefilename=tmp_savefilename)
+        numpy.random.seed(1)
+        samp = dfe.sample(n=100, rmin=0.1, return_orbit=False)
+        numpy.random.seed(1)
+        sampl = dfel.sample(n=100, rmin=0.1, return_orbit=False)
+        for x, xl in zip(samp, sampl):
+            assert (
+                numpy.amax(numpy.fabs(x - xl)) < 1e-14
+            ), "Samples using the sampling interpolators loaded from file do not agree with the original"
+        # Loading for a DF with different parameters should fail
+        dfer = eddingtondf(pot=pot, denspot=denspot, rmax=20.0)
+        with pytest.raises(ValueError) as excinfo:
+            dfer.setup_sampling(rmin=0.1, savefilename=tmp_savefilename)
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
 ############# TEST OF dMdE AGAINST KNOWN HERNQUIST FORMULA ############
 def test_eddington_hernquist_dMdE():
     # Test that dMdE for an isotropic Hernquist model is correct by comparing to the exact solution in isotropicHernquist
@@ -2027,6 +2243,20 @@ def test_constantbetadf_against_hernquist():
     return None
 
 
+def test_constantbetadf_tabulated_against_hernquist():
+    if WIN32:
+        return None  # skip on Windows, because no JAX
+    pot = potential.HernquistPotential(amp=2.3, a=1.3)
+    E = numpy.linspace(0.99 * pot(0.0, 0.0), -0.001, 101)
+    for twobeta in [-1.4, 0.6, 1]:
+        dfh = constantbetaHernquistdf(pot=pot, beta=twobeta / 2.0)
+        cdfh = constantbetadf(pot=pot, twobeta=twobeta, rmax=numpy.inf, tabulate=True)
+        assert numpy.all(
+            numpy.fabs(cdfh.fE(E) / dfh.fE(E) - 1.0) < 1e-4
+        ), "Tabulated constantbetadf f(E) for the Hernquist potential does not agree with constantbetaHernquistdf"
+    return None
+
+
 # For the following tests, we use a DehnenCoreSphericalPotential
 constantbeta_dfs_selfconsist = None  # reuse in other tests
 
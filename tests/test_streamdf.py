@@ -1642,6 +1642,127 @@ def test_bovy14_callMargVLOSPMBB(bovy14_setup):
     return None
 
 
+def test_bovy14_findClosestTrackpoint_array(bovy14_setup):
+    # Load the streamdf object
+    sdf_bovy14 = bovy14_setup
+    # Closest track points for arrays should be the same as one-by-one
+    Xs = numpy.linspace(1.2, 1.6, 11)
+    cindxs = sdf_bovy14.find_closest_trackpoint(
+        Xs, None, 2.0 / 8.0, None, None, None, xy=True, usev=True
+    )
+    assert numpy.all(
+        cindxs
+        == [
+            sdf_bovy14.find_closest_trackpoint(
+                X, None, 2.0 / 8.0, None, None, None, xy=True, usev=True
+            )
+            for X in Xs
+        ]
+    ), "find_closest_trackpoint for arrays does not agree with one-by-one evaluation"
+    bs = numpy.linspace(15.0, 25.0, 11)
+    cindxs = sdf_bovy14.find_closest_trackpointLB(
+        None, bs, None, None, 8.0, None, usev=True, interp=False
+    )
+    assert numpy.all(
+        cindxs
+        == [
+            sdf_bovy14.find_closest_trackpointLB(
+                None, b, None, None, 8.0, None, usev=True, interp=False
+            )
+            for b in bs
+        ]
+    ), "find_closest_trackpointLB for arrays does not agree with one-by-one evaluation"
+    return None
+
+
+def test_bovy14_gaussApprox_array(bovy14_setup):
+    # Load the streamdf object
+    sdf_bovy14 = bovy14_setup
+    # gaussApprox for arrays should be the same as one-by-one
+    Xs = numpy.linspace(1.2, 1.6, 11)
+    meanps, varps = sdf_bovy14.gaussApprox([Xs, None, 2.0 / 8.0, None, None, None])
+    assert meanps.shape == (11, 4) and varps.shape == (
+        11,
+        4,
+        4,
+    ), "gaussApprox for arrays does not return arrays with the expected shape"
+    for X, meanp, varp in zip(Xs, meanps, varps):
+        tmeanp, tvarp = sdf_bovy14.gaussApprox([X, None, 2.0 / 8.0, None, None, None])
+        assert numpy.all(
+            numpy.fabs(meanp - tmeanp) < 10.0**-10.0
+        ), "gaussApprox mean for arrays does not agree with one-by-one evaluation"
+        assert numpy.all(
+            numpy.fabs(varp - tvarp) < 10.0**-10.0
+        ), "gaussApprox variance for arrays does not agree with one-by-one evaluation"
+    # Also in l,b
+    bs = numpy.linspace(15.0, 25.0, 11)
+    meanps, varps = sdf_bovy14.gaussApprox([None, bs, None, None, 8.0, None], lb=True)
+    for b, meanp, varp in zip(bs, meanps, varps):
+        tmeanp, tvarp = sdf_bovy14.gaussApprox(
+            [None, b, None, None, 8.0, None], lb=True
+        )
+        assert numpy.all(
+            numpy.fabs(meanp / tmeanp - 1.0) < 10.0**-8.0
+        ), "gaussApprox mean for arrays does not agree with one-by-one evaluation"
+        assert numpy.all(
+            numpy.fabs(varp - tvarp) < 10.0**-8.0 * numpy.fabs(tvarp).max()
+        ), "gaussApprox variance for arrays does not agree with one-by-one evaluation"
+    return None
+
+
+def test_bovy14_callMarg_array(bovy14_setup):
+    # Load the streamdf object
+    sdf_bovy14 = bovy14_setup
+    # callMarg for arrays should be the same as one-by-one
+    meanp, varp = sdf_bovy14.gaussApprox([None, None, 2.0 / 8.0, None, None, None])
+    xs = (
+        numpy.linspace(-3.0 * numpy.sqrt(varp[0, 0]), 3.0 * numpy.sqrt(varp[0, 0]), 11)
+        + meanp[0]
+    )
+    logps = sdf_bovy14.callMarg([xs, None, 2.0 / 8.0, None, None, None])
+    assert logps.shape == (
+        11,
+    ), "callMarg for arrays does not return an array with the expected shape"
+    assert numpy.all(
+        numpy.fabs(
+            logps
+            - [sdf_bovy14.callMarg([x, None, 2.0 / 8.0, None, None, None]) for x in xs]
+        )
+        < 10.0**-8.0
+    ), "callMarg for arrays does not agree with one-by-one evaluation"
+    # Also in l,b, and evaluating the DF for only a few observations at a time
+    import importlib
+
+    streamdf = importlib.import_module("galpy.df.streamdf")
+
+    meanp, varp = sdf_bovy14.gaussApprox([None, 20.0, None, None, 8.0, None], lb=True)
+    xs = (
+        numpy.linspace(-3.0 * numpy.sqrt(varp[0, 0]), 3.0 * numpy.sqrt(varp[0, 0]), 11)
+        + meanp[0]
+    )
+    maxnodes = streamdf._CALLMARG_MAXNODES
+    streamdf._CALLMARG_MAXNODES = 4000
+    try:
+        logps = sdf_bovy14.callMarg(
+            [None, xs, None, None, 8.0, None], lb=True, ngl=4, nsigma=3.1
+        )
+    finally:
+        streamdf._CALLMARG_MAXNODES = maxnodes
+    assert numpy.all(
+        numpy.fabs(
+            logps
+            - [
+                sdf_bovy14.callMarg(
+                    [None, x, None, None, 8.0, None], lb=True, ngl=4, nsigma=3.1
+                )
+                for x in xs
+            ]
+        )
+        < 10.0**-6.0
+    ), "callMarg for arrays does not agree with one-by-one evaluation"
+    return None
+
+
 def test_callArgs(bovy14_setup):
     # Load the streamdf object
     sdf_bovy14 = bovy14_setup
@@ -2235,6 +2356,124 @@ def test_calcaAJacLB():
     return None
 
 
+def test_calcaAJac_batch():
+    # Test that the batched Jacobian agrees with that computed for each point
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.df.streamdf import _calcaAJac_batch, calcaAJac
+    from galpy.potential import LogarithmicHaloPotential
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=0.9)
+    aAI = actionAngleIsochroneApprox(pot=lp, b=0.8)
+    xvs = numpy.array(
+        [
+            [1.56148083, 0.35081535, -1.15481504, 0.88719443, -0.47713334, 0.12019596],
+            [1.2, 0.1, -1.05, 0.5, -0.2, 1.1],
+            [0.9, -0.2, -0.95, 0.3, 0.1, 2.3],
+        ]
+    )
+    acfs, jacs = _calcaAJac_batch(xvs, aAI)
+    for ii in range(len(xvs)):
+        tacfs = aAI.actionsFreqsAngles(*xvs[ii])
+        assert numpy.all(
+            numpy.fabs(acfs[ii] - numpy.array(tacfs).flatten()) < 10.0**-10.0
+        ), "Batched actions, frequencies, and angles do not agree with those computed for each point"
+        jac = calcaAJac(
+            xvs[ii].copy(), aAI, dxv=10**-8.0 * numpy.ones(6), actionsFreqsAngles=True
+        )
+        assert numpy.all(
+            numpy.fabs(jacs[ii] - jac) < 10.0**-3.0 * numpy.amax(numpy.fabs(jac))
+        ), "Batched Jacobian does not agree with that computed for each point"
+    return None
+
+
+# Test that saving and loading the stream track works
+def test_bovy14_savefilename(bovy14_setup):
+    import os
+    import tempfile
+    import warnings
+
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.df import streamdf
+    from galpy.orbit import Orbit
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.util import conversion  # for unit conversions
+    from galpy.util import galpyWarning
+
+    sdf_bovy14 = bovy14_setup
+    lp = LogarithmicHaloPotential(normalize=1.0, q=0.9)
+    aAI = actionAngleIsochroneApprox(pot=lp, b=0.8)
+    obs = Orbit(
+        [1.56148083, 0.35081535, -1.15481504, 0.88719443, -0.47713334, 0.12019596]
+    )
+    sigv = 0.365  # km/s
+    savefile, tmp_savefilename = tempfile.mkstemp()
+    try:
+        os.close(savefile)  # Easier this way
+        os.remove(tmp_savefilename)
+        # First save, then load
+        for ii in range(2):
+            sdfs = streamdf(
+                sigv / 220.0,
+                progenitor=obs,
+                pot=lp,
+                aA=aAI,
+                leading=True,
+                nTrackChunks=11,
+                tdisrupt=4.5 / conversion.time_in_Gyr(220.0, 8.0),
+                savefilename=tmp_savefilename,
+            )
+            assert os.path.exists(tmp_savefilename), "Stream track was not saved"
+            assert numpy.all(
+                numpy.fabs(sdfs._ObsTrack - sdf_bovy14._ObsTrack) < 10.0**-10.0
+            ), "Stream track saved to or loaded from file does not agree with the original"
+            assert numpy.all(
+                numpy.fabs(sdfs._allinvjacsTrack - sdf_bovy14._allinvjacsTrack)
+                < 10.0**-10.0
+            ), "Stream track saved to or loaded from file does not agree with the original"
+            assert (
+                numpy.fabs(sdfs.density_par(0.1) - sdf_bovy14.density_par(0.1))
+                < 10.0**-10.0
+            ), "Density of stream with track loaded from file does not agree with the original"
+        # Loading with a different actionAngle object should re-compute the
+        # track (with a warning) and overwrite the file
+        aAIb = actionAngleIsochroneApprox(pot=lp, b=0.9)
+        for ii in range(2):
+            with warnings.catch_warnings(record=True) as w:
+                warnings.simplefilter("always", galpyWarning)
+                sdfb = streamdf(
+                    sigv / 220.0,
+                    progenitor=obs,
+                    pot=lp,
+                    aA=aAIb,
+                    leading=True,
+                    nTrackChunks=11,
+                    tdisrupt=4.5 / conversion.time_in_Gyr(220.0, 8.0),
+                    savefilename=tmp_savefilename,
+                )
+            raisedWarning = any(
+                "computed for a different" in str(wa.message) for wa in w
+            )
+            if ii == 0:
+                assert (
+                    raisedWarning
+                ), "Loading a stream track saved for a different actionAngle object did not raise a warning"
+                assert numpy.any(
+                    numpy.fabs(sdfb._allinvjacsTrack - sdf_bovy14._allinvjacsTrack)
+                    > 10.0**-8.0
+                ), "Stream track for a different actionAngle object was loaded from file rather than re-computed"
+                allinvjacsTrack = sdfb._allinvjacsTrack
+            else:
+                assert (
+                    not raisedWarning
+                ), "Stream track re-computed for a different actionAngle object was not saved to file"
+                assert numpy.all(
+                    numpy.fabs(sdfb._allinvjacsTrack - allinvjacsTrack) < 10.0**-10.0
+                ), "Stream track loaded from file does not agree with the re-computed one"
+    finally:
+        os.remove(tmp_savefilename)
+    return None
+
+
 def test_estimateTdisrupt(bovy14_setup):
     # Load the streamdf object
     sdf_bovy14 = bovy14_setup
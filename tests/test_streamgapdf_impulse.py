@@ -328,6 +328,44 @@ def test_hernquistX_unity():
     return None
 
 
+# Test that the batched general kicks agree with direct adaptive integration
+# for a cuspy, extended (NFW) perturber
+def test_impulse_deltav_general_curved_nfw_quad():
+    from scipy import integrate
+
+    from galpy.df import impulse_deltav_general_curvedstream
+    from galpy.potential import NFWPotential, evaluateRforces
+
+    tol = -8.0
+    numpy.random.seed(1)
+    v = numpy.random.normal(size=(20, 3))
+    x = numpy.random.normal(size=(20, 3))
+    w = numpy.array([0.3, 1.1, -0.4])
+    x0 = numpy.array([1.2, 0.1, 0.0])
+    v0 = numpy.array([0.1, 1.0, 0.2])
+    nfw = NFWPotential(amp=0.01, a=0.1)
+    for b in [0.0, 0.05, 0.5]:
+        kick = impulse_deltav_general_curvedstream(v, x, b, w, x0, v0, nfw)
+        b0 = numpy.cross(w, v0)
+        b0 *= b / numpy.sqrt(numpy.sum(b0**2))
+        for ii in range(len(v)):
+            # Direct integration of the force along the straight line
+            X = lambda t: b0 + x[ii] - x0 + (w - v[ii]) * t
+            r = lambda t: numpy.sqrt(numpy.sum(X(t) ** 2.0))
+            for jj in range(3):
+                direct = integrate.quad(
+                    lambda t: evaluateRforces(nfw, r(t), 0.0) * X(t)[jj] / r(t),
+                    -numpy.inf,
+                    numpy.inf,
+                    epsabs=1e-12,
+                    limit=200,
+                )[0]
+                assert (
+                    numpy.fabs(kick[ii, jj] - direct) < 10.0**tol
+                ), "Batched general kick does not agree with direct integration for an NFW perturber"
+    return None
+
+
 # Test general impulse vs. full orbit integration for zero force
 def test_impulse_deltav_general_orbit_zeroforce():
     from galpy.df import (
@@ -534,6 +572,37 @@ def test_impulse_deltav_plummerstream_tmaxerror():
     return None
 
 
+# Test that the batched Plummer-stream kick is converged for a long
+# perturbing stream and works with a GSigma that only accepts scalars
+def test_impulse_deltav_plummerstream_long_scalarGSigma():
+    import math
+
+    from galpy.df import impulse_deltav_plummerstream
+
+    tol = -8.0
+    numpy.random.seed(2)
+    v = numpy.random.normal(size=(50, 3))
+    y = numpy.random.normal(size=50)
+    w = numpy.array([0.3, 1.1, -0.4])
+
+    GSigma = lambda t: 0.01 * math.exp(-(t**2.0) / 8.0)  # only scalars
+    GSigma_arr = lambda t: 0.01 * numpy.exp(-(t**2.0) / 8.0)
+    kick = impulse_deltav_plummerstream(v, y, 0.05, w, GSigma, 0.02, -10.0, 10.0)
+    kick_arr = impulse_deltav_plummerstream(
+        v, y, 0.05, w, GSigma_arr, 0.02, -10.0, 10.0
+    )
+    assert numpy.all(
+        numpy.fabs(kick - kick_arr) < 10.0**-14.0
+    ), "Plummer-stream kick with scalar GSigma does not agree with that for array GSigma"
+    kick_hi = impulse_deltav_plummerstream(
+        v, y, 0.05, w, GSigma_arr, 0.02, -10.0, 10.0, ngl=800
+    )
+    assert numpy.all(
+        numpy.fabs(kick - kick_hi) < 10.0**tol
+    ), "Plummer-stream kick is not converged in the Gauss-Legendre order"
+    return None
+
+
 # Test the Plummer curved calculation for a perpendicular stream impact:
 # short impact should be the same as a Plummer-sphere impact
 def test_impulse_deltav_plummerstream_curved_subhalo_perpendicular():
@@ -0,0 +1,335 @@
+# Tests of streampepperdf implementation, compares to streamgapdf for a
+# single impact
+import numpy
+import pytest
+from scipy import integrate
+
+V0, R0 = 220.0, 8.0
+
+
+def sanders15_impact():
+    # The impact from Sanders, Bovy, & Erkal (2015) used in test_streamgapdf
+    from galpy.util import conversion  # for unit conversions
+
+    return dict(
+        impactb=0.0,
+        subhalovel=numpy.array([6.82200571, 132.7700529, 149.4174464]) / V0,
+        timpact=0.88 / conversion.time_in_Gyr(V0, R0),
+        impact_angle=-2.34,
+        GM=10.0**-2.0 / conversion.mass_in_1010msol(V0, R0),
+        rs=0.625 / R0,
+    )
+
+
+def set_sanders15_impact(spdf):
+    # Set the single Sanders15 impact in a streampepperdf instance
+    imp = sanders15_impact()
+    spdf.set_impacts(
+        impactb=[imp["impactb"]],
+        subhalovel=[imp["subhalovel"]],
+        impact_angle=[imp["impact_angle"]],
+        timpact=[imp["timpact"]],
+        GM=[imp["GM"]],
+        rs=[imp["rs"]],
+    )
+    return None
+
+
+@pytest.fixture(scope="module")
+def setup_sanders15_trailing():
+    # Imports
+    from galpy.actionAngle import actionAngleIsochroneApprox
+    from galpy.df import streamgapdf, streampepperdf
+    from galpy.orbit import Orbit
+    from galpy.potential import LogarithmicHaloPotential
+    from galpy.util import conversion  # for unit conversions
+
+    lp = LogarithmicHaloPotential(normalize=1.0, q=0.9)
+    aAI = actionAngleIsochroneApprox(pot=lp, b=0.8)
+    prog_unp_peri = Orbit(
+        [
+            2.6556151742081835,
+            0.2183747276300308,
+            0.67876510797240575,
+            -2.0143395648974671,
+            -0.3273737682604374,
+            0.24218273922966019,
+        ]
+    )
+    sigv = 0.365 * (10.0 / 2.0) ** (1.0 / 3.0)  # km/s
+    common_kwargs = dict(
+        progenitor=prog_unp_peri,
+        pot=lp,
+        aA=aAI,
+        leading=False,
+        nTrackChunks=26,
+        nTrackIterations=1,
+        sigMeanOffset=4.5,
+        tdisrupt=10.88 / conversion.time_in_Gyr(V0, R0),
+        Vnorm=V0,
+        Rnorm=R0,
+    )
+    imp = sanders15_impact()
+    sdf_sanders15 = streamgapdf(sigv / V0, **common_kwargs, **imp)
+    # Peppered stream that allows impacts at the time of the Sanders15 impact
+    # and at twice that time, set up without impacts
+    spdf_sanders15 = streampepperdf(
+        sigv / V0,
+        **common_kwargs,
+        timpact=[imp["timpact"], 2.0 * imp["timpact"]],
+    )
+    return sdf_sanders15, spdf_sanders15
+
+
+def test_noimpacts(setup_sanders15_trailing):
+    # Without impacts, streampepperdf should be the same as streamdf
+    from galpy.df import streamdf
+
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    spdf_sanders15.set_impacts(
+        impactb=[], subhalovel=[], impact_angle=[], timpact=[], GM=[], rs=[]
+    )
+    apars = numpy.linspace(0.1, 4.0, 11)
+    assert numpy.all(
+        numpy.fabs(
+            spdf_sanders15.density_par(apars)
+            / numpy.array([streamdf.density_par(spdf_sanders15, a) for a in apars])
+            - 1.0
+        )
+        < 10.0**-8.0
+    ), "streampepperdf density without impacts does not agree with streamdf"
+    assert numpy.all(
+        numpy.fabs(
+            spdf_sanders15.meanOmega(apars, oned=True)
+            - numpy.array(
+                [streamdf.meanOmega(spdf_sanders15, a, oned=True) for a in apars]
+            )
+        )
+        < 10.0**-8.0
+    ), "streampepperdf meanOmega without impacts does not agree with streamdf"
+    set_sanders15_impact(spdf_sanders15)
+    return None
+
+
+def test_pOparapar_oneimpact(setup_sanders15_trailing):
+    # For a single impact, pOparapar should be the same as for streamgapdf
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    set_sanders15_impact(spdf_sanders15)
+    sigOpar = numpy.sqrt(sdf_sanders15._sortedSigOEig[2])
+    Opars = numpy.linspace(
+        sdf_sanders15._meandO - 4.0 * sigOpar,
+        sdf_sanders15._meandO + 4.0 * sigOpar,
+        101,
+    )
+    for apar in [0.3, 1.0, 2.0, 2.6, 4.0]:
+        sg_pOpar = sdf_sanders15.pOparapar(Opars, apar)
+        sp_pOpar = spdf_sanders15.pOparapar(Opars, apar)
+        assert numpy.all(
+            numpy.fabs(sp_pOpar - sg_pOpar) < 10.0**-8.0 * numpy.amax(sg_pOpar)
+        ), f"streampepperdf pOparapar for a single impact does not agree with streamgapdf at apar = {apar}"
+    return None
+
+
+def test_density_par_oneimpact(setup_sanders15_trailing):
+    # For a single impact, the density should be the same as for streamgapdf
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    set_sanders15_impact(spdf_sanders15)
+    apars = numpy.linspace(0.1, 4.0, 21)
+    sp_dens = spdf_sanders15.density_par(apars)
+    for apar, dens in zip(apars, sp_dens):
+        assert (
+            numpy.fabs(
+                dens
+                / sdf_sanders15.density_par(apar, approx=False)
+                * numpy.sqrt(2.0 * numpy.pi)
+                - 1.0
+            )
+            < 10.0**-2.0
+        ), f"streampepperdf density for a single impact does not agree with streamgapdf at apar = {apar}"
+    # Scalar input
+    assert (
+        numpy.fabs(spdf_sanders15.density_par(apars[3]) / sp_dens[3] - 1.0)
+        < 10.0**-10.0
+    ), "streampepperdf density_par for scalar input does not agree with that for array input"
+    return None
+
+
+def test_meanOmega_oneimpact(setup_sanders15_trailing):
+    # For a single impact, the mean frequency should be the same as for
+    # streamgapdf
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    set_sanders15_impact(spdf_sanders15)
+    apars = numpy.linspace(0.1, 4.0, 21)
+    sp_mO = spdf_sanders15.meanOmega(apars, oned=True)
+    for apar, mO in zip(apars, sp_mO):
+        assert (
+            numpy.fabs(
+                mO / sdf_sanders15.meanOmega(apar, oned=True, approx=False) - 1.0
+            )
+            < 3.0 * 10.0**-3.0
+        ), f"streampepperdf meanOmega for a single impact does not agree with streamgapdf at apar = {apar}"
+    # 3D
+    sp_mO3D = spdf_sanders15.meanOmega(apars, use_physical=False)
+    assert sp_mO3D.shape == (len(apars), 3), "3D meanOmega has the wrong shape"
+    assert numpy.all(
+        numpy.fabs(
+            numpy.dot(
+                sp_mO3D - spdf_sanders15._progenitor_Omega,
+                spdf_sanders15._dsigomeanProgDirection,
+            )
+            * spdf_sanders15._sigMeanSign
+            - spdf_sanders15.meanOmega(apars, oned=True, use_physical=False)
+        )
+        < 10.0**-8.0
+    ), "3D meanOmega does not agree with oned meanOmega"
+    return None
+
+
+def test_sample_aAt_oneimpact(setup_sanders15_trailing):
+    # For a single impact, the sampled frequencies and angles should be the
+    # same as for streamgapdf
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    set_sanders15_impact(spdf_sanders15)
+    numpy.random.seed(1)
+    sg_Om, sg_angle, sg_dt = sdf_sanders15._sample_aAt(1000)
+    numpy.random.seed(1)
+    sp_Om, sp_angle, sp_dt = spdf_sanders15._sample_aAt(1000)
+    assert numpy.all(
+        numpy.fabs(sp_dt - sg_dt) < 10.0**-10.0
+    ), "streampepperdf sampled times do not agree with streamgapdf"
+    assert numpy.all(
+        numpy.fabs(sp_Om - sg_Om) < 10.0**-8.0
+    ), "streampepperdf sampled frequencies do not agree with streamgapdf"
+    assert numpy.all(
+        numpy.fabs(sp_angle - sg_angle) < 10.0**-6.0
+    ), "streampepperdf sampled angles do not agree with streamgapdf"
+    # Also check that full sampling works
+    numpy.random.seed(1)
+    RvR = spdf_sanders15.sample(n=10)
+    assert RvR.shape == (6, 10), "streampepperdf sample has the wrong shape"
+    return None
+
+
+def test_twoimpacts_negligible(setup_sanders15_trailing):
+    # Adding a negligible, older impact should not change the model
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    imp = sanders15_impact()
+    spdf_sanders15.set_impacts(
+        impactb=[imp["impactb"], 0.0],
+        subhalovel=[imp["subhalovel"], imp["subhalovel"]],
+        impact_angle=[imp["impact_angle"], -1.5],
+        timpact=[imp["timpact"], 2.0 * imp["timpact"]],
+        GM=[imp["GM"], 10.0**-10.0 * imp["GM"]],
+        rs=imp["rs"],
+    )
+    assert spdf_sanders15._nimpact == 2, "Number of impacts not set correctly"
+    sigOpar = numpy.sqrt(sdf_sanders15._sortedSigOEig[2])
+    Opars = numpy.linspace(
+        sdf_sanders15._meandO - 4.0 * sigOpar,
+        sdf_sanders15._meandO + 4.0 * sigOpar,
+        101,
+    )
+    for apar in [0.3, 2.0, 2.6, 4.0]:
+        sg_pOpar = sdf_sanders15.pOparapar(Opars, apar)
+        sp_pOpar = spdf_sanders15.pOparapar(Opars, apar)
+        assert numpy.all(
+            numpy.fabs(sp_pOpar - sg_pOpar) < 10.0**-6.0 * numpy.amax(sg_pOpar)
+        ), f"streampepperdf pOparapar with an additional negligible impact does not agree with streamgapdf at apar = {apar}"
+    set_sanders15_impact(spdf_sanders15)
+    return None
+
+
+def test_twoimpacts_sametime(setup_sanders15_trailing):
+    # Two impacts at the same time, one much further out, should not change
+    # the model, tests that impacts at the same time are handled together
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    imp = sanders15_impact()
+    spdf_sanders15.set_impacts(
+        impactb=[10.0, imp["impactb"]],
+        subhalovel=numpy.array([imp["subhalovel"], imp["subhalovel"]]),
+        impact_angle=[-1.5, imp["impact_angle"]],
+        timpact=[imp["timpact"], imp["timpact"]],
+        GM=[10.0**-10.0 * imp["GM"], imp["GM"]],
+        rs=[imp["rs"], imp["rs"]],
+    )
+    sigOpar = numpy.sqrt(sdf_sanders15._sortedSigOEig[2])
+    Opars = numpy.linspace(
+        sdf_sanders15._meandO - 4.0 * sigOpar,
+        sdf_sanders15._meandO + 4.0 * sigOpar,
+        101,
+    )
+    for apar in [0.3, 2.0, 2.6, 4.0]:
+        sg_pOpar = sdf_sanders15.pOparapar(Opars, apar)
+        sp_pOpar = spdf_sanders15.pOparapar(Opars, apar)
+        assert numpy.all(
+            numpy.fabs(sp_pOpar - sg_pOpar) < 10.0**-6.0 * numpy.amax(sg_pOpar)
+        ), f"streampepperdf pOparapar with an additional negligible impact at the same time does not agree with streamgapdf at apar = {apar}"
+    set_sanders15_impact(spdf_sanders15)
+    return None
+
+
+def test_twoimpacts_density_normalized(setup_sanders15_trailing):
+    # With two impacts, the total number of stars should be conserved
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    imp = sanders15_impact()
+    spdf_sanders15.set_impacts(
+        impactb=[imp["impactb"], imp["impactb"]],
+        subhalovel=[imp["subhalovel"], imp["subhalovel"]],
+        impact_angle=[imp["impact_angle"], -1.2],
+        timpact=[imp["timpact"], 2.0 * imp["timpact"]],
+        GM=imp["GM"],
+        rs=imp["rs"],
+    )
+    apars = numpy.linspace(0.0, 8.0, 401)
+    pert_mass = integrate.trapezoid(spdf_sanders15.density_par(apars), apars)
+    set_sanders15_impact(spdf_sanders15)
+    one_mass = integrate.trapezoid(spdf_sanders15.density_par(apars), apars)
+    assert (
+        numpy.fabs(pert_mass / one_mass - 1.0) < 10.0**-2.0
+    ), "Total stream mass with two impacts is not the same as with one impact"
+    return None
+
+
+def test_set_impacts_errors(setup_sanders15_trailing):
+    sdf_sanders15, spdf_sanders15 = setup_sanders15_trailing
+    imp = sanders15_impact()
+    # Neither GM/rs nor subhalopot
+    with pytest.raises(IOError) as excinfo:
+        spdf_sanders15.set_impacts(
+            impactb=[imp["impactb"]],
+            subhalovel=[imp["subhalovel"]],
+            impact_angle=[imp["impact_angle"]],
+            timpact=[imp["timpact"]],
+        )
+    # Time not set up at initialization
+    with pytest.raises(ValueError) as excinfo:
+        spdf_sanders15.set_impacts(
+            impactb=[imp["impactb"]],
+            subhalovel=[imp["subhalovel"]],
+            impact_angle=[imp["impact_angle"]],
+            timpact=[1.5 * imp["timpact"]],
+            GM=[imp["GM"]],
+            rs=[imp["rs"]],
+        )
+    # Leading impact for trailing stream
+    with pytest.raises(ValueError) as excinfo:
+        spdf_sanders15.set_impacts(
+            impactb=[imp["impactb"]],
+            subhalovel=[imp["subhalovel"]],
+            impact_angle=[-imp["impact_angle"]],
+            timpact=[imp["timpact"]],
+            GM=[imp["GM"]],
+            rs=[imp["rs"]],
+        )
+    # Inconsistent number of impacts
+    with pytest.raises(ValueError) as excinfo:
+        spdf_sanders15.set_impacts(
+            impactb=[imp["impactb"], imp["impactb"]],
+            subhalovel=[imp["subhalovel"], imp["subhalovel"]],
+            impact_angle=[imp["impact_angle"]],
+            timpact=[imp["timpact"], imp["timpact"]],
+            GM=[imp["GM"]],
+            rs=[imp["rs"]],
+        )
+    set_sanders15_impact(spdf_sanders15)
+    return None